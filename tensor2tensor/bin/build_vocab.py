@@ -26,7 +26,6 @@ from __future__ import print_function
 
 import os
 
-from tensor2tensor import problems as problems_lib  # pylint: disable=unused-import
 from tensor2tensor.data_generators import text_problems
 from tensor2tensor.utils import registry
 import tensorflow as tf
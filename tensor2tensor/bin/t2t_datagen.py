@@ -35,8 +35,8 @@ import tempfile
 
 import numpy as np
 
-from tensor2tensor import problems as problems_lib  # pylint: disable=unused-import
 from tensor2tensor.data_generators import generator_utils
+from tensor2tensor.data_generators import image_utils
 from tensor2tensor.utils import registry
 from tensor2tensor.utils import usr_dir
 
@@ -78,6 +78,20 @@ flags.DEFINE_integer("task_id_end", -1, "For distributed data generation.")
 flags.DEFINE_integer(
     "num_concurrent_processes", None,
     "Applies only to problems for which multiprocess_generate=True.")
+flags.DEFINE_integer("generate_num_workers", 1,
+                     "Number of processes to build and serialize examples in "
+                     "while writing shards.")
+flags.DEFINE_integer("png_num_workers", 1,
+                     "Number of processes to encode image and video frames "
+                     "as PNG in.")
+flags.DEFINE_bool("shuffle_in_memory", False,
+                  "If true, read each whole shard into memory to shuffle it, "
+                  "regardless of --shuffle_max_memory_mb.")
+flags.DEFINE_integer("shuffle_max_memory_mb", 1024,
+                     "Shards bigger than this are shuffled through temporary "
+                     "buckets on disk, to bound memory use.")
+flags.DEFINE_integer("shuffle_num_workers", 1,
+                     "Number of processes to shuffle shards in.")
 flags.DEFINE_string("t2t_usr_dir", "",
                     "Path to a Python module that will be imported. The "
                     "__init__.py file should include the necessary imports. "
@@ -136,12 +150,34 @@ def set_random_seed():
   np.random.seed(FLAGS.random_seed)
 
 
+def _is_registered_problem(problem_name):
+  if problem_name in _SUPPORTED_PROBLEM_GENERATORS:
+    return True
+  try:
+    registry.problem(problem_name)
+  except LookupError:
+    return False
+  return True
+
+
 def main(_):
   usr_dir.import_usr_dir(FLAGS.t2t_usr_dir)
+  generator_utils.set_generate_options(
+      num_workers=FLAGS.generate_num_workers)
+  image_utils.set_png_options(num_workers=FLAGS.png_num_workers)
+  generator_utils.set_shuffle_options(
+      max_memory_bytes=(
+          0 if FLAGS.shuffle_in_memory else FLAGS.shuffle_max_memory_mb << 20),
+      num_workers=FLAGS.shuffle_num_workers)
 
-  # Calculate the list of problems to generate.
-  problems = sorted(
-      list(_SUPPORTED_PROBLEM_GENERATORS) + registry.list_problems())
+  # Calculate the list of problems to generate. A single named problem is
+  # looked up alone, so that only the module registering it is imported.
+  if (FLAGS.problem and FLAGS.problem[-1] != "*" and
+      _is_registered_problem(FLAGS.problem)):
+    problems = [FLAGS.problem]
+  else:
+    problems = sorted(
+        list(_SUPPORTED_PROBLEM_GENERATORS) + registry.list_problems())
   for exclude in FLAGS.exclude_problems.split(","):
     if exclude:
       problems = [p for p in problems if exclude not in p]
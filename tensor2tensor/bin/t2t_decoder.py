@@ -35,6 +35,7 @@ import os
 from tensor2tensor.bin import t2t_trainer
 from tensor2tensor.data_generators import problem  # pylint: disable=unused-import
 from tensor2tensor.data_generators import text_encoder
+from tensor2tensor.utils import decode_cache
 from tensor2tensor.utils import decoding
 from tensor2tensor.utils import registry
 from tensor2tensor.utils import trainer_lib
@@ -61,6 +62,19 @@ flags.DEFINE_integer("decode_shards", 1, "Number of decoding replicas.")
 flags.DEFINE_string("score_file", "", "File to score. Each line in the file "
                     "must be in the format input \t target.")
 flags.DEFINE_bool("decode_in_memory", False, "Decode in memory.")
+flags.DEFINE_bool("decode_with_predictor", False,
+                  "With --decode_from_file, build the inference graph and "
+                  "restore the checkpoint once, and feed the batches to one "
+                  "session, instead of going through Estimator.predict.")
+flags.DEFINE_bool("use_decode_cache", False,
+                  "With --decode_from_file, reuse the decodes of inputs "
+                  "already decoded with the same checkpoint, problem and "
+                  "decode hparams instead of decoding them again.")
+flags.DEFINE_string("decode_cache_file", "",
+                    "sqlite file persisting the decode cache across runs. "
+                    "Only kept in memory if empty.")
+flags.DEFINE_integer("decode_cache_size", 100000,
+                     "Number of decodes kept in memory by the decode cache.")
 
 
 def create_hparams():
@@ -89,9 +103,26 @@ def decode(estimator, hparams, decode_hp):
   elif FLAGS.decode_from_file:
     if estimator.config.use_tpu:
       raise ValueError("TPU can only decode from dataset.")
+    predictor = None
+    if FLAGS.decode_with_predictor:
+      predictor = decoding.Predictor(estimator, hparams,
+                                     checkpoint_path=FLAGS.checkpoint_path)
+    cache = None
+    if FLAGS.use_decode_cache:
+      cache = decode_cache.DecodeCache(
+          decode_cache.make_namespace(
+              (FLAGS.checkpoint_path or
+               tf.train.latest_checkpoint(estimator.model_dir)),
+              FLAGS.problem, decode_hp),
+          capacity=FLAGS.decode_cache_size,
+          path=FLAGS.decode_cache_file or None)
     decoding.decode_from_file(estimator, FLAGS.decode_from_file, hparams,
                               decode_hp, FLAGS.decode_to_file,
-                              checkpoint_path=FLAGS.checkpoint_path)
+                              checkpoint_path=FLAGS.checkpoint_path,
+                              predictor=predictor,
+                              decode_cache=cache)
+    if cache is not None:
+      cache.close()
     if FLAGS.checkpoint_path and FLAGS.keep_timestamp:
       ckpt_time = os.path.getmtime(FLAGS.checkpoint_path + ".index")
       os.utime(FLAGS.decode_to_file, (ckpt_time, ckpt_time))
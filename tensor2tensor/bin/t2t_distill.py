@@ -22,8 +22,6 @@ from __future__ import division
 from __future__ import print_function
 
 import os
-from tensor2tensor import models  # pylint: disable=unused-import
-from tensor2tensor import problems as problems_lib  # pylint: disable=unused-import
 from tensor2tensor.bin import t2t_trainer
 from tensor2tensor.utils import cloud_mlengine
 from tensor2tensor.utils import flags as t2t_flags  # pylint: disable=unused-import
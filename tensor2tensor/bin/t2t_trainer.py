@@ -20,8 +20,6 @@ from __future__ import print_function
 import contextlib
 import os
 import sys
-from tensor2tensor import models  # pylint: disable=unused-import
-from tensor2tensor import problems as problems_lib  # pylint: disable=unused-import
 from tensor2tensor.data_generators import problem  # pylint: disable=unused-import
 from tensor2tensor.utils import cloud_mlengine
 from tensor2tensor.utils import cloud_tpu
@@ -14,7 +14,13 @@
 # limitations under the License.
 """Translate a file with all checkpoints in a given directory.
 
-t2t-decoder will be executed with these parameters:
+By default, the inference graph is built once in this process and the weights
+of each checkpoint are restored into it in turn. With --reference, each
+translation is scored right away, and a JSON summary of each step is written
+next to its translation.
+
+With --decoder_command, that command (e.g. t2t-decoder) is run for each
+checkpoint instead, with these parameters:
 --problem
 --data_dir
 --output_dir with the value of --model_dir
@@ -30,6 +36,10 @@ from __future__ import print_function
 import os
 import shutil
 from tensor2tensor.utils import bleu_hook
+from tensor2tensor.utils import checkpoint_evaluator
+from tensor2tensor.utils import decoding
+from tensor2tensor.utils import trainer_lib
+from tensor2tensor.utils import usr_dir
 
 import tensorflow as tf
 
@@ -37,10 +47,11 @@ flags = tf.flags
 FLAGS = flags.FLAGS
 
 # t2t-translate-all specific options
-flags.DEFINE_string("decoder_command", "t2t-decoder {params}",
-                    "Which command to execute instead t2t-decoder. "
-                    "{params} is replaced by the parameters. Useful e.g. for "
-                    "qsub wrapper.")
+flags.DEFINE_string("decoder_command", "",
+                    "If set, execute this command for every checkpoint "
+                    "instead of decoding in this process, e.g. "
+                    "\"t2t-decoder {params}\". {params} is replaced by the "
+                    "parameters. Useful e.g. for qsub wrapper.")
 flags.DEFINE_string("model_dir", "",
                     "Directory to load model checkpoints from.")
 flags.DEFINE_string("source", None,
@@ -50,6 +61,12 @@ flags.DEFINE_string("translations_dir", "translations",
 flags.DEFINE_integer("min_steps", 0, "Ignore checkpoints with less steps.")
 flags.DEFINE_integer("wait_minutes", 0,
                      "Wait upto N minutes for a new checkpoint")
+flags.DEFINE_string("reference", None,
+                    "Path to the reference translation file. If set, the "
+                    "translations are scored with BLEU as they are made.")
+flags.DEFINE_integer("decode_threads", 1,
+                     "Number of batches to decode at a time, when decoding "
+                     "in this process.")
 
 # options derived from t2t-decoder
 flags.DEFINE_integer("beam_size", 4, "Beam-search width.")
@@ -60,6 +77,31 @@ flags.DEFINE_string("data_dir", None, "see t2t-decoder")
 flags.DEFINE_string("problem", None, "see t2t-decoder")
 flags.DEFINE_string("hparams_set", "transformer_big_single_gpu",
                     "see t2t-decoder")
+flags.DEFINE_string("hparams", "", "see t2t-decoder")
+flags.DEFINE_string("decode_hparams", "",
+                    "see t2t-decoder; beam_size and alpha are set from "
+                    "--beam_size and --alpha.")
+
+
+def create_evaluator(model_dir, source):
+  """Builds the in-process evaluator of the checkpoints in model_dir."""
+  usr_dir.import_usr_dir(FLAGS.t2t_usr_dir)
+  hparams = trainer_lib.create_hparams(
+      FLAGS.hparams_set, FLAGS.hparams,
+      data_dir=os.path.expanduser(FLAGS.data_dir),
+      problem_name=FLAGS.problem)
+  decode_hp = decoding.decode_hparams(FLAGS.decode_hparams)
+  decode_hp.beam_size = FLAGS.beam_size
+  decode_hp.alpha = FLAGS.alpha
+  estimator = trainer_lib.create_estimator(
+      FLAGS.model, hparams,
+      trainer_lib.create_run_config(model_dir=model_dir),
+      decode_hparams=decode_hp)
+  return checkpoint_evaluator.CheckpointEvaluator(
+      estimator, hparams, decode_hp, source,
+      reference_filename=(os.path.expanduser(FLAGS.reference)
+                          if FLAGS.reference else None),
+      num_threads=FLAGS.decode_threads)
 
 
 def main(_):
@@ -77,6 +119,9 @@ def main(_):
   if not os.path.exists(flags_path):
     shutil.copy2(os.path.join(model_dir, "flags.txt"), flags_path)
 
+  evaluator = None
+  if not FLAGS.decoder_command:
+    evaluator = create_evaluator(model_dir, source)
   locals_and_flags = {"FLAGS": FLAGS}
   for model in bleu_hook.stepfiles_iterator(model_dir, FLAGS.wait_minutes,
                                             FLAGS.min_steps):
@@ -85,6 +130,9 @@ def main(_):
     locals_and_flags.update(locals())
     if os.path.exists(out_file):
       tf.logging.info(out_file + " already exists, so skipping it.")
+    elif evaluator is not None:
+      tf.logging.info("Translating " + out_file)
+      evaluator.evaluate(model.filename, out_file)
     else:
       tf.logging.info("Translating " + out_file)
       params = (
@@ -98,6 +146,8 @@ def main(_):
       command = FLAGS.decoder_command.format(**locals())
       tf.logging.info("Running:\n" + command)
       os.system(command)
+  if evaluator is not None:
+    evaluator.close()
   # pylint: enable=unused-variable
 
 
@@ -18,14 +18,24 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
+import bisect
+import collections
 import gzip
+import itertools
+import json
+import multiprocessing
 import os
 import random
 import stat
+import struct
 import tarfile
 import tempfile
+import threading
+import time
+import numpy as np
 import requests
 import six
+from six.moves import queue
 from six.moves import range  # pylint: disable=redefined-builtin
 # Imports urllib on Python2, urllib.request on Python3
 import six.moves.urllib_request as urllib
@@ -36,6 +46,16 @@ import tensorflow as tf
 
 UNSHUFFLED_SUFFIX = "-unshuffled"
 
+# Number of processes generate_files serializes examples in. See
+# set_generate_options.
+_GENERATE_NUM_WORKERS = 1
+
+
+def set_generate_options(num_workers=1):
+  """Sets the number of serializer processes generate_files uses by default."""
+  global _GENERATE_NUM_WORKERS
+  _GENERATE_NUM_WORKERS = num_workers
+
 
 def to_example(dictionary):
   """Helper: build tf.Example from (string -> int/float/str list) dictionary."""
@@ -70,7 +90,7 @@ def generate_files_distributed(generator,
   output_filename = sharded_name(output_name, task_id, num_shards)
   output_file = os.path.join(output_dir, output_filename)
   tf.logging.info("Writing to file %s", output_file)
-  writer = tf.python_io.TFRecordWriter(output_file)
+  writer = IndexedRecordWriter(output_file)
 
   counter = 0
   for case in generator:
@@ -128,8 +148,159 @@ def outputs_exist(filenames):
       return out_fname
 
 
+# Bytes around the data of each record in a TFRecord file: a uint64 length, a
+# uint32 masked CRC of the length, and a uint32 masked CRC of the data.
+_RECORD_HEADER_BYTES = 12
+_RECORD_FOOTER_BYTES = 4
+
+
+def record_index_filename(filename):
+  """Returns the name of the index sidecar file of a TFRecord file.
+
+  The name starts with a dot so that it matches none of the filepatterns the
+  TFRecord files themselves are read with.
+
+  Args:
+    filename: path of a TFRecord file.
+
+  Returns:
+    Path of the index file.
+  """
+  dirname, basename = os.path.split(filename)
+  return os.path.join(dirname, "." + basename + ".index")
+
+
+class IndexedRecordWriter(object):
+  """A TFRecordWriter which also writes an index sidecar file on close.
+
+  The index holds the number of records in the file, so that they can be
+  counted without reading the file, and the file's size in bytes and
+  modification time, to tell whether the index is stale. See
+  read_record_index.
+  """
+
+  def __init__(self, filename):
+    self._filename = filename
+    self._writer = tf.python_io.TFRecordWriter(filename)
+    self._num_records = 0
+    self._num_bytes = 0
+
+  def write(self, record):
+    self._writer.write(record)
+    self._num_records += 1
+    self._num_bytes += (
+        _RECORD_HEADER_BYTES + len(record) + _RECORD_FOOTER_BYTES)
+
+  def close(self):
+    self._writer.close()
+    index = {
+        "num_records": self._num_records,
+        "file_bytes": self._num_bytes,
+        "file_mtime_nsec": tf.gfile.Stat(self._filename).mtime_nsec,
+    }
+    with tf.gfile.GFile(record_index_filename(self._filename), "w") as f:
+      f.write(json.dumps(index))
+
+
+def build_record_index(filename):
+  """Scans an uncompressed TFRecord file and writes its index sidecar.
+
+  Args:
+    filename: path of a TFRecord file.
+
+  Returns:
+    The index, as read_record_index returns it.
+  """
+  num_records, offset = 0, 0
+  with tf.gfile.GFile(filename, "rb") as f:
+    while True:
+      header = f.read(_RECORD_HEADER_BYTES)
+      if not header:
+        break
+      if len(header) < _RECORD_HEADER_BYTES:
+        raise ValueError("Truncated record in %s" % filename)
+      length, = struct.unpack("<Q", header[:8])
+      f.seek(length + _RECORD_FOOTER_BYTES, 1)
+      num_records += 1
+      offset += _RECORD_HEADER_BYTES + length + _RECORD_FOOTER_BYTES
+  index = {
+      "num_records": num_records,
+      "file_bytes": offset,
+      "file_mtime_nsec": tf.gfile.Stat(filename).mtime_nsec,
+  }
+  with tf.gfile.GFile(record_index_filename(filename), "w") as f:
+    f.write(json.dumps(index))
+  return index
+
+
+def _rename_indexed_records(old_filename, new_filename):
+  """Renames a TFRecord file and its index sidecar.
+
+  Renames copy the file on some filesystems, e.g. GCS, so the modification
+  time in the index is updated to the renamed file's.
+
+  Args:
+    old_filename: path of an indexed TFRecord file.
+    new_filename: its new path.
+  """
+  tf.gfile.Rename(old_filename, new_filename)
+  with tf.gfile.GFile(record_index_filename(old_filename)) as f:
+    index = json.loads(f.read())
+  index["file_mtime_nsec"] = tf.gfile.Stat(new_filename).mtime_nsec
+  with tf.gfile.GFile(record_index_filename(new_filename), "w") as f:
+    f.write(json.dumps(index))
+  tf.gfile.Remove(record_index_filename(old_filename))
+
+
+def read_record_index(filename):
+  """Reads the index sidecar of a TFRecord file.
+
+  Args:
+    filename: path of a TFRecord file.
+
+  Returns:
+    A dict with keys "num_records", "file_bytes" and "file_mtime_nsec", or
+    None if the file has no index or the index does not match the file's size
+    and modification time. A file rewritten, or copied,
+    after its index was written thus needs build_record_index again.
+  """
+  index_filename = record_index_filename(filename)
+  if not tf.gfile.Exists(index_filename):
+    return None
+  try:
+    with tf.gfile.GFile(index_filename) as f:
+      index = json.loads(f.read())
+    stat = tf.gfile.Stat(filename)
+    if (stat.length != index["file_bytes"] or
+        stat.mtime_nsec != index["file_mtime_nsec"]):
+      tf.logging.warning("Ignoring stale record index %s", index_filename)
+      return None
+  except (ValueError, KeyError, tf.errors.OpError):
+    tf.logging.warning("Ignoring unreadable record index %s", index_filename)
+    return None
+  return index
+
+
+def num_records(filename):
+  """Returns the number of records in a TFRecord file.
+
+  Uses the index sidecar of the file if there is one, and counts the records
+  otherwise.
+
+  Args:
+    filename: path of a TFRecord file.
+
+  Returns:
+    The number of records.
+  """
+  index = read_record_index(filename)
+  if index is not None:
+    return index["num_records"]
+  return sum(1 for _ in tf.python_io.tf_record_iterator(filename))
+
+
 def generate_files(generator, output_filenames,
-                   max_cases=None, cycle_every_n=1):
+                   max_cases=None, cycle_every_n=1, num_workers=None):
   """Generate cases from a generator and save as TFRecord files.
 
   Generated cases are transformed to tf.Example protos and saved as TFRecords
@@ -142,35 +313,222 @@ def generate_files(generator, output_filenames,
       if None (default), we use the generator until StopIteration is raised.
     cycle_every_n: how many cases from the generator to take before
       switching to the next shard; by default set to 1, switch every case.
+    num_workers: if greater than 1, build and serialize the tf.Examples in
+      this many processes, with the generator and the file writes each on
+      their own thread. The output files hold the same examples as with 1.
+      Defaults to the value given to set_generate_options.
   """
   if outputs_exist(output_filenames):
     tf.logging.info("Skipping generator because outputs files exists at {}"
                     .format(output_filenames))
     return
   tmp_filenames = [fname + ".incomplete" for fname in output_filenames]
-  num_shards = len(output_filenames)
-  writers = [tf.python_io.TFRecordWriter(fname) for fname in tmp_filenames]
-  counter, shard = 0, 0
-  for case in generator:
-    if case is None:
-      continue
-    if counter % 100000 == 0:
-      tf.logging.info("Generating case %d." % counter)
-    counter += 1
-    if max_cases and counter > max_cases:
-      break
-    example = to_example(case)
-    writers[shard].write(example.SerializeToString())
-    if counter % cycle_every_n == 0:
-      shard = (shard + 1) % num_shards
+  if num_workers is None:
+    num_workers = _GENERATE_NUM_WORKERS
+  start_time = time.time()
+  if num_workers > 1:
+    counter = _generate_files_pipelined(
+        generator, tmp_filenames, max_cases, cycle_every_n, num_workers)
+  else:
+    num_shards = len(output_filenames)
+    writers = [IndexedRecordWriter(fname) for fname in tmp_filenames]
+    counter, shard = 0, 0
+    for case in generator:
+      if case is None:
+        continue
+      if counter % 100000 == 0:
+        tf.logging.info("Generating case %d." % counter)
+      counter += 1
+      if max_cases and counter > max_cases:
+        break
+      example = to_example(case)
+      writers[shard].write(example.SerializeToString())
+      if counter % cycle_every_n == 0:
+        shard = (shard + 1) % num_shards
 
-  for writer in writers:
-    writer.close()
+    for writer in writers:
+      writer.close()
 
   for tmp_name, final_name in zip(tmp_filenames, output_filenames):
-    tf.gfile.Rename(tmp_name, final_name)
+    _rename_indexed_records(tmp_name, final_name)
+
+  elapsed = time.time() - start_time
+  tf.logging.info("Generated %s Examples in %.1f seconds (%.1f examples/sec)",
+                  counter, elapsed, counter / max(elapsed, 1e-6))
+
+
+def _apply_to_chunk(fn, chunk):
+  return [fn(item) for item in chunk]
+
 
-  tf.logging.info("Generated %s Examples", counter)
+def ordered_pool_imap(fn, items, num_workers, chunk_size=1, max_in_flight=None):
+  """Yields fn(item) for items, computed in a process pool, in order.
+
+  Unlike multiprocessing.Pool.imap, items is read only as the results are
+  consumed, so that at most about max_in_flight * chunk_size items and
+  results are held at a time, even if the items come from a long generator.
+
+  Args:
+    fn: picklable function of an item, e.g. a module-level function or a
+      functools.partial of one.
+    items: iterable of picklable items.
+    num_workers: number of processes. If at most 1, fn is run in this process
+      instead.
+    chunk_size: number of items sent to a process at a time.
+    max_in_flight: maximum number of pending chunks. Defaults to
+      4 * num_workers.
+
+  Yields:
+    fn(item) for each item, in order.
+  """
+  if num_workers <= 1:
+    for item in items:
+      yield fn(item)
+    return
+  max_in_flight = max_in_flight or 4 * num_workers
+  items = iter(items)
+  pool = multiprocessing.Pool(num_workers)
+  try:
+    pending = collections.deque()
+    while True:
+      chunk = list(itertools.islice(items, chunk_size))
+      if chunk:
+        pending.append(pool.apply_async(_apply_to_chunk, (fn, chunk)))
+      if not pending:
+        break
+      if not chunk or len(pending) >= max_in_flight:
+        for result in pending.popleft().get():
+          yield result
+  finally:
+    pool.terminate()
+    pool.join()
+
+
+# Number of cases sent to a serializer process at a time.
+_SERIALIZE_CHUNK_SIZE = 256
+
+
+def _serialize_cases(shards_and_cases):
+  """Serializes a chunk of (shard, case) pairs to (shard, record) pairs."""
+  return [(shard, to_example(case).SerializeToString())
+          for shard, case in shards_and_cases]
+
+
+def _generate_files_pipelined(generator, filenames, max_cases, cycle_every_n,
+                              num_workers):
+  """generate_files, pipelined over threads and a process pool.
+
+  A producer thread runs the generator and assigns cases to shards in chunks,
+  a pool of num_workers processes serializes the chunks, and one thread per
+  shard writes its records. Chunks are written in generator order, so every
+  file gets the same examples in the same order as when writing serially.
+
+  Args:
+    generator: a generator yielding (string -> int/float/str list) dictionaries.
+    filenames: List of output file paths, one per shard.
+    max_cases: maximum number of cases to get from the generator, or None.
+    cycle_every_n: how many cases to take before switching to the next shard.
+    num_workers: number of serializer processes.
+
+  Returns:
+    The number of cases written, as counted by generate_files.
+  """
+  num_shards = len(filenames)
+  max_in_flight = 4 * num_workers
+  chunk_queue = queue.Queue(maxsize=max_in_flight)
+  write_queues = [queue.Queue(maxsize=max_in_flight * _SERIALIZE_CHUNK_SIZE)
+                  for _ in filenames]
+  errors = []
+  done = object()
+  stop = threading.Event()
+
+  def produce():
+    try:
+      chunk = []
+      counter, shard = 0, 0
+      for case in generator:
+        if stop.is_set():
+          break
+        if case is None:
+          continue
+        if counter % 100000 == 0:
+          tf.logging.info("Generating case %d." % counter)
+        counter += 1
+        if max_cases and counter > max_cases:
+          break
+        chunk.append((shard, case))
+        if len(chunk) >= _SERIALIZE_CHUNK_SIZE:
+          chunk_queue.put(chunk)
+          chunk = []
+        if counter % cycle_every_n == 0:
+          shard = (shard + 1) % num_shards
+      if chunk:
+        chunk_queue.put(chunk)
+    except Exception as e:  # pylint: disable=broad-except
+      errors.append(e)
+    finally:
+      chunk_queue.put(done)
+
+  def write(filename, write_queue):
+    writer = IndexedRecordWriter(filename)
+    try:
+      while True:
+        record = write_queue.get()
+        if record is done:
+          break
+        writer.write(record)
+    except Exception as e:  # pylint: disable=broad-except
+      errors.append(e)
+      # Keep draining so that the dispatcher never blocks on this queue.
+      while write_queue.get() is not done:
+        pass
+    finally:
+      writer.close()
+
+  # Fork the serializer processes before starting any threads.
+  pool = multiprocessing.Pool(num_workers)
+  producer = threading.Thread(target=produce)
+  writer_threads = [threading.Thread(target=write, args=args)
+                    for args in zip(filenames, write_queues)]
+  for thread in [producer] + writer_threads:
+    thread.daemon = True
+    thread.start()
+
+  def dispatch(serialized):
+    for shard, record in serialized:
+      write_queues[shard].put(record)
+    return len(serialized)
+
+  counter = 0
+  chunk = None
+  try:
+    pending = collections.deque()
+    while True:
+      chunk = chunk_queue.get()
+      if chunk is done:
+        break
+      pending.append(pool.apply_async(_serialize_cases, (chunk,)))
+      if len(pending) >= max_in_flight:
+        counter += dispatch(pending.popleft().get())
+    while pending:
+      counter += dispatch(pending.popleft().get())
+  finally:
+    # On errors, stop the producer and drain the chunk queue, which it may be
+    # blocked on, until it is done.
+    stop.set()
+    while chunk is not done:
+      chunk = chunk_queue.get()
+    producer.join()
+    pool.terminate()
+    pool.join()
+    for write_queue in write_queues:
+      write_queue.put(done)
+    for thread in writer_threads:
+      thread.join()
+
+  if errors:
+    raise errors[0]
+  return counter
 
 
 def download_report_hook(count, block_size, total_size):
@@ -300,7 +658,7 @@ def gunzip_file(gz_path, new_path):
 
 def get_or_generate_vocab_inner(data_dir, vocab_filename, vocab_size,
                                 generator, max_subtoken_length=None,
-                                reserved_tokens=None):
+                                reserved_tokens=None, num_workers=1):
   """Inner implementation for vocab generators.
 
   Args:
@@ -314,6 +672,8 @@ def get_or_generate_vocab_inner(data_dir, vocab_filename, vocab_size,
     reserved_tokens: List of reserved tokens. `text_encoder.RESERVED_TOKENS`
       should be a prefix of `reserved_tokens`. If `None`, defaults to
       `RESERVED_TOKENS`.
+    num_workers: an optional integer. If greater than 1, count the tokens of
+      the generated text in this many processes.
 
   Returns:
     A SubwordTextEncoder vocabulary object.
@@ -329,7 +689,7 @@ def get_or_generate_vocab_inner(data_dir, vocab_filename, vocab_size,
   tf.logging.info("Generating vocab file: %s", vocab_filepath)
   vocab = text_encoder.SubwordTextEncoder.build_from_generator(
       generator, vocab_size, max_subtoken_length=max_subtoken_length,
-      reserved_tokens=reserved_tokens)
+      reserved_tokens=reserved_tokens, num_workers=num_workers)
 
   if vocab_filepath:
     tf.gfile.MakeDirs(data_dir)
@@ -339,12 +699,12 @@ def get_or_generate_vocab_inner(data_dir, vocab_filename, vocab_size,
 
 
 def get_or_generate_vocab(data_dir, tmp_dir, vocab_filename, vocab_size,
-                          sources, file_byte_budget=1e6):
+                          sources, file_byte_budget=1e6, num_workers=1):
   """Generate a vocabulary from the datasets in sources."""
 
   vocab_generator = generate_lines_for_vocab(tmp_dir, sources, file_byte_budget)
   return get_or_generate_vocab_inner(data_dir, vocab_filename, vocab_size,
-                                     vocab_generator)
+                                     vocab_generator, num_workers=num_workers)
 
 
 def generate_lines_for_vocab(tmp_dir, sources, file_byte_budget=1e6):
@@ -455,7 +815,7 @@ def read_records(filename):
 
 
 def write_records(records, out_filename):
-  writer = tf.python_io.TFRecordWriter(out_filename)
+  writer = IndexedRecordWriter(out_filename)
   for count, record in enumerate(records):
     writer.write(record)
     if count > 0 and count % 100000 == 0:
@@ -474,52 +834,168 @@ def generate_dataset_and_shuffle(train_gen,
     shuffle_dataset(train_paths + dev_paths)
 
 
-def _shuffle_single(fname):
-  records = read_records(fname)
-  random.shuffle(records)
+# Shards bigger than this are shuffled through temporary buckets on disk. See
+# set_shuffle_options.
+_SHUFFLE_MAX_MEMORY_BYTES = 1 << 30
+# Number of processes shuffle_dataset shuffles shards in.
+_SHUFFLE_NUM_WORKERS = 1
+
+
+def set_shuffle_options(max_memory_bytes=0, num_workers=1):
+  """Sets the defaults used by shuffle_dataset.
+
+  Args:
+    max_memory_bytes: shards bigger than this many bytes are shuffled with a
+      bounded-memory external shuffle. If 0, every shard is read into memory
+      and shuffled there, as before.
+    num_workers: number of shards to shuffle concurrently, in separate
+      processes.
+  """
+  global _SHUFFLE_MAX_MEMORY_BYTES, _SHUFFLE_NUM_WORKERS
+  _SHUFFLE_MAX_MEMORY_BYTES = max_memory_bytes
+  _SHUFFLE_NUM_WORKERS = num_workers
+
+
+def _shuffle_records_in_buckets(fname, out_fname, num_buckets, rng):
+  """Shuffles the records of fname into out_fname via temporary buckets.
+
+  Each record goes to a bucket file chosen uniformly at random, then every
+  bucket in turn is shuffled in memory and appended to the output. This is a
+  uniform shuffle which only ever holds one bucket in memory.
+
+  Args:
+    fname: input TFRecord file.
+    out_fname: output TFRecord file.
+    num_buckets: number of temporary bucket files.
+    rng: a random.Random, or the random module.
+  """
+  bucket_fnames = ["%s.shuffle-%05d" % (out_fname, i)
+                   for i in range(num_buckets)]
+  writers = [tf.python_io.TFRecordWriter(f) for f in bucket_fnames]
+  for count, record in enumerate(tf.python_io.tf_record_iterator(fname)):
+    writers[rng.randrange(num_buckets)].write(record)
+    if count > 0 and count % 100000 == 0:
+      tf.logging.info("bucketed: %d", count)
+  for writer in writers:
+    writer.close()
+
+  out_writer = IndexedRecordWriter(out_fname)
+  for bucket_fname in bucket_fnames:
+    records = read_records(bucket_fname)
+    rng.shuffle(records)
+    for record in records:
+      out_writer.write(record)
+    tf.gfile.Remove(bucket_fname)
+  out_writer.close()
+
+
+def _shuffle_single(fname, rng=random, max_memory_bytes=0):
+  """Shuffles the records of one shard, removing the unshuffled file.
+
+  Args:
+    fname: unshuffled TFRecord file, named with UNSHUFFLED_SUFFIX.
+    rng: a random.Random, or the random module.
+    max_memory_bytes: if the shard is bigger than this many bytes, shuffle it
+      in buckets of about half this size on disk. If 0, shuffle in memory.
+  """
   out_fname = fname.replace(UNSHUFFLED_SUFFIX, "")
-  write_records(records, out_fname)
+  file_bytes = tf.gfile.Stat(fname).length if max_memory_bytes else 0
+  if max_memory_bytes and file_bytes > max_memory_bytes:
+    num_buckets = 2 * (-(-file_bytes // max_memory_bytes))
+    tf.logging.info("Shuffling %s in %d buckets", fname, num_buckets)
+    _shuffle_records_in_buckets(fname, out_fname, num_buckets, rng)
+  else:
+    records = read_records(fname)
+    rng.shuffle(records)
+    write_records(records, out_fname)
   tf.gfile.Remove(fname)
+  if tf.gfile.Exists(record_index_filename(fname)):
+    tf.gfile.Remove(record_index_filename(fname))
+
+
+def _shuffle_single_seeded(args):
+  fname, seed, max_memory_bytes = args
+  _shuffle_single(fname, random.Random(seed), max_memory_bytes)
 
 
-def shuffle_dataset(filenames):
-  """Shuffles the dataset."""
+def shuffle_dataset(filenames, max_memory_bytes=None, num_workers=None):
+  """Shuffles the dataset.
+
+  Args:
+    filenames: unshuffled TFRecord files, named with UNSHUFFLED_SUFFIX.
+    max_memory_bytes: shards bigger than this many bytes are shuffled with a
+      bounded-memory external shuffle; 0 shuffles all shards in memory.
+      Defaults to the value given to set_shuffle_options.
+    num_workers: number of processes to shuffle shards in. Defaults to the
+      value given to set_shuffle_options.
+  """
   if outputs_exist(filenames):
     tf.logging.info("Skipping shuffle because output files exist")
     return
+  if max_memory_bytes is None:
+    max_memory_bytes = _SHUFFLE_MAX_MEMORY_BYTES
+  if num_workers is None:
+    num_workers = _SHUFFLE_NUM_WORKERS
   tf.logging.info("Shuffling data...")
-  for filename in filenames:
-    _shuffle_single(filename)
+  if num_workers > 1 and len(filenames) > 1:
+    # Seed each shard from the global random state, so that the result only
+    # depends on it and not on how the shards are scheduled.
+    args = [(filename, random.getrandbits(64), max_memory_bytes)
+            for filename in filenames]
+    pool = multiprocessing.Pool(min(num_workers, len(filenames)))
+    try:
+      pool.map(_shuffle_single_seeded, args, chunksize=1)
+    finally:
+      pool.terminate()
+      pool.join()
+  else:
+    for filename in filenames:
+      _shuffle_single(filename, max_memory_bytes=max_memory_bytes)
   tf.logging.info("Data shuffled.")
 
 
 class SequencePacker(object):
   """Helper for constructing a packed example of sequence examples.
 
-  See comments to pack_examples()
+  The sequences are only concatenated, into arrays, by to_dict. See comments
+  to pack_examples()
   """
 
   def __init__(self, first_sequence, spacing=2):
     self._spacing = spacing
-    self._ids = first_sequence[:]
-    self._segmentation = [1] * len(first_sequence)
-    self._position = list(range(len(first_sequence)))
+    self._sequences = [first_sequence]
+    self._length = len(first_sequence)
 
   def add(self, ids):
-    padding = [0] * self._spacing
-    self._ids.extend(padding + ids)
-    next_segment_num = self._segmentation[-1] + 1 if self._segmentation else 1
-    self._segmentation.extend(padding + [next_segment_num] * len(ids))
-    self._position.extend(padding + list(range(len(ids))))
+    self._sequences.append(ids)
+    self._length += self._spacing + len(ids)
 
   def can_fit(self, ids, packed_length):
-    return len(self._ids) + self._spacing + len(ids) <= packed_length
+    return self._length + self._spacing + len(ids) <= packed_length
+
+  def free_space(self, packed_length):
+    """Returns the length of the longest sequence that still fits."""
+    return packed_length - self._length - self._spacing
+
+  @property
+  def num_tokens(self):
+    return sum(len(ids) for ids in self._sequences)
 
   def to_dict(self):
+    ids = np.zeros(self._length, dtype=np.int64)
+    segmentation = np.zeros(self._length, dtype=np.int64)
+    position = np.zeros(self._length, dtype=np.int64)
+    start = 0
+    for segment_num, sequence in enumerate(self._sequences, 1):
+      end = start + len(sequence)
+      ids[start:end] = sequence
+      segmentation[start:end] = segment_num
+      position[start:end] = np.arange(len(sequence))
+      start = end + self._spacing
     return {"inputs": [0],
-            "targets": self._ids,
-            "targets_segmentation": self._segmentation,
-            "targets_position": self._position}
+            "targets": ids.tolist(),
+            "targets_segmentation": segmentation.tolist(),
+            "targets_position": position.tolist()}
 
 
 class SequencePairPacker(object):
@@ -540,6 +1016,14 @@ class SequencePairPacker(object):
     return (self._inputs.can_fit(pair[0], packed_length) and
             self._targets.can_fit(pair[1], packed_length))
 
+  def free_space(self, packed_length):
+    """Returns the length of the longest targets sequence that still fits."""
+    return self._targets.free_space(packed_length)
+
+  @property
+  def num_tokens(self):
+    return self._inputs.num_tokens + self._targets.num_tokens
+
   def to_dict(self):
     ret = self._targets.to_dict()
     inputs_dict = self._inputs.to_dict()
@@ -549,12 +1033,52 @@ class SequencePairPacker(object):
     return ret
 
 
+class PackingStats(object):
+  """Counts how well pack_examples fills its packed examples.
+
+  Attributes:
+    num_examples: number of examples (or chopped fragments) packed.
+    num_packed: number of packed examples emitted.
+    num_tokens: number of non-spacing tokens in the packed examples, summed
+      over inputs and targets.
+    capacity: number of token slots in the packed examples, i.e. num_packed
+      times packed_length for each of inputs and targets.
+    padding_saved: number of padding tokens saved compared to padding every
+      example to packed_length on its own.
+  """
+
+  def __init__(self):
+    self.num_examples = 0
+    self.num_packed = 0
+    self.num_tokens = 0
+    self.capacity = 0
+    self.padding_saved = 0
+
+  def update(self, packer, packed_length, num_examples, num_sequences):
+    self.num_examples += num_examples
+    self.num_packed += 1
+    self.num_tokens += packer.num_tokens
+    self.capacity += packed_length * num_sequences
+    self.padding_saved += (num_examples - 1) * packed_length * num_sequences
+
+  @property
+  def fill_ratio(self):
+    return self.num_tokens / max(self.capacity, 1)
+
+  def __str__(self):
+    return ("packed %d examples into %d, fill ratio %.3f, %d padding tokens "
+            "saved" % (self.num_examples, self.num_packed, self.fill_ratio,
+                       self.padding_saved))
+
+
 def pack_examples(examples,
                   has_inputs,
                   packed_length=256,
                   spacing=2,
                   queue_size=10,
-                  chop_long_sequences=False):
+                  chop_long_sequences=False,
+                  sort_window=1,
+                  stats=None):
   """Pack examples into longer examples.
 
   If has_inputs=False, we are packing single-sequence examples with
@@ -572,6 +1096,13 @@ def pack_examples(examples,
   (as above) and concatenating the targets (as above).  Chopping of
   long sequences is not supported.
 
+  Packing is online best-fit-decreasing: examples are read sort_window at a
+  time and, longest first, each goes to the open packed example with the
+  least free space that it fits in. Open packed examples are kept in an index
+  sorted by free space (of the targets), so finding the best fit costs a
+  binary search. When a new packed example has to be opened and queue_size are
+  already open, the fullest one is emitted first.
+
   The packed examples are represented as dictionaries containing:
     "inputs", "targets": the packed sequences described above
     "inputs_segmentation", "targets_segmentation":
@@ -590,14 +1121,62 @@ def pack_examples(examples,
     has_inputs: a boolean
     packed_length: an integer
     spacing: an integer
-    queue_size: an integer
+    queue_size: an integer, the maximum number of packed examples being filled
     chop_long_sequences: a boolean
+    sort_window: an integer, the number of examples sorted by decreasing
+      length before packing them. 1 packs the examples in order.
+    stats: an optional PackingStats to add the packing statistics to. They
+      are logged either way.
 
   Yields:
     feature dictionaries.
   """
   packer = SequencePairPacker if has_inputs else SequencePacker
-  combined = []
+  num_sequences = 2 if has_inputs else 1
+  if stats is None:
+    stats = PackingStats()
+  # Sorted (free space, serial number) pairs of the open packed examples,
+  # which are open[serial number], with their number of examples.
+  free_index = []
+  open_packers = {}
+  serials = itertools.count()
+
+  def emit(key):
+    del free_index[bisect.bisect_left(free_index, key)]
+    c, num_examples = open_packers.pop(key[1])
+    stats.update(c, packed_length, num_examples, num_sequences)
+    return c.to_dict()
+
+  def add(x):
+    """Packs x, returning the packed examples that are done."""
+    needed = len(x[1]) if has_inputs else len(x)
+    i = bisect.bisect_left(free_index, (needed, -1))
+    while i < len(free_index):
+      key = free_index[i]
+      c, num_examples = open_packers[key[1]]
+      if c.can_fit(x, packed_length):
+        c.add(x)
+        del free_index[i]
+        open_packers[key[1]] = (c, num_examples + 1)
+        key = (c.free_space(packed_length), key[1])
+        bisect.insort(free_index, key)
+        return []
+      i += 1
+    done = []
+    if len(free_index) >= queue_size:
+      done.append(emit(free_index[0]))
+    c = packer(x, spacing)
+    key = (c.free_space(packed_length), next(serials))
+    open_packers[key[1]] = (c, 1)
+    bisect.insort(free_index, key)
+    if key[0] < 0:
+      done.append(emit(key))
+    return done
+
+  def sort_key(x):
+    return len(x[0]) + len(x[1]) if has_inputs else len(x)
+
+  window = []
   for example in examples:
     x = ((example["inputs"], example["targets"])
          if has_inputs else example["targets"])
@@ -605,22 +1184,25 @@ def pack_examples(examples,
       assert not has_inputs
       num_fragments = len(x) // packed_length
       for i in range(num_fragments):
-        yield packer(
-            x[packed_length * i:packed_length * (i + 1)], spacing).to_dict()
+        c = packer(x[packed_length * i:packed_length * (i + 1)], spacing)
+        stats.update(c, packed_length, 1, num_sequences)
+        yield c.to_dict()
       x = x[packed_length * num_fragments:]
-    added = False
-    for c in combined:
-      if c.can_fit(x, packed_length):
-        c.add(x)
-        added = True
-        break
-    if not added:
-      if len(combined) == queue_size:
-        yield combined[0].to_dict()
-        combined = combined[1:]
-      combined.append(packer(x, spacing))
-  for c in combined:
-    yield c.to_dict()
+    window.append(x)
+    if len(window) >= sort_window:
+      window.sort(key=sort_key, reverse=True)
+      for x in window:
+        for packed in add(x):
+          yield packed
+      window = []
+  window.sort(key=sort_key, reverse=True)
+  for x in window:
+    for packed in add(x):
+      yield packed
+  for serial in sorted(open_packers):
+    key = (open_packers[serial][0].free_space(packed_length), serial)
+    yield emit(key)
+  tf.logging.info("pack_examples: %s", stats)
 
 
 def make_tmp_dir(suffix="", prefix="tmp", dir=None):  # pylint: disable=redefined-builtin
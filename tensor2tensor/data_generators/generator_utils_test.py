@@ -18,10 +18,13 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
+import collections
 import gzip
 import io
 import os
+import random
 import tempfile
+import threading
 from builtins import bytes  # pylint: disable=redefined-builtin
 
 from tensor2tensor.data_generators import generator_utils
@@ -29,6 +32,12 @@ from tensor2tensor.data_generators import generator_utils
 import tensorflow as tf
 
 
+def _square(x):
+  if x < 0:
+    raise ValueError("negative")
+  return x * x
+
+
 class GeneratorUtilsTest(tf.test.TestCase):
 
   def testGenerateFiles(self):
@@ -46,8 +55,200 @@ class GeneratorUtilsTest(tf.test.TestCase):
 
     # Clean up.
     os.remove(tmp_file_path + "-train-00000-of-00001")
+    os.remove(generator_utils.record_index_filename(
+        tmp_file_path + "-train-00000-of-00001"))
     os.remove(tmp_file_path)
 
+  def testGenerateFilesPipelined(self):
+    tmp_dir = self.get_temp_dir()
+
+    def test_generator():
+      for i in range(2000):
+        yield None if i % 7 == 0 else {"inputs": [i], "targets": [i, i + 1]}
+
+    all_records = []
+    for num_workers in [1, 3]:
+      filenames = generator_utils.train_data_filenames(
+          "pipelined%d" % num_workers, tmp_dir, 3)
+      generator_utils.generate_files(
+          test_generator(), filenames, max_cases=1500, cycle_every_n=4,
+          num_workers=num_workers)
+      # The order of the features in serialized tf.Examples can differ.
+      all_records.append(
+          [[tf.train.Example.FromString(record)
+            for record in generator_utils.read_records(f)]
+           for f in filenames])
+      for filename in filenames:
+        self.assertFalse(tf.gfile.Exists(filename + ".incomplete"))
+        os.remove(filename)
+        os.remove(generator_utils.record_index_filename(filename))
+
+    self.assertEqual(1500, sum(len(records) for records in all_records[0]))
+    self.assertEqual(all_records[0], all_records[1])
+
+  def testGenerateFilesPipelinedStopsOnError(self):
+    tmp_dir = self.get_temp_dir()
+
+    def test_generator():
+      i = 0
+      while True:
+        # to_example rejects empty fields.
+        yield {"inputs": [i] if i != 10 else []}
+        i += 1
+
+    num_threads = threading.active_count()
+    filenames = generator_utils.train_data_filenames("failing", tmp_dir, 2)
+    with self.assertRaisesRegexp(ValueError, "Empty generated field"):
+      generator_utils.generate_files(test_generator(), filenames,
+                                     num_workers=2)
+    # The producer thread stopped rather than block on the full chunk queue.
+    self.assertEqual(num_threads, threading.active_count())
+
+  def testShuffleDataset(self):
+    tmp_dir = self.get_temp_dir()
+    records = [bytes("record %d" % i, "utf-8") for i in range(1000)]
+    filenames = generator_utils.train_data_filenames(
+        "shuffle" + generator_utils.UNSHUFFLED_SUFFIX, tmp_dir, 3)
+    for max_memory_bytes, num_workers in [(0, 1), (1000, 1), (1000, 2)]:
+      for filename in filenames:
+        generator_utils.write_records(records, filename)
+      generator_utils.shuffle_dataset(
+          filenames, max_memory_bytes=max_memory_bytes,
+          num_workers=num_workers)
+
+      for filename in filenames:
+        self.assertFalse(tf.gfile.Exists(filename))
+        self.assertFalse(tf.gfile.Exists(
+            generator_utils.record_index_filename(filename)))
+        out_filename = filename.replace(generator_utils.UNSHUFFLED_SUFFIX, "")
+        shuffled = generator_utils.read_records(out_filename)
+        self.assertNotEqual(records, shuffled)
+        self.assertEqual(sorted(records), sorted(shuffled))
+        self.assertEqual(1000, generator_utils.num_records(out_filename))
+        os.remove(out_filename)
+        os.remove(generator_utils.record_index_filename(out_filename))
+      self.assertFalse([f for f in os.listdir(tmp_dir) if ".shuffle-" in f])
+
+  def testRecordIndex(self):
+    tmp_dir = self.get_temp_dir()
+    filename = os.path.join(tmp_dir, "indexed-train-00000-of-00001")
+    index_filename = generator_utils.record_index_filename(filename)
+    records = [bytes("record %d" % i, "utf-8") * (i % 5) for i in range(250)]
+    writer = generator_utils.IndexedRecordWriter(filename)
+    for record in records:
+      writer.write(record)
+    writer.close()
+    self.assertEqual([], tf.gfile.Glob(filename[:-len("-00000-of-00001")] +
+                                       "*.index"))
+
+    index = generator_utils.read_record_index(filename)
+    self.assertEqual(250, index["num_records"])
+    self.assertEqual(os.path.getsize(filename), index["file_bytes"])
+    self.assertEqual(250, generator_utils.num_records(filename))
+
+    # A rebuilt index is the same as the one written with the records.
+    os.remove(index_filename)
+    self.assertIsNone(generator_utils.read_record_index(filename))
+    self.assertEqual(index, generator_utils.build_record_index(filename))
+    self.assertEqual(index, generator_utils.read_record_index(filename))
+
+    # Stale indices are ignored.
+    generator_utils.write_records(records[:10], filename + ".tmp")
+    os.rename(filename + ".tmp", filename)
+    self.assertIsNone(generator_utils.read_record_index(filename))
+    self.assertEqual(10, generator_utils.num_records(filename))
+
+    # So are indices of files rewritten at the same size.
+    generator_utils.build_record_index(filename)
+    generator_utils.write_records(records[10:0:-1], filename + ".tmp")
+    os.rename(filename + ".tmp", filename)
+    stat = os.stat(filename)
+    os.utime(filename, (stat.st_atime, stat.st_mtime + 1))
+    self.assertIsNone(generator_utils.read_record_index(filename))
+    self.assertEqual(10, generator_utils.num_records(filename))
+
+    os.remove(filename)
+    os.remove(index_filename)
+    os.remove(generator_utils.record_index_filename(filename + ".tmp"))
+
+  def testPackExamples(self):
+    examples = [{"targets": [1, 2, 3]}, {"targets": [4, 5]},
+                {"targets": [6, 7, 8, 9]}]
+    packed = list(generator_utils.pack_examples(
+        examples, has_inputs=False, packed_length=9, spacing=1))
+    self.assertEqual([
+        {"inputs": [0],
+         "targets": [1, 2, 3, 0, 4, 5],
+         "targets_segmentation": [1, 1, 1, 0, 2, 2],
+         "targets_position": [0, 1, 2, 0, 0, 1]},
+        {"inputs": [0],
+         "targets": [6, 7, 8, 9],
+         "targets_segmentation": [1, 1, 1, 1],
+         "targets_position": [0, 1, 2, 3]}], packed)
+
+  def testPackExamplesBestFitDecreasing(self):
+    rng = random.Random(1)
+    examples = [{"inputs": [rng.randint(1, 9)] * rng.randint(1, 30),
+                 "targets": [rng.randint(1, 9)] * rng.randint(1, 60)}
+                for _ in range(2000)]
+
+    def pack(**kwargs):
+      stats = generator_utils.PackingStats()
+      packed = list(generator_utils.pack_examples(
+          examples, has_inputs=True, packed_length=64, spacing=2,
+          stats=stats, **kwargs))
+      unpacked = []
+      for p in packed:
+        for name in ["inputs", "targets"]:
+          ids = p[name]
+          self.assertLessEqual(len(ids), 64)
+          self.assertEqual(len(ids), len(p[name + "_segmentation"]))
+          self.assertEqual(len(ids), len(p[name + "_position"]))
+        segments = collections.defaultdict(lambda: ([], []))
+        for i, name in enumerate(["inputs", "targets"]):
+          for x, s in zip(p[name], p[name + "_segmentation"]):
+            if s:
+              segments[s][i].append(x)
+        unpacked.extend(tuple(tuple(x) for x in v) for v in segments.values())
+      self.assertEqual(
+          sorted((tuple(e["inputs"]), tuple(e["targets"])) for e in examples),
+          sorted(unpacked))
+      self.assertEqual(len(examples), stats.num_examples)
+      self.assertEqual(len(packed), stats.num_packed)
+      self.assertEqual(
+          (len(examples) - len(packed)) * 2 * 64, stats.padding_saved)
+      return stats
+
+    in_order = pack(queue_size=1)
+    best_fit = pack(queue_size=100, sort_window=100)
+    self.assertGreater(best_fit.fill_ratio, in_order.fill_ratio)
+    self.assertGreater(best_fit.padding_saved, in_order.padding_saved)
+
+  def testOrderedPoolImap(self):
+    num_read = [0]
+
+    def items(n):
+      for i in range(n):
+        num_read[0] += 1
+        yield i
+
+    for num_workers in [1, 3]:
+      self.assertEqual(
+          [i * i for i in range(100)],
+          list(generator_utils.ordered_pool_imap(
+              _square, items(100), num_workers, chunk_size=7)))
+
+    # Items are read only as results are consumed.
+    num_read[0] = 0
+    results = generator_utils.ordered_pool_imap(
+        _square, items(1000), 2, chunk_size=5, max_in_flight=3)
+    self.assertEqual(0, next(results))
+    self.assertLessEqual(num_read[0], 3 * 5)
+    results.close()
+
+    with self.assertRaises(ValueError):
+      list(generator_utils.ordered_pool_imap(_square, [1, -1, 2], 2))
+
   def testMaybeDownload(self):
     tmp_dir = self.get_temp_dir()
     (_, tmp_file_path) = tempfile.mkstemp(dir=tmp_dir)
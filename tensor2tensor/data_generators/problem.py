@@ -158,12 +158,10 @@ def preprocess_example_common(example, hparams, mode):
 
 def _file_num_records_cached(filename):
   """Return the number of TFRecords in a file."""
-  # Cache the result, as this is expensive to compute
+  # Cache the result, as this is expensive to compute without an index file.
   if filename in _file_num_records_cache:
     return _file_num_records_cache[filename]
-  ret = 0
-  for _ in tf.python_io.tf_record_iterator(filename):
-    ret += 1
+  ret = generator_utils.num_records(filename)
   _file_num_records_cache[filename] = ret
   return ret
 
@@ -1184,6 +1182,8 @@ def problem_hparams_to_features(problem_hparams):
 def skip_random_fraction(dataset, data_file):
   # Skip a random fraction at the beginning of the stream.  The skip is
   # essential for synchronous highly-parallel training to avoid multiple
-  # replicas reading the same data in lock-step.
+  # replicas reading the same data in lock-step. The record count comes from
+  # the shard's index file when datagen wrote one, but the skip itself still
+  # reads through the skipped records of the interleaved stream.
   num_skip = random.randint(0, _file_num_records_cached(data_file))
   return dataset.skip(num_skip)
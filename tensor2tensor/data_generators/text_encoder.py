@@ -26,6 +26,7 @@ from __future__ import print_function
 import collections
 from itertools import chain
 import math
+import multiprocessing
 import re
 import tempfile
 import time
@@ -56,6 +57,13 @@ else:
 _UNESCAPE_REGEX = re.compile(r"\\u|\\\\|\\([0-9]+);")
 _ESCAPE_CHARS = set(u"\\_u;0123456789")
 
+# Default number of tokens kept in SubwordTextEncoder's LRU token cache.
+DEFAULT_TOKEN_CACHE_SIZE = 2**16
+
+# Key marking the end of a subtoken in SubwordTextEncoder's subtoken trie. It
+# can never collide with a child key, which are always single characters.
+_TRIE_ID_KEY = None
+
 
 # Unicode utility functions that work with Python 2 and 3
 def native_to_unicode(s):
@@ -98,6 +106,79 @@ def strip_ids(ids, ids_to_strip):
   return ids
 
 
+class LRUCache(object):
+  """Bounded least-recently-used cache with hit/miss/eviction counters.
+
+  Storage is only allocated when the first entry is added, so an unused cache
+  costs next to nothing. A capacity of 0 disables caching.
+  """
+
+  def __init__(self, capacity):
+    self._capacity = capacity
+    self._entries = None
+    self.hits = 0
+    self.misses = 0
+    self.evictions = 0
+
+  @property
+  def capacity(self):
+    return self._capacity
+
+  def __len__(self):
+    return len(self._entries) if self._entries else 0
+
+  def get(self, key):
+    """Returns the value cached for key, or None, updating the counters."""
+    if self._entries is not None and key in self._entries:
+      # Re-insert to mark as most recently used.
+      value = self._entries.pop(key)
+      self._entries[key] = value
+      self.hits += 1
+      return value
+    self.misses += 1
+    return None
+
+  def put(self, key, value):
+    """Caches value for key, evicting the least recently used entry if full."""
+    if self._capacity <= 0:
+      return
+    if self._entries is None:
+      self._entries = collections.OrderedDict()
+    elif key in self._entries:
+      del self._entries[key]
+    elif len(self._entries) >= self._capacity:
+      self._entries.popitem(last=False)
+      self.evictions += 1
+    self._entries[key] = value
+
+  def clear(self):
+    """Drops all entries and frees the storage. Counters are kept."""
+    self._entries = None
+
+  def stats(self):
+    """Returns a dict of cache counters, suitable for logging."""
+    lookups = self.hits + self.misses
+    return {
+        "capacity": self._capacity,
+        "size": len(self),
+        "hits": self.hits,
+        "misses": self.misses,
+        "evictions": self.evictions,
+        "hit_rate": float(self.hits) / lookups if lookups else 0.0,
+    }
+
+
+def log_cache_stats(encoder, name="encoder"):
+  """Logs the token cache counters of encoder, if it has a token cache."""
+  if not hasattr(encoder, "cache_stats"):
+    return
+  stats = encoder.cache_stats()
+  tf.logging.info(
+      "%s token cache: hits=%d misses=%d evictions=%d size=%d/%d "
+      "hit_rate=%.3f", name, stats["hits"], stats["misses"],
+      stats["evictions"], stats["size"], stats["capacity"], stats["hit_rate"])
+
+
 class TextEncoder(object):
   """Base class for converting from ints to/from human readable strings."""
 
@@ -162,11 +243,155 @@ class TextEncoder(object):
         decoded_ids.append(id_ - self._num_reserved_ids)
     return [str(d) for d in decoded_ids]
 
+  def encode_batch(self, strings, num_workers=1):
+    """Transform a batch of strings into a ragged array of int ids.
+
+    Args:
+      strings: list of human-readable strings.
+      num_workers: if greater than 1, encode in this many processes. Only
+        worthwhile for large batches, as every call starts a new pool.
+
+    Returns:
+      ids: int64 numpy array, the concatenated ids of all the strings.
+      offsets: int64 numpy array of length len(strings) + 1, such that the ids
+        of strings[i] are ids[offsets[i]:offsets[i + 1]].
+    """
+    if num_workers > 1 and len(strings) > 1:
+      return _map_batch_in_pool(self, "_encode_batch", strings, num_workers)
+    return self._encode_batch(strings)
+
+  def _encode_batch(self, strings):
+    """Single process implementation of encode_batch."""
+    ids = []
+    offsets = [0]
+    for s in strings:
+      ids.extend(self.encode(s))
+      offsets.append(len(ids))
+    return np.array(ids, dtype=np.int64), np.array(offsets, dtype=np.int64)
+
+  def decode_batch(self, ids, offsets=None, strip_extraneous=False,
+                   num_workers=1):
+    """Transform a batch of id sequences into human-readable strings.
+
+    Args:
+      ids: either a list of id sequences, or, if offsets is given, a flat array
+        of ids as returned by encode_batch.
+      offsets: optional int array splitting ids, as returned by encode_batch.
+      strip_extraneous: bool, whether to strip off extraneous tokens
+        (EOS and PAD).
+      num_workers: if greater than 1, decode in this many processes.
+
+    Returns:
+      list of human-readable strings.
+    """
+    if offsets is not None:
+      ids = np.asarray(ids)
+      ids = [ids[offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1)]
+    ids = [list(x.tolist() if isinstance(x, np.ndarray) else x) for x in ids]
+    if num_workers > 1 and len(ids) > 1:
+      return _map_batch_in_pool(self, "_decode_batch", ids, num_workers,
+                                strip_extraneous=strip_extraneous)
+    return self._decode_batch(ids, strip_extraneous=strip_extraneous)
+
+  def _decode_batch(self, id_lists, strip_extraneous=False):
+    """Single process implementation of decode_batch."""
+    return [self.decode(x, strip_extraneous=strip_extraneous)
+            for x in id_lists]
+
   @property
   def vocab_size(self):
     raise NotImplementedError()
 
 
+# Encoder used by batch worker processes, set by the pool initializer.
+_BATCH_ENCODER = None
+
+
+def _init_batch_worker(encoder):
+  global _BATCH_ENCODER
+  _BATCH_ENCODER = encoder
+
+
+def _run_batch_worker(args):
+  method_name, items, kwargs = args
+  return getattr(_BATCH_ENCODER, method_name)(items, **kwargs)
+
+
+def _map_batch_in_pool(encoder, method_name, items, num_workers, **kwargs):
+  """Runs encoder.<method_name> over chunks of items in a process pool.
+
+  The encoder is sent to each worker once, when the pool starts.
+
+  Args:
+    encoder: a TextEncoder.
+    method_name: "_encode_batch" or "_decode_batch".
+    items: list of inputs to the method.
+    num_workers: number of processes.
+    **kwargs: passed on to the method.
+
+  Returns:
+    The chunk results merged: a ragged (ids, offsets) pair for
+    "_encode_batch", or a list for "_decode_batch".
+  """
+  num_chunks = min(len(items), 4 * num_workers)
+  chunk_size = -(-len(items) // num_chunks)
+  chunks = [(method_name, items[i:i + chunk_size], kwargs)
+            for i in range(0, len(items), chunk_size)]
+  pool = multiprocessing.Pool(
+      num_workers, initializer=_init_batch_worker, initargs=(encoder,))
+  try:
+    results = pool.map(_run_batch_worker, chunks)
+  finally:
+    pool.terminate()
+    pool.join()
+  if method_name != "_encode_batch":
+    return [x for result in results for x in result]
+  return concat_ragged(results)
+
+
+def concat_ragged(ragged_arrays):
+  """Concatenates a list of ragged (ids, offsets) pairs into one pair."""
+  ids = np.concatenate([ids for ids, _ in ragged_arrays])
+  offsets = [np.zeros([1], dtype=np.int64)]
+  base = 0
+  for _, chunk_offsets in ragged_arrays:
+    offsets.append(chunk_offsets[1:] + base)
+    base += chunk_offsets[-1]
+  return ids, np.concatenate(offsets)
+
+
+def pad_ragged(ids, offsets, max_length=0, append_id=None, pad_id=PAD_ID,
+               dtype=np.int32):
+  """Builds a padded batch from a ragged (ids, offsets) pair.
+
+  Args:
+    ids: flat int array of ids, as returned by TextEncoder.encode_batch.
+    offsets: int array splitting ids, as returned by TextEncoder.encode_batch.
+    max_length: if positive, truncate sequences so that they are at most this
+      long, including append_id.
+    append_id: if not None, append this id (e.g. EOS_ID) to every sequence.
+    pad_id: id to pad with.
+    dtype: numpy dtype of the result.
+
+  Returns:
+    numpy array of shape [len(offsets) - 1, longest sequence length].
+  """
+  ids = np.asarray(ids)
+  offsets = np.asarray(offsets)
+  lengths = offsets[1:] - offsets[:-1]
+  extra = 1 if append_id is not None else 0
+  if max_length > 0:
+    lengths = np.minimum(lengths, max_length - extra)
+  width = (int(lengths.max()) if lengths.size else 0) + extra
+  positions = np.arange(width)
+  mask = positions[None, :] < lengths[:, None]
+  padded = np.full([len(lengths), width], pad_id, dtype=dtype)
+  padded[mask] = ids[(offsets[:-1, None] + positions[None, :])[mask]]
+  if append_id is not None:
+    padded[np.arange(len(lengths)), lengths] = append_id
+  return padded
+
+
 class ByteTextEncoder(TextEncoder):
   """Encodes each byte to an id. For 8-bit strings only."""
 
@@ -195,6 +420,15 @@ class ByteTextEncoder(TextEncoder):
     # Python3: join byte arrays and then decode string
     return b"".join(decoded_ids).decode("utf-8", "replace")
 
+  def _encode_batch(self, strings):
+    # Vectorized: one buffer holding the bytes of every string.
+    encoded = [s.encode("utf-8") if is_unicode(s) else s for s in strings]
+    lengths = np.array([len(b) for b in encoded], dtype=np.int64)
+    offsets = np.concatenate(
+        [np.zeros([1], dtype=np.int64), np.cumsum(lengths)])
+    ids = np.frombuffer(b"".join(encoded), dtype=np.uint8).astype(np.int64)
+    return ids + self._num_reserved_ids, offsets
+
   def decode_list(self, ids):
     numres = self._num_reserved_ids
     decoded_ids = []
@@ -439,6 +673,113 @@ def _unescape_token(escaped_token):
   return _UNESCAPE_REGEX.sub(match, trimmed)
 
 
+def _check_reserved_tokens(reserved_tokens):
+  """Returns reserved_tokens, defaulting to RESERVED_TOKENS.
+
+  Args:
+    reserved_tokens: List of reserved tokens or None.
+
+  Returns:
+    The list of reserved tokens.
+
+  Raises:
+    ValueError: if RESERVED_TOKENS is not a prefix of reserved_tokens.
+  """
+  if reserved_tokens is None:
+    return RESERVED_TOKENS
+  # There is not complete freedom in replacing RESERVED_TOKENS.
+  for default, proposed in zip(RESERVED_TOKENS, reserved_tokens):
+    if default != proposed:
+      raise ValueError("RESERVED_TOKENS must be a prefix of "
+                       "reserved_tokens.")
+  return reserved_tokens
+
+
+class _SubtokenCountTables(object):
+  """Counts shared by the SubwordTextEncoder builds over some token counts.
+
+  build_to_target_size builds one vocabulary per bisection step from the same
+  token counts. The alphabet, the escaped tokens and the substring counts of
+  the first refinement iteration, where the vocabulary is the alphabet so that
+  every position is a subtoken boundary, don't depend on min_count and are
+  computed here once. The substring counts also bound the counts of every later
+  iteration, which lets those prune candidates before extending them.
+  """
+
+  def __init__(self, token_counts, reserved_tokens, max_subtoken_length):
+    """Escapes the tokens and counts their substrings.
+
+    Args:
+      token_counts: a dictionary of Unicode strings to int.
+      reserved_tokens: List of reserved tokens.
+      max_subtoken_length: Maximum length of a subtoken, or None.
+    """
+    self.max_subtoken_length = max_subtoken_length
+    # Include all characters from all tokens in the alphabet to guarantee that
+    # any token can be encoded, as well as the reserved tokens and escaping
+    # characters.
+    alphabet_tokens = chain(six.iterkeys(token_counts),
+                            [native_to_unicode(t) for t in reserved_tokens])
+    self.alphabet = {c for token in alphabet_tokens for c in token}
+    self.alphabet |= _ESCAPE_CHARS
+
+    self.escaped_token_counts = []
+    self.substring_counts = collections.defaultdict(int)
+    for token, count in six.iteritems(token_counts):
+      iter_start_time = time.time()
+      escaped_token = _escape_token(token, self.alphabet)
+      self.escaped_token_counts.append((escaped_token, count))
+      for start in range(len(escaped_token)):
+        last_position = len(escaped_token) + 1
+        if max_subtoken_length is not None:
+          last_position = min(last_position, start + max_subtoken_length)
+
+        for end in range(start + 1, last_position):
+          self.substring_counts[escaped_token[start:end]] += count
+      iter_time_secs = time.time() - iter_start_time
+      if iter_time_secs > 0.1:
+        tf.logging.info("Processing token [{0}] took {1} seconds, consider "
+                        "setting Text2TextProblem.max_subtoken_length to a "
+                        "smaller value.".format(token, iter_time_secs))
+
+  def initial_subtoken_counts(self, min_count):
+    """Returns first-iteration subtoken counts that matter at min_count.
+
+    Substrings counted less than min_count are dropped, apart from single
+    characters, whose counts order the alphabet in the vocabulary.
+
+    Args:
+      min_count: an integer, at least 1.
+
+    Returns:
+      A new collections.defaultdict(int), which the caller may modify.
+    """
+    return collections.defaultdict(int, (
+        (s, count) for s, count in six.iteritems(self.substring_counts)
+        if count >= min_count or len(s) == 1))
+
+
+def _parallel_generator_token_counts(generator, num_workers, batch_size=1000):
+  """Counts tokens of the generated text in a pool of num_workers processes."""
+  def batches():
+    batch = []
+    for item in generator:
+      batch.append(native_to_unicode(item))
+      if len(batch) >= batch_size:
+        yield batch
+        batch = []
+    if batch:
+      yield batch
+
+  pool = multiprocessing.Pool(num_workers)
+  try:
+    counters = list(pool.imap_unordered(tokenizer.token_counts, batches()))
+    return tokenizer.merge_token_counts(counters, pool)
+  finally:
+    pool.terminate()
+    pool.join()
+
+
 class SubwordTextEncoder(TextEncoder):
   """Class for invertibly encoding text using a limited vocabulary.
 
@@ -472,14 +813,17 @@ class SubwordTextEncoder(TextEncoder):
 
   """
 
-  def __init__(self, filename=None):
+  def __init__(self, filename=None, cache_size=DEFAULT_TOKEN_CACHE_SIZE):
     """Initialize and read from a file, if provided.
 
     Args:
       filename: filename from which to read vocab. If None, do not load a
         vocab
+      cache_size: maximum number of tokens whose subtoken ids are kept in the
+        LRU token cache. 0 disables the cache.
     """
     self._alphabet = set()
+    self._cache = LRUCache(cache_size)
     self.filename = filename
     if filename is not None:
       self._load_from_file(filename)
@@ -496,6 +840,16 @@ class SubwordTextEncoder(TextEncoder):
     return self._tokens_to_subtoken_ids(
         tokenizer.encode(native_to_unicode(s)))
 
+  def _encode_batch(self, strings):
+    # Like encode, but extending one list rather than one per string.
+    ids = []
+    offsets = [0]
+    for s in strings:
+      for token in tokenizer.encode(native_to_unicode(s)):
+        ids.extend(self._token_to_subtoken_ids(token))
+      offsets.append(len(ids))
+    return np.array(ids, dtype=np.int64), np.array(offsets, dtype=np.int64)
+
   def encode_without_tokenizing(self, token_text):
     """Converts string to list of subtoken ids without calling tokenizer.
 
@@ -558,13 +912,11 @@ class SubwordTextEncoder(TextEncoder):
     Returns:
       a list of integers in the range [0, vocab_size)
     """
-    cache_location = hash(token) % self._cache_size
-    cache_key, cache_value = self._cache[cache_location]
-    if cache_key == token:
-      return cache_value
-    ret = self._escaped_token_to_subtoken_ids(
-        _escape_token(token, self._alphabet))
-    self._cache[cache_location] = (token, ret)
+    ret = self._cache.get(token)
+    if ret is None:
+      ret = self._escaped_token_to_subtoken_ids(
+          _escape_token(token, self._alphabet))
+      self._cache.put(token, ret)
     return ret
 
   def _subtoken_ids_to_tokens(self, subtokens):
@@ -592,34 +944,71 @@ class SubwordTextEncoder(TextEncoder):
       return self._all_subtoken_strings[subtoken]
     return u""
 
-  def _escaped_token_to_subtoken_strings(self, escaped_token):
-    """Converts an escaped token string to a list of subtoken strings.
+  def _escaped_token_to_subtoken_matches(self, escaped_token):
+    """Greedily splits an escaped token into the longest matching subtokens.
+
+    Walks the subtoken trie once from each split point, remembering the
+    longest prefix seen so far which is a complete subtoken. As most tokens
+    end in a single long subtoken, the remainder of the token is looked up
+    directly before walking the trie.
 
     Args:
       escaped_token: An escaped token as a unicode string.
     Returns:
-      A list of subtokens as unicode strings.
+      A list of (end, subtoken_id) pairs, one per subtoken, where `end` is the
+      position in `escaped_token` just past the subtoken.
     """
     # NOTE: This algorithm is greedy; it won't necessarily produce the "best"
     # list of subtokens.
     ret = []
     start = 0
     token_len = len(escaped_token)
+    trie = self._subtoken_trie
+    subtoken_string_to_id = self._subtoken_string_to_id
     while start < token_len:
-      for end in range(
-          min(token_len, start + self._max_subtoken_len), start, -1):
-        subtoken = escaped_token[start:end]
-        if subtoken in self._subtoken_string_to_id:
-          ret.append(subtoken)
-          start = end
+      if token_len - start <= self._max_subtoken_len:
+        subtoken_id = subtoken_string_to_id.get(escaped_token[start:])
+        if subtoken_id is not None:
+          ret.append((token_len, subtoken_id))
+          break
+
+      node = trie
+      end = start
+      subtoken_id = None
+      pos = start
+      while pos < token_len:
+        node = node.get(escaped_token[pos])
+        if node is None:
           break
+        pos += 1
+        if _TRIE_ID_KEY in node:
+          end = pos
+          subtoken_id = node[_TRIE_ID_KEY]
 
-      else:  # Did not break
+      if subtoken_id is None:
         # If there is no possible encoding of the escaped token then one of the
         # characters in the token is not in the alphabet. This should be
         # impossible and would be indicative of a bug.
         assert False, "Token substring not found in subtoken vocabulary."
 
+      ret.append((end, subtoken_id))
+      start = end
+
+    return ret
+
+  def _escaped_token_to_subtoken_strings(self, escaped_token):
+    """Converts an escaped token string to a list of subtoken strings.
+
+    Args:
+      escaped_token: An escaped token as a unicode string.
+    Returns:
+      A list of subtokens as unicode strings.
+    """
+    ret = []
+    start = 0
+    for end, _ in self._escaped_token_to_subtoken_matches(escaped_token):
+      ret.append(escaped_token[start:end])
+      start = end
     return ret
 
   def _escaped_token_to_subtoken_ids(self, escaped_token):
@@ -631,8 +1020,8 @@ class SubwordTextEncoder(TextEncoder):
       A list of subtoken IDs as integers.
     """
     return [
-        self._subtoken_string_to_id[subtoken]
-        for subtoken in self._escaped_token_to_subtoken_strings(escaped_token)
+        subtoken_id for _, subtoken_id in
+        self._escaped_token_to_subtoken_matches(escaped_token)
     ]
 
   @classmethod
@@ -640,7 +1029,8 @@ class SubwordTextEncoder(TextEncoder):
                            generator,
                            target_size,
                            max_subtoken_length=None,
-                           reserved_tokens=None):
+                           reserved_tokens=None,
+                           num_workers=1):
     """Builds a SubwordTextEncoder from the generated text.
 
     Args:
@@ -653,14 +1043,19 @@ class SubwordTextEncoder(TextEncoder):
       reserved_tokens: List of reserved tokens. The global variable
         `RESERVED_TOKENS` must be a prefix of `reserved_tokens`. If this
         argument is `None`, it will use `RESERVED_TOKENS`.
+      num_workers: int, if greater than 1, the generated text is tokenized in
+        this many processes.
 
     Returns:
       SubwordTextEncoder with `vocab_size` approximately `target_size`.
     """
-    token_counts = collections.defaultdict(int)
-    for item in generator:
-      for tok in tokenizer.encode(native_to_unicode(item)):
-        token_counts[tok] += 1
+    if num_workers > 1:
+      token_counts = _parallel_generator_token_counts(generator, num_workers)
+    else:
+      token_counts = collections.defaultdict(int)
+      for item in generator:
+        for tok in tokenizer.encode(native_to_unicode(item)):
+          token_counts[tok] += 1
     encoder = cls.build_to_target_size(
         target_size, token_counts, 1, 1e3,
         max_subtoken_length=max_subtoken_length,
@@ -707,18 +1102,19 @@ class SubwordTextEncoder(TextEncoder):
     if target_size < 1:
       raise ValueError("Target size must be positive.")
 
-    if reserved_tokens is None:
-      reserved_tokens = RESERVED_TOKENS
+    reserved_tokens = _check_reserved_tokens(reserved_tokens)
+    # Escaping and counting substrings for the first iteration is the same for
+    # every min_count, so it is done once for all the bisection steps.
+    count_tables = _SubtokenCountTables(
+        token_counts, reserved_tokens, max_subtoken_length)
 
     def bisect(min_val, max_val):
       """Bisection to find the right size."""
       present_count = (max_val + min_val) // 2
       tf.logging.info("Trying min_count %d" % present_count)
       subtokenizer = cls()
-      subtokenizer.build_from_token_counts(
-          token_counts, present_count, num_iterations,
-          max_subtoken_length=max_subtoken_length,
-          reserved_tokens=reserved_tokens)
+      subtokenizer._build_from_count_tables(  # pylint: disable=protected-access
+          count_tables, present_count, num_iterations, reserved_tokens)
 
       # Being within 1% of the target size is ok.
       is_ok = abs(subtokenizer.vocab_size - target_size) * 100 < target_size
@@ -766,21 +1162,29 @@ class SubwordTextEncoder(TextEncoder):
         is not clear what the space is being reserved for, or when it will be
         filled in.
     """
-    if reserved_tokens is None:
-      reserved_tokens = RESERVED_TOKENS
-    else:
-      # There is not complete freedom in replacing RESERVED_TOKENS.
-      for default, proposed in zip(RESERVED_TOKENS, reserved_tokens):
-        if default != proposed:
-          raise ValueError("RESERVED_TOKENS must be a prefix of "
-                           "reserved_tokens.")
+    reserved_tokens = _check_reserved_tokens(reserved_tokens)
+    count_tables = _SubtokenCountTables(
+        token_counts, reserved_tokens, max_subtoken_length)
+    self._build_from_count_tables(
+        count_tables, min_count, num_iterations, reserved_tokens)
+
+  def _build_from_count_tables(self,
+                               count_tables,
+                               min_count,
+                               num_iterations,
+                               reserved_tokens):
+    """Implementation of build_from_token_counts over shared count tables.
 
-    # Initialize the alphabet. Note, this must include reserved tokens or it can
+    Args:
+      count_tables: a _SubtokenCountTables for the token counts.
+      min_count: an integer - discard subtokens with lower counts.
+      num_iterations: an integer.  how many iterations of refinement.
+      reserved_tokens: List of reserved tokens, already checked by
+        _check_reserved_tokens.
+    """
+    # Initialize the alphabet. Note, this includes reserved tokens or it can
     # result in encoding failures.
-    alphabet_tokens = chain(six.iterkeys(token_counts),
-                            [native_to_unicode(t) for t in reserved_tokens])
-
-    self._init_alphabet_from_tokens(alphabet_tokens)
+    self._alphabet = set(count_tables.alphabet)
 
     # Bootstrap the initial list of subtokens with the characters from the
     # alphabet plus the escaping characters.
@@ -792,31 +1196,38 @@ class SubwordTextEncoder(TextEncoder):
     # with high enough counts for our new vocabulary.
     if min_count < 1:
       min_count = 1
+    max_subtoken_length = count_tables.max_subtoken_length
+    substring_counts = count_tables.substring_counts
     for i in range(num_iterations):
       tf.logging.info("Iteration {0}".format(i))
 
-      # Collect all substrings of the encoded token that break along current
-      # subtoken boundaries.
-      subtoken_counts = collections.defaultdict(int)
-      for token, count in six.iteritems(token_counts):
-        iter_start_time = time.time()
-        escaped_token = _escape_token(token, self._alphabet)
-        subtokens = self._escaped_token_to_subtoken_strings(escaped_token)
-        start = 0
-        for subtoken in subtokens:
-          last_position = len(escaped_token) + 1
-          if max_subtoken_length is not None:
-            last_position = min(last_position, start + max_subtoken_length)
-
-          for end in range(start + 1, last_position):
-            new_subtoken = escaped_token[start:end]
-            subtoken_counts[new_subtoken] += count
-          start += len(subtoken)
-        iter_time_secs = time.time() - iter_start_time
-        if iter_time_secs > 0.1:
-          tf.logging.info("Processing token [{0}] took {1} seconds, consider "
-                          "setting Text2TextProblem.max_subtoken_length to a "
-                          "smaller value.".format(token, iter_time_secs))
+      if i == 0:
+        # The vocabulary is just the alphabet, so the counts along subtoken
+        # boundaries are the substring counts of the shared tables.
+        subtoken_counts = count_tables.initial_subtoken_counts(min_count)
+      else:
+        # Collect all substrings of the encoded token that break along current
+        # subtoken boundaries. A substring counted less than min_count over
+        # all positions can't reach it along boundaries, nor can any longer
+        # substring it is a prefix of, so those are not extended.
+        subtoken_counts = collections.defaultdict(int)
+        for escaped_token, count in count_tables.escaped_token_counts:
+          start = 0
+          for subtoken_end, _ in self._escaped_token_to_subtoken_matches(
+              escaped_token):
+            last_position = len(escaped_token) + 1
+            if max_subtoken_length is not None:
+              last_position = min(last_position, start + max_subtoken_length)
+
+            for end in range(start + 1, last_position):
+              new_subtoken = escaped_token[start:end]
+              if substring_counts[new_subtoken] < min_count:
+                # Single characters are always kept, for the alphabet counts.
+                if end == start + 1:
+                  subtoken_counts[new_subtoken] += count
+                break
+              subtoken_counts[new_subtoken] += count
+            start = subtoken_end
 
       # Array of sets of candidate subtoken strings, by length.
       len_to_subtoken_strings = []
@@ -863,6 +1274,10 @@ class SubwordTextEncoder(TextEncoder):
   def all_subtoken_strings(self):
     return tuple(self._all_subtoken_strings)
 
+  def cache_stats(self):
+    """Returns hit/miss/eviction counters of the token cache as a dict."""
+    return self._cache.stats()
+
   def dump(self):
     """Debugging dump of the current subtoken vocabulary."""
     subtoken_strings = [(i, s)
@@ -899,9 +1314,17 @@ class SubwordTextEncoder(TextEncoder):
         s: i + len(reserved_tokens)
         for i, s in enumerate(subtoken_strings) if s
     }
-    # Initialize the cache to empty.
-    self._cache_size = 2 ** 20
-    self._cache = [(None, None)] * self._cache_size
+    # Character trie over the subtoken strings, used for greedy longest-match
+    # encoding. Each node maps a character to its child node; nodes which end
+    # a subtoken also map _TRIE_ID_KEY to that subtoken's id.
+    self._subtoken_trie = {}
+    for s, i in six.iteritems(self._subtoken_string_to_id):
+      node = self._subtoken_trie
+      for c in s:
+        node = node.setdefault(c, {})
+      node[_TRIE_ID_KEY] = i
+    # Cached segmentations are stale once the vocabulary changes.
+    self._cache.clear()
 
   def _init_alphabet_from_tokens(self, tokens):
     """Initialize alphabet from an iterable of token or subtoken strings."""
@@ -46,6 +46,8 @@ tf.flags.DEFINE_integer('corpus_max_lines', 10000,
                         'How many lines of corpus to read')
 tf.flags.DEFINE_integer('num_iterations', 4, 'Number of iterations')
 tf.flags.DEFINE_bool('split_on_newlines', True, 'Break corpus into lines.')
+tf.flags.DEFINE_integer('num_workers', 1,
+                        'Number of processes used to count corpus tokens.')
 FLAGS = tf.flags.FLAGS
 
 
@@ -58,7 +60,8 @@ def main(unused_argv):
     token_counts = tokenizer.corpus_token_counts(
         FLAGS.corpus_filepattern,
         FLAGS.corpus_max_lines,
-        split_on_newlines=FLAGS.split_on_newlines)
+        split_on_newlines=FLAGS.split_on_newlines,
+        num_workers=FLAGS.num_workers)
 
   elif FLAGS.vocab_filepattern:
     token_counts = tokenizer.vocab_token_counts(FLAGS.vocab_filepattern,
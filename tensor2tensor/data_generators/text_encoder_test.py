@@ -25,14 +25,64 @@ import os
 import random
 import shutil
 import string
+import time
 
 import mock
+import numpy as np
 import six
 from six.moves import range  # pylint: disable=redefined-builtin
 
 from tensor2tensor.data_generators import text_encoder
+from tensor2tensor.data_generators import tokenizer
 import tensorflow as tf
 
+pkg_dir, _ = os.path.split(__file__)
+_TESTDATA = os.path.join(pkg_dir, "test_data")
+_VOCAB_FILE = os.path.join(os.path.dirname(pkg_dir), "test_data",
+                           "vocab.ende.32768")
+
+
+def _greedy_escaped_token_to_subtoken_ids(encoder, escaped_token):
+  """Reference slice-and-lookup longest-match segmentation."""
+  ret = []
+  start = 0
+  token_len = len(escaped_token)
+  while start < token_len:
+    for end in range(
+        min(token_len, start + encoder._max_subtoken_len), start, -1):
+      subtoken = escaped_token[start:end]
+      if subtoken in encoder._subtoken_string_to_id:
+        ret.append(encoder._subtoken_string_to_id[subtoken])
+        start = end
+        break
+    else:
+      assert False, "Token substring not found in subtoken vocabulary."
+  return ret
+
+
+def _corpus_escaped_tokens(encoder):
+  escaped_tokens = []
+  for filename in sorted(os.listdir(_TESTDATA)):
+    if not filename.startswith("corpus-"):
+      continue
+    with io.open(os.path.join(_TESTDATA, filename), encoding="utf-8") as f:
+      for line in f:
+        escaped_tokens.extend(
+            text_encoder._escape_token(token, encoder._alphabet)
+            for token in tokenizer.encode(line))
+  return escaped_tokens
+
+
+def _vocab_escaped_tokens(encoder):
+  """Corpus tokens plus whole words and rare compounds made from the vocab."""
+  words = [text_encoder._unescape_token(s)
+           for s in encoder.all_subtoken_strings if s.endswith("_")]
+  compounds = [words[i] + words[(7 * i) % len(words)].lower()
+               for i in range(len(words))]
+  return _corpus_escaped_tokens(encoder) + [
+      text_encoder._escape_token(token, encoder._alphabet)
+      for token in words + compounds]
+
 
 class NativeToUnicodeTest(tf.test.TestCase):
 
@@ -62,6 +112,84 @@ class EscapeUnescapeTokenTest(tf.test.TestCase):
         "Foo! Bar.\nunder_score back\\slash", unescaped)
 
 
+class LRUCacheTest(tf.test.TestCase):
+
+  def test_evicts_least_recently_used(self):
+    cache = text_encoder.LRUCache(2)
+    self.assertEqual(0, len(cache))
+    cache.put("a", [1])
+    cache.put("b", [2])
+    self.assertEqual([1], cache.get("a"))
+    cache.put("c", [3])
+    self.assertIsNone(cache.get("b"))
+    self.assertEqual([1], cache.get("a"))
+    self.assertEqual([3], cache.get("c"))
+    stats = cache.stats()
+    self.assertEqual(2, stats["size"])
+    self.assertEqual(3, stats["hits"])
+    self.assertEqual(1, stats["misses"])
+    self.assertEqual(1, stats["evictions"])
+
+  def test_zero_capacity_disables_cache(self):
+    cache = text_encoder.LRUCache(0)
+    cache.put("a", [1])
+    self.assertIsNone(cache.get("a"))
+    self.assertEqual(0, len(cache))
+
+
+class BatchEncodeDecodeTest(tf.test.TestCase):
+
+  def _check_batch_round_trip(self, encoder, strings):
+    ids, offsets = encoder.encode_batch(strings)
+    self.assertEqual(len(strings) + 1, len(offsets))
+    for i, s in enumerate(strings):
+      self.assertAllEqual(encoder.encode(s), ids[offsets[i]:offsets[i + 1]])
+    self.assertEqual([encoder.decode(encoder.encode(s)) for s in strings],
+                     encoder.decode_batch(ids, offsets))
+    self.assertEqual(
+        encoder.decode_batch(ids, offsets),
+        encoder.decode_batch([encoder.encode(s) for s in strings]))
+
+    pool_ids, pool_offsets = encoder.encode_batch(strings, num_workers=2)
+    self.assertAllEqual(ids, pool_ids)
+    self.assertAllEqual(offsets, pool_offsets)
+    self.assertEqual(encoder.decode_batch(ids, offsets),
+                     encoder.decode_batch(ids, offsets, num_workers=2))
+
+  def test_byte_text_encoder(self):
+    self._check_batch_round_trip(
+        text_encoder.ByteTextEncoder(), ["hello", "", "na\u00efve \u2603"])
+
+  def test_token_text_encoder(self):
+    encoder = text_encoder.TokenTextEncoder(
+        None, vocab_list="a b c d".split(), reverse=True)
+    self._check_batch_round_trip(encoder, ["a b", "c", "", "d d a"])
+
+  def test_subword_text_encoder(self):
+    corpus = "the quick brown fox jumps over the lazy dog"
+    encoder = text_encoder.SubwordTextEncoder.build_to_target_size(
+        100, collections.Counter(corpus.split(" ")), 2, 10)
+    self._check_batch_round_trip(
+        encoder, [corpus, "", "THE DOG", "quick quick brown"])
+
+  def test_pad_ragged(self):
+    ids = [5, 6, 7, 8, 9, 10]
+    offsets = [0, 3, 3, 6]
+    self.assertAllEqual([[5, 6, 7], [0, 0, 0], [8, 9, 10]],
+                        text_encoder.pad_ragged(ids, offsets))
+    self.assertAllEqual(
+        [[5, 6, 1], [1, 0, 0], [8, 9, 1]],
+        text_encoder.pad_ragged(ids, offsets, max_length=3,
+                                append_id=text_encoder.EOS_ID))
+
+  def test_concat_ragged(self):
+    ids, offsets = text_encoder.concat_ragged([
+        (np.array([1, 2]), np.array([0, 1, 2])),
+        (np.array([3]), np.array([0, 0, 1]))])
+    self.assertAllEqual([1, 2, 3], ids)
+    self.assertAllEqual([0, 1, 2, 2, 3], offsets)
+
+
 class TokenTextEncoderTest(tf.test.TestCase):
 
   @classmethod
@@ -362,6 +490,125 @@ class SubwordTextEncoderTest(tf.test.TestCase):
     reconstructed_corpus = encoder.decode(encoder.encode(corpus))
     self.assertEqual(corpus, reconstructed_corpus)
 
+  def test_build_from_generator_parallel(self):
+    corpus = "The quick brown fox jumps over the lazy dog"
+
+    def gen():
+      for i in range(30):
+        yield "%s %d" % (corpus, i)
+
+    encoder = text_encoder.SubwordTextEncoder.build_from_generator(gen(), 50)
+    parallel_encoder = text_encoder.SubwordTextEncoder.build_from_generator(
+        gen(), 50, num_workers=2)
+    self.assertEqual(encoder.all_subtoken_strings,
+                     parallel_encoder.all_subtoken_strings)
+
+  def test_shared_count_tables(self):
+    corpus = ("the quick brown fox jumps over the lazy dog while the other "
+              "quick brown foxes sleep through the thunderous quacking")
+    token_counts = collections.Counter(corpus.split(" "))
+    count_tables = text_encoder._SubtokenCountTables(
+        token_counts, text_encoder.RESERVED_TOKENS, None)
+    for min_count in [3, 1, 2, 3]:
+      encoder = text_encoder.SubwordTextEncoder()
+      encoder.build_from_token_counts(token_counts, min_count)
+      shared_encoder = text_encoder.SubwordTextEncoder()
+      shared_encoder._build_from_count_tables(
+          count_tables, min_count, 4, text_encoder.RESERVED_TOKENS)
+      self.assertEqual(encoder.all_subtoken_strings,
+                       shared_encoder.all_subtoken_strings)
+
+  def test_token_cache(self):
+    corpus = "the quick brown fox jumps over the lazy dog"
+    token_counts = collections.Counter(corpus.split(" "))
+    encoder = text_encoder.SubwordTextEncoder.build_to_target_size(
+        100, token_counts, 2, 10)
+    uncached_encoder = text_encoder.SubwordTextEncoder(cache_size=0)
+    uncached_encoder._init_subtokens_from_list(
+        list(encoder.all_subtoken_strings))
+    uncached_encoder._init_alphabet_from_tokens(encoder.all_subtoken_strings)
+
+    encoded = encoder.encode(corpus)
+    self.assertEqual(uncached_encoder.encode(corpus), encoded)
+    self.assertEqual(encoded, encoder.encode(corpus))
+    stats = encoder.cache_stats()
+    # "the" repeats within the first encode and all tokens hit the second.
+    self.assertEqual(10, stats["hits"])
+    self.assertEqual(8, stats["misses"])
+    self.assertEqual(0, stats["evictions"])
+    self.assertEqual(0, uncached_encoder.cache_stats()["size"])
+
+  def test_trie_matches_greedy_segmentation(self):
+    encoder = text_encoder.SubwordTextEncoder(_VOCAB_FILE)
+    escaped_tokens = _vocab_escaped_tokens(encoder)
+    escaped_tokens.append(
+        text_encoder._escape_token("Z\u00fcrich_\U0001F638", encoder._alphabet))
+    for escaped_token in escaped_tokens:
+      self.assertEqual(
+          _greedy_escaped_token_to_subtoken_ids(encoder, escaped_token),
+          encoder._escaped_token_to_subtoken_ids(escaped_token))
+
+
+class SubwordTextEncoderBenchmark(tf.test.Benchmark):
+
+  def benchmark_build_to_target_size_zipfian(self):
+    # Synthetic corpus of random words with Zipfian frequencies.
+    rng = random.Random(0)
+    words = ["".join(rng.choice(string.ascii_lowercase)
+                     for _ in range(rng.randint(1, 12)))
+             for _ in range(20000)]
+    token_counts = collections.Counter(
+        {w: 100000 // (i + 1) + 1 for i, w in enumerate(words)})
+
+    # Record which min_counts the bisection tries, for the baseline below.
+    min_counts = []
+    build_fn = text_encoder.SubwordTextEncoder._build_from_count_tables
+
+    def record_min_count(encoder, count_tables, min_count, *args):
+      min_counts.append(min_count)
+      return build_fn(encoder, count_tables, min_count, *args)
+
+    start_time = time.time()
+    with mock.patch.object(text_encoder.SubwordTextEncoder,
+                           "_build_from_count_tables", autospec=True,
+                           side_effect=record_min_count):
+      text_encoder.SubwordTextEncoder.build_to_target_size(
+          2000, token_counts, 1, 1000)
+    shared_time = time.time() - start_time
+
+    # Each bisection step building its vocabulary from scratch.
+    start_time = time.time()
+    for min_count in min_counts:
+      text_encoder.SubwordTextEncoder().build_from_token_counts(
+          token_counts, min_count)
+    unshared_time = time.time() - start_time
+
+    self.report_benchmark(
+        iters=len(min_counts),
+        wall_time=shared_time,
+        extras={"unshared_wall_time": unshared_time,
+                "speedup": unshared_time / max(shared_time, 1e-9)})
+
+  def benchmark_trie_vs_greedy_segmentation(self):
+    encoder = text_encoder.SubwordTextEncoder(_VOCAB_FILE)
+    escaped_tokens = _vocab_escaped_tokens(encoder)
+
+    start_time = time.time()
+    for escaped_token in escaped_tokens:
+      _greedy_escaped_token_to_subtoken_ids(encoder, escaped_token)
+    greedy_time = time.time() - start_time
+
+    start_time = time.time()
+    for escaped_token in escaped_tokens:
+      encoder._escaped_token_to_subtoken_ids(escaped_token)
+    trie_time = time.time() - start_time
+
+    self.report_benchmark(
+        iters=len(escaped_tokens),
+        wall_time=trie_time,
+        extras={"greedy_wall_time": greedy_time,
+                "speedup": greedy_time / max(trie_time, 1e-9)})
+
 
 if __name__ == "__main__":
   tf.test.main()
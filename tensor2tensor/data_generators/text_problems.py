@@ -181,6 +181,18 @@ class Text2TextProblem(problem.Problem):
     """
     return 0
 
+  @property
+  def packed_queue_size(self):
+    """If this is a packed dataset, how many examples to pack at a time.
+
+    This many packed examples are filled at once, from windows of this many
+    examples sorted by decreasing length. See generator_utils.pack_examples.
+
+    Returns:
+      int
+    """
+    return 1000
+
   # END: Subclass interface
 
   @property
@@ -248,7 +260,9 @@ class Text2TextProblem(problem.Problem):
         self.has_inputs,
         self.packed_length,
         spacing=self.packed_spacing,
-        chop_long_sequences=not self.has_inputs)
+        queue_size=self.packed_queue_size,
+        chop_long_sequences=not self.has_inputs,
+        sort_window=self.packed_queue_size)
 
   def generate_encoded_samples(self, data_dir, tmp_dir, dataset_split):
     generator = self.generate_samples(data_dir, tmp_dir, dataset_split)
@@ -622,6 +636,9 @@ def text2text_generate_encoded(sample_generator,
     sample["targets"] = targets_vocab.encode(sample["targets"])
     sample["targets"].append(text_encoder.EOS_ID)
     yield sample
+  if has_inputs:
+    text_encoder.log_cache_stats(vocab, "inputs")
+  text_encoder.log_cache_stats(targets_vocab, "targets")
 
 
 @registry.register_problem
@@ -44,6 +44,9 @@ from __future__ import division
 from __future__ import print_function
 
 import collections
+import functools
+import multiprocessing
+import re
 import sys
 import unicodedata
 import six
@@ -54,11 +57,79 @@ import tensorflow as tf
 _native_to_unicode = (lambda s: s.decode("utf-8")) if six.PY2 else (lambda s: s)
 
 
-# This set contains all letter and number characters.
-_ALPHANUMERIC_CHAR_SET = set(
-    six.unichr(i) for i in range(sys.maxunicode)
-    if (unicodedata.category(six.unichr(i)).startswith("L") or
-        unicodedata.category(six.unichr(i)).startswith("N")))
+def _compute_alphanumeric_ranges():
+  """Returns (first, last) code point ranges of all letters and numbers.
+
+  This scans every code point, which takes a while; alphanumeric_ranges.py
+  holds its precomputed output.
+  """
+  ranges = []
+  for i in range(sys.maxunicode):
+    if unicodedata.category(six.unichr(i))[0] in ("L", "N"):
+      if ranges and ranges[-1][1] == i - 1:
+        ranges[-1] = (ranges[-1][0], i)
+      else:
+        ranges.append((i, i))
+  return tuple(ranges)
+
+
+def _isalnum_matches_ranges(ranges):
+  """Whether unicode.isalnum() is true for exactly the code points in ranges."""
+  is_alnum = [False] * sys.maxunicode
+  for first, last in ranges:
+    is_alnum[first:last + 1] = [True] * (last + 1 - first)
+  return all(six.unichr(i).isalnum() == is_alnum[i]
+             for i in range(sys.maxunicode))
+
+
+def _alphanumeric_char_classes():
+  """Returns regex character classes for alphanumeric and other characters.
+
+  Uses the precomputed ranges in alphanumeric_ranges.py when they were made for
+  this Python's Unicode data, and scans every code point otherwise.
+
+  Returns:
+    A (alnum_class, non_alnum_class) tuple of unicode regex strings.
+  """
+  from tensor2tensor.data_generators import alphanumeric_ranges  # pylint: disable=g-import-not-at-top
+  if alphanumeric_ranges.UNIDATA_VERSION == unicodedata.unidata_version:
+    if alphanumeric_ranges.ISALNUM_MATCHES:
+      # \w is exactly the alphanumeric characters plus the underscore, and
+      # the regex engine tests it much faster than a large explicit class.
+      return u"[^\\W_]", u"[\\W_]"
+    # Narrow Python builds can't represent code points past sys.maxunicode.
+    ranges = [(first, min(last, sys.maxunicode - 1))
+              for first, last in alphanumeric_ranges.RANGES
+              if first < sys.maxunicode]
+  else:
+    ranges = _compute_alphanumeric_ranges()
+  char_class = u"".join(
+      six.unichr(first) if first == last else
+      u"%s-%s" % (six.unichr(first), six.unichr(last))
+      for first, last in ranges)
+  return u"[%s]" % char_class, u"[^%s]" % char_class
+
+
+# Compiled lazily by _alphanumeric_regexes(), see there.
+_ALPHANUMERIC_REGEXES = None
+
+
+def _alphanumeric_regexes():
+  """Returns regexes for the tokenizer, compiling them on first use.
+
+  Returns:
+    A (run_regex, char_regex) tuple. run_regex matches a maximal run of either
+    alphanumeric or non-alphanumeric characters, so that findall() splits a
+    string at every boundary between the two. char_regex matches a single
+    alphanumeric character.
+  """
+  global _ALPHANUMERIC_REGEXES
+  if _ALPHANUMERIC_REGEXES is None:
+    alnum_class, non_alnum_class = _alphanumeric_char_classes()
+    _ALPHANUMERIC_REGEXES = (
+        re.compile(u"%s+|%s+" % (alnum_class, non_alnum_class), re.UNICODE),
+        re.compile(alnum_class, re.UNICODE))
+  return _ALPHANUMERIC_REGEXES
 
 
 def encode(text):
@@ -71,19 +142,14 @@ def encode(text):
   """
   if not text:
     return []
-  ret = []
-  token_start = 0
-  # Classify each character in the input string
-  is_alnum = [c in _ALPHANUMERIC_CHAR_SET for c in text]
-  for pos in range(1, len(text)):
-    if is_alnum[pos] != is_alnum[pos - 1]:
-      token = text[token_start:pos]
-      if token != u" " or token_start == 0:
-        ret.append(token)
-      token_start = pos
-  final_token = text[token_start:]
-  ret.append(final_token)
-  return ret
+  run_regex, _ = _alphanumeric_regexes()
+  tokens = run_regex.findall(text)
+  if len(tokens) <= 2:
+    return tokens
+  # Drop single spaces between tokens; they are implied by the two adjacent
+  # alphanumeric tokens around them.
+  return ([tokens[0]] + [token for token in tokens[1:-1] if token != u" "] +
+          [tokens[-1]])
 
 
 def decode(tokens):
@@ -94,7 +160,8 @@ def decode(tokens):
   Returns:
     a unicode string
   """
-  token_is_alnum = [t[0] in _ALPHANUMERIC_CHAR_SET for t in tokens]
+  _, char_regex = _alphanumeric_regexes()
+  token_is_alnum = [char_regex.match(t) is not None for t in tokens]
   ret = []
   for i, token in enumerate(tokens):
     if i > 0 and token_is_alnum[i - 1] and token_is_alnum[i]:
@@ -144,7 +211,7 @@ def _read_filepattern(filepattern, max_lines=None, split_on_newlines=True):
 
 
 def corpus_token_counts(
-    text_filepattern, corpus_max_lines, split_on_newlines=True):
+    text_filepattern, corpus_max_lines, split_on_newlines=True, num_workers=1):
   """Read the corpus and compute a dictionary of token counts.
 
   Args:
@@ -153,10 +220,16 @@ def corpus_token_counts(
     split_on_newlines: A boolean. If true, then split files by lines and strip
         leading and trailing whitespace from each line. Otherwise, treat each
         file as a single string.
+    num_workers: An integer; if greater than 1, tokenize the corpus in this
+        many processes. The counts are the same as when reading serially.
 
   Returns:
     a dictionary mapping token to count.
   """
+  if num_workers > 1:
+    return _parallel_corpus_token_counts(
+        text_filepattern, corpus_max_lines, split_on_newlines, num_workers)
+
   counts = collections.Counter()
   for doc in _read_filepattern(
       text_filepattern,
@@ -167,6 +240,142 @@ def corpus_token_counts(
   return counts
 
 
+def token_counts(texts):
+  """Returns a Counter of the tokens in an iterable of unicode strings."""
+  counts = collections.Counter()
+  for text in texts:
+    counts.update(encode(text))
+  return counts
+
+
+def merge_token_counts(counters, pool=None):
+  """Sums token Counters pairwise, as a tree reduction.
+
+  Args:
+    counters: A list of collections.Counter.
+    pool: An optional multiprocessing.Pool; if given, each level of the tree is
+        merged in parallel.
+
+  Returns:
+    A collections.Counter holding the sum of `counters`.
+  """
+  map_fn = pool.map if pool is not None else map
+  counters = list(counters)
+  while len(counters) > 1:
+    pairs = [counters[i:i + 2] for i in range(0, len(counters), 2)]
+    counters = list(map_fn(_sum_counters, pairs))
+  return counters[0] if counters else collections.Counter()
+
+
+def _sum_counters(counters):
+  total = collections.Counter()
+  for counter in counters:
+    total.update(counter)
+  return total
+
+
+# Files are split into byte ranges of at least this size for parallel counting.
+_MIN_SHARD_BYTES = 1 << 20
+
+
+def _corpus_shards(filenames, split_on_newlines, num_workers):
+  """Splits files into (filename, start, end) work units, in corpus order.
+
+  When splitting on newlines, large files are cut into byte ranges; a range
+  owns every line which starts inside it. Otherwise each file is a unit, with
+  `end` set to None.
+  """
+  if not split_on_newlines:
+    return [(filename, 0, None) for filename in filenames]
+  sizes = [tf.gfile.Stat(filename).length for filename in filenames]
+  shard_bytes = max(sum(sizes) // (4 * num_workers) + 1, _MIN_SHARD_BYTES)
+  shards = []
+  for filename, size in zip(filenames, sizes):
+    for start in range(0, max(size, 1), shard_bytes):
+      shards.append((filename, start, min(start + shard_bytes, size)))
+  return shards
+
+
+def _shard_token_counts(shard, split_on_newlines, max_lines):
+  """Counts tokens in one work unit from _corpus_shards.
+
+  Mirrors _read_filepattern on a single file, reading at most max_lines lines.
+
+  Args:
+    shard: A (filename, start, end) tuple.
+    split_on_newlines: A boolean, as in corpus_token_counts.
+    max_lines: If set, stop reading after reading this many lines.
+
+  Returns:
+    A (counts, lines_read) tuple.
+  """
+  filename, start, end = shard
+  counts = collections.Counter()
+  lines_read = 0
+
+  if not split_on_newlines:
+    with tf.gfile.Open(filename) as f:
+      if max_lines:
+        doc = []
+        for line in f:
+          doc.append(line)
+          lines_read += 1
+          if lines_read >= max_lines:
+            break
+        doc = "".join(doc)
+      else:
+        doc = f.read()
+    counts.update(encode(_native_to_unicode(doc)))
+    return counts, lines_read
+
+  with tf.gfile.Open(filename, "rb") as f:
+    if start > 0:
+      # Skip the rest of the line straddling `start`; it belongs to the
+      # previous shard. If `start` begins a line, this only reads a newline.
+      f.seek(start - 1)
+      f.readline()
+    while f.tell() < end:
+      line = f.readline()
+      if not line:
+        break
+      if not six.PY2:
+        line = line.decode("utf-8")
+      counts.update(encode(_native_to_unicode(line.strip())))
+      lines_read += 1
+      if max_lines and lines_read >= max_lines:
+        break
+  return counts, lines_read
+
+
+def _parallel_corpus_token_counts(
+    text_filepattern, corpus_max_lines, split_on_newlines, num_workers):
+  """corpus_token_counts over a pool of num_workers processes."""
+  filenames = sorted(tf.gfile.Glob(text_filepattern))
+  shards = _corpus_shards(filenames, split_on_newlines, num_workers)
+  count_fn = functools.partial(
+      _shard_token_counts,
+      split_on_newlines=split_on_newlines,
+      max_lines=corpus_max_lines)
+  pool = multiprocessing.Pool(num_workers)
+  try:
+    counters = []
+    lines_read = 0
+    # imap keeps corpus order, so the line budget is spent as when serial.
+    for shard, (counts, num_lines) in zip(shards, pool.imap(count_fn, shards)):
+      if corpus_max_lines and lines_read + num_lines > corpus_max_lines:
+        # The budget runs out inside this shard, so recount only its prefix.
+        counts, num_lines = _shard_token_counts(
+            shard, split_on_newlines, corpus_max_lines - lines_read)
+      counters.append(counts)
+      lines_read += num_lines
+      if corpus_max_lines and lines_read >= corpus_max_lines:
+        break
+    return merge_token_counts(counters, pool)
+  finally:
+    pool.terminate()
+    pool.join()
+
+
 def vocab_token_counts(text_filepattern, max_lines):
   """Read a vocab file and return a dictionary of token counts.
 
@@ -21,8 +21,11 @@ from __future__ import print_function
 
 import os
 import random
+import unicodedata
+import mock
 import six
 from six.moves import range  # pylint: disable=redefined-builtin
+from tensor2tensor.data_generators import alphanumeric_ranges
 from tensor2tensor.data_generators import tokenizer
 import tensorflow as tf
 
@@ -46,6 +49,19 @@ class TokenizerTest(tf.test.TestCase):
     self.assertListEqual([u"two", u". \n", u"lines"],
                          tokenizer.encode(u"two. \nlines"))
 
+  def test_encode_underscores_and_symbols(self):
+    self.assertListEqual([u"snake", u"_", u"case", u" \u2603", u"x"],
+                         tokenizer.encode(u"snake_case \u2603x"))
+
+  def test_precomputed_alphanumeric_ranges(self):
+    if alphanumeric_ranges.UNIDATA_VERSION != unicodedata.unidata_version:
+      return
+    self.assertEqual(alphanumeric_ranges.RANGES,
+                     tokenizer._compute_alphanumeric_ranges())
+    self.assertEqual(
+        alphanumeric_ranges.ISALNUM_MATCHES,
+        tokenizer._isalnum_matches_ranges(alphanumeric_ranges.RANGES))
+
   def test_decode(self):
     self.assertEqual(
         u"Dude - that's so cool.",
@@ -112,6 +128,38 @@ class TestTokenCounts(tf.test.TestCase):
         u".\n": 1
     }, token_counts)
 
+  @mock.patch.object(tokenizer, "_MIN_SHARD_BYTES", new=16)
+  def test_parallel_corpus_token_counts_match_serial(self):
+    for split_on_newlines in [True, False]:
+      for max_lines in [0, 1, 5, 7, 1000]:
+        serial = tokenizer.corpus_token_counts(
+            self.corpus_path, corpus_max_lines=max_lines,
+            split_on_newlines=split_on_newlines)
+        parallel = tokenizer.corpus_token_counts(
+            self.corpus_path, corpus_max_lines=max_lines,
+            split_on_newlines=split_on_newlines, num_workers=3)
+        self.assertDictEqual(serial, parallel)
+
+  @mock.patch.object(tokenizer, "_MIN_SHARD_BYTES", new=16)
+  def test_corpus_shards_cover_files(self):
+    filenames = sorted(tf.gfile.Glob(self.corpus_path))
+    shards = tokenizer._corpus_shards(filenames, True, 2)
+    self.assertGreater(len(shards), len(filenames))
+    for filename in filenames:
+      ranges = [(start, end) for f, start, end in shards if f == filename]
+      self.assertEqual(0, ranges[0][0])
+      self.assertEqual(os.path.getsize(filename), ranges[-1][1])
+      for (_, end), (start, _) in zip(ranges, ranges[1:]):
+        self.assertEqual(end, start)
+
+  def test_merge_token_counts(self):
+    counters = [tokenizer.token_counts([u"a b", u"b c"]),
+                tokenizer.token_counts([u"c"]),
+                tokenizer.token_counts([u"a"])]
+    self.assertDictEqual({u"a": 2, u"b": 2, u"c": 2},
+                         tokenizer.merge_token_counts(counters))
+    self.assertDictEqual({}, tokenizer.merge_token_counts([]))
+
   def test_vocab_token_counts(self):
     token_counts = tokenizer.vocab_token_counts(self.vocab_path, 0)
 
@@ -18,10 +18,12 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
+import collections
 import os
 import six
 
 from tensor2tensor.data_generators import generator_utils
+from tensor2tensor.data_generators import image_utils
 from tensor2tensor.data_generators import problem
 from tensor2tensor.data_generators import text_encoder
 from tensor2tensor.utils import metrics
@@ -347,7 +349,9 @@ class VideoProblem(problem.Problem):
 
     By default this function just encodes the numpy array returned as "frame"
     from `self.generate_samples` into a PNG image. Override this function to
-    get other encodings on disk.
+    get other encodings on disk. The frames are encoded by
+    image_utils.encode_images_as_png as they are generated, in as many
+    processes as set with image_utils.set_png_options.
 
     Args:
       data_dir: final data directory. Typically only used in this method to copy
@@ -362,36 +366,41 @@ class VideoProblem(problem.Problem):
     Raises:
       ValueError: if the frame has a different number of channels than required.
     """
-    with tf.Graph().as_default():
-      image_t = tf.placeholder(
-          dtype=tf.uint8, shape=(None, None, None))
-      encoded_image_t = tf.image.encode_png(image_t)
-      with tf.Session() as sess:
-        for features in self.generate_samples(data_dir, tmp_dir, dataset_split):
-          unencoded_frame = features.pop("frame")
-          height, width, channels = unencoded_frame.shape
-          if channels != self.num_channels:
-            raise ValueError("Generated frame has %d channels while the class "
-                             "assumes %d channels." % (channels,
-                                                       self.num_channels))
-          if height != self.frame_height:
-            raise ValueError("Generated frame has height %d while the class "
-                             "assumes height %d." % (height, self.frame_height))
-          if width != self.frame_width:
-            raise ValueError("Generated frame has width %d while the class "
-                             "assumes width %d." % (width, self.frame_width))
-          encoded_frame = sess.run(encoded_image_t, feed_dict={
-              image_t: unencoded_frame})
-          features["image/encoded"] = [encoded_frame]
-          features["image/format"] = ["png"]
-          features["image/height"] = [height]
-          features["image/width"] = [width]
-          if "image/debug" in features:
-            unencoded_debug = features.pop("image/debug")
-            encoded_debug = sess.run(encoded_image_t, feed_dict={
-                image_t: unencoded_debug})
-            features["image/encoded_debug"] = [encoded_debug]
-          yield features
+    # Samples whose frames are being encoded, and whether they have a debug
+    # image encoded right after the frame. Frames are read as encode_frames
+    # consumes them, so this holds a bounded number of samples.
+    pending_samples = collections.deque()
+
+    def frames():
+      for features in self.generate_samples(data_dir, tmp_dir, dataset_split):
+        unencoded_frame = features.pop("frame")
+        height, width, channels = unencoded_frame.shape
+        if channels != self.num_channels:
+          raise ValueError("Generated frame has %d channels while the class "
+                           "assumes %d channels." % (channels,
+                                                     self.num_channels))
+        if height != self.frame_height:
+          raise ValueError("Generated frame has height %d while the class "
+                           "assumes height %d." % (height, self.frame_height))
+        if width != self.frame_width:
+          raise ValueError("Generated frame has width %d while the class "
+                           "assumes width %d." % (width, self.frame_width))
+        unencoded_debug = features.pop("image/debug", None)
+        features["image/format"] = ["png"]
+        features["image/height"] = [height]
+        features["image/width"] = [width]
+        pending_samples.append((features, unencoded_debug is not None))
+        yield unencoded_frame
+        if unencoded_debug is not None:
+          yield unencoded_debug
+
+    encoded_frames = image_utils.encode_images_as_png(frames())
+    for encoded_frame in encoded_frames:
+      features, has_debug = pending_samples.popleft()
+      features["image/encoded"] = [encoded_frame]
+      if has_debug:
+        features["image/encoded_debug"] = [next(encoded_frames)]
+      yield features
 
   def generate_encoded_samples_debug(self, data_dir, tmp_dir, dataset_split):
     """Generate samples of the encoded frames and dump for debug if needed."""
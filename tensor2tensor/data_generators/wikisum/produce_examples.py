@@ -37,6 +37,12 @@ flags.DEFINE_string("refs_dir", None, "Directory with process_X dirs")
 flags.DEFINE_string("urls_dir", "gs://tensor2tensor-data/wikisum/wiki_urls/",
                     "Directory with wiki_urls.json")
 flags.DEFINE_string("vocab_dir", None, "Directory with vocab file")
+flags.DEFINE_string("refs_store_dir", None,
+                    "Local directory to keep the reference store of each "
+                    "shard in, to reuse across runs. Defaults to a temporary "
+                    "directory deleted after each shard.")
+flags.DEFINE_integer("rank_num_workers", 1,
+                     "Number of processes to rank reference paragraphs in.")
 flags.DEFINE_bool("for_commoncrawl", False,
                   "Whether to use WikisumCommoncrawl or WikisumWeb.")
 
@@ -63,7 +69,9 @@ def main(_):
         refs_dir=FLAGS.refs_dir,
         urls_dir=FLAGS.urls_dir,
         vocab_path=os.path.join(FLAGS.vocab_dir, problem.vocab_filename),
-        out_filepaths=out_filepaths)
+        out_filepaths=out_filepaths,
+        refs_store_dir=FLAGS.refs_store_dir,
+        rank_num_workers=FLAGS.rank_num_workers)
 
 
 if __name__ == "__main__":
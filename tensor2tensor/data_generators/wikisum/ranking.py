@@ -0,0 +1,164 @@
+# coding=utf-8
+# Copyright 2018 The Tensor2Tensor Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""TF-IDF ranking of reference paragraphs by the title of a Wikipedia article.
+
+Each paragraph is normalized and filtered once, and scanned once for the
+title tokens with a single regex. The counts of the title tokens in the
+paragraphs are collected as a sparse matrix in coordinate form, and the
+document frequencies and scores of all paragraphs of an article are computed
+with NumPy. rank_articles ranks the paragraphs of many articles in a process
+pool, in order.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import math
+import re
+import string
+
+import numpy as np
+
+from tensor2tensor.data_generators import generator_utils
+from tensor2tensor.data_generators import text_encoder
+from tensor2tensor.data_generators import tokenizer
+from tensor2tensor.data_generators.wikisum import utils as cc_utils
+
+_PUNCTUATION_RE = re.compile("[%s]" % re.escape(string.punctuation))
+_WHITESPACE_RE = re.compile(r"\s+")
+_SCORED_TOKEN_RE = re.compile("[a-z0-9]")
+
+# Number of articles sent to a ranking process at a time.
+_RANK_CHUNK_SIZE = 16
+
+
+def normalize_text(text):
+  text = text.lower()
+  # Space around punctuation
+  text = _PUNCTUATION_RE.sub(r" \g<0> ", text)
+  text = _WHITESPACE_RE.sub(" ", text)
+  text = text.strip()
+  return text
+
+
+def tokens_to_score(tokens):
+  return {t for t in tokens if _SCORED_TOKEN_RE.search(t)}
+
+
+def _title_tokens_regex(title_tokens):
+  """Returns a regex matching the title tokens, as tokenizer.encode splits.
+
+  Title tokens are runs of alphanumeric characters, so a match must not be
+  preceded or followed by an alphanumeric character.
+
+  Args:
+    title_tokens: iterable of unicode tokens.
+  """
+  # pylint: disable=protected-access
+  alnum_class, _ = tokenizer._alphanumeric_char_classes()
+  # pylint: enable=protected-access
+  # Longer tokens first, so that a token is not matched as the prefix of
+  # another.
+  alternatives = u"|".join(
+      re.escape(token) for token in sorted(title_tokens, key=len, reverse=True))
+  return re.compile(u"(?<!%s)(?:%s)(?!%s)" % (
+      alnum_class, alternatives, alnum_class), re.UNICODE)
+
+
+def tfidf_scores(rows, cols, num_paragraphs, num_tokens):
+  """Returns the TF-IDF scores of paragraphs on title tokens.
+
+  Args:
+    rows: int array, the paragraph of each occurrence of a title token.
+    cols: int array, the title token of each occurrence.
+    num_paragraphs: number of paragraphs.
+    num_tokens: number of title tokens.
+
+  Returns:
+    float64 array of shape [num_paragraphs]: for each paragraph, the sum over
+    title tokens, in order, of the number of occurrences of the token times
+    log(num_paragraphs / number of paragraphs with the token), or 1 if none.
+  """
+  scores = np.zeros([num_paragraphs])
+  if not num_paragraphs:
+    return scores
+  counts = np.bincount(
+      np.asarray(rows, dtype=np.int64) * num_tokens + np.asarray(
+          cols, dtype=np.int64),
+      minlength=num_paragraphs * num_tokens).reshape(
+          [num_paragraphs, num_tokens])
+  doc_counts = np.count_nonzero(counts, axis=0)
+  # Adds up the terms one token at a time, as the scores were added up in
+  # Python, so that they are the same to the last bit.
+  for token_id in range(num_tokens):
+    inv_doc_frequency = (
+        float(num_paragraphs) / max(int(doc_counts[token_id]), 1))
+    scores += counts[:, token_id] * math.log(inv_doc_frequency)
+  return scores
+
+
+def rank_reference_paragraphs(wiki_title, references_content, normalize=True):
+  """Rank and return reference paragraphs by tf-idf score on title tokens."""
+  normalized_title = normalize_text(wiki_title)
+  title_tokens = tokens_to_score(
+      set(tokenizer.encode(text_encoder.native_to_unicode(normalized_title))))
+  # The scores add up the terms of the tokens in the set's order.
+  title_token_ids = {token: i for i, token in enumerate(title_tokens)}
+  title_tokens_regex = None
+  if title_tokens:
+    title_tokens_regex = _title_tokens_regex(title_tokens)
+
+  contents, rows, cols = [], [], []
+  for ref in references_content:
+    for paragraph in ref.split("\n"):
+      normalized_paragraph = normalize_text(paragraph)
+      if cc_utils.filter_paragraph(normalized_paragraph):
+        # Skip paragraph
+        continue
+      if title_tokens_regex:
+        token_ids = [title_token_ids[token] for token in
+                     title_tokens_regex.findall(
+                         text_encoder.native_to_unicode(normalized_paragraph))]
+        rows.extend([len(contents)] * len(token_ids))
+        cols.extend(token_ids)
+      contents.append(normalized_paragraph if normalize else paragraph)
+
+  scores = tfidf_scores(rows, cols, len(contents), len(title_tokens))
+  # A stable sort, so that paragraphs with equal scores stay in order.
+  order = np.argsort(-scores, kind="mergesort")
+  return [contents[i] for i in order]
+
+
+def _rank_article(article):
+  return rank_reference_paragraphs(*article)
+
+
+def rank_articles(articles, num_workers=1):
+  """Ranks the reference paragraphs of articles, in order.
+
+  Args:
+    articles: iterable of (wiki_title, references_content) pairs, see
+      rank_reference_paragraphs. It is read as the rankings are consumed, so
+      that at most about 4 * num_workers * _RANK_CHUNK_SIZE articles are held
+      at a time.
+    num_workers: if greater than 1, rank in this many processes.
+
+  Returns:
+    An iterator of the ranked paragraphs of each article, normalized, in
+    order.
+  """
+  return generator_utils.ordered_pool_imap(
+      _rank_article, articles, num_workers, chunk_size=_RANK_CHUNK_SIZE)
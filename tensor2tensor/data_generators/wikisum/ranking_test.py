@@ -0,0 +1,155 @@
+# coding=utf-8
+# Copyright 2018 The Tensor2Tensor Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Tests for tensor2tensor.data_generators.wikisum.ranking."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import collections
+import math
+import random
+import time
+
+from tensor2tensor.data_generators import text_encoder
+from tensor2tensor.data_generators import tokenizer
+from tensor2tensor.data_generators.wikisum import ranking
+from tensor2tensor.data_generators.wikisum import utils as cc_utils
+
+import tensorflow as tf
+
+
+def _reference_rank_reference_paragraphs(wiki_title, references_content):
+  """The ranking of paragraphs one token and one paragraph at a time."""
+  title_tokens = ranking.tokens_to_score(set(tokenizer.encode(
+      text_encoder.native_to_unicode(ranking.normalize_text(wiki_title)))))
+  ref_paragraph_info = []
+  doc_counts = collections.defaultdict(int)
+  for ref in references_content:
+    for paragraph in ref.split("\n"):
+      normalized_paragraph = ranking.normalize_text(paragraph)
+      if cc_utils.filter_paragraph(normalized_paragraph):
+        continue
+      counts = collections.defaultdict(int)
+      for token in tokenizer.encode(
+          text_encoder.native_to_unicode(normalized_paragraph)):
+        if token in title_tokens:
+          counts[token] += 1
+      for token in title_tokens:
+        if counts[token]:
+          doc_counts[token] += 1
+      ref_paragraph_info.append(
+          {"content": normalized_paragraph, "counts": counts})
+
+  for info in ref_paragraph_info:
+    score = 0.
+    for token in title_tokens:
+      inv_doc_frequency = (
+          float(len(ref_paragraph_info)) / max(doc_counts[token], 1))
+      score += info["counts"][token] * math.log(inv_doc_frequency)
+    info["score"] = score
+
+  ref_paragraph_info.sort(key=lambda el: el["score"], reverse=True)
+  return [info["content"] for info in ref_paragraph_info]
+
+
+def _random_articles(num_articles, seed=0, max_paragraphs=20):
+  """Returns (title, references_content) pairs of random text."""
+  rng = random.Random(seed)
+  words = [u"".join(rng.choice(u"abcdefghij") for _ in range(rng.randint(1, 4)))
+           for _ in range(300)]
+  words += [u"Einstein's", u"théorie", u"1905", u"(physics)", u"of", u"the",
+            u"x-ray", u"naïve"]
+
+  def paragraph():
+    text = u" ".join(rng.choice(words) for _ in range(rng.randint(4, 40)))
+    return text + rng.choice([u".", u"", u" !"])
+
+  articles = []
+  for _ in range(num_articles):
+    title = u" ".join(rng.choice(words) for _ in range(rng.randint(0, 5)))
+    references_content = [
+        u"\n".join(paragraph() for _ in range(rng.randint(0, max_paragraphs)))
+        for _ in range(rng.randint(1, 5))]
+    articles.append((title, references_content))
+  return articles
+
+
+class RankingTest(tf.test.TestCase):
+
+  def testMatchesReferenceRanking(self):
+    for title, references_content in _random_articles(50):
+      self.assertEqual(
+          _reference_rank_reference_paragraphs(title, references_content),
+          ranking.rank_reference_paragraphs(title, references_content))
+
+  def testTitleTokensMatchWholeTokens(self):
+    references_content = [
+        u"physics of the physicist is physics .\n"
+        u"metaphysics is not physics-like at all , no\n"
+        u"nothing relevant in this paragraph here\n"
+        u"a second paragraph with nothing relevant"]
+    self.assertEqual(
+        _reference_rank_reference_paragraphs(u"Physics", references_content),
+        ranking.rank_reference_paragraphs(u"Physics", references_content))
+    self.assertEqual(
+        u"physics of the physicist is physics .",
+        ranking.rank_reference_paragraphs(u"Physics", references_content)[0])
+
+  def testEqualScoresKeepOrder(self):
+    references_content = [u"paragraph number %d of the reference . and more"
+                          % i for i in range(10)]
+    self.assertEqual(
+        [ranking.normalize_text(p) for p in references_content],
+        ranking.rank_reference_paragraphs(u"", references_content))
+
+  def testNotNormalized(self):
+    references_content = [u"No Fox here but some more words. And more\n"
+                          u"The Quick, brown fox jumps over it. Again"]
+    self.assertEqual(
+        [u"The Quick, brown fox jumps over it. Again",
+         u"No Fox here but some more words. And more"],
+        ranking.rank_reference_paragraphs(u"Quick", references_content,
+                                          normalize=False))
+
+  def testRankArticles(self):
+    articles = _random_articles(40, seed=1)
+    expected = [ranking.rank_reference_paragraphs(title, references_content)
+                for title, references_content in articles]
+    self.assertEqual(expected, list(ranking.rank_articles(articles)))
+    self.assertEqual(expected,
+                     list(ranking.rank_articles(iter(articles), num_workers=2)))
+
+
+class RankingBenchmark(tf.test.Benchmark):
+
+  def benchmarkRankReferenceParagraphs(self):
+    articles = _random_articles(20, seed=2, max_paragraphs=200)
+    for name, rank_fn in [
+        ("reference", _reference_rank_reference_paragraphs),
+        ("vectorized", ranking.rank_reference_paragraphs)]:
+      start = time.time()
+      for title, references_content in articles:
+        rank_fn(title, references_content)
+      wall_time = time.time() - start
+      self.report_benchmark(
+          name="rank_reference_paragraphs_%s" % name,
+          iters=len(articles),
+          wall_time=wall_time / len(articles),
+          extras={"articles_per_sec": len(articles) / wall_time})
+
+
+if __name__ == "__main__":
+  tf.test.main()
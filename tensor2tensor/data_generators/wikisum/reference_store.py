@@ -0,0 +1,189 @@
+# coding=utf-8
+# Copyright 2018 The Tensor2Tensor Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""On-disk store of reference contents by URL, with a memory-mapped index.
+
+A shard of references holds tens of GB of text, too much to hold in a dict.
+write_reference_store writes the references of a shard once to 2 local
+files:
+
+  * path + ".data": the records, each the length of the URL as a 4-byte
+    little-endian integer, the URL and the content, both UTF-8.
+  * path + ".index.npy": a [3, num_references] uint64 array of the URL
+    hashes, sorted, and the offsets and lengths of their records.
+
+ReferenceStore memory-maps the index and reads the records from the data
+file, so a lookup is a binary search over the hashes and one read. Memory
+use stays that of the index pages in use: the records are read through the
+page cache, not mapped into the process.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import array
+import hashlib
+import os
+import struct
+import threading
+
+import numpy as np
+
+from tensor2tensor.data_generators import text_encoder
+import tensorflow as tf
+
+_DATA_SUFFIX = ".data"
+_INDEX_SUFFIX = ".index.npy"
+
+
+def _url_bytes(url):
+  return url if isinstance(url, bytes) else url.encode("utf-8")
+
+
+def _url_hash(url_bytes):
+  return struct.unpack("<Q", hashlib.md5(url_bytes).digest()[:8])[0]
+
+
+def _record_url(record):
+  url_length, = struct.unpack("<I", record[:4])
+  return record[4:4 + url_length]
+
+
+def exists(path):
+  return os.path.exists(path + _INDEX_SUFFIX)
+
+
+def write_reference_store(references, path):
+  """Writes references to a store at path.
+
+  Args:
+    references: iterable of (url, content) pairs, as str or UTF-8 bytes. If
+      a URL is repeated, its last content is kept.
+    path: path prefix of the store files, on local disk. The files are
+      written under temporary names first, so the store exists only once
+      complete.
+
+  Returns:
+    The number of references in the store.
+  """
+  hashes, offsets, lengths = (array.array("Q") for _ in range(3))
+  offset = 0
+  with open(path + _DATA_SUFFIX + ".incomplete", "wb") as f:
+    for url, content in references:
+      url = _url_bytes(url)
+      record = struct.pack("<I", len(url)) + url + _url_bytes(content)
+      f.write(record)
+      hashes.append(_url_hash(url))
+      offsets.append(offset)
+      lengths.append(len(record))
+      offset += len(record)
+  os.rename(path + _DATA_SUFFIX + ".incomplete", path + _DATA_SUFFIX)
+
+  index = np.array([np.frombuffer(a, dtype=np.uint64) if a else
+                    np.zeros([0], dtype=np.uint64)
+                    for a in [hashes, offsets, lengths]], dtype=np.uint64)
+  del hashes, offsets, lengths
+  # Later records come later among equal hashes, so that the last record of
+  # a repeated URL is the one kept.
+  index = index[:, np.argsort(index[0], kind="mergesort")]
+  same_hash = np.flatnonzero(index[0, 1:] == index[0, :-1])
+  if same_hash.size:
+    index = _drop_repeated_urls(index, same_hash, path + _DATA_SUFFIX)
+
+  with open(path + _INDEX_SUFFIX + ".incomplete", "wb") as f:
+    np.save(f, index)
+  os.rename(path + _INDEX_SUFFIX + ".incomplete", path + _INDEX_SUFFIX)
+  return index.shape[1]
+
+
+def _drop_repeated_urls(index, same_hash, data_filename):
+  """Keeps only the last record of each URL among records of equal hashes."""
+  keep = np.ones([index.shape[1]], dtype=bool)
+  with open(data_filename, "rb") as f:
+
+    def record_url(i):
+      f.seek(int(index[1, i]))
+      return _record_url(f.read(int(index[2, i])))
+
+    for start in np.union1d(same_hash, same_hash + 1):
+      # Only repeated URLs, not hash collisions, are dropped.
+      url = record_url(start)
+      end = start + 1
+      while end < index.shape[1] and index[0, end] == index[0, start]:
+        if record_url(end) == url:
+          keep[start] = False
+          break
+        end += 1
+  return index[:, keep]
+
+
+class ReferenceStore(object):
+  """Reference contents by URL, from the files of write_reference_store.
+
+  Read-only and safe to use from several threads.
+  """
+
+  def __init__(self, path):
+    self._index = np.load(path + _INDEX_SUFFIX, mmap_mode="r")
+    self._hashes = self._index[0]
+    self._file = open(path + _DATA_SUFFIX, "rb")
+    self._lock = threading.Lock()
+
+  def __len__(self):
+    return self._index.shape[1]
+
+  def __contains__(self, url):
+    return self.get(url) is not None
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *unused_exc_info):
+    self.close()
+
+  def get(self, url, default=None):
+    """Returns the content of url, as unicode, or default if not stored."""
+    url = _url_bytes(url)
+    url_hash = np.uint64(_url_hash(url))
+    i = np.searchsorted(self._hashes, url_hash)
+    while i < len(self) and self._hashes[i] == url_hash:
+      with self._lock:
+        self._file.seek(int(self._index[1, i]))
+        record = self._file.read(int(self._index[2, i]))
+      if _record_url(record) == url:
+        return text_encoder.to_unicode(record[4 + len(url):])
+      i += 1
+    return default
+
+  def close(self):
+    self._file.close()
+
+
+def open_or_build(path, references_fn):
+  """Opens the store at path, writing it from references_fn() if missing.
+
+  Args:
+    path: path prefix of the store files, on local disk.
+    references_fn: callable returning the (url, content) pairs to store, see
+      write_reference_store.
+
+  Returns:
+    A ReferenceStore.
+  """
+  if not exists(path):
+    tf.logging.info("Writing reference store %s", path)
+    num_references = write_reference_store(references_fn(), path)
+    tf.logging.info("Wrote %d references to %s", num_references, path)
+  return ReferenceStore(path)
@@ -0,0 +1,104 @@
+# coding=utf-8
+# Copyright 2018 The Tensor2Tensor Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Tests for tensor2tensor.data_generators.wikisum.reference_store."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import os
+import tempfile
+
+import mock
+import numpy as np
+
+from tensor2tensor.data_generators.wikisum import reference_store
+
+import tensorflow as tf
+
+
+class ReferenceStoreTest(tf.test.TestCase):
+
+  def _path(self, name):
+    return os.path.join(tempfile.mkdtemp(dir=self.get_temp_dir()), name)
+
+  def testGet(self):
+    references = [(u"http://a.com/%d" % i, u"content %d\nété" % i)
+                  for i in range(1000)]
+    references.append((b"http://b.com", b"bytes content"))
+    path = self._path("get")
+    self.assertEqual(1001,
+                     reference_store.write_reference_store(references, path))
+    with reference_store.ReferenceStore(path) as store:
+      self.assertEqual(1001, len(store))
+      for url, content in references[:1000]:
+        self.assertEqual(content, store.get(url))
+        self.assertEqual(content, store.get(url.encode("utf-8")))
+      self.assertEqual(u"bytes content", store.get(u"http://b.com"))
+      self.assertIsNone(store.get(u"http://c.com"))
+      self.assertEqual(u"", store.get(u"http://c.com", u""))
+      self.assertIn(u"http://a.com/0", store)
+      self.assertNotIn(u"http://c.com", store)
+
+  def testRepeatedUrlsKeepLastContent(self):
+    references = [(u"u1", u"first"), (u"u2", u"other"), (u"u1", u"second"),
+                  (u"u1", u"third")]
+    path = self._path("repeated")
+    self.assertEqual(
+        2, reference_store.write_reference_store(references, path))
+    with reference_store.ReferenceStore(path) as store:
+      self.assertEqual(u"third", store.get(u"u1"))
+      self.assertEqual(u"other", store.get(u"u2"))
+
+  def testHashCollisions(self):
+    references = [(u"u1", u"c1"), (u"u2", u"c2"), (u"u1", u"c3"),
+                  (u"u3", u"c4")]
+    path = self._path("collisions")
+    with mock.patch.object(reference_store, "_url_hash",
+                           lambda url: 0 if url != b"u3" else 1):
+      self.assertEqual(
+          3, reference_store.write_reference_store(references, path))
+      with reference_store.ReferenceStore(path) as store:
+        self.assertEqual(u"c3", store.get(u"u1"))
+        self.assertEqual(u"c2", store.get(u"u2"))
+        self.assertEqual(u"c4", store.get(u"u3"))
+        self.assertIsNone(store.get(u"u4"))
+
+  def testEmpty(self):
+    path = self._path("empty")
+    self.assertEqual(0, reference_store.write_reference_store([], path))
+    with reference_store.ReferenceStore(path) as store:
+      self.assertEqual(0, len(store))
+      self.assertIsNone(store.get(u"u1"))
+
+  def testOpenOrBuild(self):
+    path = self._path("open_or_build")
+    calls = []
+
+    def references_fn():
+      calls.append(1)
+      return iter([(u"u1", u"c1")])
+
+    for _ in range(2):
+      store = reference_store.open_or_build(path, references_fn)
+      self.assertEqual(u"c1", store.get(u"u1"))
+      store.close()
+    self.assertEqual(1, len(calls))
+    index = np.load(path + ".index.npy")
+    self.assertEqual((3, 1), index.shape)
+
+
+if __name__ == "__main__":
+  tf.test.main()
@@ -21,19 +21,18 @@ import collections
 import contextlib
 import datetime
 import gzip
+import io
 import os
 import re
+import resource
+import sys
+import threading
 import urllib
 
-import tensorflow as tf
+import six
+from six.moves import queue
 
-# pylint: disable=g-import-not-at-top
-# To maintain compatibility with Python 2 and 3
-try:
-  import cStringIO as StringIO
-except ImportError:
-  import io as StringIO
-# pylint: enable=g-import-not-at-top
+import tensorflow as tf
 
 
 # Each entry is a URL to the wet.paths.gz file for that CommonCrawl dump.
@@ -48,10 +47,21 @@ METADTA_SUFFIX = '.metadata.json'
 
 
 
+# Bytes of a WET file parsed at a time.
+_WET_READ_SIZE = 16 * 1024 * 1024
+
+
 def readahead(path):
   return path
 
 
+def _native_str(s):
+  """Returns a UTF-8 bytes or native string as a native string."""
+  if isinstance(s, str):
+    return s
+  return s.decode('utf-8', 'replace')
+
+
 class WETHeader(collections.namedtuple('WETHeader', ['url', 'length'])):
   URI_HEADER = 'WARC-Target-URI: '
   LENGTH_HEADER = 'Content-Length: '
@@ -65,20 +75,27 @@ class WETHeader(collections.namedtuple('WETHeader', ['url', 'length'])):
     if not line:
       # EOF
       return None
-    while not line.startswith(cls.LENGTH_HEADER):
-      if line.startswith(cls.URI_HEADER):
-        url = line[len(cls.URI_HEADER):].strip()
+    uri_header, length_header = cls.URI_HEADER, cls.LENGTH_HEADER
+    if isinstance(line, bytes):
+      uri_header, length_header = _WET_URI_HEADER, _WET_LENGTH_HEADER
+    while not line.startswith(length_header):
+      if line.startswith(uri_header):
+        url = _native_str(line[len(uri_header):].strip())
       line = f.readline()
 
     # Consume empty separator
     f.readline()
 
     # Read content
-    length = int(line.split(':')[1])
+    length = int(line[len(length_header):])
 
     return cls(url, length)
 
 
+_WET_URI_HEADER = WETHeader.URI_HEADER.encode('ascii')
+_WET_LENGTH_HEADER = WETHeader.LENGTH_HEADER.encode('ascii')
+
+
 class WETRecord(collections.namedtuple('WETRecord', ['url', 'content'])):
 
   @classmethod
@@ -97,18 +114,104 @@ class WETRecord(collections.namedtuple('WETRecord', ['url', 'content'])):
     return cls(header.url, content)
 
 
-def wet_records_from_file_obj(f, take_ownership=False):
-  """Iterate through records in WET file object."""
-  while True:
-    record = WETRecord.read(f)
+def _line_end(buf, pos, at_eof):
+  """Returns the offset past the line at pos in buf, or None if incomplete."""
+  newline = buf.find(b'\n', pos)
+  if newline >= 0:
+    return newline + 1
+  return len(buf) if at_eof else None
+
+
+def _header_line(buf, header, start, end):
+  """Returns the offset of the last line in buf[start:end] with header."""
+  line = buf.rfind(b'\n' + header, start, end)
+  if line >= 0:
+    return line + 1
+  return start if buf.startswith(header, start) else -1
+
+
+def _parse_wet_records(buf, at_eof):
+  """Parses the complete WET records at the start of a buffer.
 
-    if record is None:
+  Parses as WETRecord.read does, but searches the buffer for the headers and
+  slices the contents out of it, instead of reading line by line.
+
+  Args:
+    buf: bytearray, the next bytes of a WET file.
+    at_eof: whether buf holds the rest of the file. If so, a truncated last
+      record is parsed as WETRecord.read would.
+
+  Returns:
+    (records, end): the WETRecords parsed and the offset past the last one in
+    buf.
+  """
+  view = memoryview(buf)
+  size = len(buf)
+  records = []
+  end = 0
+  while end < size:
+    # The header ends with the first Content-Length line.
+    if buf.startswith(_WET_LENGTH_HEADER, end):
+      length_line = end
+    else:
+      length_line = buf.find(b'\n' + _WET_LENGTH_HEADER, end) + 1
+      if not length_line:
+        # The header is incomplete.
+        break
+    pos = _line_end(buf, length_line, at_eof)
+    if pos is None:
       break
+    length = int(view[length_line + len(_WET_LENGTH_HEADER):pos].tobytes())
+    url = None
+    uri_line = _header_line(buf, _WET_URI_HEADER, end, length_line)
+    if uri_line >= 0:
+      url = _native_str(view[uri_line + len(_WET_URI_HEADER):
+                             buf.find(b'\n', uri_line)].tobytes().strip())
+    # Empty separator
+    pos = _line_end(buf, pos, at_eof)
+    if pos is None or (pos + length > size and not at_eof):
+      break
+    content = view[pos:pos + length].tobytes()
+    pos = min(pos + length, size)
+    # Empty separators
+    pos = _line_end(buf, pos, at_eof)
+    if pos is not None:
+      pos = _line_end(buf, pos, at_eof)
+    if pos is None:
+      break
+    records.append(WETRecord(url, content))
+    end = pos
+  # Releases the buffer, so that it can be resized.
+  del view
+  return records, end
 
-    if not record.url:
-      continue
 
-    yield record
+def wet_records_from_file_obj(f, take_ownership=False,
+                              read_size=_WET_READ_SIZE):
+  """Iterate through records in WET file object.
+
+  Args:
+    f: file object, opened in binary mode.
+    take_ownership: whether to close f when done.
+    read_size: number of bytes to read and parse at a time.
+
+  Yields:
+    WETRecords with a URL, in order. Their url is a native string and their
+    content bytes.
+  """
+  buf = bytearray()
+  at_eof = False
+  while not at_eof:
+    chunk = f.read(read_size)
+    at_eof = not chunk
+    buf.extend(chunk)
+    records, end = _parse_wet_records(buf, at_eof)
+    del buf[:end]
+
+    for record in records:
+      if not record.url:
+        continue
+      yield record
 
   if take_ownership:
     f.close()
@@ -121,11 +224,88 @@ def wet_records(wet_filepath):
   else:
     fopen = tf.gfile.FastGFile
 
-  with fopen(wet_filepath) as f:
+  with fopen(wet_filepath, 'rb') as f:
     for record in wet_records_from_file_obj(f):
       yield record
 
 
+def wet_records_from_contents(contents):
+  """Generate WETRecords from the bytes of a WET file, gzipped or not."""
+  f = io.BytesIO(contents)
+  if contents[:2] == b'\x1f\x8b':
+    f = gzip.GzipFile(fileobj=f)
+  return wet_records_from_file_obj(f, take_ownership=True)
+
+
+def wet_file_contents(wet_file, tmp_dir):
+  """Returns the bytes of a WET file, downloading it if it is a URL."""
+  if wet_file.startswith('http'):
+    wet_gz = download(wet_file, tmp_dir)
+    try:
+      with tf.gfile.Open(wet_gz, 'rb') as f:
+        return f.read()
+    finally:
+      tf.gfile.Remove(wet_gz)
+  with tf.gfile.Open(readahead(wet_file), 'rb') as f:
+    return f.read()
+
+
+_PREFETCH_DONE = object()
+
+
+def prefetch(items, fn, num_prefetch=1):
+  """Yields (item, fn(item)) for items, computing fn ahead on a thread.
+
+  While the caller handles the result for one item, a background thread
+  computes it for the next ones, e.g. reads the next file. Exceptions raised
+  by fn, or by iterating over items, are raised by the generator in their
+  place in the sequence.
+
+  Args:
+    items: iterable of items.
+    fn: function of an item, run on the background thread.
+    num_prefetch: number of results to compute ahead. The thread may compute
+      one more, while waiting for the caller to take one.
+
+  Yields:
+    (item, fn(item)) pairs, in order.
+  """
+  results = queue.Queue(maxsize=num_prefetch)
+  stop = threading.Event()
+
+  def compute_results():
+    try:
+      for item in items:
+        if stop.is_set():
+          return
+        results.put((item, fn(item), None))
+    except Exception:  # pylint: disable=broad-except
+      results.put((None, None, sys.exc_info()))
+      return
+    results.put(_PREFETCH_DONE)
+
+  thread = threading.Thread(target=compute_results)
+  thread.daemon = True
+  thread.start()
+  try:
+    while True:
+      result = results.get()
+      if result is _PREFETCH_DONE:
+        break
+      item, value, exc_info = result
+      if exc_info:
+        six.reraise(*exc_info)
+      yield item, value
+  finally:
+    stop.set()
+    # Unblocks the thread if it is waiting to put a result.
+    try:
+      while True:
+        results.get_nowait()
+    except queue.Empty:
+      pass
+
+
 def download(url, download_dir):
   outname = os.path.join(download_dir, os.path.basename(url))
   if tf.gfile.Exists(outname):
@@ -201,8 +381,8 @@ def shard(items, num_shards):
 
 
 def gzip_memfile(fname):
-  with tf.gfile.Open(readahead(fname)) as f:
-    memfile = StringIO.StringIO(f.read())
+  with tf.gfile.Open(readahead(fname), 'rb') as f:
+    memfile = io.BytesIO(f.read())
   return gzip.GzipFile(fileobj=memfile)
 
 
@@ -229,7 +409,7 @@ def filter_paragraph(p):
     return True
 
   # Require some letters.
-  if not re.search(_SOME_ALPHA_RE, p):
+  if not _SOME_ALPHA_RE.search(p):
     return True
 
   # Keep this one at the end, probably the most complicated logic.
@@ -245,7 +425,7 @@ def filter_paragraph(p):
         break
       last = i
       num_alpha = 0
-    if re.match(_ONLY_ALPHA_RE, x):
+    if _ONLY_ALPHA_RE.match(x):
       num_alpha += 1
   if not found_sentence:
     return True
@@ -253,9 +433,14 @@ def filter_paragraph(p):
   return False
 
 
+def peak_rss_mb():
+  """Returns the peak resident set size of this process so far, in MB."""
+  return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.
+
+
 @contextlib.contextmanager
 def timing(name=''):
-  """Log start, end, and duration."""
+  """Log start, end, duration and peak RSS."""
   start = datetime.datetime.now()
   timestamp = start.strftime('%H:%M')
   tf.logging.info('Starting job [%s] at %s', name, timestamp)
@@ -266,3 +451,4 @@ def timing(name=''):
   duration = end - start
   duration_mins = duration.total_seconds() / 60
   tf.logging.info('Total time [%s] (m): %d', name, int(duration_mins))
+  tf.logging.info('Peak RSS [%s] (MB): %d', name, int(peak_rss_mb()))
@@ -18,7 +18,12 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
+import gzip
+import io
 import os
+import random
+import time
+
 from tensor2tensor.data_generators.wikisum import utils
 
 import tensorflow as tf
@@ -32,6 +37,41 @@ def _get_testdata(filename):
     return f.read()
 
 
+def _wet_record(url, content):
+  header = [b"WARC/1.0", b"WARC-Type: conversion"]
+  if url is not None:
+    header.append(b"WARC-Target-URI: " + url)
+  header.extend([b"Content-Type: text/plain",
+                 b"Content-Length: %d" % len(content)])
+  return b"\r\n".join(header) + b"\r\n\r\n" + content + b"\r\n\r\n"
+
+
+def _synthetic_wet(num_bytes, seed=0):
+  """Returns the bytes of a WET file of about num_bytes, and its records."""
+  rng = random.Random(seed)
+  words = [b"word%d" % i for i in range(1000)] + [u"été".encode("utf-8")]
+  records = [(None, b"software: test\r\n")]
+  size = 0
+  while size < num_bytes:
+    lines = [b" ".join(rng.choice(words) for _ in range(rng.randint(0, 30)))
+             for _ in range(rng.randint(1, 40))]
+    records.append((b"http://example.com/%d" % len(records),
+                    b"\n".join(lines)))
+    size += len(records[-1][1]) + 150
+  return b"".join(_wet_record(*record) for record in records), records
+
+
+def _wet_records_by_line(wet):
+  f = io.BytesIO(wet)
+  records = []
+  while True:
+    record = utils.WETRecord.read(f)
+    if record is None:
+      return records
+    if record.url:
+      records.append(record)
+
+
 class UtilsTest(tf.test.TestCase):
 
   def test_filter_paragraph(self):
@@ -44,6 +84,93 @@ class UtilsTest(tf.test.TestCase):
         p = _get_testdata(good)
       self.assertFalse(utils.filter_paragraph(p), msg="Filtered %s" % p)
 
+  def test_wet_records_from_file_obj(self):
+    wet, records = _synthetic_wet(200000)
+    expected = [(url.decode("utf-8"), content)
+                for url, content in records if url is not None]
+    self.assertEqual(expected, [tuple(r) for r in _wet_records_by_line(wet)])
+    for read_size in [1, 7, 1000, 10**6]:
+      self.assertEqual(
+          expected,
+          [tuple(r) for r in utils.wet_records_from_file_obj(
+              io.BytesIO(wet), read_size=read_size)])
+
+  def test_wet_records_truncated(self):
+    wet = _wet_record(b"u1", b"content 1") + _wet_record(b"u2", b"content 2")
+    for end in [len(wet) - 2, len(wet) - 6]:
+      self.assertEqual(
+          [tuple(r) for r in _wet_records_by_line(wet[:end])],
+          [tuple(r) for r in utils.wet_records_from_file_obj(
+              io.BytesIO(wet[:end]), read_size=5)])
+
+  def test_wet_records_from_contents(self):
+    wet, records = _synthetic_wet(10000)
+    gz = io.BytesIO()
+    # WET files are gzipped a record at a time.
+    for i in range(0, len(wet), 3000):
+      with gzip.GzipFile(fileobj=gz, mode="wb") as f:
+        f.write(wet[i:i + 3000])
+    self.assertEqual(len(records) - 1,
+                     len(list(utils.wet_records_from_contents(wet))))
+    self.assertEqual(list(utils.wet_records_from_contents(wet)),
+                     list(utils.wet_records_from_contents(gz.getvalue())))
+
+  def test_prefetch(self):
+    self.assertEqual([(i, i * i) for i in range(10)],
+                     list(utils.prefetch(range(10), lambda i: i * i)))
+
+    def fail_on_3(i):
+      if i == 3:
+        raise ValueError("3")
+      return i
+
+    results = []
+    with self.assertRaisesRegexp(ValueError, "3"):
+      for _, i in utils.prefetch(range(10), fail_on_3, num_prefetch=2):
+        results.append(i)
+    self.assertEqual([0, 1, 2], results)
+
+    def fail_after_2():
+      for i in range(2):
+        yield i
+      raise ValueError("items")
+
+    results = []
+    with self.assertRaisesRegexp(ValueError, "items"):
+      for _, i in utils.prefetch(fail_after_2(), lambda i: i):
+        results.append(i)
+    self.assertEqual([0, 1], results)
+    # Stopping early does not leave the thread blocked.
+    for _ in utils.prefetch(range(10), lambda i: i):
+      break
+
+
+class WETParserBenchmark(tf.test.Benchmark):
+
+  def benchmarkWetRecords(self, num_bytes=256 * 1024 * 1024):
+    wet, _ = _synthetic_wet(num_bytes)
+    gz = io.BytesIO()
+    with gzip.GzipFile(fileobj=gz, mode="wb", compresslevel=1) as f:
+      f.write(wet)
+    gz = gz.getvalue()
+
+    def by_line():
+      f = gzip.GzipFile(fileobj=io.BytesIO(gz))
+      return sum(1 for _ in iter(lambda: utils.WETRecord.read(f), None))
+
+    def chunked():
+      return sum(1 for _ in utils.wet_records_from_contents(gz))
+
+    for name, parse_fn in [("by_line", by_line), ("chunked", chunked)]:
+      start = time.time()
+      parse_fn()
+      wall_time = time.time() - start
+      self.report_benchmark(
+          name="wet_records_%s" % name,
+          iters=1,
+          wall_time=wall_time,
+          extras={"mb_per_sec": len(wet) / 1e6 / wall_time})
+
 
 if __name__ == "__main__":
   tf.test.main()
@@ -19,18 +19,16 @@ from __future__ import division
 from __future__ import print_function
 
 import collections
+import functools
 import json
-import math
 import os
-import re
-import string
 import tempfile
 
-import six
 from tensor2tensor.data_generators import generator_utils
 from tensor2tensor.data_generators import problem
 from tensor2tensor.data_generators import text_encoder
-from tensor2tensor.data_generators import tokenizer
+from tensor2tensor.data_generators.wikisum import ranking
+from tensor2tensor.data_generators.wikisum import reference_store
 from tensor2tensor.data_generators.wikisum import utils as cc_utils
 from tensor2tensor.utils import metrics
 from tensor2tensor.utils import registry
@@ -39,6 +37,7 @@ import tensorflow as tf
 PROCESS_FOLDER_PREFIX = "process"
 REF_SHARD_FILE_PREFIX = "references.tfrecords.gz"
 REF_SHARD_FILE = REF_SHARD_FILE_PREFIX + "-%05d-of-01000"
+REF_STORE_FILE = "references.store-%05d-of-01000"
 
 # Support files
 BASE_SUPPORT_DIR = "gs://tensor2tensor-data/wikisum"
@@ -109,8 +108,8 @@ class WikisumBase(problem.Problem):
           total_chars += len(section.text)
 
       # References
-      for i, content in enumerate(
-          six.itervalues(_references_content(ref_files_by_shard[shard_id]))):
+      for i, (_, content) in enumerate(
+          _references(ref_files_by_shard[shard_id])):
         for line in content.split("\n"):
           if line:
             yield _normalize_text(line)
@@ -216,7 +215,8 @@ def _truncate_to_lead_section(example):
 def _make_example_from_record(record):
   features = {
       "url":
-          tf.train.Feature(bytes_list=tf.train.BytesList(value=[record.url])),
+          tf.train.Feature(bytes_list=tf.train.BytesList(
+              value=[tf.compat.as_bytes(record.url)])),
       "content":
           tf.train.Feature(
               bytes_list=tf.train.BytesList(value=[record.content])),
@@ -241,17 +241,32 @@ def _references_files_by_shard(refs_dir):
   return shards
 
 
-def _references_content(ref_files):
-  """Returns dict<str ref_url, str ref_content>."""
+def _references(ref_files):
+  """Generates (str ref_url, str ref_content) pairs from reference files."""
   example_spec = {
       "url": tf.FixedLenFeature([], tf.string),
       "content": tf.FixedLenFeature([], tf.string),
   }
-  data = {}
   for ex in generator_utils.tfrecord_iterator(
       ref_files, gzipped=True, example_spec=example_spec):
-    data[ex["url"]] = text_encoder.to_unicode(ex["content"])
-  return data
+    yield ex["url"], text_encoder.to_unicode(ex["content"])
+
+
+def _references_store(ref_files, shard_id, store_dir):
+  """Returns a ReferenceStore of the references of a shard.
+
+  Args:
+    ref_files: reference files of the shard.
+    shard_id: id of the shard.
+    store_dir: local directory of the store, which is reused if it was
+      written there by an earlier run.
+
+  Returns:
+    A reference_store.ReferenceStore, mapping url to unicode content.
+  """
+  return reference_store.open_or_build(
+      os.path.join(store_dir, REF_STORE_FILE % shard_id),
+      lambda: _references(ref_files))
 
 
 def _wiki_urls_for_shard(shard_id, urls_dir=None):
@@ -319,65 +334,32 @@ def _wiki_articles(shard_id, wikis_dir=None):
             sections=sections)
 
 
-def _token_counts(text, token_set=None):
-  counts = collections.defaultdict(int)
-  for token in tokenizer.encode(text_encoder.native_to_unicode(text)):
-    if token_set and token not in token_set:
-      continue
-    counts[token] += 1
-  return counts
-
-
-def _normalize_text(text):
-  text = text.lower()
-  # Space around punctuation
-  text = re.sub("[%s]" % re.escape(string.punctuation), r" \g<0> ", text)
-  text = re.sub(r"\s+", " ", text)
-  text = text.strip()
-  return text
-
-
-def _tokens_to_score(tokens):
-  return {t for t in tokens if re.search("[a-z0-9]", t)}
-
-
-def rank_reference_paragraphs(wiki_title, references_content, normalize=True):
-  """Rank and return reference paragraphs by tf-idf score on title tokens."""
-  normalized_title = _normalize_text(wiki_title)
-  title_tokens = _tokens_to_score(
-      set(tokenizer.encode(text_encoder.native_to_unicode(normalized_title))))
-  ref_paragraph_info = []
-  doc_counts = collections.defaultdict(int)
-  for ref in references_content:
-    for paragraph in ref.split("\n"):
-      normalized_paragraph = _normalize_text(paragraph)
-      if cc_utils.filter_paragraph(normalized_paragraph):
-        # Skip paragraph
-        continue
-      counts = _token_counts(normalized_paragraph, title_tokens)
-      for token in title_tokens:
-        if counts[token]:
-          doc_counts[token] += 1
-      content = normalized_paragraph if normalize else paragraph
-      info = {"content": content, "counts": counts}
-      ref_paragraph_info.append(info)
-
-  for info in ref_paragraph_info:
-    score = 0.
-    for token in title_tokens:
-      term_frequency = info["counts"][token]
-      inv_doc_frequency = (
-          float(len(ref_paragraph_info)) / max(doc_counts[token], 1))
-      score += term_frequency * math.log(inv_doc_frequency)
-    info["score"] = score
-
-  ref_paragraph_info.sort(key=lambda el: el["score"], reverse=True)
-  return [info["content"] for info in ref_paragraph_info]
+_normalize_text = ranking.normalize_text
+rank_reference_paragraphs = ranking.rank_reference_paragraphs
 
 
 def produce_examples(shard_ids, wikis_dir, refs_dir, urls_dir, vocab_path,
-                     out_filepaths):
-  """Produce examples from shard_ids to out_filepaths."""
+                     out_filepaths, refs_store_dir=None, rank_num_workers=1):
+  """Produce examples from shard_ids to out_filepaths.
+
+  The references of each shard are written to an on-disk
+  reference_store.ReferenceStore, and the references of each wiki are read
+  from it as needed, so memory use does not grow with the size of a shard.
+  The reference paragraphs of the wikis are ranked in rank_num_workers
+  processes while the wikis are encoded.
+
+  Args:
+    shard_ids: ids of the shards to produce examples from.
+    wikis_dir: directory with the wiki_content TFRecords.
+    refs_dir: directory with the process_X directories of reference files.
+    urls_dir: directory with the wiki_urls JSON files.
+    vocab_path: path of the SubwordTextEncoder vocabulary.
+    out_filepaths: paths of the TFRecord files to write.
+    refs_store_dir: local directory to keep the reference store of each
+      shard in, to reuse across runs. Defaults to a temporary directory
+      deleted after each shard.
+    rank_num_workers: number of processes to rank reference paragraphs in.
+  """
   # * Join the Wikipedia articles with their references
   # * Run Tf-idf to sort reference paragraphs
   # * Encode the Wikipedia and reference text with the vocabulary
@@ -387,51 +369,78 @@ def produce_examples(shard_ids, wikis_dir, refs_dir, urls_dir, vocab_path,
 
   vocab = text_encoder.SubwordTextEncoder(vocab_path)
   eot_ids = vocab.encode(EOT)
-
-  def example_generator():
-    """Generate Example dicts."""
-    stats = dict(total_original_wikis=0, total_original_refs=0,
-                 total_found_refs=0, ref_lengths=[], wiki_original_refs=[],
-                 wiki_found_refs=[], wikis_skipped_no_refs=0,
-                 wikis_skipped_short_lead=0, num_wikis_written=0)
+  stats = dict(total_original_wikis=0, total_original_refs=0,
+               total_found_refs=0, ref_lengths=[], wiki_original_refs=[],
+               wiki_found_refs=[], wikis_skipped_no_refs=0,
+               wikis_skipped_short_lead=0, num_wikis_written=0,
+               peak_rss_mb=[])
+  # Wikis whose reference paragraphs are being ranked, in order.
+  pending_wikis = collections.deque()
+
+  def wikis_to_rank():
+    """Yields (title, reference contents) of the wikis with references."""
     ref_files_by_shard = _references_files_by_shard(refs_dir)
     for shard_id in shard_ids:
       tf.logging.info("Processing shard %d", shard_id)
       wiki_urls = _wiki_urls_for_shard(shard_id, urls_dir)
       tf.logging.info("Loaded wiki URLs for shard")
-      refs_content = _references_content(ref_files_by_shard[shard_id])
-      tf.logging.info("Loaded reference content for shard")
-      for i, wiki in enumerate(_wiki_articles(shard_id, wikis_dir)):
-        if not i % 1000:
-          tf.logging.info("Processing wiki index %d for shard %d", i, shard_id)
-        stats["total_original_wikis"] += 1
-
-        # Get reference content
-        wiki_ref_content = []
-        ref_urls = wiki_urls[wiki.url]["refs"]
-        stats["total_original_refs"] += len(ref_urls)
-        stats_wiki_original_refs = len(ref_urls)
-        stats_wiki_found_refs = 0
-        for ref_url in ref_urls:
-          ref_content = refs_content.get(ref_url)
-          if not ref_content:
+      store_dir = refs_store_dir or tempfile.mkdtemp()
+      refs_content = None
+      try:
+        refs_content = _references_store(ref_files_by_shard[shard_id],
+                                         shard_id, store_dir)
+        tf.logging.info("Loaded reference store for shard: %d references",
+                        len(refs_content))
+        for i, wiki in enumerate(_wiki_articles(shard_id, wikis_dir)):
+          if not i % 1000:
+            tf.logging.info("Processing wiki index %d for shard %d", i,
+                            shard_id)
+          stats["total_original_wikis"] += 1
+
+          # Get reference content
+          wiki_ref_content = []
+          ref_urls = wiki_urls[wiki.url]["refs"]
+          stats["total_original_refs"] += len(ref_urls)
+          stats_wiki_original_refs = len(ref_urls)
+          stats_wiki_found_refs = 0
+          for ref_url in ref_urls:
+            ref_content = refs_content.get(ref_url)
+            if not ref_content:
+              continue
+            stats["total_found_refs"] += 1
+            stats["ref_lengths"].append(len(ref_content))
+            stats_wiki_found_refs += 1
+            wiki_ref_content.append(ref_content)
+
+          stats["wiki_original_refs"].append(stats_wiki_original_refs)
+          stats["wiki_found_refs"].append(stats_wiki_found_refs)
+          if not wiki_ref_content or len(wiki_ref_content) < _MIN_REFS:
+            # No/few refs were found
+            stats["wikis_skipped_no_refs"] += 1
             continue
-          stats["total_found_refs"] += 1
-          stats["ref_lengths"].append(len(ref_content))
-          stats_wiki_found_refs += 1
-          wiki_ref_content.append(ref_content)
-
-        stats["wiki_original_refs"].append(stats_wiki_original_refs)
-        stats["wiki_found_refs"].append(stats_wiki_found_refs)
-        if not wiki_ref_content or len(wiki_ref_content) < _MIN_REFS:
-          # No/few refs were found
-          stats["wikis_skipped_no_refs"] += 1
-          continue
 
-        # Rank reference paragraphs with TFIDF
-        wiki_title = _normalize_text(wiki.title)
-        ranked_paragraphs = rank_reference_paragraphs(wiki_title,
-                                                      wiki_ref_content)
+          wiki_title = _normalize_text(wiki.title)
+          pending_wikis.append((wiki_title, wiki))
+          yield wiki_title, wiki_ref_content
+      finally:
+        # The store of a shard may be tens of GB, so it is removed even if
+        # processing fails or the generator is abandoned.
+        if refs_content is not None:
+          refs_content.close()
+        if not refs_store_dir:
+          tf.gfile.DeleteRecursively(store_dir)
+      stats["peak_rss_mb"].append(cc_utils.peak_rss_mb())
+      tf.logging.info("Finished shard %d; peak RSS %d MB", shard_id,
+                      stats["peak_rss_mb"][-1])
+
+  def example_generator():
+    """Generate Example dicts."""
+    # Rank reference paragraphs with TFIDF
+    wikis = wikis_to_rank()
+    ranked_wikis = ranking.rank_articles(wikis, num_workers=rank_num_workers)
+    try:
+      for ranked_paragraphs in ranked_wikis:
+        wiki_title, wiki = pending_wikis.popleft()
 
         # Construct inputs from Wiki title and references
         inputs = []
@@ -462,6 +471,11 @@ def produce_examples(shard_ids, wikis_dir, refs_dir, urls_dir, vocab_path,
             "targets": targets,
             "section_boundaries": section_boundaries,
         }
+    finally:
+      # Stops the ranking processes and cleans up the reference store right
+      # away if this generator is abandoned.
+      ranked_wikis.close()
+      wikis.close()
 
     tf.logging.info("Total: %d, Skipped: %d",
                     stats["num_wikis_written"],
@@ -499,52 +513,93 @@ def _process_folders(tmp_dir):
   return tf.gfile.Glob(os.path.join(tmp_dir, PROCESS_FOLDER_PREFIX) + "*")
 
 
+def _load_wet_file(wet_file, metadata_dir, tmp_dir):
+  """Returns the metadata and the contents of a WET file.
+
+  The contents are None if the metadata has no references.
+  """
+  metadata_fname = os.path.join(
+      metadata_dir, os.path.basename(wet_file)) + cc_utils.METADTA_SUFFIX
+  with tf.gfile.Open(cc_utils.readahead(metadata_fname)) as f:
+    wet_metadata = json.loads(f.read())
+
+  if not wet_metadata:
+    # No references in this WET file
+    return wet_metadata, None
+  return wet_metadata, cc_utils.wet_file_contents(wet_file, tmp_dir)
+
+
+def _references_from_wet_contents(wet_metadata, contents):
+  """Returns (shard ids, serialized Example) of the references in a WET."""
+  references = []
+  if contents is None:
+    return references
+  for wet_record in cc_utils.wet_records_from_contents(contents):
+    shard_ids = wet_metadata.get(wet_record.url)
+    if not shard_ids:
+      # URL not in dataset
+      continue
+
+    # Serialize
+    ex = _make_example_from_record(wet_record)
+    references.append((shard_ids, ex.SerializeToString()))
+  return references
+
+
+def _references_from_wet_file(wet_file, metadata_dir, tmp_dir):
+  return _references_from_wet_contents(
+      *_load_wet_file(wet_file, metadata_dir, tmp_dir))
+
+
+def _references_by_wet_file(wet_files, metadata_dir, tmp_dir, num_workers):
+  """Yields the references of each WET file, see _references_from_wet_file.
+
+  With a single worker, the next WET file is read on a background thread
+  while the current one is parsed. With more, the WET files are read and
+  parsed in a process pool, and their references yielded in order.
+  """
+  if num_workers <= 1:
+    for _, (wet_metadata, contents) in cc_utils.prefetch(
+        wet_files,
+        lambda wet_file: _load_wet_file(wet_file, metadata_dir, tmp_dir)):
+      yield _references_from_wet_contents(wet_metadata, contents)
+    return
+  for references in generator_utils.ordered_pool_imap(
+      functools.partial(_references_from_wet_file, metadata_dir=metadata_dir,
+                        tmp_dir=tmp_dir),
+      wet_files, num_workers, max_in_flight=2 * num_workers):
+    yield references
+
+
 def extract_references_from_wets(wet_files, metadata_dir, out_dir,
-                                 tmp_dir=None):
-  """Extract references from WET files into sharded output files."""
+                                 tmp_dir=None, num_workers=1):
+  """Extract references from WET files into sharded output files.
+
+  Args:
+    wet_files: paths or URLs of the WET files.
+    metadata_dir: directory with the metadata file of each WET file.
+    out_dir: directory to write the reference shards to.
+    tmp_dir: directory to download WET files to.
+    num_workers: number of processes to parse WET files in. The references
+      of all the WET files are written to the shards in the order of the
+      files.
+  """
   # Setup output files
   shard_files = make_ref_shard_files(out_dir)
+  if not tmp_dir:
+    tmp_dir = tempfile.gettempdir()
 
   num_refs = 0
-  for i, wet_file in enumerate(wet_files):
-    num_refs_in_wet = 0
-    tf.logging.info("Processing file %d", i)
-
-    # Read metadata file
-    metadata_fname = os.path.join(
-        metadata_dir, os.path.basename(wet_file)) + cc_utils.METADTA_SUFFIX
-    with tf.gfile.Open(cc_utils.readahead(metadata_fname)) as f:
-      wet_metadata = json.loads(f.read())
-
-    if not wet_metadata:
-      # No references in this WET file
-      continue
-
-    if wet_file.startswith("http"):
-      # download
-      if not tmp_dir:
-        tmp_dir = tempfile.gettempdir()
-      record_gen = cc_utils.wet_records_from_url(wet_file, tmp_dir)
-    else:
-      # local
-      record_gen = cc_utils.wet_records_from_file_obj(
-          cc_utils.gzip_memfile(wet_file), take_ownership=True)
-
-    for wet_record in record_gen:
-      shard_ids = wet_metadata.get(wet_record.url)
-      if not shard_ids:
-        # URL not in dataset
-        continue
-
-      # Serialize and write out
-      ex = _make_example_from_record(wet_record)
-      ex_str = ex.SerializeToString()
+  for i, references in enumerate(_references_by_wet_file(
+      wet_files, metadata_dir, tmp_dir, num_workers)):
+    tf.logging.info("Processed file %d", i)
+    for shard_ids, ex_str in references:
+      # Write out
       for shard_id in shard_ids:
         shard_files[shard_id].write(ex_str)
-      num_refs += 1
-      num_refs_in_wet += 1
+    num_refs += len(references)
 
-    tf.logging.info("Wrote out %d references for this WET", num_refs_in_wet)
+    tf.logging.info("Wrote out %d references for this WET", len(references))
 
   tf.logging.info("Wrote out %d references total", num_refs)
 
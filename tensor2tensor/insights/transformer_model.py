@@ -27,6 +27,7 @@ from tensor2tensor.bin import t2t_trainer
 from tensor2tensor.data_generators import text_encoder
 from tensor2tensor.insights import graph
 from tensor2tensor.insights import query_processor
+from tensor2tensor.utils import decode_cache
 from tensor2tensor.utils import decoding
 from tensor2tensor.utils import trainer_lib
 from tensor2tensor.utils import usr_dir
@@ -119,6 +120,7 @@ class TransformerModel(query_processor.QueryProcessor):
     decode_hp = decoding.decode_hparams()
     decode_hp.add_hparam("shards", 1)
     decode_hp.add_hparam("shard_id", 0)
+    self.decode_hp = decode_hp
 
     # Create the estimator and final hyper parameters.
     self.estimator = trainer_lib.create_estimator(
@@ -132,11 +134,56 @@ class TransformerModel(query_processor.QueryProcessor):
     self.targets_vocab = self.hparams.problem_hparams.vocabulary["targets"]
     self.const_array_size = 10000
 
+    # The inference graph is built and the model weights are loaded once per
+    # server worker, on its first query. Processors are created before the
+    # workers are forked, and TensorFlow sessions do not survive a fork.
+    self._predictor = None
+    self._decode_cache = None
+    self._decode_cache_file = transformer_config.get("decode_cache_file", "")
+
     # Prepare the Transformer's debug data directory.
     run_dirs = sorted(glob.glob(os.path.join("/tmp/t2t_server_dump", "run_*")))
     for run_dir in run_dirs:
       shutil.rmtree(run_dir)
 
+  @property
+  def predictor(self):
+    """The decoding.Predictor used to process queries."""
+    if self._predictor is None:
+      # pylint: disable=protected-access
+      self._predictor = decoding.Predictor(
+          self.estimator, self.hparams,
+          features_fn=decoding._interactive_input_tensor_to_features_dict,
+          inputs_rank=1)
+      self._predictor.warmup(self._query_to_features(""))
+    return self._predictor
+
+  @property
+  def decode_cache(self):
+    """The decode_cache.DecodeCache of the results of process, by query."""
+    if self._decode_cache is None:
+      self._decode_cache = decode_cache.DecodeCache(
+          decode_cache.make_namespace(
+              tf.train.latest_checkpoint(self.estimator.model_dir),
+              self.hparams.problem.name, self.decode_hp, "insights"),
+          capacity=1000,
+          path=self._decode_cache_file or None)
+    return self._decode_cache
+
+  def _encode_query(self, query):
+    input_ids = self.source_vocab.encode(query)
+    input_ids.append(text_encoder.EOS_ID)
+    return input_ids
+
+  def _query_to_features(self, query):
+    """Encodes query in the interactive input format of decoding."""
+    input_ids = self._encode_query(query)
+    x = [1, 100, len(input_ids)] + input_ids
+    x += [0] * (self.const_array_size - len(x))
+    return {
+        "inputs": np.array(x).astype(np.int32),
+    }
+
   def process(self, query):
     """Returns the visualizations for query.
 
@@ -148,40 +195,28 @@ class TransformerModel(query_processor.QueryProcessor):
     """
     tf.logging.info("Processing new query [%s]" %query)
 
-    # Create the new TFDBG hook directory.
+    # Repeated queries are answered from the cache, without decoding. The
+    # predictor is built first so that both use the same checkpoint.
+    predictor = self.predictor
+    query_ids = self._encode_query(query)
+    cached = self.decode_cache.get(query_ids)
+    if cached is not None:
+      self.decode_cache.log_stats()
+      return cached
+
+    # Create the new TFDBG dump directory.
     hook_dir = "/tmp/t2t_server_dump/request_%d" %int(time.time())
     os.makedirs(hook_dir)
-    hooks = [tfdbg.DumpingDebugHook(hook_dir, watch_fn=topk_watch_fn)]
-
-    # TODO(kstevens): This is extremely hacky and slow for responding to
-    # queries.  Figure out a reasonable way to pre-load the model weights before
-    # forking and run queries through the estimator quickly.
-    def server_input_fn():
-      """Generator that returns just the current query."""
-      for _ in range(1):
-        input_ids = self.source_vocab.encode(query)
-        input_ids.append(text_encoder.EOS_ID)
-        x = [1, 100, len(input_ids)] + input_ids
-        x += [0] * (self.const_array_size - len(x))
-        d = {
-            "inputs": np.array(x).astype(np.int32),
-        }
-        yield d
-
-    def input_fn():
-      """Generator that returns just the current query."""
-      gen_fn = decoding.make_input_fn_from_generator(server_input_fn())
-      example = gen_fn()
-      # TODO(kstevens): Make this method public
-      # pylint: disable=protected-access
-      return decoding._interactive_input_tensor_to_features_dict(
-          example, self.hparams)
+
+    def wrap_session(session):
+      return tfdbg.DumpingDebugWrapperSession(
+          session, hook_dir, watch_fn=topk_watch_fn)
 
     # Make the prediction for the current query.
-    result_iter = self.estimator.predict(input_fn, hooks=hooks)
-    result = None
-    for result in result_iter:
-      break
+    predictions = predictor.predict(
+        self._query_to_features(query), wrap_session=wrap_session)
+    result = {key: value[0] for key, value in predictions.items()}
+    predictor.log_stats()
 
     # Extract the beam search information by reading the dumped TFDBG event
     # tensors.  We first read and record the per step beam sequences then record
@@ -295,6 +330,9 @@ class TransformerModel(query_processor.QueryProcessor):
         },
     }
 
-    return {
+    results = {
         "result": [processing_vis, graph_vis],
     }
+    self.decode_cache.put(query_ids, results)
+    self.decode_cache.log_stats()
+    return results
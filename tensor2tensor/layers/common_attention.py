@@ -1502,6 +1502,35 @@ def dot_product_attention(q,
     return tf.matmul(weights, v)
 
 
+def dot_product_attention_time_major(q, k, v, bias, name=None):
+  """Dot-product attention of a single query over time-major keys and values.
+
+  Used for incremental decoding with a preallocated cache, which is stored
+  with the time dimension first so it can be updated in place.
+
+  Args:
+    q: Tensor with shape [batch, heads, 1, depth_k].
+    k: Tensor with shape [length_kv, batch, heads, depth_k].
+    v: Tensor with shape [length_kv, batch, heads, depth_v].
+    bias: bias Tensor broadcastable to [batch, heads, 1, length_kv], or None.
+    name: an optional string
+
+  Returns:
+    Tensor with shape [batch, heads, 1, depth_v].
+  """
+  with tf.variable_scope(
+      name, default_name="dot_product_attention_time_major",
+      values=[q, k, v]):
+    # [length_kv, batch, heads]
+    logits = tf.reduce_sum(tf.squeeze(q, axis=2) * k, axis=-1)
+    if bias is not None:
+      bias = common_layers.cast_like(bias, logits)
+      logits += tf.transpose(bias[:, :, 0, :], [2, 0, 1])
+    weights = tf.nn.softmax(logits, axis=0, name="attention_weights")
+    x = tf.reduce_sum(tf.expand_dims(weights, axis=-1) * v, axis=0)
+    return tf.expand_dims(x, axis=2)
+
+
 def _generate_relative_positions_matrix(length, max_relative_position):
   """Generates matrix of relative positions between inputs."""
   range_vec = tf.range(length)
@@ -3216,6 +3245,10 @@ def multihead_attention(query_antecedent,
            should be empty Tensors of the appropriate shape.
                'k' [batch_size, 0, key_channels]
                'v' [batch_size, 0, value_channels]
+           Instead of 'k' and 'v', it may contain 'k_steps' and 'v_steps',
+           preallocated time-major caches for self-attention of shape
+           [decode_length, batch_size, num_heads, depth], which are updated in
+           place at decode_loop_step, passed in kwargs.
     gap_size: Integer option for dilated attention to indicate spacing between
               memory blocks.
     num_memory_blocks: Integer option to indicate how many memory blocks to look
@@ -3260,6 +3293,8 @@ def multihead_attention(query_antecedent,
     raise ValueError("Value depth (%d) must be divisible by the number of "
                      "attention heads (%d)." % (total_value_depth, num_heads))
   vars_3d_num_heads = num_heads if vars_3d else 0
+  time_major_cache = (
+      cache is not None and memory_antecedent is None and "k_steps" in cache)
   with tf.variable_scope(name, default_name="multihead_attention",
                          values=[query_antecedent, memory_antecedent]):
 
@@ -3290,7 +3325,17 @@ def multihead_attention(query_antecedent,
         k = split_heads(k, num_heads)
         v = split_heads(v, num_heads)
         decode_loop_step = kwargs.get("decode_loop_step")
-        if decode_loop_step is None:
+        if time_major_cache:
+          # Preallocated time-major cache, [decode_length, batch, heads,
+          # depth]. The step is written in place along the first dimension,
+          # so it needs no transposes, and only steps [:i + 1] are read.
+          k = cache["k_steps"] = inplace_ops.alias_inplace_update(
+              cache["k_steps"], decode_loop_step, tf.squeeze(k, axis=2))
+          v = cache["v_steps"] = inplace_ops.alias_inplace_update(
+              cache["v_steps"], decode_loop_step, tf.squeeze(v, axis=2))
+          k = k[:decode_loop_step + 1]
+          v = v[:decode_loop_step + 1]
+        elif decode_loop_step is None:
           k = cache["k"] = tf.concat([cache["k"], k], axis=2)
           v = cache["v"] = tf.concat([cache["v"], v], axis=2)
         else:
@@ -3318,7 +3363,9 @@ def multihead_attention(query_antecedent,
       q *= key_depth_per_head**-0.5
 
     additional_returned_value = None
-    if callable(attention_type):  # Generic way to extend multihead_attention
+    if time_major_cache:
+      x = dot_product_attention_time_major(q, k, v, bias)
+    elif callable(attention_type):  # Generic way to extend multihead_attention
       x = attention_type(q, k, v, **kwargs)
       if isinstance(x, tuple):
         x, additional_returned_value = x  # Unpack
@@ -68,6 +68,26 @@ class CommonAttentionTest(parameterized.TestCase, tf.test.TestCase):
       res = session.run(a)
     self.assertEqual(res.shape, (5, 7, 12, 32))
 
+  def testDotProductAttentionTimeMajor(self):
+    q = np.random.rand(5, 7, 1, 32)
+    k = np.random.rand(5, 7, 12, 32)
+    v = np.random.rand(5, 7, 12, 16)
+    bias = np.random.rand(1, 1, 1, 12)
+    with self.test_session() as session:
+      a = common_attention.dot_product_attention(
+          tf.constant(q, dtype=tf.float32),
+          tf.constant(k, dtype=tf.float32),
+          tf.constant(v, dtype=tf.float32),
+          tf.constant(bias, dtype=tf.float32))
+      b = common_attention.dot_product_attention_time_major(
+          tf.constant(q, dtype=tf.float32),
+          tf.constant(k.transpose([2, 0, 1, 3]), dtype=tf.float32),
+          tf.constant(v.transpose([2, 0, 1, 3]), dtype=tf.float32),
+          tf.constant(bias, dtype=tf.float32))
+      res_a, res_b = session.run([a, b])
+    self.assertEqual(res_b.shape, (5, 7, 1, 16))
+    self.assertAllClose(res_a, res_b)
+
   @parameterized.named_parameters(
       ("", 1, 1, 8, 4, 1, 2),
       ("dynamic_batch", None, 1, 8, 4, 1, 2),
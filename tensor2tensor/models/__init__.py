@@ -12,57 +12,8 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
-"""Models defined in T2T. Imports here force registration."""
-from __future__ import absolute_import
-from __future__ import division
-from __future__ import print_function
-# pylint: disable=unused-import
+"""Models defined in T2T.
 
-from tensor2tensor.layers import modalities  # pylint: disable=g-import-not-at-top
-from tensor2tensor.mesh_tensorflow import mtf_image_transformer
-from tensor2tensor.mesh_tensorflow import mtf_transformer
-from tensor2tensor.mesh_tensorflow.research import experiments_moe
-from tensor2tensor.models import basic
-from tensor2tensor.models import bytenet
-from tensor2tensor.models import distillation
-from tensor2tensor.models import image_transformer
-from tensor2tensor.models import image_transformer_2d
-from tensor2tensor.models import lstm
-from tensor2tensor.models import neural_gpu
-from tensor2tensor.models import resnet
-from tensor2tensor.models import revnet
-from tensor2tensor.models import shake_shake
-from tensor2tensor.models import slicenet
-from tensor2tensor.models import transformer
-from tensor2tensor.models import vanilla_gan
-from tensor2tensor.models import xception
-
-from tensor2tensor.models.research import adafactor_experiments
-from tensor2tensor.models.research import aligned
-from tensor2tensor.models.research import attention_lm
-from tensor2tensor.models.research import attention_lm_moe
-from tensor2tensor.models.research import autoencoders
-from tensor2tensor.models.research import cycle_gan
-from tensor2tensor.models.research import gene_expression
-from tensor2tensor.models.research import lm_experiments
-from tensor2tensor.models.research import multimodel
-from tensor2tensor.models.research import next_frame_basic_deterministic
-from tensor2tensor.models.research import next_frame_basic_stochastic
-from tensor2tensor.models.research import next_frame_emily
-from tensor2tensor.models.research import next_frame_savp
-from tensor2tensor.models.research import next_frame_sv2p
-from tensor2tensor.models.research import rl
-from tensor2tensor.models.research import similarity_transformer
-from tensor2tensor.models.research import super_lm
-from tensor2tensor.models.research import transformer_moe
-from tensor2tensor.models.research import transformer_nat
-from tensor2tensor.models.research import transformer_revnet
-from tensor2tensor.models.research import transformer_sketch
-from tensor2tensor.models.research import transformer_symshard
-from tensor2tensor.models.research import transformer_vae
-from tensor2tensor.models.research import universal_transformer
-from tensor2tensor.models.research import vqa_attention
-from tensor2tensor.models.research import vqa_recurrent_self_attention
-from tensor2tensor.models.research import vqa_self_attention
-
-# pylint: enable=unused-import
+Importing this package does not import the models. Import all_models to
+register all of them; the registry imports single models when looked up.
+"""
@@ -600,6 +600,13 @@ class Transformer(t2t_model.T2TModel):
       decoder_self_attention_bias += common_attention.attention_bias_proximal(
           decode_length)
 
+    # Only greedy decoding preallocates the cache. Beam search reorders the
+    # whole cache every step, so it ignores preallocate_cache and keeps
+    # concatenating.
+    preallocate_cache = (
+        self._decode_hparams.get("preallocate_cache", False) and
+        beam_size <= 1 and hparams.ffn_layer != "conv_relu_conv")
+
     def symbols_to_logits_fn(ids, i, cache):
       """Go from ids to logits for next symbol."""
       ids = ids[:, -1:]
@@ -607,6 +614,7 @@ class Transformer(t2t_model.T2TModel):
       targets = preprocess_targets(targets, i)
 
       bias = decoder_self_attention_bias[:, :, i:i + 1, :i + 1]
+      decode_loop_step = i if preallocate_cache else None
 
       with tf.variable_scope("body"):
         body_outputs = dp(
@@ -617,6 +625,7 @@ class Transformer(t2t_model.T2TModel):
             bias,
             hparams,
             cache,
+            decode_loop_step,
             nonpadding=features_to_nonpadding(features, "targets"))
 
       with tf.variable_scope(target_modality.name):
@@ -651,7 +660,12 @@ class Transformer(t2t_model.T2TModel):
         top_beams=top_beams,
         alpha=alpha,
         batch_size=batch_size,
-        force_decode_length=self._decode_hparams.force_decode_length)
+        force_decode_length=self._decode_hparams.force_decode_length,
+        preallocate_cache=preallocate_cache,
+        # The forced partial targets are not dropped with finished entries.
+        compact_finished_beams=(
+            self._decode_hparams.get("compact_finished_beams", False) and
+            partial_targets is None))
     if partial_targets is not None:
       if beam_size <= 1 or top_beams <= 1:
         ret["outputs"] = ret["outputs"][:, partial_targets_length:]
@@ -812,7 +826,9 @@ def fast_decode(encoder_output,
                 eos_id=beam_search.EOS_ID,
                 batch_size=None,
                 force_decode_length=False,
-                scope_prefix="body/"):
+                scope_prefix="body/",
+                preallocate_cache=False,
+                compact_finished_beams=False):
   """Given encoder output and a symbols to logits function, does fast decoding.
 
   Implements both greedy and beam search decoding, uses beam search iff
@@ -837,6 +853,16 @@ def fast_decode(encoder_output,
     force_decode_length: bool, whether to force the full decode length, or if
       False, stop when all beams hit eos_id.
     scope_prefix: str, prefix for decoder layer variable scopes.
+    preallocate_cache: bool, whether to allocate the self-attention caches up
+      front as time-major "k_steps" and "v_steps" of shape
+      [decode_length, batch_size, num_heads, depth], instead of growing "k"
+      and "v" by concatenation on every step. The symbols_to_logits_fn must
+      then pass the step i as decode_loop_step, so they are updated in place.
+      Only affects greedy decoding (beam_size 1); beam search ignores it.
+    compact_finished_beams: bool, whether beam search drops batch entries from
+      the batch, and their caches, once their best beam is determined. See
+      beam_search.beam_search. Only applies if top_beams == 1, as only the
+      top beam is guaranteed to be unchanged.
 
   Returns:
       A dict of decoding results {
@@ -846,6 +872,9 @@ def fast_decode(encoder_output,
           "scores": decoding log probs from the beam search,
               None if using greedy decoding (beam_size=1)
       }
+      With beam search, it also has the scalar "decode_steps", "batch_steps"
+      and "batch_steps_saved", and the [batch_size] "entry_steps" statistics
+      of beam_search.beam_search.
 
     Raises:
       NotImplementedError: If beam size > 1 with partial targets.
@@ -871,6 +900,16 @@ def fast_decode(encoder_output,
               tf.zeros([batch_size, 0, hparams.hidden_size]),
       } for layer in range(num_layers)
   }
+  if preallocate_cache and beam_size <= 1:
+    for layer_cache in cache.values():
+      layer_cache.pop("k")
+      layer_cache.pop("v")
+      layer_cache["k_steps"] = tf.zeros([
+          decode_length, batch_size, hparams.num_heads,
+          key_channels // hparams.num_heads])
+      layer_cache["v_steps"] = tf.zeros([
+          decode_length, batch_size, hparams.num_heads,
+          value_channels // hparams.num_heads])
 
   if encoder_output is not None:
     for layer in range(num_layers):
@@ -892,6 +931,7 @@ def fast_decode(encoder_output,
     cache["encoder_output"] = encoder_output
     cache["encoder_decoder_attention_bias"] = encoder_decoder_attention_bias
 
+  stats = {}
   if beam_size > 1:  # Beam Search
     initial_ids = sos_id * tf.ones([batch_size], dtype=tf.int32)
     decoded_ids, scores = beam_search.beam_search(
@@ -903,7 +943,9 @@ def fast_decode(encoder_output,
         alpha,
         states=cache,
         eos_id=eos_id,
-        stop_early=(top_beams == 1))
+        stop_early=(top_beams == 1),
+        compact_finished=compact_finished_beams,
+        stats=stats)
 
     if top_beams == 1:
       decoded_ids = decoded_ids[:, 0, 1:]
@@ -956,7 +998,9 @@ def fast_decode(encoder_output,
         ])
     scores = log_prob
 
-  return {"outputs": decoded_ids, "scores": scores}
+  ret = {"outputs": decoded_ids, "scores": scores}
+  ret.update(stats)
+  return ret
 
 
 @registry.register_model
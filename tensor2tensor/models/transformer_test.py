@@ -17,6 +17,8 @@
 from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
+import time
+
 import numpy as np
 
 from tensor2tensor.data_generators import problem_hparams
@@ -329,6 +331,45 @@ class TransformerTest(tf.test.TestCase):
                      (BATCH_SIZE, INPUT_LENGTH + decode_length))
     self.assertAllClose(fast_res, slow_res)
 
+  def testGreedyPreallocatedVsConcatCache(self):
+    model, features = get_model(
+        transformer.transformer_small(), mode=tf.estimator.ModeKeys.PREDICT)
+    decode_length = 4
+
+    results = []
+    for preallocate_cache in [False, True]:
+      model._decode_hparams.preallocate_cache = preallocate_cache
+      with tf.variable_scope(tf.get_variable_scope(),
+                             reuse=tf.AUTO_REUSE):
+        results.append(model._greedy_infer(features, decode_length))
+
+    with self.test_session() as session:
+      session.run(tf.global_variables_initializer())
+      concat_res, preallocated_res = session.run(results)
+
+    self.assertEqual(preallocated_res["outputs"].shape,
+                     (BATCH_SIZE, INPUT_LENGTH + decode_length))
+    self.assertAllEqual(concat_res["outputs"], preallocated_res["outputs"])
+    self.assertAllClose(concat_res["scores"], preallocated_res["scores"])
+
+  def testBeamDecodeStats(self):
+    model, features = get_model(
+        transformer.transformer_small(), mode=tf.estimator.ModeKeys.PREDICT)
+    model._decode_hparams.compact_finished_beams = True
+    decode_length = 4
+    with tf.variable_scope(tf.get_variable_scope(), reuse=tf.AUTO_REUSE):
+      result = model._beam_decode(
+          features, decode_length, beam_size=4, top_beams=1, alpha=1.0)
+
+    with self.test_session() as session:
+      session.run(tf.global_variables_initializer())
+      res = session.run(result)
+
+    self.assertEqual((BATCH_SIZE,), res["entry_steps"].shape)
+    self.assertEqual(res["batch_steps"], sum(res["entry_steps"]))
+    self.assertEqual(res["decode_steps"] * BATCH_SIZE,
+                     res["batch_steps"] + res["batch_steps_saved"])
+
 
 class TransformerScorerTest(tf.test.TestCase):
 
@@ -372,5 +413,45 @@ class TransformerScorerTest(tf.test.TestCase):
     self.assertEqual(sorted(scorer_eval_vars), sorted(transformer_vars))
 
 
+class FastDecodeBenchmark(tf.test.Benchmark):
+
+  def _benchmark_decode(self, decode_length, preallocate_cache):
+    with tf.Graph().as_default():
+      hparams = transformer.transformer_small()
+      p_hparams = problem_hparams.test_problem_hparams(VOCAB_SIZE, VOCAB_SIZE)
+      hparams.problem_hparams = p_hparams
+      model = transformer.Transformer(
+          hparams, tf.estimator.ModeKeys.PREDICT, p_hparams)
+      inputs = np.random.randint(
+          VOCAB_SIZE, size=(BATCH_SIZE, INPUT_LENGTH, 1, 1))
+      features = {
+          "inputs": tf.constant(inputs, dtype=tf.int32),
+          "target_space_id": tf.constant(1, dtype=tf.int32),
+      }
+      model._decode_hparams.force_decode_length = True
+      model._decode_hparams.preallocate_cache = preallocate_cache
+      features["decode_length"] = decode_length - INPUT_LENGTH
+      result = model._greedy_infer(features, decode_length)
+
+      with tf.Session() as session:
+        session.run(tf.global_variables_initializer())
+        session.run(result)
+        start_time = time.time()
+        session.run(result)
+        return time.time() - start_time
+
+  def benchmark_preallocated_vs_concat_cache(self):
+    # Beam search always uses the concatenating cache.
+    for decode_length in [64, 256, 1024]:
+      concat_time = self._benchmark_decode(decode_length, False)
+      preallocated_time = self._benchmark_decode(decode_length, True)
+      self.report_benchmark(
+          name="fast_decode_greedy_length%d" % decode_length,
+          iters=1,
+          wall_time=preallocated_time,
+          extras={"concat_wall_time": concat_time,
+                  "speedup": concat_time / max(preallocated_time, 1e-9)})
+
+
 if __name__ == "__main__":
   tf.test.main()
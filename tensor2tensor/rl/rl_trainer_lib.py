@@ -19,7 +19,7 @@ from __future__ import print_function
 
 import os
 
-from tensor2tensor import models  # pylint: disable=unused-import
+from tensor2tensor.models import all_models  # pylint: disable=unused-import
 from tensor2tensor.models.research import rl  # pylint: disable=unused-import
 from tensor2tensor.rl import collect
 from tensor2tensor.rl import ppo
@@ -0,0 +1,397 @@
+# coding=utf-8
+# Copyright 2018 The Tensor2Tensor Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Dynamic micro-batching of concurrent prediction requests.
+
+A BatchingServer queues requests from many threads, groups them by input
+length bucket, and runs a batch through its backend as soon as a bucket holds
+max_batch_size requests or its oldest request has waited max_wait_secs.
+
+  predictor = decoding.Predictor(estimator, hparams)
+  server = batching_server.BatchingServer(
+      batching_server.make_predictor_backend(predictor))
+  prediction = server.predict(input_ids)
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import bisect
+import collections
+import threading
+import time
+
+import numpy as np
+import six
+
+from tensor2tensor.data_generators import text_encoder
+from tensor2tensor.utils import data_reader
+import tensorflow as tf
+
+
+class ServerOverloadedError(Exception):
+  """Raised when a request is submitted to a full BatchingServer queue."""
+
+
+class RequestTimeoutError(Exception):
+  """Raised when a request is not served within its timeout."""
+
+
+class _Request(object):
+  """A queued request, and a handle on its eventual result."""
+
+  def __init__(self, input_ids, bucket):
+    self.input_ids = input_ids
+    self.bucket = bucket
+    self.enqueue_time = time.time()
+    self._done = threading.Event()
+    self._result = None
+    self._error = None
+
+  def set_result(self, result):
+    self._result = result
+    self._done.set()
+
+  def set_error(self, error):
+    self._error = error
+    self._done.set()
+
+  def done(self):
+    return self._done.is_set()
+
+  def result(self, timeout=None):
+    """Waits for and returns the prediction, re-raising any backend error."""
+    if not self._done.wait(timeout):
+      raise RequestTimeoutError("Request not served in %s seconds" % timeout)
+    if self._error is not None:
+      raise self._error  # pylint: disable=raising-bad-type
+    return self._result
+
+
+class BatchingServer(object):
+  """Batches concurrent requests in front of a backend.
+
+  The backend is a function from a list of input id lists to a list of
+  predictions, one per input, e.g. as made by make_predictor_backend. It is
+  called from num_workers threads, on batches of at most max_batch_size
+  inputs that all fall in the same length bucket.
+
+  At most max_queue_size requests are queued. Beyond that, submit either
+  raises ServerOverloadedError or blocks until there is room again.
+  """
+
+  def __init__(self,
+               backend_fn,
+               max_batch_size=32,
+               max_wait_secs=0.005,
+               max_queue_size=1024,
+               bucket_boundaries=None,
+               num_workers=1):
+    """Starts the worker threads.
+
+    Args:
+      backend_fn: function from a list of input id lists to a list of
+        predictions.
+      max_batch_size: maximum number of requests in a batch.
+      max_wait_secs: maximum time the oldest request of a bucket waits for the
+        bucket to fill up.
+      max_queue_size: maximum number of queued requests.
+      bucket_boundaries: sorted input lengths splitting the length buckets.
+        Defaults to the data_reader training boundaries up to 256.
+      num_workers: number of threads calling backend_fn.
+    """
+    if bucket_boundaries is None:
+      bucket_boundaries = data_reader._bucket_boundaries(256)  # pylint: disable=protected-access
+    self._backend_fn = backend_fn
+    self._max_batch_size = max_batch_size
+    self._max_wait_secs = max_wait_secs
+    self._max_queue_size = max_queue_size
+    self._boundaries = list(bucket_boundaries)
+    self._queues = [collections.deque()
+                    for _ in range(len(self._boundaries) + 1)]
+    self._cond = threading.Condition()
+    self._queue_depth = 0
+    self._closed = False
+
+    self._max_queue_depth = 0
+    self._num_rejected = 0
+    self._num_requests = 0
+    self._num_batches = 0
+    self._num_errors = 0
+    self._queue_secs = []
+    self._backend_secs = []
+
+    self._workers = []
+    for i in range(num_workers):
+      worker = threading.Thread(target=self._work,
+                                name="BatchingServerWorker%d" % i)
+      worker.daemon = True
+      worker.start()
+      self._workers.append(worker)
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *unused_exc_info):
+    self.close()
+
+  def submit(self, input_ids, block=False, timeout=None):
+    """Queues a request.
+
+    Args:
+      input_ids: list of int input ids.
+      block: whether to wait for room in a full queue rather than raise.
+      timeout: when blocking, maximum number of seconds to wait for room.
+
+    Returns:
+      A request handle; its result method returns the prediction.
+
+    Raises:
+      ServerOverloadedError: if the queue is full.
+      ValueError: if the server is closed.
+    """
+    request = _Request(input_ids,
+                       bisect.bisect_left(self._boundaries, len(input_ids)))
+    with self._cond:
+      if block:
+        deadline = None if timeout is None else time.time() + timeout
+        while (self._queue_depth >= self._max_queue_size and
+               not self._closed):
+          remaining = None if deadline is None else deadline - time.time()
+          if remaining is not None and remaining <= 0:
+            break
+          self._cond.wait(remaining)
+      if self._closed:
+        raise ValueError("BatchingServer is closed.")
+      if self._queue_depth >= self._max_queue_size:
+        self._num_rejected += 1
+        raise ServerOverloadedError(
+            "BatchingServer queue is full (%d requests)." % self._queue_depth)
+      self._queues[request.bucket].append(request)
+      self._queue_depth += 1
+      self._max_queue_depth = max(self._max_queue_depth, self._queue_depth)
+      self._cond.notify_all()
+    return request
+
+  def predict(self, input_ids, timeout=None):
+    """Queues a request, blocking while the queue is full, and waits for it."""
+    start_time = time.time()
+    request = self.submit(input_ids, block=True, timeout=timeout)
+    if timeout is not None:
+      timeout = max(0., timeout - (time.time() - start_time))
+    return request.result(timeout)
+
+  def queue_depth(self):
+    """Number of requests waiting to be batched."""
+    with self._cond:
+      return self._queue_depth
+
+  def _next_batch(self):
+    """Waits for and dequeues the next batch, or returns None once closed."""
+    with self._cond:
+      while True:
+        now = time.time()
+        ready = None
+        next_deadline = None
+        for queue in self._queues:
+          if not queue:
+            continue
+          if len(queue) >= self._max_batch_size or self._closed:
+            ready = queue
+            break
+          deadline = queue[0].enqueue_time + self._max_wait_secs
+          if deadline <= now:
+            # Of the buckets that timed out, serve the one waiting longest.
+            if ready is None or queue[0].enqueue_time < ready[0].enqueue_time:
+              ready = queue
+          elif next_deadline is None or deadline < next_deadline:
+            next_deadline = deadline
+        if ready is not None:
+          batch = [ready.popleft()
+                   for _ in range(min(len(ready), self._max_batch_size))]
+          self._queue_depth -= len(batch)
+          # Wakes up submitters blocked on a full queue.
+          self._cond.notify_all()
+          return batch
+        if self._closed:
+          return None
+        self._cond.wait(None if next_deadline is None else next_deadline - now)
+
+  def _work(self):
+    while True:
+      batch = self._next_batch()
+      if batch is None:
+        return
+      self._run_batch(batch)
+
+  def _run_batch(self, batch):
+    """Runs a batch through the backend and hands out the results."""
+    start_time = time.time()
+    try:
+      results = self._backend_fn([request.input_ids for request in batch])
+      if len(results) != len(batch):
+        raise ValueError("Backend returned %d results for %d requests." %
+                         (len(results), len(batch)))
+    except Exception as e:  # pylint: disable=broad-except
+      tf.logging.error("BatchingServer backend failed: %s", e)
+      with self._cond:
+        self._num_errors += 1
+      for request in batch:
+        request.set_error(e)
+      return
+    end_time = time.time()
+    with self._cond:
+      self._num_batches += 1
+      self._num_requests += len(batch)
+      self._backend_secs.append(end_time - start_time)
+      self._queue_secs.extend(start_time - request.enqueue_time
+                              for request in batch)
+    for request, result in zip(batch, results):
+      request.set_result(result)
+
+  def stats(self):
+    """Returns a dict of request, batch and queue statistics."""
+    with self._cond:
+      queue_ms = np.array(self._queue_secs or [0.]) * 1000.0
+      backend_ms = np.array(self._backend_secs or [0.]) * 1000.0
+      return {
+          "requests": self._num_requests,
+          "batches": self._num_batches,
+          "errors": self._num_errors,
+          "rejected": self._num_rejected,
+          "queue_depth": self._queue_depth,
+          "max_queue_depth": self._max_queue_depth,
+          "mean_batch_size": (float(self._num_requests) /
+                              max(self._num_batches, 1)),
+          "mean_queue_ms": float(np.mean(queue_ms)),
+          "p99_queue_ms": float(np.percentile(queue_ms, 99)),
+          "mean_backend_ms": float(np.mean(backend_ms)),
+      }
+
+  def log_stats(self):
+    tf.logging.info(
+        "BatchingServer: %(requests)d requests in %(batches)d batches (mean "
+        "size %(mean_batch_size).1f), %(rejected)d rejected, %(errors)d failed "
+        "batches, queue depth %(queue_depth)d (max %(max_queue_depth)d), "
+        "queue wait mean %(mean_queue_ms).1fms p99 %(p99_queue_ms).1fms, "
+        "backend mean %(mean_backend_ms).1fms", self.stats())
+
+  def close(self):
+    """Serves the queued requests, then stops the workers."""
+    with self._cond:
+      self._closed = True
+      self._cond.notify_all()
+    for worker in self._workers:
+      worker.join()
+
+
+def make_predictor_backend(predictor, max_input_size=0):
+  """Makes a backend_fn running batches through a decoding.Predictor.
+
+  Args:
+    predictor: a decoding.Predictor taking padded [batch_size, length] inputs.
+    max_input_size: if positive, truncate inputs to this length.
+
+  Returns:
+    A function from a list of input id lists, without EOS_ID, to a list of
+    dicts of numpy arrays of predictions.
+  """
+
+  def backend_fn(input_ids_list):
+    offsets = np.cumsum([0] + [len(input_ids) for input_ids in input_ids_list])
+    input_ids = np.concatenate(
+        [np.asarray(ids, dtype=np.int32) for ids in input_ids_list])
+    # Truncates to max_input_size including the EOS_ID, and pads with 0.
+    inputs = text_encoder.pad_ragged(
+        input_ids, offsets, max_length=max_input_size,
+        append_id=text_encoder.EOS_ID)
+    predictions = predictor.predict({"inputs": inputs})
+    return [{key: value[i] for key, value in six.iteritems(predictions)}
+            for i in range(len(input_ids_list))]
+
+  return backend_fn
+
+
+def make_stub_backend(secs_per_batch=0.01, secs_per_token=0.):
+  """Makes a backend_fn that echoes its inputs after a simulated delay.
+
+  The delay models a fixed cost per batch plus a cost per padded input token,
+  so that benchmarks and tests can run without a model.
+
+  Args:
+    secs_per_batch: fixed delay of each call.
+    secs_per_token: delay of each token of the padded batch.
+
+  Returns:
+    A function from a list of input id lists to a list of dicts with the
+    "outputs" and "scores" of each input.
+  """
+
+  def backend_fn(input_ids_list):
+    width = max(len(input_ids) for input_ids in input_ids_list)
+    time.sleep(secs_per_batch + secs_per_token * width * len(input_ids_list))
+    return [{"outputs": np.array(input_ids), "scores": 0.}
+            for input_ids in input_ids_list]
+
+  return backend_fn
+
+
+def run_load(server, input_ids_list, num_clients=8, timeout=None):
+  """Sends requests to a server from concurrent clients, as a load test.
+
+  Each client thread sends its share of input_ids_list one request at a time,
+  waiting for each prediction before sending the next.
+
+  Args:
+    server: a BatchingServer.
+    input_ids_list: list of input id lists to send.
+    num_clients: number of client threads.
+    timeout: per request timeout in seconds.
+
+  Returns:
+    A dict with the number of requests and failures, the throughput and the
+    request latencies in ms.
+  """
+  latencies = []
+  failures = []
+
+  def client(shard):
+    for input_ids in input_ids_list[shard::num_clients]:
+      start_time = time.time()
+      try:
+        server.predict(input_ids, timeout=timeout)
+      except Exception as e:  # pylint: disable=broad-except
+        failures.append(e)
+        continue
+      latencies.append(time.time() - start_time)
+
+  start_time = time.time()
+  clients = [threading.Thread(target=client, args=(i,))
+             for i in range(num_clients)]
+  for thread in clients:
+    thread.start()
+  for thread in clients:
+    thread.join()
+  seconds = time.time() - start_time
+  latencies_ms = np.array(latencies or [0.]) * 1000.0
+  return {
+      "requests": len(latencies),
+      "failures": len(failures),
+      "seconds": seconds,
+      "requests_per_sec": len(latencies) / max(seconds, 1e-9),
+      "mean_ms": float(np.mean(latencies_ms)),
+      "p50_ms": float(np.percentile(latencies_ms, 50)),
+      "p99_ms": float(np.percentile(latencies_ms, 99)),
+  }
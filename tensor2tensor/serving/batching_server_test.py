@@ -0,0 +1,147 @@
+# coding=utf-8
+# Copyright 2018 The Tensor2Tensor Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Tests for tensor2tensor.serving.batching_server."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import threading
+
+import numpy as np
+
+from tensor2tensor.serving import batching_server
+import tensorflow as tf
+
+
+class _RecordingBackend(object):
+  """Echoes its inputs, recording each batch and optionally blocking."""
+
+  def __init__(self):
+    self.batches = []
+    self.called = threading.Event()
+    self.release = threading.Event()
+    self.release.set()
+
+  def __call__(self, input_ids_list):
+    self.called.set()
+    self.release.wait()
+    self.batches.append([list(input_ids) for input_ids in input_ids_list])
+    return [{"outputs": np.array(input_ids)} for input_ids in input_ids_list]
+
+
+class BatchingServerTest(tf.test.TestCase):
+
+  def testBatchesByLengthBucket(self):
+    backend = _RecordingBackend()
+    backend.release.clear()
+    with batching_server.BatchingServer(
+        backend, max_batch_size=2, max_wait_secs=0.05,
+        bucket_boundaries=[4]) as server:
+      requests = [server.submit(input_ids)
+                  for input_ids in [[1], [2, 2, 2, 2, 2], [3], [4, 4]]]
+      backend.release.set()
+      results = [request.result(timeout=10) for request in requests]
+    for input_ids, result in zip([[1], [2, 2, 2, 2, 2], [3], [4, 4]], results):
+      self.assertAllEqual(input_ids, result["outputs"])
+    batches = sorted(backend.batches)
+    self.assertEqual([[[1], [3]], [[2, 2, 2, 2, 2]], [[4, 4]]], batches)
+
+  def testMaxWaitFlushesPartialBatch(self):
+    backend = _RecordingBackend()
+    with batching_server.BatchingServer(
+        backend, max_batch_size=8, max_wait_secs=0.01) as server:
+      result = server.predict([1, 2, 3], timeout=10)
+      self.assertAllEqual([1, 2, 3], result["outputs"])
+      self.assertEqual(1, server.stats()["batches"])
+
+  def testBackpressure(self):
+    backend = _RecordingBackend()
+    backend.release.clear()
+    server = batching_server.BatchingServer(
+        backend, max_batch_size=1, max_wait_secs=0., max_queue_size=2)
+    # The worker holds one request while the backend is blocked.
+    requests = [server.submit([1])]
+    self.assertTrue(backend.called.wait(10))
+    requests.extend([server.submit([2]), server.submit([3])])
+    self.assertEqual(2, server.queue_depth())
+    with self.assertRaises(batching_server.ServerOverloadedError):
+      server.submit([4])
+    with self.assertRaises(batching_server.ServerOverloadedError):
+      server.submit([4], block=True, timeout=0.01)
+    backend.release.set()
+    requests.append(server.submit([4], block=True, timeout=10))
+    server.close()
+    self.assertEqual([[1], [2], [3], [4]],
+                     [list(request.result()["outputs"])
+                      for request in requests])
+    stats = server.stats()
+    self.assertEqual(2, stats["rejected"])
+    self.assertEqual(2, stats["max_queue_depth"])
+    self.assertEqual(0, stats["queue_depth"])
+
+  def testBackendErrors(self):
+
+    def backend_fn(unused_input_ids_list):
+      raise RuntimeError("backend failure")
+
+    with batching_server.BatchingServer(backend_fn) as server:
+      with self.assertRaisesRegexp(RuntimeError, "backend failure"):
+        server.predict([1], timeout=10)
+    self.assertEqual(1, server.stats()["errors"])
+
+  def testCloseServesQueuedRequests(self):
+    backend = _RecordingBackend()
+    server = batching_server.BatchingServer(
+        backend, max_batch_size=4, max_wait_secs=60.)
+    requests = [server.submit([i]) for i in range(3)]
+    server.close()
+    self.assertEqual([[[0], [1], [2]]], backend.batches)
+    self.assertTrue(all(request.done() for request in requests))
+    with self.assertRaises(ValueError):
+      server.submit([1])
+
+
+class BatchingServerBenchmark(tf.test.Benchmark):
+  """Load test of the batching server against a stub backend."""
+
+  def benchmark_batching_server(self):
+    rng = np.random.RandomState(0)
+    input_ids_list = [list(rng.randint(2, 100, size=rng.randint(1, 64)))
+                      for _ in range(2000)]
+    for max_batch_size in [1, 8, 32]:
+      backend_fn = batching_server.make_stub_backend(
+          secs_per_batch=0.002, secs_per_token=1e-6)
+      with batching_server.BatchingServer(
+          backend_fn, max_batch_size=max_batch_size,
+          max_wait_secs=0.002) as server:
+        load = batching_server.run_load(server, input_ids_list,
+                                        num_clients=64)
+        stats = server.stats()
+      self.report_benchmark(
+          name="batching_server_max_batch_size_%d" % max_batch_size,
+          iters=load["requests"],
+          wall_time=load["seconds"],
+          extras={
+              "requests_per_sec": load["requests_per_sec"],
+              "p50_ms": load["p50_ms"],
+              "p99_ms": load["p99_ms"],
+              "mean_batch_size": stats["mean_batch_size"],
+              "max_queue_depth": stats["max_queue_depth"],
+          })
+
+
+if __name__ == "__main__":
+  tf.test.main()
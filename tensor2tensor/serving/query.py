@@ -22,7 +22,7 @@ import os
 from oauth2client.client import GoogleCredentials
 from six.moves import input  # pylint: disable=redefined-builtin
 
-from tensor2tensor import problems as problems_lib  # pylint: disable=unused-import
+from tensor2tensor.data_generators import text_encoder
 from tensor2tensor.serving import serving_utils
 from tensor2tensor.utils import registry
 from tensor2tensor.utils import usr_dir
@@ -86,6 +86,8 @@ def main(_):
   while True:
     inputs = FLAGS.inputs_once if FLAGS.inputs_once else input(">> ")
     outputs = serving_utils.predict([inputs], problem, request_fn)
+    for name, feature_info in sorted(problem.feature_info.items()):
+      text_encoder.log_cache_stats(feature_info.encoder, name)
     outputs, = outputs
     output, score = outputs
     print_str = """
@@ -19,11 +19,13 @@ from __future__ import division
 from __future__ import print_function
 
 import base64
+import collections
 import functools
+import threading
+
 from googleapiclient import discovery
 import grpc
 
-from tensor2tensor import problems as problems_lib  # pylint: disable=unused-import
 from tensor2tensor.data_generators import text_encoder
 from tensor2tensor.utils import cloud_tpu as cloud
 import tensorflow as tf
@@ -32,28 +34,28 @@ from tensorflow_serving.apis import prediction_service_pb2_grpc
 
 
 
-def _make_example(input_ids, problem, input_feature_name="inputs"):
-  """Make a tf.train.Example for the problem.
+# Dummy features of each (problem name, input feature name), as made by
+# _dummy_features.
+_DUMMY_FEATURES = {}
 
-  features[input_feature_name] = input_ids
 
-  Also fills in any other required features with dummy values.
+def _dummy_features(problem, input_feature_name="inputs"):
+  """Dummy values for the features a problem requires besides the inputs.
+
+  The values only depend on problem.example_reading_spec, so they are made
+  once per problem and reused for every example.
 
   Args:
-    input_ids: list<int>.
     problem: Problem.
-    input_feature_name: name of feature for input_ids.
+    input_feature_name: name of the feature holding the input ids.
 
   Returns:
-    tf.train.Example
+    dict from feature name to tf.train.Feature.
   """
-  features = {
-      input_feature_name:
-          tf.train.Feature(int64_list=tf.train.Int64List(value=input_ids))
-  }
-
-  # Fill in dummy values for any other required features that presumably
-  # will not actually be used for prediction.
+  key = (problem.name, input_feature_name)
+  if key in _DUMMY_FEATURES:
+    return _DUMMY_FEATURES[key]
+  features = {}
   data_fields, _ = problem.example_reading_spec()
   for fname, ftype in data_fields.items():
     if fname == input_feature_name:
@@ -71,18 +73,50 @@ def _make_example(input_ids, problem, input_feature_name="inputs"):
     if ftype.dtype in [tf.float32, tf.float64]:
       value = tf.train.Feature(
           float_list=tf.train.FloatList(value=[0.] * num_elements))
-    if ftype.dtype == tf.bytes:
+    if ftype.dtype == tf.string:
       value = tf.train.Feature(
           bytes_list=tf.train.BytesList(value=[""] * num_elements))
     tf.logging.info("Adding dummy value for feature %s as it is required by "
                     "the Problem.", fname)
     features[fname] = value
+  _DUMMY_FEATURES[key] = features
+  return features
+
+
+def _make_example(input_ids, problem, input_feature_name="inputs"):
+  """Make a tf.train.Example for the problem.
+
+  features[input_feature_name] = input_ids
+
+  Also fills in any other required features with dummy values.
+
+  Args:
+    input_ids: list<int>.
+    problem: Problem.
+    input_feature_name: name of feature for input_ids.
+
+  Returns:
+    tf.train.Example
+  """
+  features = dict(_dummy_features(problem, input_feature_name))
+  features[input_feature_name] = tf.train.Feature(
+      int64_list=tf.train.Int64List(value=input_ids))
   return tf.train.Example(features=tf.train.Features(feature=features))
 
 
+# Stubs of each server address, so that the request functions of a server
+# share one channel.
+_STUBS = {}
+_STUBS_LOCK = threading.Lock()
+
+
 def _create_stub(server):
-  channel = grpc.insecure_channel(server)
-  return prediction_service_pb2_grpc.PredictionServiceStub(channel)
+  with _STUBS_LOCK:
+    if server not in _STUBS:
+      channel = grpc.insecure_channel(server)
+      _STUBS[server] = prediction_service_pb2_grpc.PredictionServiceStub(
+          channel)
+    return _STUBS[server]
 
 
 def _encode(inputs, encoder, add_eos=True):
@@ -98,8 +132,41 @@ def _decode(output_ids, output_decoder):
 
 
 
-def make_grpc_request_fn(servable_name, server, timeout_secs):
-  """Wraps function to make grpc requests with runtime args."""
+def _parse_predict_response(response):
+  outputs = tf.make_ndarray(response.outputs["outputs"])
+  scores = tf.make_ndarray(response.outputs["scores"])
+  assert len(outputs) == len(scores)
+  return [{
+      "outputs": outputs[i],
+      "scores": scores[i]
+  } for i in range(len(outputs))]
+
+
+class _PredictFuture(object):
+  """The pending predictions of an asynchronous Predict request."""
+
+  def __init__(self, response_future):
+    self._response_future = response_future
+
+  def result(self):
+    return _parse_predict_response(self._response_future.result())
+
+
+def make_grpc_request_fn(servable_name, server, timeout_secs,
+                         asynchronous=False):
+  """Wraps function to make grpc requests with runtime args.
+
+  Args:
+    servable_name: name of the served model.
+    server: address of the TensorFlow model server.
+    timeout_secs: timeout of each request.
+    asynchronous: if True, the request function sends the request and returns
+      at once, with an object whose result method waits for the predictions.
+      predict uses this to keep several requests in flight.
+
+  Returns:
+    A function from a list of tf.train.Examples to their predictions.
+  """
   stub = _create_stub(server)
 
   def _make_grpc_request(examples):
@@ -109,14 +176,9 @@ def make_grpc_request_fn(servable_name, server, timeout_secs):
     request.inputs["input"].CopyFrom(
         tf.contrib.util.make_tensor_proto(
             [ex.SerializeToString() for ex in examples], shape=[len(examples)]))
-    response = stub.Predict(request, timeout_secs)
-    outputs = tf.make_ndarray(response.outputs["outputs"])
-    scores = tf.make_ndarray(response.outputs["scores"])
-    assert len(outputs) == len(scores)
-    return [{
-        "outputs": outputs[i],
-        "scores": scores[i]
-    } for i in range(len(outputs))]
+    if asynchronous:
+      return _PredictFuture(stub.Predict.future(request, timeout_secs))
+    return _parse_predict_response(stub.Predict(request, timeout_secs))
 
   return _make_grpc_request
 
@@ -142,22 +204,71 @@ def make_cloud_mlengine_request_fn(credentials, model_name, version):
   return _make_cloud_mlengine_request
 
 
-def predict(inputs_list, problem, request_fn):
-  """Encodes inputs, makes request to deployed TF model, and decodes outputs."""
+def predict(inputs_list, problem, request_fn, chunk_size=0, max_in_flight=1,
+            decode_cache=None):
+  """Encodes inputs, makes request to deployed TF model, and decodes outputs.
+
+  With a chunk_size, the inputs are sent in requests of chunk_size inputs.
+  If request_fn is asynchronous, as made by make_grpc_request_fn, up to
+  max_in_flight requests are pending at a time, and the next chunk is encoded
+  while they are.
+
+  Args:
+    inputs_list: list of input strings.
+    problem: Problem.
+    request_fn: function from a list of tf.train.Examples to either their
+      predictions or an object whose result method returns them.
+    chunk_size: number of inputs per request; all of them if 0.
+    max_in_flight: maximum number of pending asynchronous requests.
+    decode_cache: optional decode_cache.DecodeCache of the (output, score)
+      pairs of the served model. Cached inputs are not sent, repeated ones
+      are sent once, and the new outputs are added to it.
+
+  Returns:
+    list of (output string, score) pairs, one per input.
+  """
   assert isinstance(inputs_list, list)
   fname = "inputs" if problem.has_inputs else "targets"
   input_encoder = problem.feature_info[fname].encoder
-  input_ids_list = [
-      _encode(inputs, input_encoder, add_eos=problem.has_inputs)
-      for inputs in inputs_list
-  ]
-  examples = [_make_example(input_ids, problem, fname)
-              for input_ids in input_ids_list]
-  predictions = request_fn(examples)
   output_decoder = problem.feature_info["targets"].encoder
-  outputs = [
-      (_decode(prediction["outputs"], output_decoder),
-       prediction["scores"])
-      for prediction in predictions
-  ]
+  input_ids_list = [None] * len(inputs_list)
+  outputs = [None] * len(inputs_list)
+
+  def _input_ids(i):
+    if input_ids_list[i] is None:
+      input_ids_list[i] = _encode(inputs_list[i], input_encoder,
+                                  add_eos=problem.has_inputs)
+    return input_ids_list[i]
+
+  # Indices of the inputs to send, and of the repeats of each to copy its
+  # output to.
+  to_predict = list(range(len(inputs_list)))
+  repeats = {}
+  if decode_cache is not None:
+    outputs, uncached_groups = decode_cache.get_many(
+        [_input_ids(i) for i in range(len(inputs_list))])
+    to_predict = [group[0] for group in uncached_groups]
+    repeats = {group[0]: group[1:] for group in uncached_groups}
+
+  def _collect(indices, pending_predictions):
+    if hasattr(pending_predictions, "result"):
+      pending_predictions = pending_predictions.result()
+    for i, prediction in zip(indices, pending_predictions):
+      outputs[i] = (_decode(prediction["outputs"], output_decoder),
+                    prediction["scores"])
+      if decode_cache is not None:
+        decode_cache.put(input_ids_list[i], outputs[i])
+      for j in repeats.get(i, []):
+        outputs[j] = outputs[i]
+
+  chunk_size = chunk_size or max(len(to_predict), 1)
+  pending = collections.deque()
+  for start in range(0, len(to_predict), chunk_size):
+    indices = to_predict[start:start + chunk_size]
+    examples = [_make_example(_input_ids(i), problem, fname) for i in indices]
+    while len(pending) >= max(max_in_flight, 1):
+      _collect(*pending.popleft())
+    pending.append((indices, request_fn(examples)))
+  while pending:
+    _collect(*pending.popleft())
   return outputs
@@ -0,0 +1,165 @@
+# coding=utf-8
+# Copyright 2018 The Tensor2Tensor Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Tests for tensor2tensor.serving.serving_utils."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import collections
+from concurrent import futures
+import threading
+import time
+
+import grpc
+import numpy as np
+
+from tensor2tensor.data_generators import text_encoder
+from tensor2tensor.serving import serving_utils
+from tensor2tensor.utils import decode_cache
+import tensorflow as tf
+from tensorflow_serving.apis import predict_pb2
+from tensorflow_serving.apis import prediction_service_pb2_grpc
+
+
+_FeatureInfo = collections.namedtuple("_FeatureInfo", ["encoder"])
+
+
+class _EchoProblem(object):
+  """A byte-level text problem with an extra required feature."""
+
+  name = "echo_problem"
+  has_inputs = True
+
+  def __init__(self):
+    encoder = text_encoder.ByteTextEncoder()
+    self.feature_info = {"inputs": _FeatureInfo(encoder),
+                         "targets": _FeatureInfo(encoder)}
+    self.num_reading_spec_calls = 0
+
+  def example_reading_spec(self):
+    self.num_reading_spec_calls += 1
+    data_fields = {
+        "inputs": tf.VarLenFeature(tf.int64),
+        "targets": tf.VarLenFeature(tf.int64),
+        "example_id": tf.FixedLenFeature([1], tf.int64),
+    }
+    return data_fields, None
+
+
+class _EchoPredictionService(
+    prediction_service_pb2_grpc.PredictionServiceServicer):
+  """Returns the inputs of each example as its outputs, after a delay."""
+
+  def __init__(self, delay_secs=0.):
+    self._delay_secs = delay_secs
+    self._lock = threading.Lock()
+    self._in_flight = 0
+    self.max_in_flight = 0
+    self.request_sizes = []
+
+  def Predict(self, request, context):
+    with self._lock:
+      self._in_flight += 1
+      self.max_in_flight = max(self.max_in_flight, self._in_flight)
+    time.sleep(self._delay_secs)
+    examples = [tf.train.Example.FromString(serialized) for serialized
+                in tf.make_ndarray(request.inputs["input"])]
+    input_ids = [ex.features.feature["inputs"].int64_list.value
+                 for ex in examples]
+    width = max(len(ids) for ids in input_ids)
+    outputs = np.zeros([len(input_ids), width], dtype=np.int64)
+    for i, ids in enumerate(input_ids):
+      outputs[i, :len(ids)] = ids
+    response = predict_pb2.PredictResponse()
+    response.outputs["outputs"].CopyFrom(tf.make_tensor_proto(outputs))
+    response.outputs["scores"].CopyFrom(tf.make_tensor_proto(
+        np.arange(len(input_ids), dtype=np.float32)))
+    with self._lock:
+      self._in_flight -= 1
+      self.request_sizes.append(len(input_ids))
+    return response
+
+
+class ServingUtilsTest(tf.test.TestCase):
+
+  def setUp(self):
+    # Dummy features are cached per problem name across tests.
+    serving_utils._DUMMY_FEATURES.clear()
+    self.service = _EchoPredictionService(delay_secs=0.05)
+    self.server = grpc.server(futures.ThreadPoolExecutor(max_workers=8))
+    prediction_service_pb2_grpc.add_PredictionServiceServicer_to_server(
+        self.service, self.server)
+    port = self.server.add_insecure_port("localhost:0")
+    self.server.start()
+    self.address = "localhost:%d" % port
+
+  def tearDown(self):
+    self.server.stop(None)
+
+  def testMakeExampleCachesDummyFeatures(self):
+    problem = _EchoProblem()
+    for input_ids in [[1, 2], [3]]:
+      ex = serving_utils._make_example(input_ids, problem)
+      self.assertEqual(input_ids,
+                       list(ex.features.feature["inputs"].int64_list.value))
+      self.assertEqual([0],
+                       list(ex.features.feature["example_id"].int64_list.value))
+    self.assertEqual(1, problem.num_reading_spec_calls)
+
+  def testPredict(self):
+    problem = _EchoProblem()
+    request_fn = serving_utils.make_grpc_request_fn(
+        "echo", self.address, timeout_secs=10)
+    outputs = serving_utils.predict(["ab", "c"], problem, request_fn)
+    self.assertEqual(["ab", "c"], [output for output, _ in outputs])
+    self.assertEqual([2], self.service.request_sizes)
+
+  def testPredictPipelined(self):
+    problem = _EchoProblem()
+    request_fn = serving_utils.make_grpc_request_fn(
+        "echo", self.address, timeout_secs=10, asynchronous=True)
+    inputs_list = ["input %d" % i for i in range(10)]
+    outputs = serving_utils.predict(inputs_list, problem, request_fn,
+                                    chunk_size=3, max_in_flight=4)
+    self.assertEqual(inputs_list, [output for output, _ in outputs])
+    self.assertEqual([0., 1., 2., 0., 1., 2., 0., 1., 2., 0.],
+                     [score for _, score in outputs])
+    self.assertEqual([1, 3, 3, 3], sorted(self.service.request_sizes))
+    self.assertGreater(self.service.max_in_flight, 1)
+
+  def testPredictDecodesRepeatedInputsOnce(self):
+    problem = _EchoProblem()
+    request_fn = serving_utils.make_grpc_request_fn(
+        "echo", self.address, timeout_secs=10)
+    cache = decode_cache.DecodeCache("echo")
+    inputs_list = ["ab", "c", "ab", "ab", "c"]
+    outputs = serving_utils.predict(inputs_list, problem, request_fn,
+                                    decode_cache=cache)
+    self.assertEqual(inputs_list, [output for output, _ in outputs])
+    self.assertEqual([2], self.service.request_sizes)
+    # All of them are cached now.
+    outputs = serving_utils.predict(inputs_list, problem, request_fn,
+                                    decode_cache=cache)
+    self.assertEqual(inputs_list, [output for output, _ in outputs])
+    self.assertEqual([2], self.service.request_sizes)
+
+  def testStubIsShared(self):
+    self.assertIs(serving_utils._create_stub(self.address),
+                  serving_utils._create_stub(self.address))
+
+
+if __name__ == "__main__":
+  tf.test.main()
@@ -85,6 +85,14 @@ def get_state_shape_invariants(tensor):
   return tf.TensorShape(shape)
 
 
+def get_compact_state_shape_invariants(tensor):
+  """Returns the shape of the tensor but sets all but the last dim to None."""
+  shape = tensor.shape.as_list()
+  for i in range(len(shape) - 1):
+    shape[i] = None
+  return tf.TensorShape(shape)
+
+
 def compute_batch_indices(batch_size, beam_size):
   """Computes the i'th coordinate that contains the batch index for gathers.
 
@@ -177,7 +185,9 @@ def beam_search(symbols_to_logits_fn,
                 alpha,
                 states=None,
                 eos_id=EOS_ID,
-                stop_early=True):
+                stop_early=True,
+                compact_finished=False,
+                stats=None):
   """Beam search with length penalties.
 
   Requires a function that can take the currently decoded symbols and return
@@ -218,6 +228,23 @@ def beam_search(symbols_to_logits_fn,
     states: dict (possibly nested) of decoding states.
     eos_id: ID for end of sentence.
     stop_early: a boolean - stop once best sequence is provably determined.
+    compact_finished: a boolean - if stop_early is also set, drop each batch
+        entry from the alive set, together with its states, as soon as its
+        best sequences are provably determined, instead of decoding the whole
+        batch until every entry is. Only the top beam is guaranteed to be the
+        same: lower finished beams of a dropped entry are no longer filled in
+        where they are still -INF, so they can differ. Hence it should only be
+        used if just the top beam is returned. Requires symbols_to_logits_fn
+        to handle a shrinking batch, so everything it uses per batch entry
+        must be in `states`.
+    stats: an optional dict, to which scalar tensors are added:
+        "decode_steps", the number of decoding steps run, "batch_steps", the
+        number of batch entries decoded summed over the steps, and
+        "batch_steps_saved", how many fewer batch entries were decoded than
+        without compact_finished. The decoding FLOPs saved are about
+        batch_steps_saved / (batch_steps + batch_steps_saved) of the total.
+        Also "entry_steps", the number of steps each batch entry was decoded
+        for, [batch_size], which sums to batch_steps.
   Returns:
     Tuple of
     (decoded beams [batch_size, beam_size, decode_length]
@@ -247,6 +274,15 @@ def beam_search(symbols_to_logits_fn,
   finished_scores = tf.ones([batch_size, beam_size]) * -INF
   finished_flags = tf.zeros([batch_size, beam_size], tf.bool)
 
+  compact_finished = compact_finished and stop_early
+
+  def alive_batch_size(tensor):
+    # The batch shrinks as it is compacted, otherwise it keeps its static
+    # size, which the loop's shape invariants expect.
+    if compact_finished:
+      return common_layers.shape_list(tensor)[0]
+    return batch_size
+
   def grow_finished(finished_seq, finished_scores, finished_flags, curr_seq,
                     curr_scores, curr_finished):
     """Given sequences and scores, will gather the top k=beam size sequences.
@@ -269,6 +305,7 @@ def beam_search(symbols_to_logits_fn,
          log probs of these sequences,
          Finished flags of these sequences)
     """
+    batch_size = alive_batch_size(finished_scores)
     # First append a column of 0'ids to finished to make the same length with
     # finished scores
     finished_seq = tf.concat(
@@ -304,6 +341,7 @@ def beam_search(symbols_to_logits_fn,
          log probs of these sequences,
          Finished flags of these sequences)
     """
+    batch_size = alive_batch_size(curr_scores)
     # Set the scores of the finished seq in curr_seq to large negative
     # values
     curr_scores += tf.to_float(curr_finished) * -INF
@@ -337,6 +375,7 @@ def beam_search(symbols_to_logits_fn,
          Flags indicating which of these sequences have finished decoding,
          dict of transformed decoding states)
     """
+    batch_size = alive_batch_size(alive_log_probs)
     # Get the logits for all the possible next symbols
     flat_ids = tf.reshape(alive_seq, [batch_size * beam_size, -1])
 
@@ -459,16 +498,14 @@ def beam_search(symbols_to_logits_fn,
     return (i + 1, alive_seq, alive_log_probs, finished_seq, finished_scores,
             finished_flags, states)
 
-  def _is_finished(i, unused_alive_seq, alive_log_probs, unused_finished_seq,
-                   finished_scores, finished_in_finished, unused_states):
-    """Checking termination condition.
+  def _bound_is_met(alive_log_probs, finished_scores, finished_in_finished):
+    """Checks which batch entries have their best sequences determined.
 
-    We terminate when we decoded up to decode_length or the lowest scoring item
-    in finished has a greater score that the highest prob item in alive divided
-    by the max length penalty
+    That is the case when the lowest scoring item in finished has a greater
+    score that the highest prob item in alive divided by the max length
+    penalty.
 
     Args:
-      i: loop index
       alive_log_probs: probabilities of the beams. [batch_size, beam_size]
       finished_scores: scores for each of these sequences.
         [batch_size, beam_size]
@@ -476,10 +513,8 @@ def beam_search(symbols_to_logits_fn,
         [batch_size, beam_size]
 
     Returns:
-      Bool.
+      Bools. [batch_size]
     """
-    if not stop_early:
-      return tf.less(i, decode_length)
     max_length_penalty = tf.pow(((5. + tf.to_float(decode_length)) / 6.), alpha)
     # The best possible score of the most likely alive sequence.
     lower_bound_alive_scores = alive_log_probs[:, 0] / max_length_penalty
@@ -497,14 +532,43 @@ def beam_search(symbols_to_logits_fn,
     lowest_score_of_finished_in_finished += (
         (1. - tf.to_float(tf.reduce_any(finished_in_finished, 1))) * -INF)
 
+    return tf.greater(lowest_score_of_finished_in_finished,
+                      lower_bound_alive_scores)
+
+  def _is_finished(i, unused_alive_seq, alive_log_probs, unused_finished_seq,
+                   finished_scores, finished_in_finished, unused_states):
+    """Checking termination condition.
+
+    We terminate when we decoded up to decode_length or the lowest scoring item
+    in finished has a greater score that the highest prob item in alive divided
+    by the max length penalty
+
+    Args:
+      i: loop index
+      alive_log_probs: probabilities of the beams. [batch_size, beam_size]
+      finished_scores: scores for each of these sequences.
+        [batch_size, beam_size]
+      finished_in_finished: finished bools for each of these sequences.
+        [batch_size, beam_size]
+
+    Returns:
+      Bool.
+    """
+    if not stop_early:
+      return tf.less(i, decode_length)
     bound_is_met = tf.reduce_all(
-        tf.greater(lowest_score_of_finished_in_finished,
-                   lower_bound_alive_scores))
+        _bound_is_met(alive_log_probs, finished_scores, finished_in_finished))
 
     return tf.logical_and(
         tf.less(i, decode_length), tf.logical_not(bound_is_met))
 
-  (_, alive_seq, alive_log_probs, finished_seq, finished_scores,
+  if compact_finished:
+    return _compacting_beam_search_loop(
+        inner_loop, _bound_is_met, batch_size, beam_size, decode_length,
+        alive_seq, alive_log_probs, finished_seq, finished_scores,
+        finished_flags, states, stats)
+
+  (decode_steps, alive_seq, alive_log_probs, finished_seq, finished_scores,
    finished_flags, _) = tf.while_loop(
        _is_finished,
        inner_loop, [
@@ -535,4 +599,130 @@ def beam_search(symbols_to_logits_fn,
       tf.reduce_any(finished_flags, 1), finished_seq, alive_seq)
   finished_scores = tf.where(
       tf.reduce_any(finished_flags, 1), finished_scores, alive_log_probs)
+  if stats is not None:
+    stats["decode_steps"] = decode_steps
+    stats["batch_steps"] = decode_steps * batch_size
+    stats["batch_steps_saved"] = tf.constant(0)
+    stats["entry_steps"] = tf.fill([batch_size], decode_steps)
   return finished_seq, finished_scores
+
+
+def _compacting_beam_search_loop(inner_loop, bound_is_met, batch_size,
+                                 beam_size, decode_length, alive_seq,
+                                 alive_log_probs, finished_seq,
+                                 finished_scores, finished_flags, states,
+                                 stats):
+  """The beam search loop, dropping batch entries as they are determined.
+
+  After every step, the batch entries whose best sequences are determined, or
+  all of them at decode_length, have their results scattered into
+  [batch_size, beam_size, decode_length + 1] outputs. The remaining entries
+  are gathered, with their states, into a smaller batch for the next step.
+
+  Args:
+    inner_loop: the body of the beam search loop in beam_search.
+    bound_is_met: function from alive_log_probs, finished_scores and
+      finished_flags to a [batch_size] bool Tensor of the determined entries.
+    batch_size: the original batch size.
+    beam_size: Size of the beam.
+    decode_length: Number of steps to decode for.
+    alive_seq: initial alive sequences. [batch_size, beam_size, 1]
+    alive_log_probs: initial log probs. [batch_size, beam_size]
+    finished_seq: initial finished sequences. [batch_size, beam_size, 1]
+    finished_scores: initial finished scores. [batch_size, beam_size]
+    finished_flags: initial finished flags. [batch_size, beam_size]
+    states: dict (possibly nested) of decoding states.
+    stats: an optional dict to add decoding statistics to.
+
+  Returns:
+    Tuple of
+    (decoded beams [batch_size, beam_size, decode_length]
+     decoding probabilities [batch_size, beam_size])
+  """
+  # The position in the original batch of each alive batch entry.
+  batch_index = tf.range(batch_size)
+  outputs_seq = tf.zeros([batch_size, beam_size, decode_length + 1],
+                         alive_seq.dtype)
+  outputs_scores = tf.zeros([batch_size, beam_size])
+  outputs_steps = tf.zeros([batch_size], tf.int32)
+
+  def compacting_inner_loop(i, alive_seq, alive_log_probs, finished_seq,
+                            finished_scores, finished_flags, states,
+                            batch_index, outputs_seq, outputs_scores,
+                            outputs_steps, batch_steps):
+    """One step of beam search, then moves out the determined entries."""
+    batch_steps += tf.size(batch_index)
+    (i, alive_seq, alive_log_probs, finished_seq, finished_scores,
+     finished_flags, states) = inner_loop(
+         i, alive_seq, alive_log_probs, finished_seq, finished_scores,
+         finished_flags, states)
+
+    done = tf.logical_or(
+        bound_is_met(alive_log_probs, finished_scores, finished_flags),
+        tf.greater_equal(i, decode_length))
+    done_rows = tf.where(done)[:, 0]
+    alive_rows = tf.where(tf.logical_not(done))[:, 0]
+
+    # As at the end of beam_search, entries none of whose sequences reached
+    # EOS return their alive sequences.
+    any_finished = tf.reduce_any(finished_flags, 1)
+    done_seq = tf.gather(
+        tf.where(any_finished, finished_seq, alive_seq), done_rows)
+    done_seq = tf.pad(done_seq, [[0, 0], [0, 0], [0, decode_length - i]])
+    done_scores = tf.gather(
+        tf.where(any_finished, finished_scores, alive_log_probs), done_rows)
+    done_index = tf.expand_dims(tf.gather(batch_index, done_rows), 1)
+    outputs_seq += tf.scatter_nd(
+        done_index, done_seq, tf.shape(outputs_seq))
+    outputs_scores += tf.scatter_nd(
+        done_index, done_scores, tf.shape(outputs_scores))
+    outputs_steps += tf.scatter_nd(
+        done_index, tf.fill(tf.shape(done_rows), i), tf.shape(outputs_steps))
+
+    def keep_alive(tensor):
+      return tf.gather(tensor, alive_rows)
+
+    return (i, keep_alive(alive_seq), keep_alive(alive_log_probs),
+            keep_alive(finished_seq), keep_alive(finished_scores),
+            keep_alive(finished_flags), nest.map_structure(keep_alive, states),
+            keep_alive(batch_index), outputs_seq, outputs_scores,
+            outputs_steps, batch_steps)
+
+  def is_not_finished(i, *args):
+    batch_index = args[6]
+    return tf.logical_and(tf.less(i, decode_length),
+                          tf.greater(tf.size(batch_index), 0))
+
+  (decode_steps, _, _, _, _, _, _, _, outputs_seq, outputs_scores,
+   outputs_steps, batch_steps) = tf.while_loop(
+       is_not_finished,
+       compacting_inner_loop, [
+           tf.constant(0), alive_seq, alive_log_probs, finished_seq,
+           finished_scores, finished_flags, states, batch_index, outputs_seq,
+           outputs_scores, outputs_steps, tf.constant(0)
+       ],
+       shape_invariants=[
+           tf.TensorShape([]),
+           tf.TensorShape([None, None, None]),
+           tf.TensorShape([None, beam_size]),
+           tf.TensorShape([None, None, None]),
+           tf.TensorShape([None, beam_size]),
+           tf.TensorShape([None, beam_size]),
+           nest.map_structure(get_compact_state_shape_invariants, states),
+           tf.TensorShape([None]),
+           outputs_seq.get_shape(),
+           outputs_scores.get_shape(),
+           outputs_steps.get_shape(),
+           tf.TensorShape([]),
+       ],
+       parallel_iterations=1,
+       back_prop=False)
+
+  if stats is not None:
+    stats["decode_steps"] = decode_steps
+    stats["batch_steps"] = batch_steps
+    stats["batch_steps_saved"] = decode_steps * batch_size - batch_steps
+    stats["entry_steps"] = outputs_steps
+  outputs_seq = outputs_seq[:, :, :decode_steps + 1]
+  outputs_seq.set_shape((None, beam_size, None))
+  return outputs_seq, outputs_scores
@@ -369,5 +369,66 @@ class BeamSearchTest(tf.test.TestCase):
       except tf.errors.InvalidArgumentError as e:
         raise AssertionError(e.message)
 
+  def testCompactFinished(self):
+    batch_size = 5
+    beam_size = 3
+    vocab_size = 6
+    decode_length = 12
+
+    # Log probs for each batch entry and position, with EOS likely early on for
+    # some entries and never for others.
+    rng = np.random.RandomState(0)
+    logits = rng.randn(batch_size, decode_length, vocab_size)
+    logits[0, 1:, 1] += 6.
+    logits[1, 3:, 1] += 4.
+    logits[2, :, 1] -= 10.
+    logits = tf.constant(logits, dtype=tf.float32)
+
+    def symbols_to_logits(ids, i, states):
+      # Every state follows its batch entry around, so this checks that the
+      # states are compacted along with the sequences.
+      rows = tf.to_int32(states["row"][:, 0])
+      positions = tf.fill(tf.shape(rows), i)
+      return (tf.gather_nd(logits, tf.stack([rows, positions], axis=1)),
+              states)
+
+    results = []
+    for compact_finished in [False, True]:
+      stats = {}
+      states = {"row": tf.to_float(tf.reshape(tf.range(batch_size), [-1, 1]))}
+      final_ids, final_probs = beam_search.beam_search(
+          symbols_to_logits,
+          tf.zeros([batch_size], tf.int32),
+          beam_size,
+          decode_length,
+          vocab_size,
+          0.6,
+          states=states,
+          eos_id=1,
+          compact_finished=compact_finished,
+          stats=stats)
+      results.append((final_ids, final_probs, stats))
+
+    with self.test_session() as sess:
+      ((ids, probs, stats), (compact_ids, compact_probs, compact_stats)) = (
+          sess.run(results))
+
+    # Only the top beam is the same; lower beams may not be filled in.
+    self.assertAllEqual(ids[:, 0], compact_ids[:, 0])
+    self.assertAllClose(probs[:, 0], compact_probs[:, 0])
+    self.assertEqual(stats["decode_steps"], compact_stats["decode_steps"])
+    self.assertEqual(0, stats["batch_steps_saved"])
+    self.assertGreater(compact_stats["batch_steps_saved"], 0)
+    self.assertEqual(
+        stats["batch_steps"],
+        compact_stats["batch_steps"] + compact_stats["batch_steps_saved"])
+    self.assertAllEqual([stats["decode_steps"]] * batch_size,
+                        stats["entry_steps"])
+    self.assertEqual(compact_stats["batch_steps"],
+                     sum(compact_stats["entry_steps"]))
+    self.assertLess(min(compact_stats["entry_steps"]),
+                    compact_stats["decode_steps"])
+
+
 if __name__ == "__main__":
   tf.test.main()
@@ -19,6 +19,7 @@ from __future__ import print_function
 
 import collections
 import math
+import multiprocessing
 import os
 import re
 import sys
@@ -75,12 +76,9 @@ def compute_bleu(reference_corpus,
   """
   reference_length = 0
   translation_length = 0
-  bp = 1.0
-  geo_mean = 0
 
   matches_by_order = [0] * max_order
   possible_matches_by_order = [0] * max_order
-  precisions = []
 
   for (references, translations) in zip(reference_corpus, translation_corpus):
     reference_length += len(references)
@@ -96,6 +94,17 @@ def compute_bleu(reference_corpus,
       matches_by_order[len(ngram) - 1] += overlap[ngram]
     for ngram in translation_ngram_counts:
       possible_matches_by_order[len(ngram)-1] += translation_ngram_counts[ngram]
+  return _bleu_from_counts(matches_by_order, possible_matches_by_order,
+                           reference_length, translation_length, max_order,
+                           use_bp)
+
+
+def _bleu_from_counts(matches_by_order, possible_matches_by_order,
+                      reference_length, translation_length, max_order=4,
+                      use_bp=True):
+  """Computes BLEU from the n-gram match counts and lengths of a corpus."""
+  bp = 1.0
+  geo_mean = 0
   precisions = [0] * max_order
   smooth = 1.0
   for i in range(0, max_order):
@@ -128,6 +137,189 @@ def compute_bleu(reference_corpus,
   return np.float32(bleu)
 
 
+def _corpora_to_ids(corpora):
+  """Maps the tokens of tokenized corpora to ints, the same way in all.
+
+  Args:
+    corpora: list of corpora, each a list of segments of tokens.
+
+  Returns:
+    A list of (ids, lengths) pairs, one per corpus, of the flat int64 array
+    of the token ids of all the segments and the int64 array of the segment
+    lengths.
+  """
+  vocab = {}
+  encoded = []
+  for corpus in corpora:
+    ids = []
+    lengths = []
+    for segment in corpus:
+      ids.extend(vocab.setdefault(token, len(vocab)) for token in segment)
+      lengths.append(len(segment))
+    encoded.append((np.array(ids, dtype=np.int64),
+                    np.array(lengths, dtype=np.int64)))
+  return encoded
+
+
+def _bleu_stats_from_ids(args):
+  """Computes the BLEU statistics of segments of token ids.
+
+  All n-grams of an order are given dense int codes at once, for all
+  segments: the code of an n-gram is derived from the code of its first n-1
+  tokens and its last token, and renumbered with np.unique so that codes stay
+  below the number of tokens. The n-grams of a segment are then counted and
+  matched as (segment, code) integer keys.
+
+  Args:
+    args: tuple of the (ids, lengths) of the reference and translation
+      segments, as made by _corpora_to_ids, and max_order.
+
+  Returns:
+    int64 array of the statistics of each segment, see bleu_stats.
+  """
+  (ref_ids, ref_lengths), (hyp_ids, hyp_lengths), max_order = args
+  num_segments = len(ref_lengths)
+  stats = np.zeros([num_segments, 2 * max_order + 2], dtype=np.int64)
+  stats[:, -2] = ref_lengths
+  stats[:, -1] = hyp_lengths
+  ids = np.concatenate([ref_ids, hyp_ids])
+  lengths = np.concatenate([ref_lengths, hyp_lengths])
+  num_tokens = len(ids)
+  if not num_tokens:
+    return stats
+  # Segment, translation flag, and remaining length (including the token
+  # itself) of the segment, at each token.
+  segment = np.repeat(np.tile(np.arange(num_segments), 2), lengths)
+  is_hyp = np.repeat(np.arange(2 * num_segments) >= num_segments, lengths)
+  starts = np.repeat(np.cumsum(lengths) - lengths, lengths)
+  remaining = np.repeat(lengths, lengths) - (np.arange(num_tokens) - starts)
+  token_codes = np.unique(ids, return_inverse=True)[1].astype(np.int64)
+  codes = token_codes
+  for order in range(1, max_order + 1):
+    if order > 1:
+      # The last order - 1 codes are not n-grams, and masked below.
+      num_ngrams = max(num_tokens - order + 1, 0)
+      codes = np.concatenate([
+          codes[:num_ngrams] * num_tokens + token_codes[order - 1:],
+          codes[num_ngrams:]])
+      codes = np.unique(codes, return_inverse=True)[1].astype(np.int64)
+    valid = remaining >= order
+    keys = segment[valid] * num_tokens + codes[valid]
+    valid_is_hyp = is_hyp[valid]
+    hyp_keys, hyp_counts = np.unique(keys[valid_is_hyp], return_counts=True)
+    ref_keys, ref_counts = np.unique(keys[~valid_is_hyp], return_counts=True)
+    stats[:, max_order + order - 1] = np.bincount(
+        segment[valid][valid_is_hyp], minlength=num_segments)
+    if not len(hyp_keys):  # pylint: disable=g-explicit-length-test
+      continue
+    index = np.minimum(np.searchsorted(hyp_keys, ref_keys), len(hyp_keys) - 1)
+    found = hyp_keys[index] == ref_keys
+    matches = np.minimum(ref_counts[found], hyp_counts[index[found]])
+    np.add.at(stats[:, order - 1], ref_keys[found] // num_tokens, matches)
+  return stats
+
+
+def bleu_stats(reference_corpus, translation_corpus, max_order=4,
+               num_workers=1, chunk_size=1000):
+  """Computes the sufficient statistics of BLEU for each segment.
+
+  Summed over any subset of segments, the statistics give the BLEU score of
+  that subset with bleu_from_stats, e.g. for sentence BLEU or bootstrap
+  resampling, without counting n-grams again.
+
+  Args:
+    reference_corpus: list of references for each translation. Each
+        reference should be tokenized into a list of tokens.
+    translation_corpus: list of translations to score. Each translation
+        should be tokenized into a list of tokens.
+    max_order: Maximum n-gram order to use when computing BLEU score.
+    num_workers: number of processes to count n-grams in.
+    chunk_size: number of segments per task sent to a process.
+
+  Returns:
+    int64 array of shape [num_segments, 2 * max_order + 2]. Columns
+    [0, max_order) hold the n-gram matches of each order, columns
+    [max_order, 2 * max_order) the translation n-grams of each order, and
+    the last two the reference and translation lengths.
+  """
+  num_segments = min(len(reference_corpus), len(translation_corpus))
+  chunks = []
+  for start in range(0, num_segments, chunk_size):
+    end = min(start + chunk_size, num_segments)
+    chunks.append(tuple(_corpora_to_ids(
+        [reference_corpus[start:end], translation_corpus[start:end]])) +
+                  (max_order,))
+  if not chunks:
+    return np.zeros([0, 2 * max_order + 2], dtype=np.int64)
+  if num_workers > 1 and len(chunks) > 1:
+    pool = multiprocessing.Pool(num_workers)
+    try:
+      chunk_stats = pool.map(_bleu_stats_from_ids, chunks)
+    finally:
+      pool.close()
+      pool.join()
+  else:
+    chunk_stats = [_bleu_stats_from_ids(chunk) for chunk in chunks]
+  return np.concatenate(chunk_stats)
+
+
+def bleu_from_stats(stats, max_order=4, use_bp=True):
+  """Computes BLEU from statistics as returned by bleu_stats.
+
+  Args:
+    stats: int array of the statistics of one segment, or of several segments
+      to score as one corpus.
+    max_order: Maximum n-gram order, as given to bleu_stats.
+    use_bp: boolean, whether to apply brevity penalty.
+
+  Returns:
+    BLEU score, the same as compute_bleu's on those segments.
+  """
+  stats = np.asarray(stats)
+  if stats.ndim > 1:
+    stats = stats.sum(axis=0)
+  stats = [int(x) for x in stats]
+  return _bleu_from_counts(stats[:max_order], stats[max_order:2 * max_order],
+                           stats[-2], stats[-1], max_order, use_bp)
+
+
+def corpus_bleu(reference_corpus, translation_corpus, max_order=4,
+                use_bp=True, num_workers=1):
+  """Computes BLEU like compute_bleu, with integer n-grams and processes."""
+  return bleu_from_stats(
+      bleu_stats(reference_corpus, translation_corpus, max_order,
+                 num_workers=num_workers), max_order, use_bp)
+
+
+def sentence_bleu(stats, max_order=4, use_bp=True):
+  """Returns the BLEU score of each segment of stats from bleu_stats."""
+  return np.array([bleu_from_stats(segment_stats, max_order, use_bp)
+                   for segment_stats in stats], dtype=np.float32)
+
+
+def bootstrap_bleu(stats, num_samples=1000, max_order=4, use_bp=True,
+                   seed=None):
+  """BLEU scores of corpora resampled with replacement from stats.
+
+  Args:
+    stats: int array of segment statistics, as returned by bleu_stats.
+    num_samples: number of resampled corpora.
+    max_order: Maximum n-gram order, as given to bleu_stats.
+    use_bp: boolean, whether to apply brevity penalty.
+    seed: optional random seed.
+
+  Returns:
+    float32 array of num_samples BLEU scores, e.g. to take percentiles of for
+    a confidence interval.
+  """
+  stats = np.asarray(stats)
+  rng = np.random.RandomState(seed)
+  samples = rng.randint(len(stats), size=[num_samples, len(stats)])
+  return np.array(
+      [bleu_from_stats(stats[sample].sum(axis=0), max_order, use_bp)
+       for sample in samples], dtype=np.float32)
+
+
 def bleu_score(predictions, labels, **unused_kwargs):
   """BLEU score computation between labels and predictions.
 
@@ -198,20 +390,39 @@ def bleu_tokenize(string):
   return string.split()
 
 
-def bleu_wrapper(ref_filename, hyp_filename, case_sensitive=False):
-  """Compute BLEU for two files (reference and hypothesis translation)."""
-  ref_lines = text_encoder.native_to_unicode(
-      tf.gfile.Open(ref_filename, "r").read()).split("\n")
-  hyp_lines = text_encoder.native_to_unicode(
-      tf.gfile.Open(hyp_filename, "r").read()).split("\n")
-  assert len(ref_lines) == len(hyp_lines), ("{} != {}".format(
-      len(ref_lines), len(hyp_lines)))
+# Tokenized lines of reference files, by (filename, case_sensitive), with the
+# modification time and size of the file they were read at. Many translations
+# are usually scored against the same reference.
+_REFERENCE_TOKENS = {}
+
+
+def _tokenize_file(filename, case_sensitive=False):
+  lines = text_encoder.native_to_unicode(
+      tf.gfile.Open(filename, "r").read()).split("\n")
   if not case_sensitive:
-    ref_lines = [x.lower() for x in ref_lines]
-    hyp_lines = [x.lower() for x in hyp_lines]
-  ref_tokens = [bleu_tokenize(x) for x in ref_lines]
-  hyp_tokens = [bleu_tokenize(x) for x in hyp_lines]
-  return compute_bleu(ref_tokens, hyp_tokens)
+    lines = [x.lower() for x in lines]
+  return [bleu_tokenize(x) for x in lines]
+
+
+def _reference_tokens(ref_filename, case_sensitive=False):
+  """Returns the tokenized lines of ref_filename, tokenizing it once."""
+  key = (ref_filename, case_sensitive)
+  stat = tf.gfile.Stat(ref_filename)
+  version = (stat.mtime_nsec, stat.length)
+  if key not in _REFERENCE_TOKENS or _REFERENCE_TOKENS[key][0] != version:
+    _REFERENCE_TOKENS[key] = (version,
+                              _tokenize_file(ref_filename, case_sensitive))
+  return _REFERENCE_TOKENS[key][1]
+
+
+def bleu_wrapper(ref_filename, hyp_filename, case_sensitive=False,
+                 num_workers=1):
+  """Compute BLEU for two files (reference and hypothesis translation)."""
+  ref_tokens = _reference_tokens(ref_filename, case_sensitive)
+  hyp_tokens = _tokenize_file(hyp_filename, case_sensitive)
+  assert len(ref_tokens) == len(hyp_tokens), ("{} != {}".format(
+      len(ref_tokens), len(hyp_tokens)))
+  return corpus_bleu(ref_tokens, hyp_tokens, num_workers=num_workers)
 
 
 StepFile = collections.namedtuple("StepFile", "filename mtime ctime steps")
@@ -21,6 +21,7 @@ from __future__ import print_function
 
 import os
 import tempfile
+import numpy as np
 import six
 
 from tensor2tensor.data_generators import text_encoder
@@ -60,6 +61,40 @@ class BleuHookTest(tf.test.TestCase):
     actual_bleu = 0.3436
     self.assertAllClose(bleu, actual_bleu, atol=1e-03)
 
+  def testBleuStats(self):
+    rng = np.random.RandomState(0)
+    reference_corpus = [list(rng.randint(6, size=rng.randint(0, 12)))
+                        for _ in range(40)]
+    translation_corpus = [list(rng.randint(6, size=rng.randint(0, 12)))
+                          for _ in range(40)]
+    for max_order in [1, 4]:
+      bleu = bleu_hook.compute_bleu(reference_corpus, translation_corpus,
+                                    max_order=max_order)
+      stats = bleu_hook.bleu_stats(reference_corpus, translation_corpus,
+                                   max_order=max_order, chunk_size=7)
+      self.assertEqual((40, 2 * max_order + 2), stats.shape)
+      self.assertEqual(bleu, bleu_hook.bleu_from_stats(stats, max_order))
+      self.assertEqual(bleu, bleu_hook.corpus_bleu(
+          reference_corpus, translation_corpus, max_order=max_order,
+          num_workers=2))
+      sentence_bleu = bleu_hook.sentence_bleu(stats, max_order)
+      for i in range(len(stats)):
+        self.assertEqual(
+            bleu_hook.compute_bleu(reference_corpus[i:i + 1],
+                                   translation_corpus[i:i + 1],
+                                   max_order=max_order),
+            sentence_bleu[i])
+
+  def testBootstrapBleu(self):
+    reference_corpus = [[1, 2, 3, 4], [5, 6, 7, 8]] * 5
+    translation_corpus = [[1, 2, 3, 4], [8, 7, 6, 5]] * 5
+    stats = bleu_hook.bleu_stats(reference_corpus, translation_corpus)
+    samples = bleu_hook.bootstrap_bleu(stats, num_samples=50, seed=0)
+    self.assertEqual((50,), samples.shape)
+    self.assertTrue(np.all(samples >= 0.) and np.all(samples <= 1.))
+    self.assertAllEqual(
+        samples, bleu_hook.bootstrap_bleu(stats, num_samples=50, seed=0))
+
   def testBleuTokenize(self):
     self.assertEqual(bleu_hook.bleu_tokenize(u"hi, “there”"),
                      [u"hi", u",", u"“", u"there", u"”"])
@@ -31,7 +31,7 @@ from __future__ import print_function
 import os
 import numpy as np
 
-from tensor2tensor import models  # pylint: disable=unused-import
+from tensor2tensor.models import all_models  # pylint: disable=unused-import
 from tensor2tensor import problems  # pylint: disable=unused-import
 from tensor2tensor.data_generators import problem
 from tensor2tensor.utils import trainer_lib
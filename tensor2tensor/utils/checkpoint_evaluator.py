@@ -0,0 +1,167 @@
+# coding=utf-8
+# Copyright 2018 The Tensor2Tensor Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Decodes a source file with many checkpoints of a model, in one process.
+
+The inference graph is built once, by a decoding.Predictor, and the weights of
+each checkpoint are restored into it in turn. The source file is read, encoded
+and batched once, the batches are decoded by a pool of threads sharing the
+session, and the translations are scored with BLEU right away.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import json
+import os
+import time
+
+from multiprocessing.pool import ThreadPool
+
+from tensor2tensor.utils import bleu_hook
+from tensor2tensor.utils import decoding
+import tensorflow as tf
+
+
+def _checkpoint_steps(checkpoint_path):
+  try:
+    return int(checkpoint_path.rsplit("-")[-1])
+  except ValueError:
+    return None
+
+
+class CheckpointEvaluator(object):
+  """Translates a source file with checkpoints of a model and scores them."""
+
+  def __init__(self, estimator, hparams, decode_hp, source_filename,
+               reference_filename=None, num_threads=1):
+    """Reads, encodes and batches the source file.
+
+    Args:
+      estimator: a T2T Estimator, as made by trainer_lib.create_estimator.
+      hparams: model hyperparameters.
+      decode_hp: decoding hyperparameters, see decoding.decode_hparams. The
+        inputs are batched by decode_hp.batch_tokens if set, else by
+        decode_hp.batch_size (32 if unset).
+      source_filename: file with the inputs to translate, 1 per
+        decode_hp.delimiter.
+      reference_filename: optional file with the reference translations, to
+        compute BLEU with.
+      num_threads: number of batches decoded at a time.
+    """
+    self._estimator = estimator
+    self._hparams = hparams
+    self._decode_hp = decode_hp
+    self._reference_filename = reference_filename
+    self._num_threads = num_threads
+    self._predictor = None
+
+    p_hp = hparams.problem_hparams
+    inputs_vocab = p_hp.vocabulary.get("inputs", p_hp.vocabulary["targets"])
+    self._targets_vocab = p_hp.vocabulary["targets"]
+    # pylint: disable=protected-access
+    sorted_inputs, self._sorted_keys, (input_ids, offsets) = (
+        decoding._get_sorted_encoded_inputs(source_filename, inputs_vocab,
+                                            delimiter=decode_hp.delimiter))
+    self._num_inputs = len(sorted_inputs)
+    # Batches over the inputs from longest to shortest, as decode_from_file
+    # decodes them.
+    lengths = decoding._padded_input_lengths(
+        offsets, decode_hp.max_input_size)[::-1]
+    if decode_hp.get("batch_tokens", 0):
+      batches = decoding._token_budget_batches(
+          lengths, decode_hp.batch_tokens, decode_hp.batch_size)
+    else:
+      batch_size = decode_hp.batch_size or 32
+      batches = [(start, min(start + batch_size, self._num_inputs), None)
+                 for start in range(0, self._num_inputs, batch_size)]
+    self._batches = list(decoding._decode_token_budget_input_fn(
+        batches, input_ids, offsets, decode_hp.max_input_size))
+    # pylint: enable=protected-access
+    tf.logging.info("Batched %d inputs of %s into %d batches",
+                    self._num_inputs, source_filename, len(self._batches))
+
+  def _restore(self, checkpoint_path):
+    if self._predictor is None:
+      self._predictor = decoding.Predictor(
+          self._estimator, self._hparams, checkpoint_path=checkpoint_path)
+    else:
+      self._predictor.restore(checkpoint_path)
+
+  def translate(self, checkpoint_path):
+    """Returns the translations of the inputs, in order, with a checkpoint."""
+    self._restore(checkpoint_path)
+    pool = ThreadPool(self._num_threads)
+    try:
+      batch_predictions = pool.map(self._predictor.predict, self._batches)
+    finally:
+      pool.close()
+      pool.join()
+    decodes = []
+    for predictions in batch_predictions:
+      for outputs in predictions["outputs"]:
+        decodes.append(self._targets_vocab.decode(
+            decoding._save_until_eos(outputs)))  # pylint: disable=protected-access
+    # The decodes are from the longest input to the shortest.
+    decodes.reverse()
+    return [decodes[self._sorted_keys[i]] for i in range(self._num_inputs)]
+
+  def evaluate(self, checkpoint_path, decode_to_file):
+    """Translates with a checkpoint, writes and scores the translations.
+
+    Args:
+      checkpoint_path: checkpoint to translate with.
+      decode_to_file: file to write the translations to, with the
+        modification time of the checkpoint, as t2t-decoder --keep_timestamp
+        does. A JSON summary is written to decode_to_file + ".json".
+
+    Returns:
+      The summary, a dict with the checkpoint, its step, the decoding time
+      and the BLEU scores, if there is a reference file.
+    """
+    start_time = time.time()
+    decodes = self.translate(checkpoint_path)
+    decode_secs = time.time() - start_time
+    with tf.gfile.Open(decode_to_file, "w") as f:
+      for decoded in decodes:
+        f.write("%s%s" % (decoded, self._decode_hp.delimiter))
+    index_filename = checkpoint_path + ".index"
+    if os.path.exists(index_filename):
+      ckpt_time = os.path.getmtime(index_filename)
+      os.utime(decode_to_file, (ckpt_time, ckpt_time))
+
+    summary = {
+        "checkpoint_path": checkpoint_path,
+        "steps": _checkpoint_steps(checkpoint_path),
+        "num_inputs": self._num_inputs,
+        "decode_secs": decode_secs,
+        "translations": decode_to_file,
+    }
+    if self._reference_filename:
+      for name, case_sensitive in [("bleu_uncased", False),
+                                   ("bleu_cased", True)]:
+        summary[name] = 100 * float(bleu_hook.bleu_wrapper(
+            self._reference_filename, decode_to_file,
+            case_sensitive=case_sensitive))
+    with tf.gfile.Open(decode_to_file + ".json", "w") as f:
+      f.write(json.dumps(summary, indent=2, sort_keys=True))
+    tf.logging.info("Evaluated %s: %s", checkpoint_path,
+                    json.dumps(summary, sort_keys=True))
+    return summary
+
+  def close(self):
+    if self._predictor is not None:
+      self._predictor.log_stats()
+      self._predictor.close()
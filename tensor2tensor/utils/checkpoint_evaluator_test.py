@@ -0,0 +1,158 @@
+# coding=utf-8
+# Copyright 2018 The Tensor2Tensor Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Tests for tensor2tensor.utils.checkpoint_evaluator."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import json
+import os
+
+from tensor2tensor.data_generators import text_encoder
+from tensor2tensor.utils import checkpoint_evaluator
+from tensor2tensor.utils import decoding
+
+import tensorflow as tf
+
+
+_INPUTS = [
+    "a b c d e",
+    "the quick brown fox jumps over",
+    "hi",
+    "one two three four",
+    "",
+    "some more words to translate here",
+]
+
+
+def _shifted(text, shift):
+  return "".join(chr(ord(c) + shift) for c in text)
+
+
+class _ShiftEstimator(object):
+  """Stands in for a T2T Estimator.
+
+  Its model predicts the input bytes shifted by the value of the "shift"
+  variable of the checkpoint.
+  """
+
+  def __init__(self, model_dir):
+    self.model_dir = model_dir
+    self.config = tf.estimator.RunConfig(
+        session_config=tf.ConfigProto(inter_op_parallelism_threads=1))
+    self.num_model_fn_calls = 0
+
+  def model_fn(self, features, labels, mode, config):
+    del labels, config  # Unused.
+    self.num_model_fn_calls += 1
+    shift = tf.get_variable("shift", [], tf.int32,
+                            initializer=tf.zeros_initializer())
+    inputs = tf.squeeze(features["inputs"], axis=2)
+    # EOS and padding are kept.
+    outputs = tf.where(inputs > text_encoder.EOS_ID, inputs + shift, inputs)
+    return tf.estimator.EstimatorSpec(mode, predictions={"outputs": outputs})
+
+
+class CheckpointEvaluatorTest(tf.test.TestCase):
+
+  def setUp(self):
+    super(CheckpointEvaluatorTest, self).setUp()
+    self.model_dir = os.path.join(self.get_temp_dir(), "model")
+    tf.gfile.MakeDirs(self.model_dir)
+    self.checkpoint_paths = []
+    for step, shift in [(100, 0), (200, 1)]:
+      with tf.Graph().as_default():
+        global_step = tf.train.get_or_create_global_step()
+        shift_var = tf.get_variable("shift", [], tf.int32,
+                                    initializer=tf.constant_initializer(shift))
+        with tf.Session() as session:
+          session.run(tf.global_variables_initializer())
+          session.run([global_step.assign(step), shift_var])
+          self.checkpoint_paths.append(tf.train.Saver().save(
+              session, os.path.join(self.model_dir, "model.ckpt"),
+              global_step=step))
+
+    self.source_filename = os.path.join(self.get_temp_dir(), "source.txt")
+    with tf.gfile.Open(self.source_filename, "w") as f:
+      f.write("\n".join(_INPUTS) + "\n")
+    encoder = text_encoder.ByteTextEncoder()
+    self.hparams = tf.contrib.training.HParams(
+        problem_hparams=tf.contrib.training.HParams(
+            vocabulary={"inputs": encoder, "targets": encoder},
+            input_space_id=0,
+            target_space_id=0))
+
+  def _evaluator(self, estimator, **decode_hp_overrides):
+    decode_hp = decoding.decode_hparams()
+    decode_hp.override_from_dict(decode_hp_overrides)
+    return checkpoint_evaluator.CheckpointEvaluator(
+        estimator, self.hparams, decode_hp, self.source_filename,
+        reference_filename=self.source_filename, num_threads=2)
+
+  def testTranslateKeepsInputOrder(self):
+    for decode_hp_overrides in [{"batch_size": 4}, {"batch_tokens": 16}]:
+      estimator = _ShiftEstimator(self.model_dir)
+      evaluator = self._evaluator(estimator, **decode_hp_overrides)
+      self.assertEqual(_INPUTS, evaluator.translate(self.checkpoint_paths[0]))
+      self.assertEqual([_shifted(text, 1) for text in _INPUTS],
+                       evaluator.translate(self.checkpoint_paths[1]))
+      evaluator.close()
+
+  def testRestoreKeepsGraph(self):
+    estimator = _ShiftEstimator(self.model_dir)
+    predictor = decoding.Predictor(
+        estimator, self.hparams, checkpoint_path=self.checkpoint_paths[0])
+    # The session is configured like the Estimator's.
+    self.assertEqual(
+        1, predictor._session._config.inter_op_parallelism_threads)
+    graph = predictor._graph
+    num_ops = len(graph.get_operations())
+    features = {"inputs": [[ord("a") + 2, text_encoder.EOS_ID]]}
+    self.assertEqual(ord("a") + 2, predictor.predict(features)["outputs"][0, 0])
+
+    predictor.restore(self.checkpoint_paths[1])
+    self.assertEqual(ord("b") + 2, predictor.predict(features)["outputs"][0, 0])
+    self.assertEqual(self.checkpoint_paths[1], predictor.checkpoint_path)
+    self.assertIs(graph, predictor._graph)
+    self.assertEqual(num_ops, len(graph.get_operations()))
+    self.assertEqual(1, estimator.num_model_fn_calls)
+    predictor.close()
+
+  def testEvaluateWritesSummary(self):
+    estimator = _ShiftEstimator(self.model_dir)
+    evaluator = self._evaluator(estimator, batch_size=4)
+    decode_to_file = os.path.join(self.get_temp_dir(), "translations.txt")
+    for checkpoint_path in self.checkpoint_paths:
+      summary = evaluator.evaluate(checkpoint_path, decode_to_file)
+    evaluator.close()
+    # The graph was built once for both checkpoints.
+    self.assertEqual(1, estimator.num_model_fn_calls)
+
+    with tf.gfile.Open(decode_to_file) as f:
+      self.assertEqual([_shifted(text, 1) for text in _INPUTS],
+                       f.read().splitlines())
+    with tf.gfile.Open(decode_to_file + ".json") as f:
+      self.assertEqual(summary, json.loads(f.read()))
+    self.assertEqual(self.checkpoint_paths[1], summary["checkpoint_path"])
+    self.assertEqual(200, summary["steps"])
+    self.assertEqual(len(_INPUTS), summary["num_inputs"])
+    self.assertEqual(decode_to_file, summary["translations"])
+    self.assertIn("bleu_cased", summary)
+    self.assertIn("bleu_uncased", summary)
+
+
+if __name__ == "__main__":
+  tf.test.main()
@@ -0,0 +1,228 @@
+# coding=utf-8
+# Copyright 2018 The Tensor2Tensor Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Cache of decode results, keyed on the model and the input ids.
+
+Repeated inputs (UI strings, boilerplate sentences) are decoded once. The
+cache has an in-memory LRU tier and an optional sqlite file tier that
+persists across runs:
+
+  cache = decode_cache.DecodeCache(
+      decode_cache.make_namespace(checkpoint_path, problem_name, decode_hp),
+      path="/tmp/decodes.sqlite")
+  result = cache.get(input_ids)
+  if result is None:
+    result = decode(input_ids)
+    cache.put(input_ids, result)
+
+The namespace identifies everything but the inputs that the results depend
+on, so that results of other checkpoints or decode settings are never
+returned.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import collections
+import hashlib
+import json
+import sqlite3
+import threading
+
+from six.moves import cPickle
+
+from tensor2tensor.data_generators import text_encoder
+import tensorflow as tf
+
+
+# Decode hparams that change how decoding is run or written out, but not the
+# decodes themselves.
+_NON_RESULT_DECODE_HPARAMS = frozenset([
+    "batch_size",
+    "batch_tokens",
+    "compact_finished_beams",
+    "decode_in_memory",
+    "decode_to_file",
+    "delimiter",
+    "log_results",
+    "num_samples",
+    "preallocate_cache",
+    "save_images",
+    "shard_id",
+    "shards",
+])
+
+
+def make_namespace(checkpoint_path, problem_name, decode_hp=None, *extra):
+  """Makes a cache namespace for decodes of a model with decode settings.
+
+  Args:
+    checkpoint_path: path of the checkpoint (or name of the served model)
+      producing the decodes.
+    problem_name: name of the problem.
+    decode_hp: optional decode hparams, see decoding.decode_hparams. Those
+      that do not change the decodes, like batch_size, are left out.
+    *extra: any other JSON-serializable values the results depend on.
+
+  Returns:
+    A string.
+  """
+  decode_values = {}
+  if decode_hp is not None:
+    decode_values = {
+        name: value for name, value in decode_hp.values().items()
+        if name not in _NON_RESULT_DECODE_HPARAMS
+    }
+  return json.dumps(
+      [checkpoint_path, problem_name, decode_values, list(extra)],
+      sort_keys=True)
+
+
+def normalize_input_ids(input_ids):
+  """Strips trailing EOS and padding ids, so that any encoding matches."""
+  return [int(i) for i in text_encoder.strip_ids(
+      input_ids, [text_encoder.PAD_ID, text_encoder.EOS_ID])]
+
+
+class DecodeCache(object):
+  """Two-tier cache from input ids to decode results.
+
+  Lookups go to the in-memory LRU tier first, then to the sqlite tier at
+  path, if any; results found there are promoted to memory. Results are
+  pickled in the sqlite tier, so they may be any picklable value.
+
+  Safe to use from several threads.
+  """
+
+  def __init__(self, namespace, capacity=10000, path=None):
+    """Opens the cache.
+
+    Args:
+      namespace: string identifying what the results depend on besides the
+        inputs, as made by make_namespace.
+      capacity: maximum number of results in the in-memory tier.
+      path: optional path of a sqlite file for the persistent tier; created if
+        missing. Several namespaces may share a file.
+    """
+    self._namespace = namespace
+    self._memory = text_encoder.LRUCache(capacity)
+    self._lock = threading.Lock()
+    self._db = None
+    if path:
+      self._db = sqlite3.connect(path, check_same_thread=False)
+      self._db.execute("CREATE TABLE IF NOT EXISTS decodes "
+                       "(key TEXT PRIMARY KEY, value BLOB)")
+      self._db.commit()
+    self.hits = 0
+    self.disk_hits = 0
+    self.misses = 0
+
+  def _key(self, input_ids):
+    ids = ",".join(str(i) for i in normalize_input_ids(input_ids))
+    return hashlib.sha1(
+        (self._namespace + "\n" + ids).encode("utf-8")).hexdigest()
+
+  def get(self, input_ids):
+    """Returns the result cached for input_ids, or None."""
+    return self._get(self._key(input_ids))
+
+  def get_many(self, input_ids_list):
+    """Looks up several inputs, grouping the uncached ones by input.
+
+    Repeats of an uncached input count as hits, since only one of them needs
+    to be decoded.
+
+    Args:
+      input_ids_list: list of input id sequences.
+
+    Returns:
+      A pair (results, uncached_groups). results has the cached result, or
+      None, for each input. uncached_groups has, for each distinct uncached
+      input in order of first appearance, the list of its indices in
+      input_ids_list.
+    """
+    results = [None] * len(input_ids_list)
+    groups = collections.OrderedDict()
+    for i, input_ids in enumerate(input_ids_list):
+      key = self._key(input_ids)
+      if key in groups:
+        groups[key].append(i)
+        with self._lock:
+          self.hits += 1
+        continue
+      results[i] = self._get(key)
+      if results[i] is None:
+        groups[key] = [i]
+    return results, list(groups.values())
+
+  def _get(self, key):
+    with self._lock:
+      value = self._memory.get(key)
+      if value is not None:
+        self.hits += 1
+        return value
+      if self._db is not None:
+        row = self._db.execute("SELECT value FROM decodes WHERE key = ?",
+                               (key,)).fetchone()
+        if row is not None:
+          value = cPickle.loads(bytes(row[0]))
+          self._memory.put(key, value)
+          self.hits += 1
+          self.disk_hits += 1
+          return value
+      self.misses += 1
+      return None
+
+  def put(self, input_ids, value):
+    """Caches the result for input_ids in both tiers."""
+    key = self._key(input_ids)
+    with self._lock:
+      self._memory.put(key, value)
+      if self._db is not None:
+        self._db.execute(
+            "INSERT OR REPLACE INTO decodes (key, value) VALUES (?, ?)",
+            (key, sqlite3.Binary(cPickle.dumps(value, protocol=2))))
+        self._db.commit()
+
+  def stats(self):
+    """Returns a dict of the lookup counters and tier sizes."""
+    with self._lock:
+      lookups = self.hits + self.misses
+      disk_size = 0
+      if self._db is not None:
+        disk_size = self._db.execute(
+            "SELECT COUNT(*) FROM decodes").fetchone()[0]
+      return {
+          "hits": self.hits,
+          "disk_hits": self.disk_hits,
+          "misses": self.misses,
+          "hit_rate": float(self.hits) / lookups if lookups else 0.0,
+          "memory_size": len(self._memory),
+          "disk_size": disk_size,
+      }
+
+  def log_stats(self, name="Decode cache"):
+    stats = self.stats()
+    tf.logging.info(
+        "%s: hits=%d (%d from disk) misses=%d hit_rate=%.3f memory_size=%d "
+        "disk_size=%d", name, stats["hits"], stats["disk_hits"],
+        stats["misses"], stats["hit_rate"], stats["memory_size"],
+        stats["disk_size"])
+
+  def close(self):
+    with self._lock:
+      if self._db is not None:
+        self._db.close()
+        self._db = None
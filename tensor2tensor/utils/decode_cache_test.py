@@ -0,0 +1,98 @@
+# coding=utf-8
+# Copyright 2018 The Tensor2Tensor Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Tests for tensor2tensor.utils.decode_cache."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import os
+
+from tensor2tensor.data_generators import text_encoder
+from tensor2tensor.utils import decode_cache
+
+import tensorflow as tf
+
+
+class DecodeCacheTest(tf.test.TestCase):
+
+  def testMemoryTier(self):
+    cache = decode_cache.DecodeCache("model", capacity=2)
+    self.assertIsNone(cache.get([5, 6]))
+    cache.put([5, 6], ("output", -1.5))
+    self.assertEqual(("output", -1.5), cache.get([5, 6]))
+    # Trailing EOS and padding do not change the key.
+    self.assertEqual(("output", -1.5),
+                     cache.get([5, 6, text_encoder.EOS_ID, 0, 0]))
+    self.assertIsNone(cache.get([6, 5]))
+    # Other namespaces do not see the result.
+    self.assertIsNone(decode_cache.DecodeCache("other model").get([5, 6]))
+    stats = cache.stats()
+    self.assertEqual(2, stats["hits"])
+    self.assertEqual(2, stats["misses"])
+    self.assertEqual(0.5, stats["hit_rate"])
+    self.assertEqual(1, stats["memory_size"])
+
+  def testGetManyGroupsRepeatedInputs(self):
+    cache = decode_cache.DecodeCache("model")
+    cache.put([1], "cached")
+    results, uncached_groups = cache.get_many(
+        [[2], [1], [3], [2, text_encoder.EOS_ID], [1], [3], [2]])
+    self.assertEqual([None, "cached", None, None, "cached", None, None],
+                     results)
+    self.assertEqual([[0, 3, 6], [2, 5]], uncached_groups)
+    stats = cache.stats()
+    # Repeats of uncached inputs are hits, as they are decoded only once.
+    self.assertEqual(5, stats["hits"])
+    self.assertEqual(2, stats["misses"])
+
+  def testDiskTier(self):
+    path = os.path.join(self.get_temp_dir(), "decode_cache.sqlite")
+    if os.path.exists(path):
+      os.remove(path)
+    cache = decode_cache.DecodeCache("model", capacity=1, path=path)
+    cache.put([1, 2], "first")
+    cache.put([3, 4], "second")
+    # The first result was evicted from memory but is still on disk.
+    self.assertEqual("first", cache.get([1, 2]))
+    self.assertEqual(1, cache.stats()["disk_hits"])
+    cache.close()
+
+    cache = decode_cache.DecodeCache("model", capacity=1, path=path)
+    self.assertEqual("second", cache.get([3, 4]))
+    self.assertEqual(2, cache.stats()["disk_size"])
+    self.assertIsNone(
+        decode_cache.DecodeCache("other model", path=path).get([3, 4]))
+    cache.close()
+    os.remove(path)
+
+  def testMakeNamespace(self):
+    decode_hp = tf.contrib.training.HParams(
+        beam_size=4, alpha=0.6, batch_size=32)
+    namespace = decode_cache.make_namespace("model.ckpt-100", "problem",
+                                            decode_hp)
+    # Decode hparams that do not change the decodes are left out.
+    decode_hp.batch_size = 64
+    self.assertEqual(namespace, decode_cache.make_namespace(
+        "model.ckpt-100", "problem", decode_hp))
+    decode_hp.beam_size = 1
+    self.assertNotEqual(namespace, decode_cache.make_namespace(
+        "model.ckpt-100", "problem", decode_hp))
+    self.assertNotEqual(namespace, decode_cache.make_namespace(
+        "model.ckpt-200", "problem", decode_hp))
+
+
+if __name__ == "__main__":
+  tf.test.main()
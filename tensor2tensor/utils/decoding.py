@@ -20,6 +20,7 @@ from __future__ import print_function
 import collections
 import operator
 import os
+import threading
 import time
 
 import numpy as np
@@ -30,6 +31,7 @@ from six.moves import input  # pylint: disable=redefined-builtin
 from tensor2tensor.data_generators import problem as problem_lib
 from tensor2tensor.data_generators import text_encoder
 from tensor2tensor.data_generators import text_problems
+from tensor2tensor.utils import data_reader
 from tensor2tensor.utils import registry
 import tensorflow as tf
 
@@ -46,6 +48,10 @@ def decode_hparams(overrides=""):
       log_results=True,
       extra_length=100,
       batch_size=0,
+      # If positive, decode_from_file batches inputs of similar length
+      # together, with up to this many (padded) input tokens per batch, instead
+      # of batch_size inputs per batch.
+      batch_tokens=0,
       beam_size=4,
       alpha=0.6,
       eos_penalty=0.0,
@@ -63,7 +69,14 @@ def decode_hparams(overrides=""):
       shards=1,
       shard_id=0,
       num_decodes=1,
-      force_decode_length=False)
+      force_decode_length=False,
+      # Preallocate the Transformer's self-attention cache for the full decode
+      # length and update it in place, instead of growing it every step.
+      # Only affects greedy decoding (beam_size 1); beam search ignores it.
+      preallocate_cache=False,
+      # Drop batch entries from beam search once their best beam is known,
+      # instead of decoding the whole batch until all of them are.
+      compact_finished_beams=False)
   hp.parse(overrides)
   return hp
 
@@ -248,11 +261,16 @@ def decode_once(estimator,
   inputs_vocab = problem_hparams.vocabulary[inputs_vocab_key]
   targets_vocab = problem_hparams.vocabulary["targets"]
 
+  # Beam search steps of the examples, and of their batches.
+  beam_steps = [0, 0]
   for num_predictions, prediction in enumerate(predictions):
     num_predictions += 1
     inputs = prediction["inputs"]
     targets = prediction["targets"]
     outputs = prediction["outputs"]
+    if "decode_steps" in prediction:
+      beam_steps[0] += prediction["decode_steps"]
+      beam_steps[1] += prediction["batch_decode_steps"]
 
     # Log predictions
     decoded_outputs = []
@@ -309,6 +327,7 @@ def decode_once(estimator,
         num_predictions >= decode_hp.num_samples):
       break
 
+  _log_beam_search_stats(*beam_steps)
   if decode_to_file:
     output_file.close()
     target_file.close()
@@ -320,9 +339,27 @@ def decode_from_file(estimator,
                      hparams,
                      decode_hp,
                      decode_to_file=None,
-                     checkpoint_path=None):
-  """Compute predictions on entries in filename and write them out."""
-  if not decode_hp.batch_size:
+                     checkpoint_path=None,
+                     predictor=None,
+                     decode_cache=None):
+  """Compute predictions on entries in filename and write them out.
+
+  Args:
+    estimator: the Estimator to predict with.
+    filename: path to file with inputs, 1 per line.
+    hparams: model hyperparameters.
+    decode_hp: decoding hyperparameters, see decode_hparams.
+    decode_to_file: if given, the output filename.
+    checkpoint_path: checkpoint to predict with. Defaults to the latest one.
+    predictor: optional Predictor to predict with, instead of
+      estimator.predict.
+    decode_cache: optional decode_cache.DecodeCache of the decodes, as
+      written out, of this model and decode_hp. Cached inputs are not
+      decoded again, repeated ones are decoded once, and the new decodes are
+      added to it.
+  """
+  batch_tokens = decode_hp.get("batch_tokens", 0)
+  if not decode_hp.batch_size and not batch_tokens:
     decode_hp.batch_size = 32
     tf.logging.info(
         "decode_hp.batch_size not specified; default=%d" % decode_hp.batch_size)
@@ -336,24 +373,77 @@ def decode_from_file(estimator,
   targets_vocab = p_hp.vocabulary["targets"]
   problem_name = FLAGS.problem
   tf.logging.info("Performing decoding from a file.")
-  sorted_inputs, sorted_keys = _get_sorted_inputs(filename, decode_hp.shards,
-                                                  decode_hp.delimiter)
-  num_decode_batches = (len(sorted_inputs) - 1) // decode_hp.batch_size + 1
+  # The bucket boundary of each decoded example, in decode order, when
+  # batching by tokens.
+  bucket_of_example = []
+  if batch_tokens:
+    sorted_inputs, sorted_keys, (input_ids, offsets) = (
+        _get_sorted_encoded_inputs(filename, inputs_vocab, decode_hp.shards,
+                                   decode_hp.delimiter))
+  else:
+    sorted_inputs, sorted_keys = _get_sorted_inputs(filename, decode_hp.shards,
+                                                    decode_hp.delimiter)
+
+  # Cached decodes, by index in all_sorted_inputs. Only one of each distinct
+  # uncached input is batched and decoded.
+  all_sorted_inputs = sorted_inputs
+  if decode_cache is not None:
+    if batch_tokens:
+      all_ids, all_offsets = input_ids, offsets
+    else:
+      all_ids, all_offsets = inputs_vocab.encode_batch(sorted_inputs)
+    cached_decodes, uncached_groups = decode_cache.get_many(
+        [all_ids[all_offsets[i]:all_offsets[i + 1]]
+         for i in range(len(sorted_inputs))])
+    decode_indices = [group[0] for group in uncached_groups]
+    sorted_inputs = [sorted_inputs[i] for i in decode_indices]
+    if batch_tokens:
+      input_ids, offsets = _select_ragged(input_ids, offsets, decode_indices)
+    tf.logging.info("Decoding %d distinct of %d inputs not in the decode cache"
+                    % (len(decode_indices),
+                       sum(len(group) for group in uncached_groups)))
+
+  if batch_tokens:
+    # Decode the longest inputs first, so that OOMs show up right away.
+    lengths = _padded_input_lengths(offsets, decode_hp.max_input_size)[::-1]
+    batches = _token_budget_batches(lengths, batch_tokens,
+                                    decode_hp.batch_size)
+    for start, end, boundary in batches:
+      bucket_of_example.extend([boundary] * (end - start))
+    tf.logging.info("Batching %d inputs into %d batches of up to %d tokens" %
+                    (len(sorted_inputs), len(batches), batch_tokens))
+  else:
+    num_decode_batches = (len(sorted_inputs) - 1) // decode_hp.batch_size + 1
+
+  def input_gen_fn():
+    if batch_tokens:
+      return _decode_token_budget_input_fn(
+          batches, input_ids, offsets, decode_hp.max_input_size)
+    return _decode_batch_input_fn(num_decode_batches, sorted_inputs,
+                                  inputs_vocab, decode_hp.batch_size,
+                                  decode_hp.max_input_size)
 
   def input_fn():
-    input_gen = _decode_batch_input_fn(num_decode_batches, sorted_inputs,
-                                       inputs_vocab, decode_hp.batch_size,
-                                       decode_hp.max_input_size)
-    gen_fn = make_input_fn_from_generator(input_gen)
+    gen_fn = make_input_fn_from_generator(input_gen_fn())
     example = gen_fn()
     return _decode_input_tensor_to_features_dict(example, hparams)
 
   decodes = []
-  result_iter = estimator.predict(input_fn, checkpoint_path=checkpoint_path)
+  if not sorted_inputs:
+    result_iter = iter([])
+  elif predictor is not None:
+    result_iter = predictor.predict_iter(input_gen_fn())
+  else:
+    result_iter = estimator.predict(input_fn, checkpoint_path=checkpoint_path)
 
   start_time = time.time()
   total_time_per_step = 0
   total_cnt = 0
+  # Bucket boundary -> [examples, output tokens, seconds], when batching by
+  # tokens.
+  bucket_stats = collections.defaultdict(lambda: [0, 0, 0.0])
+  # Beam search steps of the examples, and of their batches.
+  beam_steps = [0, 0]
 
   def timer(gen):
     while True:
@@ -406,14 +496,38 @@ def decode_from_file(estimator,
       decodes.append(decoded_outputs)
     total_time_per_step += elapsed_time
     total_cnt += result["outputs"].shape[-1]
+    if "decode_steps" in result:
+      beam_steps[0] += result["decode_steps"]
+      beam_steps[1] += result["batch_decode_steps"]
+    if bucket_of_example:
+      stats = bucket_stats[bucket_of_example[len(decodes) - 1]]
+      stats[0] += 1
+      stats[1] += result["outputs"].shape[-1]
+      stats[2] += elapsed_time
   tf.logging.info("Elapsed Time: %5.5f" % (time.time() - start_time))
   tf.logging.info("Averaged Single Token Generation Time: %5.7f" %
-                  (total_time_per_step / total_cnt))
+                  (total_time_per_step / max(total_cnt, 1)))
+  _log_beam_search_stats(*beam_steps)
+  if predictor is not None:
+    predictor.log_stats()
+  for boundary, (count, num_tokens, seconds) in sorted(bucket_stats.items()):
+    tf.logging.info(
+        "Inputs of length <= %d: %d decoded, %d tokens, %.1f tokens/sec" %
+        (boundary, count, num_tokens, num_tokens / max(seconds, 1e-9)))
 
   # Reversing the decoded inputs and outputs because they were reversed in
   # _decode_batch_input_fn
   sorted_inputs.reverse()
   decodes.reverse()
+  if decode_cache is not None:
+    for group, decoded in zip(uncached_groups, decodes):
+      decode_cache.put(
+          all_ids[all_offsets[group[0]]:all_offsets[group[0] + 1]], decoded)
+      for i in group:
+        cached_decodes[i] = decoded
+    sorted_inputs = all_sorted_inputs
+    decodes = cached_decodes
+    decode_cache.log_stats()
   # If decode_to_file was provided use it as the output filename without change
   # (except for adding shard_id if using more shards for decoding).
   # Otherwise, use the input filename plus model, hp, problem, beam, alpha.
@@ -423,9 +537,27 @@ def decode_from_file(estimator,
   if not decode_to_file:
     decode_filename = _decode_filename(decode_filename, problem_name, decode_hp)
   tf.logging.info("Writing decodes into %s" % decode_filename)
-  outfile = tf.gfile.Open(decode_filename, "w")
-  for index in range(len(sorted_inputs)):
-    outfile.write("%s%s" % (decodes[sorted_keys[index]], decode_hp.delimiter))
+  with tf.gfile.Open(decode_filename, "w") as outfile:
+    for index in range(len(sorted_inputs)):
+      outfile.write("%s%s" % (decodes[sorted_keys[index]],
+                              decode_hp.delimiter))
+
+
+def _log_beam_search_stats(decode_steps, batch_decode_steps):
+  """Logs the beam search steps saved by compact_finished_beams.
+
+  Args:
+    decode_steps: steps the examples were decoded for, summed over them.
+    batch_decode_steps: steps the batches of the examples were decoded for,
+      summed over the examples.
+  """
+  if not batch_decode_steps:
+    return
+  steps_saved = batch_decode_steps - decode_steps
+  tf.logging.info(
+      "Beam search decoded examples for %d steps, %d (%.1f%%) fewer than "
+      "their batches were decoded for" %
+      (decode_steps, steps_saved, 100.0 * steps_saved / batch_decode_steps))
 
 
 def _decode_filename(base_filename, problem_name, decode_hp):
@@ -462,6 +594,151 @@ def make_input_fn_from_generator(gen):
   return input_fn
 
 
+class Predictor(object):
+  """Serves repeated predictions from one graph and session.
+
+  estimator.predict builds the inference graph and restores the checkpoint on
+  every call. A Predictor does both once, with placeholders for the inputs,
+  and then runs each predict call in the same session.
+
+  Latencies of the predict calls, but not of the warmup calls, are recorded;
+  see stats. predict may be called from several threads at once.
+  """
+
+  def __init__(self, estimator, hparams, checkpoint_path=None,
+               features_fn=None, inputs_rank=2):
+    """Builds the inference graph and restores the weights.
+
+    Args:
+      estimator: a T2T Estimator, as made by trainer_lib.create_estimator.
+      hparams: model hyperparameters.
+      checkpoint_path: checkpoint to restore. Defaults to the latest one in
+        estimator.model_dir.
+      features_fn: function from a dict of input Tensors and hparams to the
+        model features. Defaults to the decode_from_file format, a padded
+        [batch_size, length] batch of "inputs" ids.
+      inputs_rank: rank of the "inputs" fed to predict.
+
+    Raises:
+      ValueError: if there is no checkpoint to restore.
+    """
+    features_fn = features_fn or _decode_input_tensor_to_features_dict
+    checkpoint_path = (checkpoint_path or
+                       tf.train.latest_checkpoint(estimator.model_dir))
+    if not checkpoint_path:
+      raise ValueError("No checkpoint found in %s" % estimator.model_dir)
+    self._graph = tf.Graph()
+    with self._graph.as_default():
+      tf.train.get_or_create_global_step()
+      self._placeholders = {
+          "inputs": tf.placeholder(tf.int32, [None] * inputs_rank,
+                                   name="inputs"),
+      }
+      features = features_fn(self._placeholders, hparams)
+      spec = estimator.model_fn(
+          features, None, tf.estimator.ModeKeys.PREDICT, estimator.config)
+      self._predictions = spec.predictions
+      self._saver = tf.train.Saver()
+      init_op = tf.group(tf.local_variables_initializer(),
+                         tf.tables_initializer())
+    self._graph.finalize()
+    self._session = tf.Session(graph=self._graph,
+                               config=estimator.config.session_config)
+    self.restore(checkpoint_path)
+    self._session.run(init_op)
+    self._stats_lock = threading.Lock()
+    self._latencies = []
+    self._num_examples = 0
+
+  def restore(self, checkpoint_path):
+    """Loads the weights of a checkpoint of the model into the session.
+
+    The graph is kept, so this is much cheaper than a new Predictor, e.g. to
+    decode with every checkpoint of a training run.
+
+    Args:
+      checkpoint_path: checkpoint to restore.
+    """
+    tf.logging.info("Restoring parameters from %s", checkpoint_path)
+    self._saver.restore(self._session, checkpoint_path)
+    self.checkpoint_path = checkpoint_path
+
+  def predict(self, features, wrap_session=None, record_stats=True):
+    """Runs the model on one batch.
+
+    Args:
+      features: dict with the "inputs" to feed, e.g. as yielded by
+        _decode_batch_input_fn.
+      wrap_session: optional function wrapping the session for this call,
+        e.g. in a tfdbg.DumpingDebugWrapperSession.
+      record_stats: whether to record the latency of this call.
+
+    Returns:
+      A dict of numpy arrays of predictions for the batch.
+    """
+    session = self._session
+    if wrap_session is not None:
+      session = wrap_session(session)
+    start_time = time.time()
+    predictions = session.run(
+        self._predictions,
+        feed_dict={self._placeholders["inputs"]: features["inputs"]})
+    if record_stats:
+      with self._stats_lock:
+        self._latencies.append(time.time() - start_time)
+        self._num_examples += len(predictions["outputs"])
+    return predictions
+
+  def predict_iter(self, batches):
+    """Predicts on batches, yielding one predictions dict per example.
+
+    Args:
+      batches: iterable of features dicts, as taken by predict.
+
+    Yields:
+      dicts of numpy arrays, as estimator.predict does.
+    """
+    for features in batches:
+      predictions = self.predict(features)
+      for i in range(len(predictions["outputs"])):
+        yield {key: value[i] for key, value in six.iteritems(predictions)}
+
+  def warmup(self, features, num_runs=1):
+    """Runs predict on features without recording stats, e.g. to compile."""
+    start_time = time.time()
+    for _ in range(num_runs):
+      self.predict(features, record_stats=False)
+    tf.logging.info("Predictor warmed up in %.3f seconds",
+                    time.time() - start_time)
+
+  def stats(self):
+    """Returns a dict of the predict call count and latencies in ms."""
+    with self._stats_lock:
+      latencies = np.array(self._latencies) * 1000.0
+      num_examples = self._num_examples
+    calls = latencies.size
+    if not calls:
+      latencies = np.zeros([1])
+    return {
+        "calls": calls,
+        "examples": num_examples,
+        "mean_ms": float(np.mean(latencies)),
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p90_ms": float(np.percentile(latencies, 90)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        "max_ms": float(np.max(latencies)),
+    }
+
+  def log_stats(self):
+    tf.logging.info(
+        "Predictor: %(calls)d calls, %(examples)d examples, latency mean "
+        "%(mean_ms).1fms p50 %(p50_ms).1fms p90 %(p90_ms).1fms p99 "
+        "%(p99_ms).1fms max %(max_ms).1fms", self.stats())
+
+  def close(self):
+    self._session.close()
+
+
 def decode_interactively(estimator, hparams, decode_hp, checkpoint_path=None):
   """Interactive decoding."""
 
@@ -512,25 +789,100 @@ def _decode_batch_input_fn(num_decode_batches, sorted_inputs, vocabulary,
   sorted_inputs.reverse()
   for b in range(num_decode_batches):
     tf.logging.info("Decoding batch %d" % b)
-    batch_length = 0
-    batch_inputs = []
-    for inputs in sorted_inputs[b * batch_size:(b + 1) * batch_size]:
-      input_ids = vocabulary.encode(inputs)
-      if max_input_size > 0:
-        # Subtract 1 for the EOS_ID.
-        input_ids = input_ids[:max_input_size - 1]
-      input_ids.append(text_encoder.EOS_ID)
-      batch_inputs.append(input_ids)
-      if len(input_ids) > batch_length:
-        batch_length = len(input_ids)
-    final_batch_inputs = []
-    for input_ids in batch_inputs:
-      assert len(input_ids) <= batch_length
-      x = input_ids + [0] * (batch_length - len(input_ids))
-      final_batch_inputs.append(x)
+    input_ids, offsets = vocabulary.encode_batch(
+        sorted_inputs[b * batch_size:(b + 1) * batch_size])
+    # Truncates to max_input_size including the EOS_ID, and pads with 0.
+    yield {
+        "inputs": text_encoder.pad_ragged(
+            input_ids, offsets, max_length=max_input_size,
+            append_id=text_encoder.EOS_ID),
+    }
+
+
+def _select_ragged(ids, offsets, indices):
+  """Selects the sequences at indices of a ragged (ids, offsets) pair."""
+  indices = np.asarray(indices, dtype=np.int64)
+  lengths = np.diff(offsets)[indices]
+  new_offsets = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+  if not len(indices):  # pylint: disable=g-explicit-length-test
+    return ids[:0], new_offsets
+  new_ids = np.concatenate(
+      [ids[offsets[index]:offsets[index + 1]] for index in indices])
+  return new_ids, new_offsets
+
 
+def _padded_input_lengths(offsets, max_input_size):
+  """Lengths of encoded inputs once truncated and given an EOS_ID."""
+  lengths = np.diff(offsets) + 1
+  if max_input_size > 0:
+    lengths = np.minimum(lengths, max_input_size)
+  return lengths
+
+
+def _token_budget_batches(lengths, batch_tokens, max_batch_size=0):
+  """Splits a list of inputs sorted by length into token-budgeted batches.
+
+  The lengths are bucketed like data_reader._batching_scheme does for training,
+  and a batch holds consecutive inputs of a single bucket, as many as fit in
+  batch_tokens once padded to the bucket boundary.
+
+  Args:
+    lengths: int array of input lengths, sorted.
+    batch_tokens: maximum number of (padded) tokens in a batch.
+    max_batch_size: if positive, maximum number of inputs in a batch.
+
+  Returns:
+    A list of (start, end, boundary) tuples, one per batch of the inputs
+    [start, end) whose lengths are at most boundary.
+  """
+  if not len(lengths):  # pylint: disable=g-explicit-length-test
+    return []
+  max_length = int(np.max(lengths))
+  boundaries = np.array(
+      data_reader._bucket_boundaries(max_length) + [max_length])  # pylint: disable=protected-access
+  buckets = np.searchsorted(boundaries, lengths)
+  batches = []
+  start = 0
+  for end in range(1, len(lengths) + 1):
+    boundary = int(boundaries[buckets[start]])
+    batch_size = max(1, batch_tokens // boundary)
+    if max_batch_size > 0:
+      batch_size = min(batch_size, max_batch_size)
+    if (end == len(lengths) or buckets[end] != buckets[start] or
+        end - start == batch_size):
+      batches.append((start, end, boundary))
+      start = end
+  return batches
+
+
+def _decode_token_budget_input_fn(batches, input_ids, offsets,
+                                  max_input_size):
+  """Generator to produce token-budgeted batches of encoded inputs.
+
+  Args:
+    batches: list of (start, end, boundary) batches, as returned by
+      _token_budget_batches, over the inputs from longest to shortest.
+    input_ids: flat int array of the encoded inputs, shortest first.
+    offsets: int array splitting input_ids.
+    max_input_size: if positive, truncate inputs to this length.
+
+  Yields:
+    dicts of padded "inputs" batches.
+  """
+  # Offsets of the inputs from longest to shortest.
+  starts = offsets[:-1][::-1]
+  ends = offsets[1:][::-1]
+  for b, (start, end, _) in enumerate(batches):
+    tf.logging.info("Decoding batch %d" % b)
+    batch_ids = np.concatenate(
+        [input_ids[i:j] for i, j in zip(starts[start:end], ends[start:end])])
+    batch_offsets = np.concatenate(
+        [[0], np.cumsum(ends[start:end] - starts[start:end])])
+    # Truncates to max_input_size including the EOS_ID, and pads with 0.
     yield {
-        "inputs": np.array(final_batch_inputs).astype(np.int32),
+        "inputs": text_encoder.pad_ragged(
+            batch_ids, batch_offsets, max_length=max_input_size,
+            append_id=text_encoder.EOS_ID),
     }
 
 
@@ -646,6 +998,48 @@ def show_and_save_image(img, save_path):
     plt.savefig(sp)
 
 
+def _read_inputs(filename, num_shards=1, delimiter="\n"):
+  """Reads the inputs to decode, 1 per record of filename."""
+  if num_shards > 1:
+    decode_filename = filename + ("%.2d" % FLAGS.worker_id)
+  else:
+    decode_filename = filename
+
+  with tf.gfile.Open(decode_filename) as f:
+    text = f.read()
+    records = text.split(delimiter)
+    inputs = [record.strip() for record in records]
+    # Strip the last empty line.
+    if not inputs[-1]:
+      inputs.pop()
+  return inputs
+
+
+def _get_sorted_encoded_inputs(filename, vocabulary, num_shards=1,
+                               delimiter="\n"):
+  """Returning inputs encoded and sorted according to encoded length.
+
+  Args:
+    filename: path to file with inputs, 1 per line.
+    vocabulary: TextEncoder to encode the inputs with.
+    num_shards: number of input shards. If > 1, will read from file filename.XX,
+      where XX is FLAGS.worker_id.
+    delimiter: str, delimits records in the file.
+
+  Returns:
+    a sorted list of inputs, the keys to restore their order as in
+    _get_sorted_inputs, and a ragged (ids, offsets) pair of the sorted encoded
+    inputs, as returned by TextEncoder.encode_batch.
+  """
+  tf.logging.info("Getting sorted encoded inputs")
+  inputs = _read_inputs(filename, num_shards, delimiter)
+  input_ids, offsets = vocabulary.encode_batch(inputs)
+  order = np.argsort(np.diff(offsets), kind="mergesort")
+  sorted_inputs = [inputs[index] for index in order]
+  sorted_keys = {int(index): i for i, index in enumerate(order)}
+  return sorted_inputs, sorted_keys, _select_ragged(input_ids, offsets, order)
+
+
 def _get_sorted_inputs(filename, num_shards=1, delimiter="\n"):
   """Returning inputs sorted according to length.
 
@@ -661,18 +1055,7 @@ def _get_sorted_inputs(filename, num_shards=1, delimiter="\n"):
   """
   tf.logging.info("Getting sorted inputs")
   # read file and sort inputs according them according to input length.
-  if num_shards > 1:
-    decode_filename = filename + ("%.2d" % FLAGS.worker_id)
-  else:
-    decode_filename = filename
-
-  with tf.gfile.Open(decode_filename) as f:
-    text = f.read()
-    records = text.split(delimiter)
-    inputs = [record.strip() for record in records]
-    # Strip the last empty line.
-    if not inputs[-1]:
-      inputs.pop()
+  inputs = _read_inputs(filename, num_shards, delimiter)
   input_lens = [(i, len(line.split())) for i, line in enumerate(inputs)]
   sorted_input_lens = sorted(input_lens, key=operator.itemgetter(1))
   # We'll need the keys to rearrange the inputs back into their original order
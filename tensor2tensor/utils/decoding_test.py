@@ -0,0 +1,150 @@
+# coding=utf-8
+# Copyright 2018 The Tensor2Tensor Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Tests for tensor2tensor.utils.decoding."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import os
+
+import numpy as np
+
+from tensor2tensor.data_generators import text_encoder
+from tensor2tensor.data_generators import text_problems
+from tensor2tensor.utils import decode_cache
+from tensor2tensor.utils import decoding
+from tensor2tensor.utils import flags as t2t_flags  # pylint: disable=unused-import
+from tensor2tensor.utils import registry
+
+import tensorflow as tf
+
+FLAGS = tf.flags.FLAGS
+
+
+@registry.register_problem
+class DecodingTestProblem(text_problems.Text2TextProblem):
+  pass
+
+
+class _EchoPredictor(object):
+  """Predicts the inputs as the outputs, recording each batch."""
+
+  def __init__(self):
+    self.batches = []
+
+  def predict_iter(self, batches):
+    for features in batches:
+      self.batches.append(features["inputs"])
+      for row in features["inputs"]:
+        yield {"inputs": row, "outputs": row}
+
+  def log_stats(self):
+    pass
+
+
+class DecodingTest(tf.test.TestCase):
+
+  def testTokenBudgetBatches(self):
+    lengths = np.array([40, 33, 30, 12, 11, 11, 10, 9, 9, 9, 8, 3, 2])
+    batches = decoding._token_budget_batches(lengths, 60)
+    # The batches cover the inputs in order.
+    self.assertEqual(
+        list(range(len(lengths))),
+        [i for start, end, _ in batches for i in range(start, end)])
+    for start, end, boundary in batches:
+      self.assertTrue(np.all(lengths[start:end] <= boundary))
+      self.assertLessEqual((end - start) * boundary, max(60, boundary))
+    # The shortest inputs share one batch.
+    self.assertEqual((10, 13, 8), batches[-1])
+
+    batches = decoding._token_budget_batches(lengths, 60, max_batch_size=2)
+    self.assertTrue(all(end - start <= 2 for start, end, _ in batches))
+    self.assertEqual([], decoding._token_budget_batches(np.array([]), 60))
+
+  def testTokenBudgetInputFn(self):
+    inputs = ["a longer input line", "", "short", "mid length"]
+    filename = os.path.join(self.get_temp_dir(), "decode_inputs.txt")
+    with tf.gfile.Open(filename, "w") as f:
+      f.write("\n".join(inputs) + "\n")
+
+    encoder = text_encoder.ByteTextEncoder()
+    sorted_inputs, sorted_keys, (input_ids, offsets) = (
+        decoding._get_sorted_encoded_inputs(filename, encoder))
+    self.assertEqual(["", "short", "mid length", "a longer input line"],
+                     sorted_inputs)
+    self.assertEqual(inputs, [sorted_inputs[sorted_keys[i]]
+                              for i in range(len(inputs))])
+
+    lengths = decoding._padded_input_lengths(offsets, 8)[::-1]
+    self.assertEqual([8, 8, 6, 1], list(lengths))
+    batches = decoding._token_budget_batches(lengths, 16)
+    padded = [features["inputs"] for features in
+              decoding._decode_token_budget_input_fn(
+                  batches, input_ids, offsets, 8)]
+    decoded = [encoder.decode(row[:list(row).index(text_encoder.EOS_ID)])
+               for batch in padded for row in batch]
+    self.assertEqual(["a longe", "mid len", "short", ""], decoded)
+    for batch, (start, end, boundary) in zip(padded, batches):
+      self.assertEqual(end - start, batch.shape[0])
+      self.assertLessEqual(batch.shape[1], boundary)
+
+  def testSelectRagged(self):
+    ids = np.array([1, 2, 3, 4, 5, 6])
+    offsets = np.array([0, 2, 2, 5, 6])
+    selected_ids, selected_offsets = decoding._select_ragged(
+        ids, offsets, [3, 0, 1])
+    self.assertAllEqual([6, 1, 2], selected_ids)
+    self.assertAllEqual([0, 1, 3, 3], selected_offsets)
+    selected_ids, selected_offsets = decoding._select_ragged(ids, offsets, [])
+    self.assertAllEqual([], selected_ids)
+    self.assertAllEqual([0], selected_offsets)
+
+  def testDecodeFromFileDecodesRepeatedInputsOnce(self):
+    FLAGS.problem = "decoding_test_problem"
+    inputs = ["repeated", "other", "repeated", "repeated", "other"]
+    filename = os.path.join(self.get_temp_dir(), "repeated_inputs.txt")
+    with tf.gfile.Open(filename, "w") as f:
+      f.write("\n".join(inputs) + "\n")
+    decode_to_file = os.path.join(self.get_temp_dir(), "repeated_decodes.txt")
+    encoder = text_encoder.ByteTextEncoder()
+    hparams = tf.contrib.training.HParams(
+        problem_hparams=tf.contrib.training.HParams(
+            vocabulary={"inputs": encoder, "targets": encoder}))
+    decode_hp = decoding.decode_hparams("log_results=False")
+    cache = decode_cache.DecodeCache("echo")
+
+    predictor = _EchoPredictor()
+    decoding.decode_from_file(None, filename, hparams, decode_hp,
+                              decode_to_file=decode_to_file,
+                              predictor=predictor, decode_cache=cache)
+    with tf.gfile.Open(decode_to_file) as f:
+      self.assertEqual(inputs, f.read().splitlines())
+    # Each distinct input reached the model once.
+    self.assertEqual(1, len(predictor.batches))
+    self.assertEqual(2, len(predictor.batches[0]))
+
+    # They are all cached now.
+    predictor = _EchoPredictor()
+    decoding.decode_from_file(None, filename, hparams, decode_hp,
+                              decode_to_file=decode_to_file,
+                              predictor=predictor, decode_cache=cache)
+    with tf.gfile.Open(decode_to_file) as f:
+      self.assertEqual(inputs, f.read().splitlines())
+    self.assertEqual([], predictor.batches)
+
+
+if __name__ == "__main__":
+  tf.test.main()
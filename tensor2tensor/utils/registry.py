@@ -38,14 +38,23 @@ For hyperparameter ranges:
   * List: `registry.list_ranged_hparams`
   * Retrieve by name: `registry.ranged_hparams`
   * Command-line flag in `t2t_trainer.py`: `--hparams_range=name`
+
+Registered names are looked up lazily: when a name is not registered yet, the
+module registering it, per the checked-in registry_manifest.py, is imported,
+so a binary only imports the models and problems it uses. Names missing from
+the manifest are found by importing every model and problem module, as do the
+`list_*` functions. Regenerate the manifest with
+`python -m tensor2tensor.utils.registry_scan`.
 """
 from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
+import importlib
 import inspect
 import re
 import six
+from tensor2tensor.utils import registry_manifest
 import tensorflow as tf
 
 _ATTACKS = {}
@@ -57,6 +66,9 @@ _PRUNING_PARAMS = {}
 _PRUNING_STRATEGY = {}
 _RANGED_HPARAMS = {}
 
+# Whether import_all_modules has run, or the registry was reset for tests.
+_ALL_MODULES_IMPORTED = [False]
+
 
 class Modalities(object):
   SYMBOL = "symbol"
@@ -92,6 +104,42 @@ def _reset():
   for ctr in [_MODELS, _HPARAMS, _RANGED_HPARAMS, _ATTACK_PARAMS] + list(
       _MODALITIES.values()):
     ctr.clear()
+  # Only what is registered from now on is looked up.
+  _ALL_MODULES_IMPORTED[0] = True
+
+
+def import_all_modules():
+  """Imports all model and problem modules, registering all they define."""
+  if _ALL_MODULES_IMPORTED[0]:
+    return
+  _ALL_MODULES_IMPORTED[0] = True
+  importlib.import_module("tensor2tensor.models.all_models")
+  all_problems = importlib.import_module(
+      "tensor2tensor.data_generators.all_problems")
+  all_problems.import_modules(all_problems.ALL_MODULES)
+
+
+def _is_registered(registered, kind, name):
+  """Returns whether name is registered, importing its module if needed.
+
+  Args:
+    registered: dict of registered names of that kind, e.g. _MODELS.
+    kind: kind of registration in the manifest, e.g. "model".
+    name: name to look up.
+
+  Returns:
+    Whether name is in registered once the module registering it, according
+    to the manifest, is imported. If the manifest does not know the name,
+    all modules are imported.
+  """
+  if name in registered or _ALL_MODULES_IMPORTED[0]:
+    return name in registered
+  module = registry_manifest.MANIFEST.get(kind, {}).get(name)
+  if module is not None:
+    importlib.import_module(module)
+  if name not in registered:
+    import_all_modules()
+  return name in registered
 
 
 def default_name(obj_class):
@@ -139,7 +187,7 @@ def register_model(name=None):
 
 
 def model(name):
-  if name not in _MODELS:
+  if not _is_registered(_MODELS, "model", name):
     raise LookupError("Model %s never registered.  Available models:\n %s" %
                       (name, "\n".join(list_models())))
 
@@ -147,6 +195,7 @@ def model(name):
 
 
 def list_models():
+  import_all_modules()
   return list(sorted(_MODELS))
 
 
@@ -171,7 +220,7 @@ def register_hparams(name=None):
 
 def hparams(name):
   """Retrieve registered hparams by name."""
-  if name not in _HPARAMS:
+  if not _is_registered(_HPARAMS, "hparams", name):
     error_msg = "HParams set %s never registered. Sets registered:\n%s"
     raise LookupError(
         error_msg % (name,
@@ -184,6 +233,7 @@ def hparams(name):
 
 
 def list_hparams(prefix=None):
+  import_all_modules()
   if prefix:
     return [name for name in _HPARAMS if name.startswith(prefix)]
   return list(_HPARAMS)
@@ -215,12 +265,13 @@ def register_ranged_hparams(name=None):
 
 
 def ranged_hparams(name):
-  if name not in _RANGED_HPARAMS:
+  if not _is_registered(_RANGED_HPARAMS, "ranged_hparams", name):
     raise LookupError("RangedHParams set %s never registered." % name)
   return _RANGED_HPARAMS[name]
 
 
 def list_ranged_hparams():
+  import_all_modules()
   return list(_RANGED_HPARAMS)
 
 
@@ -271,7 +322,7 @@ def problem(name):
 
   base_name, was_reversed, was_copy = parse_problem_name(name)
 
-  if base_name not in _PROBLEMS:
+  if not _is_registered(_PROBLEMS, "problem", base_name):
     all_problem_names = list_problems()
     error_lines = ["%s not in the set of supported problems:" % base_name
                   ] + all_problem_names
@@ -281,6 +332,7 @@ def problem(name):
 
 
 def list_problems():
+  import_all_modules()
   return sorted(list(_PROBLEMS))
 
 
@@ -305,7 +357,7 @@ def register_attack(name=None):
 
 def attacks(name):
   """Retrieve registered attack by name."""
-  if name not in _ATTACKS:
+  if not _is_registered(_ATTACKS, "attack", name):
     error_msg = "Attack %s never registered. Sets registered:\n%s"
     raise LookupError(
         error_msg % (name,
@@ -319,6 +371,7 @@ def attacks(name):
 
 
 def list_attacks(prefix=None):
+  import_all_modules()
   if prefix:
     return [name for name in _ATTACKS if name.startswith(prefix)]
   return list(_ATTACKS)
@@ -345,7 +398,7 @@ def register_attack_params(name=None):
 
 def attack_params(name):
   """Retrieve registered aparams by name."""
-  if name not in _ATTACK_PARAMS:
+  if not _is_registered(_ATTACK_PARAMS, "attack_params", name):
     error_msg = "Attack HParams set %s never registered. Sets registered:\n%s"
     raise LookupError(
         error_msg %
@@ -358,6 +411,7 @@ def attack_params(name):
 
 
 def list_attack_params(prefix=None):
+  import_all_modules()
   if prefix:
     return [name for name in _ATTACK_PARAMS if name.startswith(prefix)]
   return list(_ATTACK_PARAMS)
@@ -384,7 +438,7 @@ def register_pruning_params(name=None):
 
 def pruning_params(name):
   """Retrieve registered pruning params by name."""
-  if name not in _PRUNING_PARAMS:
+  if not _is_registered(_PRUNING_PARAMS, "pruning_params", name):
     error_msg = "Pruning HParams set %s never registered. Sets registered:\n%s"
     raise LookupError(error_msg % (
         name, display_list_by_prefix(list_pruning_params(), starting_spaces=4)))
@@ -396,6 +450,7 @@ def pruning_params(name):
 
 
 def list_pruning_params(prefix=None):
+  import_all_modules()
   if prefix:
     return [name for name in _PRUNING_PARAMS if name.startswith(prefix)]
   return list(_PRUNING_PARAMS)
@@ -422,7 +477,7 @@ def register_pruning_strategy(name=None):
 
 def pruning_strategies(name):
   """Retrieve registered pruning strategies by name."""
-  if name not in _PRUNING_STRATEGY:
+  if not _is_registered(_PRUNING_STRATEGY, "pruning_strategy", name):
     error_msg = "Pruning strategy set %s never registered. Sets registered:\n%s"
     raise LookupError(
         error_msg % (name,
@@ -436,6 +491,7 @@ def pruning_strategies(name):
 
 
 def list_pruning_strategies(prefix=None):
+  import_all_modules()
   if prefix:
     return [name for name in _PRUNING_STRATEGY if name.startswith(prefix)]
   return list(_PRUNING_STRATEGY)
@@ -444,7 +500,8 @@ def list_pruning_strategies(prefix=None):
 def _internal_get_modality(name, mod_collection, collection_str):
   if name is None:
     name = "default"
-  if name not in mod_collection:
+  kind = collection_str.lower() + "_modality"
+  if not _is_registered(mod_collection, kind, name):
     raise LookupError(
         "%s modality %s never registered." % (collection_str, name))
   return mod_collection[name]
@@ -548,6 +605,7 @@ def register_class_label_modality(name=None):
 
 
 def list_modalities():
+  import_all_modules()
   all_modalities = []
   for modality_type, modalities in six.iteritems(_MODALITIES):
     all_modalities.extend([
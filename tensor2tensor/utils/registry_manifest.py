@@ -0,0 +1,1322 @@
+# coding=utf-8
+# Copyright 2018 The Tensor2Tensor Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Module registering each registered name, by kind of registration.
+
+Generated by `python -m tensor2tensor.utils.registry_scan`. Do not edit.
+"""
+
+MANIFEST = {
+    "attack_params": {
+        "resnet_fgsm": "tensor2tensor.models.resnet",
+        "resnet_madry": "tensor2tensor.models.resnet",
+        "resnet_random": "tensor2tensor.models.resnet",
+        "shake_shake_fgsm": "tensor2tensor.models.shake_shake",
+    },
+    "audio_modality": {
+        "audio_spectral_modality": "tensor2tensor.layers.modalities",
+        "default": "tensor2tensor.layers.modalities",
+        "identity": "tensor2tensor.layers.modalities",
+        "speech_recognition_modality":
+            "tensor2tensor.data_generators.speech_recognition",
+    },
+    "class_label_modality": {
+        "default": "tensor2tensor.layers.modalities",
+        "identity": "tensor2tensor.layers.modalities",
+        "multi_label": "tensor2tensor.layers.modalities",
+        "onehot": "tensor2tensor.layers.modalities",
+        "onehot_softmax_average_pooling": "tensor2tensor.layers.modalities",
+        "onehot_softmax_last_timestep": "tensor2tensor.layers.modalities",
+        "onehot_softmax_max_pooling": "tensor2tensor.layers.modalities",
+        "sigmoid": "tensor2tensor.layers.modalities",
+        "sigmoid_max_pooling": "tensor2tensor.layers.modalities",
+    },
+    "generic_modality": {
+        "default": "tensor2tensor.layers.modalities",
+        "l2_loss": "tensor2tensor.layers.modalities",
+    },
+    "hparams": {
+        "adaptive_universal_transformer_accumulated_small":
+            "tensor2tensor.models.research.universal_transformer",
+        "adaptive_universal_transformer_accumulated_tiny":
+            "tensor2tensor.models.research.universal_transformer",
+        "adaptive_universal_transformer_base":
+            "tensor2tensor.models.research.universal_transformer",
+        "adaptive_universal_transformer_base_d03":
+            "tensor2tensor.models.research.universal_transformer",
+        "adaptive_universal_transformer_concat_small":
+            "tensor2tensor.models.research.universal_transformer",
+        "adaptive_universal_transformer_concat_tiny":
+            "tensor2tensor.models.research.universal_transformer",
+        "adaptive_universal_transformer_global_small":
+            "tensor2tensor.models.research.universal_transformer",
+        "adaptive_universal_transformer_global_tiny":
+            "tensor2tensor.models.research.universal_transformer",
+        "adaptive_universal_transformer_large":
+            "tensor2tensor.models.research.universal_transformer",
+        "adaptive_universal_transformer_mix_after_ut_small":
+            "tensor2tensor.models.research.universal_transformer",
+        "adaptive_universal_transformer_mix_before_ut_small":
+            "tensor2tensor.models.research.universal_transformer",
+        "adaptive_universal_transformer_position_random_timing_tiny":
+            "tensor2tensor.models.research.universal_transformer",
+        "adaptive_universal_transformer_position_step_timing_tiny":
+            "tensor2tensor.models.research.universal_transformer",
+        "adaptive_universal_transformer_random_small":
+            "tensor2tensor.models.research.universal_transformer",
+        "adaptive_universal_transformer_random_tiny":
+            "tensor2tensor.models.research.universal_transformer",
+        "adaptive_universal_transformer_small":
+            "tensor2tensor.models.research.universal_transformer",
+        "adaptive_universal_transformer_small_d03":
+            "tensor2tensor.models.research.universal_transformer",
+        "adaptive_universal_transformer_small_sb":
+            "tensor2tensor.models.research.universal_transformer",
+        "adaptive_universal_transformer_step_sinusoid_timing_tiny":
+            "tensor2tensor.models.research.universal_transformer",
+        "adaptive_universal_transformer_tall":
+            "tensor2tensor.models.research.universal_transformer",
+        "adaptive_universal_transformer_tall_actlossw0":
+            "tensor2tensor.models.research.universal_transformer",
+        "adaptive_universal_transformer_tall_actlossw001":
+            "tensor2tensor.models.research.universal_transformer",
+        "adaptive_universal_transformer_tiny":
+            "tensor2tensor.models.research.universal_transformer",
+        "adaptive_universal_transformer_tiny_d02":
+            "tensor2tensor.models.research.universal_transformer",
+        "adaptive_universal_transformer_tiny_d02_sb":
+            "tensor2tensor.models.research.universal_transformer",
+        "adaptive_universal_transformer_tiny_d05":
+            "tensor2tensor.models.research.universal_transformer",
+        "adaptive_universal_transformer_tiny_sb":
+            "tensor2tensor.models.research.universal_transformer",
+        "adaptive_universal_transformer_with_sru_small":
+            "tensor2tensor.models.research.universal_transformer",
+        "afx_adafactor": "tensor2tensor.models.research.adafactor_experiments",
+        "afx_adam": "tensor2tensor.models.research.adafactor_experiments",
+        "afx_base": "tensor2tensor.models.research.adafactor_experiments",
+        "afx_clip": "tensor2tensor.models.research.adafactor_experiments",
+        "afx_clip2": "tensor2tensor.models.research.adafactor_experiments",
+        "afx_clip_factored":
+            "tensor2tensor.models.research.adafactor_experiments",
+        "afx_factored": "tensor2tensor.models.research.adafactor_experiments",
+        "afx_fast": "tensor2tensor.models.research.adafactor_experiments",
+        "afx_mimic_adam": "tensor2tensor.models.research.adafactor_experiments",
+        "afx_pow05": "tensor2tensor.models.research.adafactor_experiments",
+        "afx_pow08": "tensor2tensor.models.research.adafactor_experiments",
+        "afx_pow08_clip": "tensor2tensor.models.research.adafactor_experiments",
+        "afx_pow10": "tensor2tensor.models.research.adafactor_experiments",
+        "afx_relative": "tensor2tensor.models.research.adafactor_experiments",
+        "afx_small": "tensor2tensor.models.research.adafactor_experiments",
+        "afx_small_bfloat16":
+            "tensor2tensor.models.research.adafactor_experiments",
+        "afx_small_p10": "tensor2tensor.models.research.adafactor_experiments",
+        "afx_small_p11": "tensor2tensor.models.research.adafactor_experiments",
+        "afx_small_p12": "tensor2tensor.models.research.adafactor_experiments",
+        "afx_small_p16": "tensor2tensor.models.research.adafactor_experiments",
+        "afx_small_p8": "tensor2tensor.models.research.adafactor_experiments",
+        "afx_unscale": "tensor2tensor.models.research.adafactor_experiments",
+        "afx_unscale_relative":
+            "tensor2tensor.models.research.adafactor_experiments",
+        "aligned_8k": "tensor2tensor.models.research.aligned",
+        "aligned_8k_grouped": "tensor2tensor.models.research.aligned",
+        "aligned_base": "tensor2tensor.models.research.aligned",
+        "aligned_grouped": "tensor2tensor.models.research.aligned",
+        "aligned_local": "tensor2tensor.models.research.aligned",
+        "aligned_local_1k": "tensor2tensor.models.research.aligned",
+        "aligned_local_expert": "tensor2tensor.models.research.aligned",
+        "aligned_lsh": "tensor2tensor.models.research.aligned",
+        "aligned_memory_efficient": "tensor2tensor.models.research.aligned",
+        "aligned_moe": "tensor2tensor.models.research.aligned",
+        "aligned_no_att": "tensor2tensor.models.research.aligned",
+        "aligned_no_timing": "tensor2tensor.models.research.aligned",
+        "aligned_pos_emb": "tensor2tensor.models.research.aligned",
+        "aligned_pseudolocal": "tensor2tensor.models.research.aligned",
+        "aligned_pseudolocal_256": "tensor2tensor.models.research.aligned",
+        "attention_lm_11k": "tensor2tensor.models.research.attention_lm_moe",
+        "attention_lm_12k": "tensor2tensor.models.research.attention_lm_moe",
+        "attention_lm_16k": "tensor2tensor.models.research.attention_lm_moe",
+        "attention_lm_ae_extended":
+            "tensor2tensor.models.research.attention_lm_moe",
+        "attention_lm_attention_moe_tiny":
+            "tensor2tensor.models.research.attention_lm_moe",
+        "attention_lm_base": "tensor2tensor.models.research.attention_lm",
+        "attention_lm_hybrid_v2":
+            "tensor2tensor.models.research.attention_lm_moe",
+        "attention_lm_moe_24b_diet":
+            "tensor2tensor.models.research.attention_lm_moe",
+        "attention_lm_moe_32b_diet":
+            "tensor2tensor.models.research.attention_lm_moe",
+        "attention_lm_moe_base":
+            "tensor2tensor.models.research.attention_lm_moe",
+        "attention_lm_moe_base_ae":
+            "tensor2tensor.models.research.attention_lm_moe",
+        "attention_lm_moe_base_hybrid":
+            "tensor2tensor.models.research.attention_lm_moe",
+        "attention_lm_moe_base_local":
+            "tensor2tensor.models.research.attention_lm_moe",
+        "attention_lm_moe_base_long_seq":
+            "tensor2tensor.models.research.attention_lm_moe",
+        "attention_lm_moe_base_memeff":
+            "tensor2tensor.models.research.attention_lm_moe",
+        "attention_lm_moe_large":
+            "tensor2tensor.models.research.attention_lm_moe",
+        "attention_lm_moe_large_diet":
+            "tensor2tensor.models.research.attention_lm_moe",
+        "attention_lm_moe_memory_efficient":
+            "tensor2tensor.models.research.attention_lm_moe",
+        "attention_lm_moe_small":
+            "tensor2tensor.models.research.attention_lm_moe",
+        "attention_lm_moe_tiny":
+            "tensor2tensor.models.research.attention_lm_moe",
+        "attention_lm_moe_translation":
+            "tensor2tensor.models.research.attention_lm_moe",
+        "attention_lm_moe_unscramble_base":
+            "tensor2tensor.models.research.attention_lm_moe",
+        "attention_lm_no_moe_small":
+            "tensor2tensor.models.research.attention_lm_moe",
+        "attention_lm_small": "tensor2tensor.models.research.attention_lm",
+        "attention_lm_translation":
+            "tensor2tensor.models.research.attention_lm",
+        "attention_lm_translation_full_attention":
+            "tensor2tensor.models.research.attention_lm",
+        "attention_lm_translation_l12":
+            "tensor2tensor.models.research.attention_lm",
+        "autoencoder_autoregressive":
+            "tensor2tensor.models.research.autoencoders",
+        "autoencoder_basic": "tensor2tensor.models.research.autoencoders",
+        "autoencoder_basic_discrete":
+            "tensor2tensor.models.research.autoencoders",
+        "autoencoder_discrete_cifar":
+            "tensor2tensor.models.research.autoencoders",
+        "autoencoder_discrete_pong":
+            "tensor2tensor.models.research.autoencoders",
+        "autoencoder_ordered_discrete":
+            "tensor2tensor.models.research.autoencoders",
+        "autoencoder_ordered_discrete_hs256":
+            "tensor2tensor.models.research.autoencoders",
+        "autoencoder_ordered_discrete_patched":
+            "tensor2tensor.models.research.autoencoders",
+        "autoencoder_ordered_discrete_simple":
+            "tensor2tensor.models.research.autoencoders",
+        "autoencoder_ordered_discrete_vq":
+            "tensor2tensor.models.research.autoencoders",
+        "autoencoder_ordered_text":
+            "tensor2tensor.models.research.autoencoders",
+        "autoencoder_ordered_text_small":
+            "tensor2tensor.models.research.autoencoders",
+        "autoencoder_residual": "tensor2tensor.models.research.autoencoders",
+        "autoencoder_residual_discrete":
+            "tensor2tensor.models.research.autoencoders",
+        "autoencoder_residual_discrete_big":
+            "tensor2tensor.models.research.autoencoders",
+        "autoencoder_residual_text":
+            "tensor2tensor.models.research.autoencoders",
+        "autoencoder_stacked": "tensor2tensor.models.research.autoencoders",
+        "basic_1": "tensor2tensor.layers.common_hparams",
+        "basic_fc_small": "tensor2tensor.models.basic",
+        "basic_policy_parameters": "tensor2tensor.models.research.rl",
+        "bytenet_base": "tensor2tensor.models.bytenet",
+        "cycle_gan_small": "tensor2tensor.models.research.cycle_gan",
+        "discrete_random_action_base": "tensor2tensor.models.research.rl",
+        "distill_resnet_32_to_15_cifar20x5":
+            "tensor2tensor.models.distillation",
+        "gene_expression_conv_base":
+            "tensor2tensor.models.research.gene_expression",
+        "image_transformer2d_base": "tensor2tensor.models.image_transformer_2d",
+        "image_transformer_base": "tensor2tensor.models.image_transformer",
+        "imagetransformer1d_base_12l_64by64":
+            "tensor2tensor.models.image_transformer",
+        "imagetransformer1d_base_8l_64by64":
+            "tensor2tensor.models.image_transformer",
+        "imagetransformer2d_base": "tensor2tensor.models.image_transformer_2d",
+        "imagetransformer2d_base_12l_8_16_big":
+            "tensor2tensor.models.image_transformer_2d",
+        "imagetransformer2d_base_12l_8_64_64by64":
+            "tensor2tensor.models.image_transformer_2d",
+        "imagetransformer2d_base_14l_8_16_big":
+            "tensor2tensor.models.image_transformer_2d",
+        "imagetransformer2d_base_14l_8_16_big_uncond":
+            "tensor2tensor.models.image_transformer_2d",
+        "imagetransformer2d_base_8l_8_16":
+            "tensor2tensor.models.image_transformer_2d",
+        "imagetransformer2d_base_8l_8_16_big":
+            "tensor2tensor.models.image_transformer_2d",
+        "imagetransformer2d_base_8l_8_16_big_16k":
+            "tensor2tensor.models.image_transformer_2d",
+        "imagetransformer2d_base_8l_8_16_ls":
+            "tensor2tensor.models.image_transformer_2d",
+        "imagetransformer2d_base_8l_8_32_big":
+            "tensor2tensor.models.image_transformer_2d",
+        "imagetransformer2d_base_8l_8_64_64by64":
+            "tensor2tensor.models.image_transformer_2d",
+        "imagetransformer2d_tiny": "tensor2tensor.models.image_transformer_2d",
+        "imagetransformer_ae_cifar":
+            "tensor2tensor.models.research.transformer_vae",
+        "imagetransformer_b10l_4h_big_uncond_dr01_tpu":
+            "tensor2tensor.models.image_transformer",
+        "imagetransformer_b10l_4h_big_uncond_dr03_lr025_tpu":
+            "tensor2tensor.models.image_transformer",
+        "imagetransformer_b10l_4h_big_uncond_dr03_tpu":
+            "tensor2tensor.models.image_transformer",
+        "imagetransformer_b10l_dr03_moe_tpu":
+            "tensor2tensor.models.image_transformer",
+        "imagetransformer_b12l_4h_b128_h512_uncond_dr01_im":
+            "tensor2tensor.models.image_transformer",
+        "imagetransformer_b12l_4h_b128_h512_uncond_dr03_tpu":
+            "tensor2tensor.models.image_transformer",
+        "imagetransformer_b12l_4h_b128_uncond_dr03_tpu":
+            "tensor2tensor.models.image_transformer",
+        "imagetransformer_b12l_4h_b256_uncond_dr03_rel_tpu":
+            "tensor2tensor.models.image_transformer",
+        "imagetransformer_b12l_4h_b256_uncond_dr03_tpu":
+            "tensor2tensor.models.image_transformer",
+        "imagetransformer_b12l_4h_big_uncond_dr03_lr025_tpu":
+            "tensor2tensor.models.image_transformer",
+        "imagetransformer_b12l_4h_big_uncond_dr03_tpu":
+            "tensor2tensor.models.image_transformer",
+        "imagetransformer_b12l_4h_uncond_dr03_tpu":
+            "tensor2tensor.models.image_transformer",
+        "imagetransformer_b12l_8h_b256_uncond_dr03_tpu":
+            "tensor2tensor.models.image_transformer",
+        "imagetransformer_bas8l_8h_big_uncond_dr03_imgnet":
+            "tensor2tensor.models.image_transformer",
+        "imagetransformer_base": "tensor2tensor.models.image_transformer",
+        "imagetransformer_base_10l_16h_big_dr01_imgnet":
+            "tensor2tensor.models.image_transformer",
+        "imagetransformer_base_10l_16h_big_dr01_moe_imgnet":
+            "tensor2tensor.models.image_transformer",
+        "imagetransformer_base_10l_16h_big_uncond_dr01_imgnet":
+            "tensor2tensor.models.image_transformer",
+        "imagetransformer_base_10l_8h_big_cond_dr03_dan":
+            "tensor2tensor.models.image_transformer",
+        "imagetransformer_base_10l_8h_big_uncond_dr03_dan":
+            "tensor2tensor.models.image_transformer",
+        "imagetransformer_base_10l_8h_big_uncond_dr03_dan_64":
+            "tensor2tensor.models.image_transformer",
+        "imagetransformer_base_10l_8h_big_uncond_dr03_dan_64_2d":
+            "tensor2tensor.models.image_transformer_2d",
+        "imagetransformer_base_12l_8h_big":
+            "tensor2tensor.models.image_transformer",
+        "imagetransformer_base_12l_8h_big_uncond":
+            "tensor2tensor.models.image_transformer",
+        "imagetransformer_base_14l_8h_big":
+            "tensor2tensor.models.image_transformer",
+        "imagetransformer_base_14l_8h_big_dr01":
+            "tensor2tensor.models.image_transformer",
+        "imagetransformer_base_14l_8h_big_uncond":
+            "tensor2tensor.models.image_transformer",
+        "imagetransformer_base_8l_8h_big_cond_dr03_dan":
+            "tensor2tensor.models.image_transformer",
+        "imagetransformer_base_8l_8h_big_cond_dr03_dan_128":
+            "tensor2tensor.models.image_transformer",
+        "imagetransformer_base_8l_8h_big_cond_dr03_dan_dilated":
+            "tensor2tensor.models.image_transformer",
+        "imagetransformer_base_8l_8h_big_cond_dr03_dan_dilated_b":
+            "tensor2tensor.models.image_transformer",
+        "imagetransformer_base_8l_8h_big_cond_dr03_dan_dilated_c":
+            "tensor2tensor.models.image_transformer",
+        "imagetransformer_base_8l_8h_big_cond_dr03_dan_dilated_d":
+            "tensor2tensor.models.image_transformer",
+        "imagetransformer_base_imagenet_tpu":
+            "tensor2tensor.models.image_transformer",
+        "imagetransformer_base_rel": "tensor2tensor.models.image_transformer",
+        "imagetransformer_base_tpu": "tensor2tensor.models.image_transformer",
+        "imagetransformer_cifar10_base":
+            "tensor2tensor.models.image_transformer",
+        "imagetransformer_cifar10_base_dmol":
+            "tensor2tensor.models.image_transformer",
+        "imagetransformer_imagenet32_base":
+            "tensor2tensor.models.image_transformer",
+        "imagetransformer_moe_tiny": "tensor2tensor.models.image_transformer",
+        "imagetransformer_sep_channels":
+            "tensor2tensor.models.image_transformer",
+        "imagetransformer_sep_channels_12l_16h_imagenet_large":
+            "tensor2tensor.models.image_transformer",
+        "imagetransformer_sep_channels_16l_16h_imgnet_lrg_loc":
+            "tensor2tensor.models.image_transformer",
+        "imagetransformer_sep_channels_16l_16h_imgnet_lrg_loc_128":
+            "tensor2tensor.models.image_transformer",
+        "imagetransformer_sep_channels_8l":
+            "tensor2tensor.models.image_transformer",
+        "imagetransformer_sep_channels_8l_8h":
+            "tensor2tensor.models.image_transformer",
+        "imagetransformer_sep_channels_8l_8h_local_and_global_att":
+            "tensor2tensor.models.image_transformer",
+        "imagetransformer_sep_channels_8l_multipos3":
+            "tensor2tensor.models.image_transformer",
+        "imagetransformer_sep_channels_8l_tpu":
+            "tensor2tensor.models.image_transformer",
+        "imagetransformer_sep_output_channels_8l_local_and_global_att":
+            "tensor2tensor.models.image_transformer",
+        "imagetransformer_tiny": "tensor2tensor.models.image_transformer",
+        "imagetransformer_tiny_tpu": "tensor2tensor.models.image_transformer",
+        "imagetransformerpp_base_10l_8h_big_uncond_dr03_dan":
+            "tensor2tensor.models.image_transformer",
+        "imagetransformerpp_base_10l_8h_big_uncond_dr03_dan_a":
+            "tensor2tensor.models.image_transformer",
+        "imagetransformerpp_base_10l_8h_big_uncond_dr03_dan_b":
+            "tensor2tensor.models.image_transformer",
+        "imagetransformerpp_base_10l_8h_big_uncond_dr03_dan_g":
+            "tensor2tensor.models.image_transformer",
+        "imagetransformerpp_base_12l_8h_big_uncond_dr03_dan_k":
+            "tensor2tensor.models.image_transformer",
+        "imagetransformerpp_base_12l_8h_big_uncond_dr03_dan_l":
+            "tensor2tensor.models.image_transformer",
+        "imagetransformerpp_base_12l_8h_big_uncond_dr03_dan_m":
+            "tensor2tensor.models.image_transformer",
+        "imagetransformerpp_base_12l_8h_big_uncond_dr03_dan_m_bs1":
+            "tensor2tensor.models.image_transformer",
+        "imagetransformerpp_base_12l_8h_big_uncond_dr03_dan_m_rel":
+            "tensor2tensor.models.image_transformer",
+        "imagetransformerpp_base_12l_8h_big_uncond_dr03_dan_m_relsh":
+            "tensor2tensor.models.image_transformer",
+        "imagetransformerpp_base_14l_8h_big_uncond_dr03_dan_eval":
+            "tensor2tensor.models.image_transformer",
+        "imagetransformerpp_base_14l_8h_big_uncond_dr03_dan_p":
+            "tensor2tensor.models.image_transformer",
+        "imagetransformerpp_base_14l_8h_big_uncond_dr03_dan_p_bs1":
+            "tensor2tensor.models.image_transformer",
+        "imagetransformerpp_base_5l_8h_big_uncond_dr00_dan_g_bs1":
+            "tensor2tensor.models.image_transformer",
+        "imagetransformerpp_base_5l_8h_dr00_dan_g_bs1_adafactor":
+            "tensor2tensor.models.image_transformer",
+        "imagetransformerpp_base_6l_8h_dr00_dan_g_bs1_adafactor":
+            "tensor2tensor.models.image_transformer",
+        "imagetransformerpp_base_8l_8h_big_cond_dr03_dan":
+            "tensor2tensor.models.image_transformer",
+        "imagetransformerpp_base_8l_8h_big_cond_dr03_dan_a":
+            "tensor2tensor.models.image_transformer",
+        "imagetransformerpp_sep_channels_8l_8h":
+            "tensor2tensor.models.image_transformer",
+        "imagetransformerpp_tiny": "tensor2tensor.models.image_transformer",
+        "img2img_transformer2d_base":
+            "tensor2tensor.models.image_transformer_2d",
+        "img2img_transformer2d_n103":
+            "tensor2tensor.models.image_transformer_2d",
+        "img2img_transformer2d_n24":
+            "tensor2tensor.models.image_transformer_2d",
+        "img2img_transformer2d_n3": "tensor2tensor.models.image_transformer_2d",
+        "img2img_transformer2d_n31":
+            "tensor2tensor.models.image_transformer_2d",
+        "img2img_transformer2d_n44":
+            "tensor2tensor.models.image_transformer_2d",
+        "img2img_transformer2d_q1": "tensor2tensor.models.image_transformer_2d",
+        "img2img_transformer2d_q2": "tensor2tensor.models.image_transformer_2d",
+        "img2img_transformer2d_q3": "tensor2tensor.models.image_transformer_2d",
+        "img2img_transformer2d_tiny":
+            "tensor2tensor.models.image_transformer_2d",
+        "img2img_transformer_b1": "tensor2tensor.models.image_transformer_2d",
+        "img2img_transformer_b2": "tensor2tensor.models.image_transformer_2d",
+        "img2img_transformer_b3": "tensor2tensor.models.image_transformer_2d",
+        "img2img_transformer_b3_bs1":
+            "tensor2tensor.models.image_transformer_2d",
+        "img2img_transformer_b3_bs10":
+            "tensor2tensor.models.image_transformer_2d",
+        "img2img_transformer_b3_bs2":
+            "tensor2tensor.models.image_transformer_2d",
+        "img2img_transformer_b3_bs3":
+            "tensor2tensor.models.image_transformer_2d",
+        "img2img_transformer_b3_bs4":
+            "tensor2tensor.models.image_transformer_2d",
+        "img2img_transformer_b3_bs5":
+            "tensor2tensor.models.image_transformer_2d",
+        "img2img_transformer_b3_bs6":
+            "tensor2tensor.models.image_transformer_2d",
+        "img2img_transformer_b3_bs7":
+            "tensor2tensor.models.image_transformer_2d",
+        "img2img_transformer_b3_bs8":
+            "tensor2tensor.models.image_transformer_2d",
+        "img2img_transformer_b3_bs9":
+            "tensor2tensor.models.image_transformer_2d",
+        "img2img_transformer_base": "tensor2tensor.models.image_transformer_2d",
+        "img2img_transformer_base_tpu":
+            "tensor2tensor.models.image_transformer_2d",
+        "img2img_transformer_dilated":
+            "tensor2tensor.models.image_transformer_2d",
+        "img2img_transformer_tiny": "tensor2tensor.models.image_transformer_2d",
+        "img2img_transformer_tiny_tpu":
+            "tensor2tensor.models.image_transformer_2d",
+        "lmx_base": "tensor2tensor.models.research.lm_experiments",
+        "lmx_h1k_f4k": "tensor2tensor.models.research.lm_experiments",
+        "lmx_h1k_f64k": "tensor2tensor.models.research.lm_experiments",
+        "lmx_h2k_f8k": "tensor2tensor.models.research.lm_experiments",
+        "lmx_h3k_f12k": "tensor2tensor.models.research.lm_experiments",
+        "lmx_h4k_f16k": "tensor2tensor.models.research.lm_experiments",
+        "lmx_moe": "tensor2tensor.models.research.lm_experiments",
+        "lmx_moe_h1k_f4k_x32": "tensor2tensor.models.research.lm_experiments",
+        "lmx_moe_h1k_f8k_x16": "tensor2tensor.models.research.lm_experiments",
+        "lmx_relative": "tensor2tensor.models.research.lm_experiments",
+        "lmx_relative_nopos": "tensor2tensor.models.research.lm_experiments",
+        "lstm_asr_v1": "tensor2tensor.models.lstm",
+        "lstm_attention": "tensor2tensor.models.lstm",
+        "lstm_bahdanau_attention": "tensor2tensor.models.lstm",
+        "lstm_bahdanau_attention_multi": "tensor2tensor.models.lstm",
+        "lstm_luong_attention": "tensor2tensor.models.lstm",
+        "lstm_luong_attention_multi": "tensor2tensor.models.lstm",
+        "lstm_seq2seq": "tensor2tensor.models.lstm",
+        "mtf_image_transformer_base":
+            "tensor2tensor.mesh_tensorflow.mtf_image_transformer",
+        "mtf_image_transformer_base_cifar":
+            "tensor2tensor.mesh_tensorflow.mtf_image_transformer",
+        "mtf_image_transformer_base_imagenet":
+            "tensor2tensor.mesh_tensorflow.mtf_image_transformer",
+        "mtf_image_transformer_base_imagenet_mp":
+            "tensor2tensor.mesh_tensorflow.mtf_image_transformer",
+        "mtf_image_transformer_base_single":
+            "tensor2tensor.mesh_tensorflow.mtf_image_transformer",
+        "mtf_image_transformer_length_sharded":
+            "tensor2tensor.mesh_tensorflow.mtf_image_transformer",
+        "mtf_image_transformer_single":
+            "tensor2tensor.mesh_tensorflow.mtf_image_transformer",
+        "mtf_image_transformer_tiny":
+            "tensor2tensor.mesh_tensorflow.mtf_image_transformer",
+        "mtf_image_transformer_tiny_8gpu":
+            "tensor2tensor.mesh_tensorflow.mtf_image_transformer",
+        "mtf_image_transformer_tiny_moe":
+            "tensor2tensor.mesh_tensorflow.mtf_image_transformer",
+        "mtf_transformer_base": "tensor2tensor.mesh_tensorflow.mtf_transformer",
+        "mtf_transformer_lm_baseline":
+            "tensor2tensor.mesh_tensorflow.mtf_transformer",
+        "mtf_transformer_lm_moe":
+            "tensor2tensor.mesh_tensorflow.research.experiments_moe",
+        "mtf_transformer_paper_lm_0":
+            "tensor2tensor.mesh_tensorflow.mtf_transformer",
+        "mtf_transformer_paper_lm_1":
+            "tensor2tensor.mesh_tensorflow.mtf_transformer",
+        "mtf_transformer_paper_lm_2":
+            "tensor2tensor.mesh_tensorflow.mtf_transformer",
+        "mtf_transformer_paper_lm_3":
+            "tensor2tensor.mesh_tensorflow.mtf_transformer",
+        "mtf_transformer_paper_lm_4":
+            "tensor2tensor.mesh_tensorflow.mtf_transformer",
+        "mtf_transformer_paper_lm_5":
+            "tensor2tensor.mesh_tensorflow.mtf_transformer",
+        "mtf_transformer_paper_lm_m1":
+            "tensor2tensor.mesh_tensorflow.mtf_transformer",
+        "mtf_transformer_paper_tr_0":
+            "tensor2tensor.mesh_tensorflow.mtf_transformer",
+        "mtf_transformer_paper_tr_0_mesh_128":
+            "tensor2tensor.mesh_tensorflow.mtf_transformer",
+        "mtf_transformer_paper_tr_0_mesh_512":
+            "tensor2tensor.mesh_tensorflow.mtf_transformer",
+        "mtf_transformer_paper_tr_0_mesh_8":
+            "tensor2tensor.mesh_tensorflow.mtf_transformer",
+        "mtf_transformer_paper_tr_0_mesh_8_v2":
+            "tensor2tensor.mesh_tensorflow.mtf_transformer",
+        "mtf_transformer_paper_tr_1":
+            "tensor2tensor.mesh_tensorflow.mtf_transformer",
+        "mtf_transformer_paper_tr_2":
+            "tensor2tensor.mesh_tensorflow.mtf_transformer",
+        "mtf_transformer_paper_tr_3":
+            "tensor2tensor.mesh_tensorflow.mtf_transformer",
+        "mtf_transformer_paper_tr_4":
+            "tensor2tensor.mesh_tensorflow.mtf_transformer",
+        "mtf_transformer_paper_tr_4_mesh_16_8":
+            "tensor2tensor.mesh_tensorflow.mtf_transformer",
+        "mtf_transformer_paper_tr_6_mesh_64_8":
+            "tensor2tensor.mesh_tensorflow.mtf_transformer",
+        "mtf_transformer_paper_tr_m1":
+            "tensor2tensor.mesh_tensorflow.mtf_transformer",
+        "mtf_transformer_single":
+            "tensor2tensor.mesh_tensorflow.mtf_transformer",
+        "mtf_transformer_tiny": "tensor2tensor.mesh_tensorflow.mtf_transformer",
+        "mtf_transformer_tiny_8gpu":
+            "tensor2tensor.mesh_tensorflow.mtf_transformer",
+        "multimodel_base": "tensor2tensor.models.research.multimodel",
+        "multimodel_tiny": "tensor2tensor.models.research.multimodel",
+        "neural_gpu": "tensor2tensor.models.neural_gpu",
+        "next_frame_ae":
+            "tensor2tensor.models.research.next_frame_basic_deterministic_params",
+        "next_frame_basic_deterministic":
+            "tensor2tensor.models.research.next_frame_basic_deterministic_params",
+        "next_frame_basic_stochastic":
+            "tensor2tensor.models.research.next_frame_basic_stochastic",
+        "next_frame_emily": "tensor2tensor.models.research.next_frame_emily",
+        "next_frame_l1":
+            "tensor2tensor.models.research.next_frame_basic_deterministic_params",
+        "next_frame_l2":
+            "tensor2tensor.models.research.next_frame_basic_deterministic_params",
+        "next_frame_pixel_noise":
+            "tensor2tensor.models.research.next_frame_basic_deterministic_params",
+        "next_frame_savp":
+            "tensor2tensor.models.research.next_frame_savp_params",
+        "next_frame_small":
+            "tensor2tensor.models.research.next_frame_basic_deterministic_params",
+        "next_frame_sv2p":
+            "tensor2tensor.models.research.next_frame_sv2p_params",
+        "next_frame_sv2p_cutoff":
+            "tensor2tensor.models.research.next_frame_sv2p_params",
+        "next_frame_sv2p_tiny":
+            "tensor2tensor.models.research.next_frame_sv2p_params",
+        "next_frame_tiny":
+            "tensor2tensor.models.research.next_frame_basic_deterministic_params",
+        "next_frame_tpu":
+            "tensor2tensor.models.research.next_frame_basic_deterministic_params",
+        "ppo_atari_base": "tensor2tensor.models.research.rl",
+        "ppo_base_v1": "tensor2tensor.models.research.rl",
+        "ppo_continuous_action_base": "tensor2tensor.models.research.rl",
+        "ppo_discrete_action_base": "tensor2tensor.models.research.rl",
+        "ppo_pong_ae_base": "tensor2tensor.models.research.rl",
+        "ppo_pong_base": "tensor2tensor.models.research.rl",
+        "resnet_101": "tensor2tensor.models.resnet",
+        "resnet_152": "tensor2tensor.models.resnet",
+        "resnet_18": "tensor2tensor.models.resnet",
+        "resnet_200": "tensor2tensor.models.resnet",
+        "resnet_34": "tensor2tensor.models.resnet",
+        "resnet_50": "tensor2tensor.models.resnet",
+        "resnet_cifar_15": "tensor2tensor.models.resnet",
+        "resnet_cifar_32": "tensor2tensor.models.resnet",
+        "resnet_cifar_32_td_unit_05_05": "tensor2tensor.models.resnet",
+        "resnet_cifar_32_td_unit_no_drop": "tensor2tensor.models.resnet",
+        "resnet_cifar_32_td_weight_05_05": "tensor2tensor.models.resnet",
+        "resnet_imagenet_102": "tensor2tensor.models.resnet",
+        "resnet_imagenet_34": "tensor2tensor.models.resnet",
+        "resnet_imagenet_34_td_unit_05_05": "tensor2tensor.models.resnet",
+        "resnet_imagenet_34_td_unit_no_drop": "tensor2tensor.models.resnet",
+        "resnet_imagenet_34_td_weight_05_05": "tensor2tensor.models.resnet",
+        "revnet_104": "tensor2tensor.models.revnet",
+        "revnet_110_cifar": "tensor2tensor.models.revnet",
+        "revnet_164_cifar": "tensor2tensor.models.revnet",
+        "revnet_38_cifar": "tensor2tensor.models.revnet",
+        "shake_shake_quick": "tensor2tensor.models.shake_shake",
+        "shakeshake_big": "tensor2tensor.models.shake_shake",
+        "shakeshake_small": "tensor2tensor.models.shake_shake",
+        "shakeshake_tpu": "tensor2tensor.models.shake_shake",
+        "sliced_gan": "tensor2tensor.models.vanilla_gan",
+        "slicenet_1": "tensor2tensor.models.slicenet",
+        "slicenet_1noam": "tensor2tensor.models.slicenet",
+        "slicenet_1tiny": "tensor2tensor.models.slicenet",
+        "super_lm_b8k": "tensor2tensor.models.research.super_lm",
+        "super_lm_base": "tensor2tensor.models.research.super_lm",
+        "super_lm_big": "tensor2tensor.models.research.super_lm",
+        "super_lm_big_tpu": "tensor2tensor.models.research.super_lm",
+        "super_lm_conv": "tensor2tensor.models.research.super_lm",
+        "super_lm_high_mix": "tensor2tensor.models.research.super_lm",
+        "super_lm_low_mix": "tensor2tensor.models.research.super_lm",
+        "super_lm_moe": "tensor2tensor.models.research.super_lm",
+        "super_lm_moe_4b_diet": "tensor2tensor.models.research.super_lm",
+        "super_lm_moe_h4": "tensor2tensor.models.research.super_lm",
+        "super_lm_tpu": "tensor2tensor.models.research.super_lm",
+        "super_lm_tpu_memtest": "tensor2tensor.models.research.super_lm",
+        "transformer_ae_a3": "tensor2tensor.models.research.transformer_vae",
+        "transformer_ae_a6": "tensor2tensor.models.research.transformer_vae",
+        "transformer_ae_a8": "tensor2tensor.models.research.transformer_vae",
+        "transformer_ae_base": "tensor2tensor.models.research.transformer_vae",
+        "transformer_ae_base_ablation_1":
+            "tensor2tensor.models.research.transformer_vae",
+        "transformer_ae_base_ablation_2":
+            "tensor2tensor.models.research.transformer_vae",
+        "transformer_ae_base_ablation_3":
+            "tensor2tensor.models.research.transformer_vae",
+        "transformer_ae_base_ablation_4":
+            "tensor2tensor.models.research.transformer_vae",
+        "transformer_ae_base_ablation_5":
+            "tensor2tensor.models.research.transformer_vae",
+        "transformer_ae_base_iaf":
+            "tensor2tensor.models.research.transformer_vae",
+        "transformer_ae_base_noatt":
+            "tensor2tensor.models.research.transformer_vae",
+        "transformer_ae_base_tpu":
+            "tensor2tensor.models.research.transformer_vae",
+        "transformer_ae_small": "tensor2tensor.models.research.transformer_vae",
+        "transformer_base": "tensor2tensor.models.transformer",
+        "transformer_base_multistep8": "tensor2tensor.models.transformer",
+        "transformer_base_single_gpu": "tensor2tensor.models.transformer",
+        "transformer_base_v1": "tensor2tensor.models.transformer",
+        "transformer_base_v2": "tensor2tensor.models.transformer",
+        "transformer_big": "tensor2tensor.models.transformer",
+        "transformer_big_dr1": "tensor2tensor.models.transformer",
+        "transformer_big_dr2": "tensor2tensor.models.transformer",
+        "transformer_big_enfr": "tensor2tensor.models.transformer",
+        "transformer_big_enfr_tpu": "tensor2tensor.models.transformer",
+        "transformer_big_single_gpu": "tensor2tensor.models.transformer",
+        "transformer_big_tpu": "tensor2tensor.models.transformer",
+        "transformer_clean": "tensor2tensor.models.transformer",
+        "transformer_clean_big": "tensor2tensor.models.transformer",
+        "transformer_clean_big_tpu": "tensor2tensor.models.transformer",
+        "transformer_common_voice": "tensor2tensor.models.transformer",
+        "transformer_common_voice_tpu": "tensor2tensor.models.transformer",
+        "transformer_dr0": "tensor2tensor.models.transformer",
+        "transformer_dr2": "tensor2tensor.models.transformer",
+        "transformer_ff1024": "tensor2tensor.models.transformer",
+        "transformer_ff4096": "tensor2tensor.models.transformer",
+        "transformer_h1": "tensor2tensor.models.transformer",
+        "transformer_h16": "tensor2tensor.models.transformer",
+        "transformer_h32": "tensor2tensor.models.transformer",
+        "transformer_h4": "tensor2tensor.models.transformer",
+        "transformer_hs1024": "tensor2tensor.models.transformer",
+        "transformer_hs256": "tensor2tensor.models.transformer",
+        "transformer_k128": "tensor2tensor.models.transformer",
+        "transformer_k256": "tensor2tensor.models.transformer",
+        "transformer_l10": "tensor2tensor.models.transformer",
+        "transformer_l2": "tensor2tensor.models.transformer",
+        "transformer_l4": "tensor2tensor.models.transformer",
+        "transformer_l8": "tensor2tensor.models.transformer",
+        "transformer_librispeech": "tensor2tensor.models.transformer",
+        "transformer_librispeech_tpu": "tensor2tensor.models.transformer",
+        "transformer_librispeech_tpu_v1": "tensor2tensor.models.transformer",
+        "transformer_librispeech_tpu_v2": "tensor2tensor.models.transformer",
+        "transformer_librispeech_v1": "tensor2tensor.models.transformer",
+        "transformer_librispeech_v2": "tensor2tensor.models.transformer",
+        "transformer_lm_tpu_0": "tensor2tensor.models.transformer",
+        "transformer_lm_tpu_1": "tensor2tensor.models.transformer",
+        "transformer_ls0": "tensor2tensor.models.transformer",
+        "transformer_ls2": "tensor2tensor.models.transformer",
+        "transformer_moe_12k": "tensor2tensor.models.research.transformer_moe",
+        "transformer_moe_2k": "tensor2tensor.models.research.transformer_moe",
+        "transformer_moe_8k": "tensor2tensor.models.research.transformer_moe",
+        "transformer_moe_8k_lm":
+            "tensor2tensor.models.research.transformer_moe",
+        "transformer_moe_base": "tensor2tensor.models.research.transformer_moe",
+        "transformer_moe_prepend_8k":
+            "tensor2tensor.models.research.transformer_moe",
+        "transformer_nat_base": "tensor2tensor.models.research.transformer_nat",
+        "transformer_nat_big": "tensor2tensor.models.research.transformer_nat",
+        "transformer_nat_small":
+            "tensor2tensor.models.research.transformer_nat",
+        "transformer_packed_tpu": "tensor2tensor.models.transformer",
+        "transformer_parameter_attention_a": "tensor2tensor.models.transformer",
+        "transformer_parameter_attention_b": "tensor2tensor.models.transformer",
+        "transformer_parsing_base": "tensor2tensor.models.transformer",
+        "transformer_parsing_big": "tensor2tensor.models.transformer",
+        "transformer_parsing_ice": "tensor2tensor.models.transformer",
+        "transformer_prepend": "tensor2tensor.models.transformer",
+        "transformer_prepend_v1": "tensor2tensor.models.transformer",
+        "transformer_prepend_v2": "tensor2tensor.models.transformer",
+        "transformer_relative": "tensor2tensor.models.transformer",
+        "transformer_relative_big": "tensor2tensor.models.transformer",
+        "transformer_relative_tiny": "tensor2tensor.models.transformer",
+        "transformer_revnet_base":
+            "tensor2tensor.models.research.transformer_revnet",
+        "transformer_revnet_big":
+            "tensor2tensor.models.research.transformer_revnet",
+        "transformer_sketch":
+            "tensor2tensor.models.research.transformer_sketch",
+        "transformer_small": "tensor2tensor.models.transformer",
+        "transformer_small_tpu": "tensor2tensor.models.transformer",
+        "transformer_supervised_attention": "tensor2tensor.models.transformer",
+        "transformer_symshard_base":
+            "tensor2tensor.models.research.transformer_symshard",
+        "transformer_symshard_h4":
+            "tensor2tensor.models.research.transformer_symshard",
+        "transformer_symshard_lm_0":
+            "tensor2tensor.models.research.transformer_symshard",
+        "transformer_symshard_sh4":
+            "tensor2tensor.models.research.transformer_symshard",
+        "transformer_teeny":
+            "tensor2tensor.models.research.universal_transformer",
+        "transformer_test": "tensor2tensor.models.transformer",
+        "transformer_timeseries": "tensor2tensor.models.transformer",
+        "transformer_timeseries_tpu": "tensor2tensor.models.transformer",
+        "transformer_tiny": "tensor2tensor.models.transformer",
+        "transformer_tiny_tpu": "tensor2tensor.models.transformer",
+        "transformer_tpu": "tensor2tensor.models.transformer",
+        "transformer_tpu_1b": "tensor2tensor.models.transformer",
+        "transformer_tpu_bf16_activation": "tensor2tensor.models.transformer",
+        "transformer_tpu_with_conv": "tensor2tensor.models.transformer",
+        "universal_transformer_base":
+            "tensor2tensor.models.research.universal_transformer",
+        "universal_transformer_big":
+            "tensor2tensor.models.research.universal_transformer",
+        "universal_transformer_dwa_small":
+            "tensor2tensor.models.research.universal_transformer",
+        "universal_transformer_dwa_tiny":
+            "tensor2tensor.models.research.universal_transformer",
+        "universal_transformer_dwa_tiny_test":
+            "tensor2tensor.models.research.universal_transformer",
+        "universal_transformer_fc_base":
+            "tensor2tensor.models.research.universal_transformer",
+        "universal_transformer_fc_big":
+            "tensor2tensor.models.research.universal_transformer",
+        "universal_transformer_fc_small":
+            "tensor2tensor.models.research.universal_transformer",
+        "universal_transformer_gru_small":
+            "tensor2tensor.models.research.universal_transformer",
+        "universal_transformer_highway_small":
+            "tensor2tensor.models.research.universal_transformer",
+        "universal_transformer_highway_tiny":
+            "tensor2tensor.models.research.universal_transformer",
+        "universal_transformer_lstm_small":
+            "tensor2tensor.models.research.universal_transformer",
+        "universal_transformer_mix_after_ut_small":
+            "tensor2tensor.models.research.universal_transformer",
+        "universal_transformer_position_random_timing_small":
+            "tensor2tensor.models.research.universal_transformer",
+        "universal_transformer_position_random_timing_tiny":
+            "tensor2tensor.models.research.universal_transformer",
+        "universal_transformer_position_step_timing_tiny":
+            "tensor2tensor.models.research.universal_transformer",
+        "universal_transformer_rnn_small":
+            "tensor2tensor.models.research.universal_transformer",
+        "universal_transformer_skip_small":
+            "tensor2tensor.models.research.universal_transformer",
+        "universal_transformer_skip_tiny":
+            "tensor2tensor.models.research.universal_transformer",
+        "universal_transformer_small":
+            "tensor2tensor.models.research.universal_transformer",
+        "universal_transformer_small_dropconnect":
+            "tensor2tensor.models.research.universal_transformer",
+        "universal_transformer_small_sb":
+            "tensor2tensor.models.research.universal_transformer",
+        "universal_transformer_step_sinusoid_timing_tiny":
+            "tensor2tensor.models.research.universal_transformer",
+        "universal_transformer_teeny":
+            "tensor2tensor.models.research.universal_transformer",
+        "universal_transformer_tiny":
+            "tensor2tensor.models.research.universal_transformer",
+        "vqa_attention_base": "tensor2tensor.models.research.vqa_attention",
+        "vqa_attention_drop01_dna":
+            "tensor2tensor.models.research.vqa_attention",
+        "vqa_attention_feature_base":
+            "tensor2tensor.models.research.vqa_attention",
+        "vqa_attention_feature_batch1024":
+            "tensor2tensor.models.research.vqa_attention",
+        "vqa_attention_feature_batch1024_dnz":
+            "tensor2tensor.models.research.vqa_attention",
+        "vqa_attention_feature_batch1024_dnz_l2":
+            "tensor2tensor.models.research.vqa_attention",
+        "vqa_attention_feature_batch1024_dnz_noscaledp":
+            "tensor2tensor.models.research.vqa_attention",
+        "vqa_attention_feature_batch1024_drop01":
+            "tensor2tensor.models.research.vqa_attention",
+        "vqa_attention_feature_batch1024_drop01_dna":
+            "tensor2tensor.models.research.vqa_attention",
+        "vqa_attention_feature_batch1024_drop01_dna_concat":
+            "tensor2tensor.models.research.vqa_attention",
+        "vqa_attention_feature_batch1024_lstmlayernorm":
+            "tensor2tensor.models.research.vqa_attention",
+        "vqa_attention_feature_batch1024_numglimps1":
+            "tensor2tensor.models.research.vqa_attention",
+        "vqa_attention_feature_batch512":
+            "tensor2tensor.models.research.vqa_attention",
+        "vqa_attention_feature_dna":
+            "tensor2tensor.models.research.vqa_attention",
+        "vqa_attention_feature_dnz":
+            "tensor2tensor.models.research.vqa_attention",
+        "vqa_attention_feature_dnz_l2":
+            "tensor2tensor.models.research.vqa_attention",
+        "vqa_attention_feature_dnz_noscaledp":
+            "tensor2tensor.models.research.vqa_attention",
+        "vqa_attention_feature_hidden1024":
+            "tensor2tensor.models.research.vqa_attention",
+        "vqa_attention_feature_imagefeat1024":
+            "tensor2tensor.models.research.vqa_attention",
+        "vqa_attention_feature_imagefeat512":
+            "tensor2tensor.models.research.vqa_attention",
+        "vqa_attention_feature_initializer":
+            "tensor2tensor.models.research.vqa_attention",
+        "vqa_attention_feature_lstmlayernorm":
+            "tensor2tensor.models.research.vqa_attention",
+        "vqa_attention_feature_nonormalization":
+            "tensor2tensor.models.research.vqa_attention",
+        "vqa_attention_feature_numglimps1":
+            "tensor2tensor.models.research.vqa_attention",
+        "vqa_attention_numglimps1":
+            "tensor2tensor.models.research.vqa_attention",
+        "vqa_recurrent_self_attention_base":
+            "tensor2tensor.models.research.vqa_recurrent_self_attention",
+        "vqa_recurrent_self_attention_big":
+            "tensor2tensor.models.research.vqa_recurrent_self_attention",
+        "vqa_recurrent_self_attention_big_l4":
+            "tensor2tensor.models.research.vqa_recurrent_self_attention",
+        "vqa_recurrent_self_attention_drop1":
+            "tensor2tensor.models.research.vqa_recurrent_self_attention",
+        "vqa_recurrent_self_attention_drop3":
+            "tensor2tensor.models.research.vqa_recurrent_self_attention",
+        "vqa_recurrent_self_attention_gru":
+            "tensor2tensor.models.research.vqa_recurrent_self_attention",
+        "vqa_recurrent_self_attention_highway":
+            "tensor2tensor.models.research.vqa_recurrent_self_attention",
+        "vqa_recurrent_self_attention_l4":
+            "tensor2tensor.models.research.vqa_recurrent_self_attention",
+        "vqa_recurrent_self_attention_l8":
+            "tensor2tensor.models.research.vqa_recurrent_self_attention",
+        "vqa_recurrent_self_attention_ls2":
+            "tensor2tensor.models.research.vqa_recurrent_self_attention",
+        "vqa_recurrent_self_attention_mix_before_ut":
+            "tensor2tensor.models.research.vqa_recurrent_self_attention",
+        "vqa_recurrent_self_attention_small":
+            "tensor2tensor.models.research.vqa_recurrent_self_attention",
+        "vqa_self_attention_base":
+            "tensor2tensor.models.research.vqa_self_attention",
+        "vqa_self_attention_feature":
+            "tensor2tensor.models.research.vqa_self_attention",
+        "vqa_self_attention_feature_batch1024":
+            "tensor2tensor.models.research.vqa_self_attention",
+        "vqa_self_attention_feature_batch1024_big":
+            "tensor2tensor.models.research.vqa_self_attention",
+        "vqa_self_attention_feature_batch1024_drop03":
+            "tensor2tensor.models.research.vqa_self_attention",
+        "vqa_self_attention_feature_batch1024_exp":
+            "tensor2tensor.models.research.vqa_self_attention",
+        "vqa_self_attention_feature_batch1024_hidden6":
+            "tensor2tensor.models.research.vqa_self_attention",
+        "vqa_self_attention_feature_batch1024_hidden6_big":
+            "tensor2tensor.models.research.vqa_self_attention",
+        "vqa_self_attention_feature_lr5":
+            "tensor2tensor.models.research.vqa_self_attention",
+        "xception_base": "tensor2tensor.models.xception",
+        "xception_tiny": "tensor2tensor.models.xception",
+        "xception_tiny_tpu": "tensor2tensor.models.xception",
+        "xmoe_2d": "tensor2tensor.mesh_tensorflow.research.experiments_moe",
+        "xmoe_2d_88": "tensor2tensor.mesh_tensorflow.research.experiments_moe",
+        "xmoe_dense_4k":
+            "tensor2tensor.mesh_tensorflow.research.experiments_moe",
+        "xmoe_dense_64k":
+            "tensor2tensor.mesh_tensorflow.research.experiments_moe",
+        "xmoe_dense_8k":
+            "tensor2tensor.mesh_tensorflow.research.experiments_moe",
+        "xmoe_top_2": "tensor2tensor.mesh_tensorflow.research.experiments_moe",
+        "xmoe_top_2_c15":
+            "tensor2tensor.mesh_tensorflow.research.experiments_moe",
+    },
+    "image_modality": {
+        "channel_embeddings_bottom": "tensor2tensor.layers.modalities",
+        "default": "tensor2tensor.layers.modalities",
+        "identity": "tensor2tensor.layers.modalities",
+        "image_channel_bottom_identity": "tensor2tensor.layers.modalities",
+        "image_channel_compress": "tensor2tensor.layers.modalities",
+    },
+    "model": {
+        "aligned": "tensor2tensor.models.research.aligned",
+        "attention_lm": "tensor2tensor.models.research.attention_lm",
+        "attention_lm_moe": "tensor2tensor.models.research.attention_lm_moe",
+        "autoencoder_autoregressive":
+            "tensor2tensor.models.research.autoencoders",
+        "autoencoder_basic": "tensor2tensor.models.research.autoencoders",
+        "autoencoder_basic_discrete":
+            "tensor2tensor.models.research.autoencoders",
+        "autoencoder_ordered_discrete":
+            "tensor2tensor.models.research.autoencoders",
+        "autoencoder_residual": "tensor2tensor.models.research.autoencoders",
+        "autoencoder_residual_discrete":
+            "tensor2tensor.models.research.autoencoders",
+        "autoencoder_residual_vae":
+            "tensor2tensor.models.research.autoencoders",
+        "autoencoder_stacked": "tensor2tensor.models.research.autoencoders",
+        "basic_fc_relu": "tensor2tensor.models.basic",
+        "byte_net": "tensor2tensor.models.bytenet",
+        "cycle_gan": "tensor2tensor.models.research.cycle_gan",
+        "diagonal_neural_gpu": "tensor2tensor.models.neural_gpu",
+        "distillation": "tensor2tensor.models.distillation",
+        "gene_expression_conv": "tensor2tensor.models.research.gene_expression",
+        "imagetransformer": "tensor2tensor.models.image_transformer",
+        "imagetransformer2d": "tensor2tensor.models.image_transformer_2d",
+        "imagetransformer_moe": "tensor2tensor.models.image_transformer",
+        "img2img_transformer": "tensor2tensor.models.image_transformer_2d",
+        "img2img_transformer_block_parallel":
+            "tensor2tensor.models.image_transformer_2d",
+        "lstm_encoder": "tensor2tensor.models.lstm",
+        "lstm_seq2seq": "tensor2tensor.models.lstm",
+        "lstm_seq2seq_attention": "tensor2tensor.models.lstm",
+        "lstm_seq2seq_attention_bidirectional_encoder":
+            "tensor2tensor.models.lstm",
+        "lstm_seq2seq_bidirectional_encoder": "tensor2tensor.models.lstm",
+        "mtf_image_transformer":
+            "tensor2tensor.mesh_tensorflow.mtf_image_transformer",
+        "mtf_transformer": "tensor2tensor.mesh_tensorflow.mtf_transformer",
+        "multi_model": "tensor2tensor.models.research.multimodel",
+        "neural_gpu": "tensor2tensor.models.neural_gpu",
+        "next_frame_basic_deterministic":
+            "tensor2tensor.models.research.next_frame_basic_deterministic",
+        "next_frame_basic_stochastic":
+            "tensor2tensor.models.research.next_frame_basic_stochastic",
+        "next_frame_emily": "tensor2tensor.models.research.next_frame_emily",
+        "next_frame_savp": "tensor2tensor.models.research.next_frame_savp",
+        "next_frame_sv2p": "tensor2tensor.models.research.next_frame_sv2p",
+        "next_frame_sv2p_two_frames":
+            "tensor2tensor.models.research.next_frame_sv2p",
+        "resnet": "tensor2tensor.models.resnet",
+        "revnet": "tensor2tensor.models.revnet",
+        "shake_shake": "tensor2tensor.models.shake_shake",
+        "similarity_transformer":
+            "tensor2tensor.models.research.similarity_transformer",
+        "slice_net": "tensor2tensor.models.slicenet",
+        "sliced_gan": "tensor2tensor.models.vanilla_gan",
+        "super_lm": "tensor2tensor.models.research.super_lm",
+        "transformer": "tensor2tensor.models.transformer",
+        "transformer_ae": "tensor2tensor.models.research.transformer_vae",
+        "transformer_encoder": "tensor2tensor.models.transformer",
+        "transformer_moe": "tensor2tensor.models.research.transformer_moe",
+        "transformer_nat": "tensor2tensor.models.research.transformer_nat",
+        "transformer_revnet":
+            "tensor2tensor.models.research.transformer_revnet",
+        "transformer_scorer": "tensor2tensor.models.transformer",
+        "transformer_sketch":
+            "tensor2tensor.models.research.transformer_sketch",
+        "transformer_symshard":
+            "tensor2tensor.models.research.transformer_symshard",
+        "universal_transformer":
+            "tensor2tensor.models.research.universal_transformer",
+        "universal_transformer_encoder":
+            "tensor2tensor.models.research.universal_transformer",
+        "vqa_attention_baseline": "tensor2tensor.models.research.vqa_attention",
+        "vqa_combined_self_attention":
+            "tensor2tensor.models.research.vqa_self_attention",
+        "vqa_iterative_combined_self_attention":
+            "tensor2tensor.models.research.vqa_self_attention",
+        "vqa_recurrent_self_attention":
+            "tensor2tensor.models.research.vqa_recurrent_self_attention",
+        "vqa_self_attention":
+            "tensor2tensor.models.research.vqa_self_attention",
+        "vqa_simple_image_self_attention":
+            "tensor2tensor.models.research.vqa_attention",
+        "xception": "tensor2tensor.models.xception",
+    },
+    "problem": {
+        "algorithmic_addition_binary40":
+            "tensor2tensor.data_generators.algorithmic",
+        "algorithmic_addition_decimal40":
+            "tensor2tensor.data_generators.algorithmic",
+        "algorithmic_cipher_shift200": "tensor2tensor.data_generators.cipher",
+        "algorithmic_cipher_shift5": "tensor2tensor.data_generators.cipher",
+        "algorithmic_cipher_vigenere200":
+            "tensor2tensor.data_generators.cipher",
+        "algorithmic_cipher_vigenere5": "tensor2tensor.data_generators.cipher",
+        "algorithmic_identity_binary40":
+            "tensor2tensor.data_generators.algorithmic",
+        "algorithmic_identity_decimal40":
+            "tensor2tensor.data_generators.algorithmic",
+        "algorithmic_multiplication_binary40":
+            "tensor2tensor.data_generators.algorithmic",
+        "algorithmic_multiplication_decimal40":
+            "tensor2tensor.data_generators.algorithmic",
+        "algorithmic_reverse_binary40":
+            "tensor2tensor.data_generators.algorithmic",
+        "algorithmic_reverse_binary40_test":
+            "tensor2tensor.data_generators.algorithmic",
+        "algorithmic_reverse_decimal40":
+            "tensor2tensor.data_generators.algorithmic",
+        "algorithmic_reverse_nlplike32k":
+            "tensor2tensor.data_generators.algorithmic",
+        "algorithmic_reverse_nlplike8k":
+            "tensor2tensor.data_generators.algorithmic",
+        "algorithmic_shift_decimal40":
+            "tensor2tensor.data_generators.algorithmic",
+        "algorithmic_sort_problem": "tensor2tensor.data_generators.algorithmic",
+        "audio_timit_characters_tune":
+            "tensor2tensor.data_generators.problem_hparams",
+        "audio_timit_tokens8k_test":
+            "tensor2tensor.data_generators.problem_hparams",
+        "audio_timit_tokens8k_tune":
+            "tensor2tensor.data_generators.problem_hparams",
+        "cola": "tensor2tensor.data_generators.cola",
+        "cola_characters": "tensor2tensor.data_generators.cola",
+        "common_voice": "tensor2tensor.data_generators.common_voice",
+        "common_voice_clean": "tensor2tensor.data_generators.common_voice",
+        "common_voice_noisy": "tensor2tensor.data_generators.common_voice",
+        "common_voice_train_full_test_clean":
+            "tensor2tensor.data_generators.common_voice",
+        "genomics_expression_cage10":
+            "tensor2tensor.data_generators.gene_expression",
+        "genomics_expression_gm12878":
+            "tensor2tensor.data_generators.gene_expression",
+        "genomics_expression_l262k":
+            "tensor2tensor.data_generators.gene_expression",
+        "github_function_docstring":
+            "tensor2tensor.data_generators.function_docstring",
+        "gym_discrete_problem_with_agent_on_wrapped_full_pong":
+            "tensor2tensor.data_generators.gym_problems_specs",
+        "gym_discrete_problem_with_agent_on_wrapped_full_pong_autoencoded":
+            "tensor2tensor.data_generators.gym_problems_specs",
+        "gym_discrete_problem_with_agent_on_wrapped_full_pong_with_autoencoder":
+            "tensor2tensor.data_generators.gym_problems_specs",
+        "gym_simulated_discrete_problem_with_agent_on_wrapped_full_pong":
+            "tensor2tensor.data_generators.gym_problems_specs",
+        "gym_simulated_discrete_problem_with_agent_on_wrapped_full_pong_autoencoded":
+            "tensor2tensor.data_generators.gym_problems_specs",
+        "gym_wrapped_full_pong_random":
+            "tensor2tensor.data_generators.gym_problems_specs",
+        "image_celeba": "tensor2tensor.data_generators.celeba",
+        "image_celeba32": "tensor2tensor.data_generators.celeba",
+        "image_celeba64": "tensor2tensor.data_generators.celeba",
+        "image_celeba_multi_resolution": "tensor2tensor.data_generators.celeba",
+        "image_celebahq128": "tensor2tensor.data_generators.celebahq",
+        "image_celebahq128_dmol": "tensor2tensor.data_generators.celebahq",
+        "image_celebahq256": "tensor2tensor.data_generators.celebahq",
+        "image_celebahq256_dmol": "tensor2tensor.data_generators.celebahq",
+        "image_cifar10": "tensor2tensor.data_generators.cifar",
+        "image_cifar100": "tensor2tensor.data_generators.cifar",
+        "image_cifar100_plain": "tensor2tensor.data_generators.cifar",
+        "image_cifar100_plain8": "tensor2tensor.data_generators.cifar",
+        "image_cifar100_plain_gen": "tensor2tensor.data_generators.cifar",
+        "image_cifar100_tune": "tensor2tensor.data_generators.cifar",
+        "image_cifar10_plain": "tensor2tensor.data_generators.cifar",
+        "image_cifar10_plain8": "tensor2tensor.data_generators.cifar",
+        "image_cifar10_plain_gen": "tensor2tensor.data_generators.cifar",
+        "image_cifar10_plain_gen_dmol": "tensor2tensor.data_generators.cifar",
+        "image_cifar10_tune": "tensor2tensor.data_generators.cifar",
+        "image_cifar20": "tensor2tensor.data_generators.cifar",
+        "image_cifar20_plain": "tensor2tensor.data_generators.cifar",
+        "image_cifar20_plain8": "tensor2tensor.data_generators.cifar",
+        "image_cifar20_plain_gen": "tensor2tensor.data_generators.cifar",
+        "image_cifar20_tune": "tensor2tensor.data_generators.cifar",
+        "image_fashion_mnist": "tensor2tensor.data_generators.mnist",
+        "image_fsns": "tensor2tensor.data_generators.fsns",
+        "image_imagenet": "tensor2tensor.data_generators.imagenet",
+        "image_imagenet224": "tensor2tensor.data_generators.imagenet",
+        "image_imagenet32": "tensor2tensor.data_generators.imagenet",
+        "image_imagenet32_gen": "tensor2tensor.data_generators.imagenet",
+        "image_imagenet32_small": "tensor2tensor.data_generators.imagenet",
+        "image_imagenet64": "tensor2tensor.data_generators.imagenet",
+        "image_imagenet64_gen": "tensor2tensor.data_generators.imagenet",
+        "image_imagenet_multi_resolution_gen":
+            "tensor2tensor.data_generators.imagenet",
+        "image_lsun_bedrooms": "tensor2tensor.data_generators.image_lsun",
+        "image_mnist": "tensor2tensor.data_generators.mnist",
+        "image_mnist_tune": "tensor2tensor.data_generators.mnist",
+        "image_ms_coco_characters": "tensor2tensor.data_generators.mscoco",
+        "image_ms_coco_tokens32k": "tensor2tensor.data_generators.mscoco",
+        "image_text_ms_coco": "tensor2tensor.data_generators.mscoco",
+        "image_text_ms_coco_multi_resolution":
+            "tensor2tensor.data_generators.mscoco",
+        "image_vqav2_rcnn_feature_tokens10k_labels3k":
+            "tensor2tensor.data_generators.vqa",
+        "image_vqav2_tokens10k_labels3k": "tensor2tensor.data_generators.vqa",
+        "img2img_allen_brain": "tensor2tensor.data_generators.allen_brain",
+        "img2img_allen_brain_dim16to16_paint1":
+            "tensor2tensor.data_generators.allen_brain",
+        "img2img_allen_brain_dim48to64":
+            "tensor2tensor.data_generators.allen_brain",
+        "img2img_allen_brain_dim8to32":
+            "tensor2tensor.data_generators.allen_brain",
+        "img2img_celeba": "tensor2tensor.data_generators.celeba",
+        "img2img_celeba64": "tensor2tensor.data_generators.celeba",
+        "img2img_cifar10": "tensor2tensor.data_generators.cifar",
+        "img2img_cifar100": "tensor2tensor.data_generators.cifar",
+        "img2img_imagenet": "tensor2tensor.data_generators.imagenet",
+        "lambada_lm": "tensor2tensor.data_generators.lambada",
+        "lambada_lm_control": "tensor2tensor.data_generators.lambada",
+        "lambada_rc": "tensor2tensor.data_generators.lambada",
+        "lambada_rc_control": "tensor2tensor.data_generators.lambada",
+        "languagemodel_lm1b32k": "tensor2tensor.data_generators.lm1b",
+        "languagemodel_lm1b32k_packed": "tensor2tensor.data_generators.lm1b",
+        "languagemodel_lm1b8k_packed": "tensor2tensor.data_generators.lm1b",
+        "languagemodel_lm1b_characters": "tensor2tensor.data_generators.lm1b",
+        "languagemodel_lm1b_characters_packed":
+            "tensor2tensor.data_generators.lm1b",
+        "languagemodel_lm1b_multi_nli":
+            "tensor2tensor.data_generators.lm1b_mnli",
+        "languagemodel_lm1b_multi_nli_subwords":
+            "tensor2tensor.data_generators.lm1b_mnli",
+        "languagemodel_lm1b_sentiment_imdb":
+            "tensor2tensor.data_generators.lm1b_imdb",
+        "languagemodel_ptb10k": "tensor2tensor.data_generators.ptb",
+        "languagemodel_ptb_characters": "tensor2tensor.data_generators.ptb",
+        "languagemodel_wiki_noref_v128k_l1k":
+            "tensor2tensor.data_generators.wiki",
+        "languagemodel_wiki_noref_v32k_l1k":
+            "tensor2tensor.data_generators.wiki",
+        "languagemodel_wiki_noref_v8k_l16k":
+            "tensor2tensor.data_generators.wiki",
+        "languagemodel_wiki_noref_v8k_l1k":
+            "tensor2tensor.data_generators.wiki",
+        "languagemodel_wiki_scramble_l128":
+            "tensor2tensor.data_generators.wiki",
+        "languagemodel_wiki_scramble_l1k": "tensor2tensor.data_generators.wiki",
+        "languagemodel_wiki_xml_v8k_l1k": "tensor2tensor.data_generators.wiki",
+        "languagemodel_wiki_xml_v8k_l4k": "tensor2tensor.data_generators.wiki",
+        "languagemodel_wikitext103":
+            "tensor2tensor.data_generators.wikitext103",
+        "languagemodel_wikitext103_characters":
+            "tensor2tensor.data_generators.wikitext103",
+        "librispeech": "tensor2tensor.data_generators.librispeech",
+        "librispeech_clean": "tensor2tensor.data_generators.librispeech",
+        "librispeech_clean_small": "tensor2tensor.data_generators.librispeech",
+        "librispeech_noisy": "tensor2tensor.data_generators.librispeech",
+        "librispeech_train_full_test_clean":
+            "tensor2tensor.data_generators.librispeech",
+        "msr_paraphrase_corpus": "tensor2tensor.data_generators.mrpc",
+        "msr_paraphrase_corpus_characters":
+            "tensor2tensor.data_generators.mrpc",
+        "multi_nli": "tensor2tensor.data_generators.multinli",
+        "multi_nli_characters": "tensor2tensor.data_generators.multinli",
+        "multi_nli_shared_vocab": "tensor2tensor.data_generators.multinli",
+        "ocr_test": "tensor2tensor.data_generators.ocr",
+        "paraphrase_generation_ms_coco_problem1d":
+            "tensor2tensor.data_generators.paraphrase_ms_coco",
+        "paraphrase_generation_ms_coco_problem1d_characters":
+            "tensor2tensor.data_generators.paraphrase_ms_coco",
+        "paraphrase_generation_ms_coco_problem2d":
+            "tensor2tensor.data_generators.paraphrase_ms_coco",
+        "paraphrase_generation_ms_coco_problem2d_characters":
+            "tensor2tensor.data_generators.paraphrase_ms_coco",
+        "parsing_english_ptb16k":
+            "tensor2tensor.data_generators.problem_hparams",
+        "parsing_english_ptb8k":
+            "tensor2tensor.data_generators.problem_hparams",
+        "parsing_icelandic16k": "tensor2tensor.data_generators.ice_parsing",
+        "program_search_algolisp":
+            "tensor2tensor.data_generators.program_search",
+        "programming_desc2code_cpp": "tensor2tensor.data_generators.desc2code",
+        "programming_desc2code_py": "tensor2tensor.data_generators.desc2code",
+        "question_nli": "tensor2tensor.data_generators.qnli",
+        "question_nli_characters": "tensor2tensor.data_generators.qnli",
+        "quora_question_pairs": "tensor2tensor.data_generators.quora_qpairs",
+        "quora_question_pairs_characters":
+            "tensor2tensor.data_generators.quora_qpairs",
+        "rte": "tensor2tensor.data_generators.rte",
+        "rte_characters": "tensor2tensor.data_generators.rte",
+        "sentiment_imdb": "tensor2tensor.data_generators.imdb",
+        "sentiment_imdb_characters": "tensor2tensor.data_generators.imdb",
+        "sentiment_sst_binary": "tensor2tensor.data_generators.sst_binary",
+        "sentiment_sst_binary_characters":
+            "tensor2tensor.data_generators.sst_binary",
+        "squad": "tensor2tensor.data_generators.squad",
+        "squad_concat": "tensor2tensor.data_generators.squad",
+        "squad_concat_positioned": "tensor2tensor.data_generators.squad",
+        "stanford_nli": "tensor2tensor.data_generators.stanford_nli",
+        "stanford_nli_characters": "tensor2tensor.data_generators.stanford_nli",
+        "stanford_nli_shared_vocab":
+            "tensor2tensor.data_generators.stanford_nli",
+        "style_transfer_modern_to_shakespeare":
+            "tensor2tensor.data_generators.style_transfer",
+        "style_transfer_modern_to_shakespeare_characters":
+            "tensor2tensor.data_generators.style_transfer",
+        "style_transfer_shakespeare_to_modern":
+            "tensor2tensor.data_generators.style_transfer",
+        "style_transfer_shakespeare_to_modern_characters":
+            "tensor2tensor.data_generators.style_transfer",
+        "summarize_cnn_dailymail32k":
+            "tensor2tensor.data_generators.cnn_dailymail",
+        "sva_language_modeling":
+            "tensor2tensor.data_generators.subject_verb_agreement",
+        "sva_number_prediction":
+            "tensor2tensor.data_generators.subject_verb_agreement",
+        "text2text_copyable_tokens":
+            "tensor2tensor.data_generators.pointer_generator_word",
+        "text2text_tmpdir": "tensor2tensor.data_generators.text_problems",
+        "text2text_tmpdir_tokens":
+            "tensor2tensor.data_generators.text_problems",
+        "timeseries_synthetic_data_series10_samples100k":
+            "tensor2tensor.data_generators.timeseries",
+        "timeseries_toy_problem": "tensor2tensor.data_generators.timeseries",
+        "tiny_algo": "tensor2tensor.data_generators.algorithmic",
+        "translate_encs_wmt32k": "tensor2tensor.data_generators.translate_encs",
+        "translate_encs_wmt_characters":
+            "tensor2tensor.data_generators.translate_encs",
+        "translate_ende_wmt32k": "tensor2tensor.data_generators.translate_ende",
+        "translate_ende_wmt32k_packed":
+            "tensor2tensor.data_generators.translate_ende",
+        "translate_ende_wmt8k": "tensor2tensor.data_generators.translate_ende",
+        "translate_ende_wmt8k_packed":
+            "tensor2tensor.data_generators.translate_ende",
+        "translate_ende_wmt_bpe32k":
+            "tensor2tensor.data_generators.translate_ende",
+        "translate_ende_wmt_characters":
+            "tensor2tensor.data_generators.translate_ende",
+        "translate_enet_wmt32k": "tensor2tensor.data_generators.translate_enet",
+        "translate_enet_wmt_characters":
+            "tensor2tensor.data_generators.translate_enet",
+        "translate_enfr_wmt32k": "tensor2tensor.data_generators.translate_enfr",
+        "translate_enfr_wmt32k_packed":
+            "tensor2tensor.data_generators.translate_enfr",
+        "translate_enfr_wmt8k": "tensor2tensor.data_generators.translate_enfr",
+        "translate_enfr_wmt_characters":
+            "tensor2tensor.data_generators.translate_enfr",
+        "translate_enfr_wmt_small32k":
+            "tensor2tensor.data_generators.translate_enfr",
+        "translate_enfr_wmt_small8k":
+            "tensor2tensor.data_generators.translate_enfr",
+        "translate_enfr_wmt_small_characters":
+            "tensor2tensor.data_generators.translate_enfr",
+        "translate_enid_iwslt32k":
+            "tensor2tensor.data_generators.translate_enid",
+        "translate_enmk_setimes32k":
+            "tensor2tensor.data_generators.translate_enmk",
+        "translate_enmk_setimes_characters":
+            "tensor2tensor.data_generators.translate_enmk",
+        "translate_envi_iwslt32k":
+            "tensor2tensor.data_generators.translate_envi",
+        "translate_enzh_wmt32k": "tensor2tensor.data_generators.translate_enzh",
+        "translate_enzh_wmt8k": "tensor2tensor.data_generators.translate_enzh",
+        "video_bair_robot_pushing":
+            "tensor2tensor.data_generators.bair_robot_pushing",
+        "video_bair_robot_pushing_with_actions":
+            "tensor2tensor.data_generators.bair_robot_pushing",
+        "video_google_robot_pushing":
+            "tensor2tensor.data_generators.google_robot_pushing",
+        "video_stochastic_shapes10k":
+            "tensor2tensor.data_generators.video_generated",
+        "video_twentybn": "tensor2tensor.data_generators.twentybn",
+        "wikisum_commoncrawl": "tensor2tensor.data_generators.wikisum.wikisum",
+        "wikisum_commoncrawl_lead_section":
+            "tensor2tensor.data_generators.wikisum.wikisum",
+        "wikisum_web": "tensor2tensor.data_generators.wikisum.wikisum",
+        "wikisum_web_lead_section":
+            "tensor2tensor.data_generators.wikisum.wikisum",
+        "winograd_nli": "tensor2tensor.data_generators.wnli",
+        "winograd_nli_characters": "tensor2tensor.data_generators.wnli",
+        "wsj_parsing": "tensor2tensor.data_generators.wsj_parsing",
+    },
+    "pruning_params": {
+        "resnet_unit": "tensor2tensor.models.resnet",
+        "resnet_weight": "tensor2tensor.models.resnet",
+    },
+    "ranged_hparams": {
+        "adaptive_universal_transformer_base_range":
+            "tensor2tensor.models.research.universal_transformer",
+        "autoencoder_discrete_pong_range":
+            "tensor2tensor.models.research.autoencoders",
+        "autoencoder_range": "tensor2tensor.models.research.autoencoders",
+        "basic1": "tensor2tensor.layers.common_hparams",
+        "basic_moe_range": "tensor2tensor.layers.common_hparams",
+        "imagetransformer_cifar_tpu_range":
+            "tensor2tensor.models.image_transformer",
+        "next_frame_ae_range":
+            "tensor2tensor.models.research.next_frame_basic_deterministic_params",
+        "next_frame_base_range":
+            "tensor2tensor.models.research.next_frame_basic_deterministic_params",
+        "next_frame_clipgrad_range":
+            "tensor2tensor.models.research.next_frame_basic_deterministic_params",
+        "next_frame_doubling_range":
+            "tensor2tensor.models.research.next_frame_basic_deterministic_params",
+        "next_frame_xent_cutoff_range":
+            "tensor2tensor.models.research.next_frame_basic_deterministic_params",
+        "revnet_range": "tensor2tensor.models.revnet",
+        "slicenet1": "tensor2tensor.models.slicenet",
+        "transformer_base_range": "tensor2tensor.models.transformer",
+        "transformer_tiny_tpu_range": "tensor2tensor.models.transformer",
+        "transformer_tpu_range": "tensor2tensor.models.transformer",
+        "universal_transformer_base_range":
+            "tensor2tensor.models.research.universal_transformer",
+        "vqa_attention_base_range":
+            "tensor2tensor.models.research.vqa_attention",
+    },
+    "real_modality": {
+        "default": "tensor2tensor.layers.modalities",
+        "identity": "tensor2tensor.layers.modalities",
+        "l2_loss": "tensor2tensor.layers.modalities",
+        "log_poisson_loss": "tensor2tensor.layers.modalities",
+    },
+    "symbol_modality": {
+        "ctc": "tensor2tensor.layers.modalities",
+        "default": "tensor2tensor.layers.modalities",
+        "identity": "tensor2tensor.layers.modalities",
+        "one_hot": "tensor2tensor.layers.modalities",
+        "weights_all": "tensor2tensor.layers.modalities",
+    },
+    "video_modality": {
+        "bitwise": "tensor2tensor.layers.modalities",
+        "default": "tensor2tensor.layers.modalities",
+        "embed": "tensor2tensor.layers.modalities",
+        "identity": "tensor2tensor.layers.modalities",
+        "l1": "tensor2tensor.layers.modalities",
+        "l1raw": "tensor2tensor.layers.modalities",
+        "l2": "tensor2tensor.layers.modalities",
+        "l2raw": "tensor2tensor.layers.modalities",
+        "pixel_noise": "tensor2tensor.layers.modalities",
+    },
+}
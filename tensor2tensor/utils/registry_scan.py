@@ -0,0 +1,228 @@
+# coding=utf-8
+# Copyright 2018 The Tensor2Tensor Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Generates the registry manifest, registry_manifest.py.
+
+The manifest maps each name registered with a registry decorator to the
+module registering it, so that the registry can import just that module when
+the name is looked up, instead of every model and problem module up front.
+
+The modules are scanned statically: starting from the modules imported by
+registry.import_all_modules, the module-level imports of T2T modules are
+followed and the registry decorators of their classes and functions are read.
+Nothing is imported, so the manifest can be regenerated without the optional
+dependencies of the models and problems. Names registered dynamically (e.g.
+with a computed name) are left out; the registry finds those by importing all
+the modules.
+
+Regenerate the manifest after adding, renaming or moving registrations:
+
+  python -m tensor2tensor.utils.registry_scan
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import ast
+import os
+
+import six
+
+from tensor2tensor.data_generators import all_problems
+from tensor2tensor.utils import registry
+
+# Modules imported by registry.import_all_modules.
+ROOT_MODULES = ["tensor2tensor.models.all_models"] + all_problems.ALL_MODULES
+
+_PACKAGE = "tensor2tensor"
+_ROOT_DIR = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+MANIFEST_FILENAME = os.path.join(_ROOT_DIR, _PACKAGE, "utils",
+                                 "registry_manifest.py")
+
+_MANIFEST_HEADER = '''# coding=utf-8
+# Copyright 2018 The Tensor2Tensor Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Module registering each registered name, by kind of registration.
+
+Generated by `python -m tensor2tensor.utils.registry_scan`. Do not edit.
+"""
+
+'''
+
+
+def _module_filename(module, root_dir=_ROOT_DIR):
+  """Returns the source file of a module, or None if it is not a T2T one."""
+  if module != _PACKAGE and not module.startswith(_PACKAGE + "."):
+    return None
+  path = os.path.join(root_dir, *module.split("."))
+  for filename in [path + ".py", os.path.join(path, "__init__.py")]:
+    if os.path.isfile(filename):
+      return filename
+  return None
+
+
+def _module_level_nodes(node):
+  """Yields the nodes of a module run on import, i.e. not in functions."""
+  for child in ast.iter_child_nodes(node):
+    yield child
+    if not isinstance(child, (ast.FunctionDef, ast.Lambda)):
+      for descendant in _module_level_nodes(child):
+        yield descendant
+
+
+def _parent_modules(module):
+  parts = module.split(".")
+  return [".".join(parts[:i]) for i in range(1, len(parts) + 1)]
+
+
+def _imported_modules(tree, root_dir=_ROOT_DIR):
+  """Returns the T2T modules imported on import of a module's tree."""
+  modules = set()
+  for node in _module_level_nodes(tree):
+    names = []
+    if isinstance(node, ast.Import):
+      names = [alias.name for alias in node.names]
+    elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+      names = [node.module]
+      names.extend(node.module + "." + alias.name for alias in node.names)
+    for name in names:
+      for module in _parent_modules(name):
+        if _module_filename(module, root_dir):
+          modules.add(module)
+  return modules
+
+
+def _string_value(node):
+  # String literals are ast.Str nodes in Python 2, ast.Constant ones in 3.
+  if type(node).__name__ in ("Constant", "Str"):
+    value = getattr(node, "value", getattr(node, "s", None))
+    if isinstance(value, six.string_types):
+      return value
+  return None
+
+
+def _registration(decorator):
+  """Returns (kind, name or None) for a registry decorator, else None.
+
+  The name is None if the decorator registers under the default name, and
+  the kind is the suffix of the decorator, e.g. "model" for register_model.
+  """
+  args, keywords = [], []
+  if isinstance(decorator, ast.Call):
+    args, keywords = decorator.args, decorator.keywords
+    decorator = decorator.func
+  if not (isinstance(decorator, ast.Attribute) and
+          isinstance(decorator.value, ast.Name) and
+          decorator.value.id == "registry" and
+          decorator.attr.startswith("register_")):
+    return None
+  kind = decorator.attr[len("register_"):]
+  name_nodes = args[:1] + [kw.value for kw in keywords if kw.arg == "name"]
+  if not name_nodes:
+    return kind, None
+  name = _string_value(name_nodes[0])
+  if name is None:
+    # Registered under a computed name; found by importing all the modules.
+    return None
+  return kind, name
+
+
+def _registrations(tree):
+  """Yields (kind, name) for each registration in a module's tree."""
+  for node in _module_level_nodes(tree):
+    if isinstance(node, (ast.ClassDef, ast.FunctionDef)):
+      for decorator in node.decorator_list:
+        registration = _registration(decorator)
+        if registration:
+          kind, name = registration
+          # pylint: disable=protected-access
+          yield kind, name or registry._convert_camel_to_snake(node.name)
+          # pylint: enable=protected-access
+    elif (isinstance(node, ast.Call) and isinstance(node.func, ast.Call) and
+          node.func.args):
+      # registry.register_*("name")(obj)
+      registration = _registration(node.func)
+      if registration and registration[1]:
+        yield registration
+
+
+def scan(root_modules=None, root_dir=_ROOT_DIR):
+  """Scans the modules imported from root_modules for registrations.
+
+  Args:
+    root_modules: modules to start from, by default ROOT_MODULES.
+    root_dir: directory containing the tensor2tensor package.
+
+  Returns:
+    A dict from kind of registration (e.g. "model", "hparams",
+    "symbol_modality") to a dict from registered name to module.
+  """
+  manifest = {}
+  pending = sorted(root_modules or ROOT_MODULES, reverse=True)
+  seen = set()
+  while pending:
+    module = pending.pop()
+    if module in seen:
+      continue
+    seen.add(module)
+    filename = _module_filename(module, root_dir)
+    if filename is None:
+      continue
+    with open(filename) as f:
+      tree = ast.parse(f.read(), filename)
+    for kind, name in _registrations(tree):
+      manifest.setdefault(kind, {}).setdefault(name, module)
+    pending.extend(sorted(_imported_modules(tree, root_dir) - seen,
+                          reverse=True))
+  return manifest
+
+
+def format_manifest(manifest):
+  """Returns the source of registry_manifest.py for a manifest."""
+  lines = [_MANIFEST_HEADER + "MANIFEST = {"]
+  for kind in sorted(manifest):
+    lines.append('    "%s": {' % kind)
+    for name in sorted(manifest[kind]):
+      line = '        "%s": "%s",' % (name, manifest[kind][name])
+      if len(line) > 80:
+        line = '        "%s":\n            "%s",' % (name, manifest[kind][name])
+      lines.append(line)
+    lines.append("    },")
+  lines.append("}")
+  return "\n".join(lines) + "\n"
+
+
+def write_manifest(filename=MANIFEST_FILENAME):
+  manifest = scan()
+  with open(filename, "w") as f:
+    f.write(format_manifest(manifest))
+  print("Wrote %d names to %s" % (
+      sum(len(names) for names in manifest.values()), filename))
+
+
+if __name__ == "__main__":
+  write_manifest()
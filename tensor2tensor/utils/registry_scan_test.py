@@ -0,0 +1,106 @@
+# coding=utf-8
+# Copyright 2018 The Tensor2Tensor Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Tests for tensor2tensor.utils.registry_scan."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import os
+
+from tensor2tensor.utils import registry_manifest
+from tensor2tensor.utils import registry_scan
+import tensorflow as tf
+
+
+_ROOT_SOURCE = '''
+from tensor2tensor.models import helpers
+from tensor2tensor.utils import registry
+
+
+@registry.register_model
+class MyLazyModel(object):
+  pass
+
+
+@registry.register_hparams("named_hparams")
+def my_hparams():
+  pass
+
+
+@registry.register_symbol_modality(name="my_symbol")
+class MySymbolModality(object):
+  pass
+
+
+registry.register_problem("called_problem")(MyLazyModel)
+registry.register_problem(MyLazyModel)
+
+
+def register_later():
+  from tensor2tensor.models import unused  # not imported on import
+  @registry.register_model
+  def not_at_module_level():
+    pass
+'''
+
+_HELPERS_SOURCE = '''
+from tensor2tensor.utils import registry
+
+
+@registry.register_ranged_hparams
+def helper_range(rhp):
+  pass
+'''
+
+
+class RegistryScanTest(tf.test.TestCase):
+
+  def _write_module(self, root_dir, module, source):
+    filename = os.path.join(root_dir, *module.split(".")) + ".py"
+    if not os.path.isdir(os.path.dirname(filename)):
+      os.makedirs(os.path.dirname(filename))
+    with open(filename, "w") as f:
+      f.write(source)
+
+  def testScan(self):
+    root_dir = self.get_temp_dir()
+    self._write_module(root_dir, "tensor2tensor.models.root", _ROOT_SOURCE)
+    self._write_module(root_dir, "tensor2tensor.models.helpers",
+                       _HELPERS_SOURCE)
+    self._write_module(root_dir, "tensor2tensor.models.unused",
+                       _HELPERS_SOURCE.replace("helper_range", "unused"))
+    manifest = registry_scan.scan(["tensor2tensor.models.root"],
+                                  root_dir=root_dir)
+    self.assertEqual({
+        "model": {"my_lazy_model": "tensor2tensor.models.root"},
+        "hparams": {"named_hparams": "tensor2tensor.models.root"},
+        "symbol_modality": {"my_symbol": "tensor2tensor.models.root"},
+        "problem": {"called_problem": "tensor2tensor.models.root"},
+        "ranged_hparams": {"helper_range": "tensor2tensor.models.helpers"},
+    }, manifest)
+
+  def testManifestIsUpToDate(self):
+    with open(registry_scan.MANIFEST_FILENAME) as f:
+      source = f.read()
+    self.assertEqual(
+        registry_scan.format_manifest(registry_scan.scan()), source,
+        "Regenerate the manifest: python -m tensor2tensor.utils.registry_scan")
+    self.assertEqual("tensor2tensor.models.transformer",
+                     registry_manifest.MANIFEST["model"]["transformer"])
+
+
+if __name__ == "__main__":
+  tf.test.main()
@@ -17,8 +17,14 @@
 from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
+
+import os
+import subprocess
+import sys
+
 from tensor2tensor.utils import modality
 from tensor2tensor.utils import registry
+from tensor2tensor.utils import registry_manifest
 from tensor2tensor.utils import t2t_model
 
 import tensorflow as tf
@@ -273,6 +279,54 @@ class ModalityRegistryTest(tf.test.TestCase):
     self.assertSetEqual(set(registry.list_modalities()), set(expected))
 
 
+class LazyRegistryTest(tf.test.TestCase):
+
+  def setUp(self):
+    registry._reset()
+    module_dir = self.get_temp_dir()
+    with open(os.path.join(module_dir, "lazy_registry_module.py"), "w") as f:
+      f.write("from tensor2tensor.utils import registry\n"
+              "@registry.register_model\n"
+              "def lazy_model():\n"
+              "  pass\n")
+    sys.path.insert(0, module_dir)
+    self._manifest = registry_manifest.MANIFEST
+    registry_manifest.MANIFEST = {
+        "model": {"lazy_model": "lazy_registry_module"}}
+    registry._ALL_MODULES_IMPORTED[0] = False
+
+  def tearDown(self):
+    sys.path.pop(0)
+    sys.modules.pop("lazy_registry_module", None)
+    registry_manifest.MANIFEST = self._manifest
+    registry._ALL_MODULES_IMPORTED[0] = True
+
+  def testImportsModuleOnLookup(self):
+    self.assertNotIn("lazy_registry_module", sys.modules)
+    model = registry.model("lazy_model")
+    self.assertIs(sys.modules["lazy_registry_module"].lazy_model, model)
+    self.assertFalse(registry._ALL_MODULES_IMPORTED[0])
+
+  def testRegisteredNamesNeedNoManifest(self):
+
+    @registry.register_model
+    def eager_model():
+      pass
+
+    self.assertIs(eager_model, registry.model("eager_model"))
+    self.assertNotIn("lazy_registry_module", sys.modules)
+
+  def testLookupImportsOnlyItsModels(self):
+    # In a fresh interpreter, as other tests import all the models.
+    output = subprocess.check_output([sys.executable, "-c", "\n".join([
+        "import sys",
+        "from tensor2tensor.utils import registry",
+        "registry.model('transformer')",
+        "print('tensor2tensor.models.lstm' in sys.modules)",
+    ])])
+    self.assertEqual("False", output.decode("utf-8").split()[-1])
+
+
 class RegistryTest(tf.test.TestCase):
   """ Test class for common functions."""
 
@@ -281,5 +335,45 @@ class RegistryTest(tf.test.TestCase):
     self.assertIsNotNone(help_str)
     self.assertGreater(len(help_str), 0)
 
+
+_STARTUP_SCRIPT = """
+import resource
+import time
+start_time = time.time()
+%s
+print(time.time() - start_time,
+      resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+
+class RegistryStartupBenchmark(tf.test.Benchmark):
+  """Time and memory to import T2T and look up a model and problem.
+
+  Each variant runs in a fresh interpreter: "eager" imports every model and
+  problem module first, as binaries did before the registry was lazy.
+  """
+
+  def _run(self, statements):
+    output = subprocess.check_output(
+        [sys.executable, "-c", _STARTUP_SCRIPT % "\n".join(statements)])
+    secs, max_rss_kb = output.decode("utf-8").split()[-2:]
+    return float(secs), int(max_rss_kb)
+
+  def benchmark_startup(self):
+    lookups = ["from tensor2tensor.utils import registry",
+               "registry.model('transformer')",
+               "registry.hparams('transformer_base')",
+               "registry.problem('translate_ende_wmt32k')"]
+    for name, imports in [
+        ("eager", ["from tensor2tensor.models import all_models",
+                   "from tensor2tensor.data_generators import all_problems",
+                   "all_problems.import_modules(all_problems.ALL_MODULES)"]),
+        ("lazy", [])]:
+      secs, max_rss_kb = self._run(imports + lookups)
+      self.report_benchmark(
+          name="registry_startup_%s" % name, iters=1, wall_time=secs,
+          extras={"max_rss_mb": max_rss_kb / 1024.})
+
+
 if __name__ == "__main__":
   tf.test.main()
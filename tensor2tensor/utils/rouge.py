@@ -24,6 +24,9 @@ from __future__ import division
 from __future__ import print_function
 from __future__ import unicode_literals
 
+import array
+import multiprocessing
+
 import numpy as np
 
 import tensorflow as tf
@@ -32,8 +35,6 @@ import tensorflow as tf
 def _len_lcs(x, y):
   """Returns the length of the Longest Common Subsequence between two seqs.
 
-  Source: http://www.algorithmist.com/index.php/Longest_Common_Subsequence
-
   Args:
     x: sequence of words
     y: sequence of words
@@ -41,16 +42,25 @@ def _len_lcs(x, y):
   Returns
     integer: Length of LCS between x and y
   """
-  table = _lcs(x, y)
-  n, m = len(x), len(y)
-  return table[n, m]
-
-
-def _lcs(x, y):
+  if isinstance(x, np.ndarray):
+    x = x.tolist()
+  if isinstance(y, np.ndarray):
+    y = y.tolist()
+  if not x or not y:
+    return 0
+  try:
+    return _len_lcs_bit_parallel(x, y)
+  except TypeError:
+    # The words are not hashable, so there are no bit masks to look up.
+    return _len_lcs_dp(x, y)
+
+
+def _len_lcs_dp(x, y):
   """Computes the length of the LCS between two seqs.
 
   The implementation below uses a DP programming algorithm and runs
-  in O(nm) time where n = len(x) and m = len(y).
+  in O(nm) time where n = len(x) and m = len(y). Only two rows of the table
+  are kept, so it takes O(m) memory.
   Source: http://www.algorithmist.com/index.php/Longest_Common_Subsequence
 
   Args:
@@ -58,19 +68,46 @@ def _lcs(x, y):
     y: collection of words
 
   Returns:
-    Table of dictionary of coord and len lcs
+    integer: Length of LCS between x and y
   """
-  n, m = len(x), len(y)
-  table = dict()
-  for i in range(n + 1):
-    for j in range(m + 1):
-      if i == 0 or j == 0:
-        table[i, j] = 0
-      elif x[i - 1] == y[j - 1]:
-        table[i, j] = table[i - 1, j - 1] + 1
+  m = len(y)
+  previous = array.array("l", [0] * (m + 1))
+  current = array.array("l", [0] * (m + 1))
+  for x_word in x:
+    for j in range(m):
+      if x_word == y[j]:
+        current[j + 1] = previous[j] + 1
       else:
-        table[i, j] = max(table[i - 1, j], table[i, j - 1])
-  return table
+        current[j + 1] = max(previous[j + 1], current[j])
+    previous, current = current, previous
+  return previous[m]
+
+
+def _len_lcs_bit_parallel(x, y):
+  """Computes the length of the LCS between two seqs, len(y) bits at a time.
+
+  Bit j of v is set while row i of the DP table does not increase at column
+  j. Each word of x updates all of v with a few integer operations, so this
+  runs in O(n * m / w) time for machine words of w bits.
+  Source: Crochemore et al., A fast and practical bit-vector algorithm for
+  the longest common subsequence problem, 2001.
+
+  Args:
+    x: collection of words
+    y: collection of words
+
+  Returns:
+    integer: Length of LCS between x and y
+  """
+  masks = {}
+  for j, y_word in enumerate(y):
+    masks[y_word] = masks.get(y_word, 0) | (1 << j)
+  full = (1 << len(y)) - 1
+  v = full
+  for x_word in x:
+    u = v & masks.get(x_word, 0)
+    v = ((v + u) | (v - u)) & full
+  return len(y) - bin(v).count("1")
 
 
 def _f_lcs(llcs, m, n):
@@ -121,12 +158,50 @@ def rouge_l_sentence_level(eval_sentences, ref_sentences):
     A float: F_lcs
   """
 
+  f1_scores = _rouge_l_f1_scores(list(zip(eval_sentences, ref_sentences)))
+  return np.mean(f1_scores, dtype=np.float32)
+
+
+def _rouge_l_f1_scores(sentence_pairs):
+  """ROUGE-L F1 scores of (eval_sentence, ref_sentence) pairs."""
   f1_scores = []
-  for eval_sentence, ref_sentence in zip(eval_sentences, ref_sentences):
+  for eval_sentence, ref_sentence in sentence_pairs:
     m = len(ref_sentence)
     n = len(eval_sentence)
     lcs = _len_lcs(eval_sentence, ref_sentence)
     f1_scores.append(_f_lcs(lcs, m, n))
+  return f1_scores
+
+
+def rouge_l_corpus(eval_sentences, ref_sentences, num_workers=1,
+                   chunk_size=1000):
+  """Computes ROUGE-L of two collections of sentences in parallel.
+
+  The score is the same as rouge_l_sentence_level's, the mean of the sentence
+  F_lcs scores, but the sentence pairs are scored in num_workers processes.
+
+  Args:
+    eval_sentences: The sentences that have been picked by the summarizer
+    ref_sentences: The sentences from the reference set
+    num_workers: number of processes to score in.
+    chunk_size: number of sentence pairs per task sent to a process.
+
+  Returns:
+    A float: F_lcs
+  """
+  pairs = list(zip(eval_sentences, ref_sentences))
+  if num_workers <= 1 or len(pairs) <= chunk_size:
+    f1_scores = _rouge_l_f1_scores(pairs)
+  else:
+    chunks = [pairs[i:i + chunk_size]
+              for i in range(0, len(pairs), chunk_size)]
+    pool = multiprocessing.Pool(num_workers)
+    try:
+      f1_scores = [score for scores in pool.map(_rouge_l_f1_scores, chunks)
+                   for score in scores]
+    finally:
+      pool.close()
+      pool.join()
   return np.mean(f1_scores, dtype=np.float32)
 
 
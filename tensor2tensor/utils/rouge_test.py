@@ -17,6 +17,8 @@
 from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
+import time
+
 import numpy as np
 from tensor2tensor.utils import rouge
 
@@ -74,6 +76,42 @@ class TestRougeLMetric(tf.test.TestCase):
     self.assertAllClose(
         rouge.rouge_l_sentence_level(hypotheses, references), 0.837, atol=1e-03)
 
+  def testLenLcs(self):
+
+    def dict_table_len_lcs(x, y):
+      table = {}
+      for i in range(len(x) + 1):
+        for j in range(len(y) + 1):
+          if i == 0 or j == 0:
+            table[i, j] = 0
+          elif x[i - 1] == y[j - 1]:
+            table[i, j] = table[i - 1, j - 1] + 1
+          else:
+            table[i, j] = max(table[i - 1, j], table[i, j - 1])
+      return table[len(x), len(y)]
+
+    rng = np.random.RandomState(0)
+    for _ in range(200):
+      x = rng.randint(5, size=rng.randint(1, 80))
+      y = rng.randint(5, size=rng.randint(1, 80))
+      expected = dict_table_len_lcs(x, y)
+      self.assertEqual(expected, rouge._len_lcs(x, y))
+      self.assertEqual(expected, rouge._len_lcs_dp(list(x), list(y)))
+      self.assertEqual(expected,
+                       rouge._len_lcs_bit_parallel(list(x), list(y)))
+    self.assertEqual(0, rouge._len_lcs([], [1, 2]))
+    # Unhashable words fall back to dynamic programming.
+    self.assertEqual(2, rouge._len_lcs([[1], [2], [3]], [[1], [3]]))
+
+  def testRougeLCorpus(self):
+    rng = np.random.RandomState(0)
+    hypotheses = [rng.randint(10, size=rng.randint(1, 30)) for _ in range(50)]
+    references = [rng.randint(10, size=rng.randint(1, 30)) for _ in range(50)]
+    expected = rouge.rouge_l_sentence_level(hypotheses, references)
+    self.assertEqual(expected, rouge.rouge_l_corpus(hypotheses, references))
+    self.assertEqual(expected, rouge.rouge_l_corpus(
+        hypotheses, references, num_workers=2, chunk_size=7))
+
 
 class TestRougeMetricsE2E(tf.test.TestCase):
   """Tests the rouge metrics end-to-end."""
@@ -112,5 +150,24 @@ class TestRougeMetricsE2E(tf.test.TestCase):
       session.run(a)
 
 
+class RougeBenchmark(tf.test.Benchmark):
+  """Benchmarks ROUGE-L on 10k synthetic summaries of CNN/DailyMail size."""
+
+  def benchmark_rouge_l_corpus(self):
+    rng = np.random.RandomState(0)
+    num_summaries = 10000
+    hypotheses = [rng.randint(1000, size=rng.randint(30, 80))
+                  for _ in range(num_summaries)]
+    references = [rng.randint(1000, size=rng.randint(30, 80))
+                  for _ in range(num_summaries)]
+    for num_workers in [1, 4]:
+      start_time = time.time()
+      rouge.rouge_l_corpus(hypotheses, references, num_workers=num_workers)
+      self.report_benchmark(
+          name="rouge_l_corpus_workers_%d" % num_workers,
+          iters=num_summaries,
+          wall_time=time.time() - start_time)
+
+
 if __name__ == "__main__":
   tf.test.main()
@@ -1430,6 +1430,12 @@ class T2TModel(base.Layer):
         "inputs": inputs,
         "targets": features.get("infer_targets"),
     }
+    if isinstance(infer_out, dict) and "entry_steps" in infer_out:
+      # Beam search statistics, per example: the steps it was decoded for,
+      # and the steps its batch was decoded for.
+      predictions["decode_steps"] = infer_out["entry_steps"]
+      predictions["batch_decode_steps"] = tf.fill(
+          tf.shape(infer_out["entry_steps"]), infer_out["decode_steps"])
 
     # Pass through remaining features
     for name, feature in features.items():
@@ -20,7 +20,7 @@ from __future__ import print_function
 import numpy as np
 
 # To register the hparams set
-from tensor2tensor import models  # pylint: disable=unused-import
+from tensor2tensor.models import all_models  # pylint: disable=unused-import
 from tensor2tensor import problems
 from tensor2tensor.utils import registry
 from tensor2tensor.utils import trainer_lib